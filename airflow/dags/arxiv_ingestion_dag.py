@@ -0,0 +1,322 @@
+"""Incremental arXiv ingestion: harvest -> download -> parse -> embed -> publish.
+
+Each run only handles papers published after the per-category watermark,
+which is kept in the ``arxiv_ingest_watermarks`` Airflow Variable. Papers
+whose ``pdf_processed`` is already true are skipped, so a daily run costs in
+proportion to the new papers, not to the corpus.
+
+- ``harvest`` is mapped over categories. It queries arXiv from the watermark
+  day onward, oldest first, upserts the metadata and returns the
+  unprocessed papers.
+- ``plan_batches`` de-duplicates papers across categories, adds recent
+  papers whose earlier processing failed, and cuts them into batches.
+- ``download``, ``parse`` and ``embed`` are mapped over those batches, so
+  they spread across workers. Parsed content and chunks are written to
+  Postgres. Embeddings are staged as .npz files.
+- ``publish`` is the single writer of the vector and BM25 indexes. It
+  appends the staged embeddings, rebuilds the search filter bitmaps for the
+  new rows and only then marks the papers processed.
+- ``advance_watermarks`` moves each category's watermark to the newest paper
+  it harvested, once everything upstream has succeeded.
+
+INGEST_DATA_DIR must be a volume shared by all workers: PDFs, staged
+embeddings, figure images and the indexes live there.
+"""
+import asyncio
+import logging
+import os
+import re
+import sys
+from datetime import datetime, timedelta
+
+from airflow.sdk import Variable, dag, get_current_context, task
+
+sys.path.insert(0, "/opt/airflow")
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = [c.strip() for c in os.getenv("ARXIV_INGEST_CATEGORIES", "cs.AI,cs.CL,cs.LG").split(",") if c.strip()]
+# Upper bound per category and run; anything beyond it is picked up by the next run.
+MAX_RESULTS = int(os.getenv("ARXIV_INGEST_MAX_RESULTS", "2000"))
+BATCH_SIZE = int(os.getenv("ARXIV_INGEST_BATCH_SIZE", "25"))
+# First run without a watermark starts this many days back.
+INITIAL_LOOKBACK_DAYS = int(os.getenv("ARXIV_INGEST_INITIAL_LOOKBACK_DAYS", "1"))
+# arXiv asks for one request every few seconds; each download task has its own limiter.
+DOWNLOAD_PARALLELISM = int(os.getenv("ARXIV_INGEST_DOWNLOAD_PARALLELISM", "1"))
+EMBED_BATCH_SIZE = int(os.getenv("ARXIV_INGEST_EMBED_BATCH_SIZE", "64"))
+# Unprocessed papers (failed downloads/parses) this recent are retried on every run.
+RETRY_DAYS = int(os.getenv("ARXIV_INGEST_RETRY_DAYS", "7"))
+RETRY_LIMIT = int(os.getenv("ARXIV_INGEST_RETRY_LIMIT", "500"))
+
+DATA_DIR = os.getenv("INGEST_DATA_DIR", "/opt/airflow/data")
+PDF_DIR = os.path.join(DATA_DIR, "pdfs")
+STAGING_DIR = os.path.join(DATA_DIR, "staging")
+BLOB_DIR = os.getenv("PDF_BLOB_STORE_PATH", os.path.join(DATA_DIR, "blobs"))
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", os.path.join(DATA_DIR, "vector_index"))
+BM25_INDEX_DIR = os.getenv("BM25_INDEX_DIR", os.path.join(DATA_DIR, "bm25_index"))
+FILTER_INDEX_DIR = os.getenv("FILTER_INDEX_DIR", os.path.join(DATA_DIR, "filter_index"))
+
+WATERMARK_VARIABLE = "arxiv_ingest_watermarks"
+
+default_args = {
+    "owner": "rag",
+    "depends_on_past": False,
+    "retries": 2,
+    "retry_delay": timedelta(minutes=5),
+}
+
+
+def _run_dir() -> str:
+    run_id = get_current_context()["run_id"]
+    return os.path.join(STAGING_DIR, re.sub(r"[^A-Za-z0-9_.-]", "_", run_id))
+
+
+@dag(
+    dag_id="arxiv_incremental_ingestion",
+    description="Incremental, watermark-based arXiv harvest, parse and index",
+    schedule="@daily",
+    start_date=datetime(2024, 1, 1),
+    catchup=False,
+    max_active_runs=1,
+    default_args=default_args,
+    tags=["ingestion", "arxiv"],
+)
+def arxiv_incremental_ingestion():
+
+    @task(multiple_outputs=False)
+    def harvest(category: str) -> dict:
+        """Fetch papers newer than the category watermark and upsert their metadata."""
+        from src.db.utils.papers import fetch_processed_arxiv_ids, upsert_papers
+        from src.schemas.database.paper_schema import PaperMetadata
+        from src.services.arxiv_downloader.client import ArxivClient
+        import arxiv
+
+        watermarks = Variable.get(WATERMARK_VARIABLE, default={}, deserialize_json=True)
+        if category in watermarks:
+            watermark = datetime.fromisoformat(watermarks[category])
+        else:
+            watermark = datetime.utcnow() - timedelta(days=INITIAL_LOOKBACK_DAYS)
+
+        # submittedDate has day granularity: re-query the watermark day and drop what was seen.
+        results = ArxivClient().fetch_papers_by_query(
+            search_category=category,
+            max_results=MAX_RESULTS,
+            from_date=watermark.strftime("%Y-%m-%d"),
+            to_date=(datetime.utcnow() + timedelta(days=1)).strftime("%Y-%m-%d"),
+            sort_by=arxiv.SortCriterion.SubmittedDate,
+            sort_order=arxiv.SortOrder.Ascending,
+        )
+        papers, pdf_urls = [], {}
+        for result in results:
+            paper = PaperMetadata.from_arxiv_result(result)
+            if paper.published_date <= watermark:
+                continue
+            papers.append(paper)
+            pdf_urls[paper.arxiv_id] = (result.get_short_id().split("/")[-1], result.pdf_url)
+
+        async def store() -> set:
+            await upsert_papers(papers)
+            return await fetch_processed_arxiv_ids(paper.arxiv_id for paper in papers)
+
+        processed = asyncio.run(store()) if papers else set()
+        pending = [
+            {
+                "arxiv_id": paper.arxiv_id,
+                "paper_id": pdf_urls[paper.arxiv_id][0],
+                "pdf_url": pdf_urls[paper.arxiv_id][1],
+                "published": paper.published_date.isoformat(),
+            }
+            for paper in papers
+            if paper.arxiv_id not in processed
+        ]
+        newest = max((paper.published_date for paper in papers), default=watermark)
+        logger.info("%s: %d new papers, %d already processed, watermark %s -> %s",
+                    category, len(papers), len(processed), watermark.isoformat(), newest.isoformat())
+        return {"category": category, "papers": pending, "watermark": newest.isoformat()}
+
+    @task
+    def plan_batches(harvests: list) -> list:
+        """De-duplicate papers across categories, add recent retries and split into work batches."""
+        from src.db.utils.papers import fetch_unprocessed_papers
+
+        papers = {}
+        for harvested in harvests:
+            for paper in harvested["papers"]:
+                papers.setdefault(paper["arxiv_id"], paper)
+        retries = asyncio.run(fetch_unprocessed_papers(
+            CATEGORIES, datetime.utcnow() - timedelta(days=RETRY_DAYS), limit=RETRY_LIMIT
+        ))
+        for paper in retries:
+            papers.setdefault(paper.arxiv_id, {
+                "arxiv_id": paper.arxiv_id,
+                "paper_id": paper.pdf_url.rstrip("/").split("/")[-1],
+                "pdf_url": paper.pdf_url,
+                "published": paper.published_date.isoformat(),
+            })
+        ordered = sorted(papers.values(), key=lambda paper: paper["published"])
+        return [ordered[i:i + BATCH_SIZE] for i in range(0, len(ordered), BATCH_SIZE)]
+
+    @task(max_active_tis_per_dagrun=DOWNLOAD_PARALLELISM)
+    def download(batch: list) -> list:
+        """Download the PDFs of one batch; papers that fail are left for the next run."""
+        from src.services.arxiv_downloader.downloader import ArxivPdfDownloader
+
+        downloader = ArxivPdfDownloader(PDF_DIR)
+        results = asyncio.run(downloader.download_many((paper["paper_id"], paper["pdf_url"]) for paper in batch))
+        downloaded = [
+            {**paper, "pdf_path": result.path}
+            for paper, result in zip(batch, results)
+            if result.status != "failed"
+        ]
+        logger.info("Downloaded %d/%d PDFs (%s)", len(downloaded), len(batch), downloader.throughput())
+        return downloaded
+
+    @task
+    def parse(batch: list) -> dict:
+        """Parse, store and chunk the PDFs of one batch.
+
+        Returns the arxiv_ids that succeeded and the ids of the chunks their new
+        chunks replaced, which publish removes from the indexes.
+        """
+        from pathlib import Path
+
+        from src.db.utils.chunks import replace_paper_chunks
+        from src.db.utils.papers import save_paper_content
+        from src.services.chunking.chunker import SectionChunker
+        from src.services.pdf_parser.factory import make_pdf_parser_service
+
+        service = make_pdf_parser_service(blob_dir=BLOB_DIR)
+        chunker = SectionChunker()
+
+        async def run() -> dict:
+            try:
+                # The parse engine converts the whole batch in parallel worker processes.
+                contents = await asyncio.gather(
+                    *(service.parse_pdf(Path(paper["pdf_path"])) for paper in batch), return_exceptions=True
+                )
+            finally:
+                if service.engine is not None:
+                    await service.engine.stop()
+            parsed, superseded = [], []
+            for paper, content in zip(batch, contents):
+                if isinstance(content, Exception):
+                    logger.warning("Could not parse %s: %s", paper["arxiv_id"], content)
+                    continue
+                # pdf_processed is only set by publish, once the paper is searchable.
+                await save_paper_content(paper["arxiv_id"], content, mark_processed=False)
+                # A re-parsed paper gets new chunk ids; its old ones are still in the indexes.
+                _, replaced = await replace_paper_chunks(
+                    paper["arxiv_id"], chunker.iter_chunks(paper["arxiv_id"], content.sections)
+                )
+                superseded.extend(replaced)
+                parsed.append(paper["arxiv_id"])
+            return {"arxiv_ids": parsed, "superseded": superseded}
+
+        parsed = asyncio.run(run())
+        logger.info("Parsed %d/%d papers (%d chunks superseded), %.1f chunks/s", len(parsed["arxiv_ids"]),
+                    len(batch), len(parsed["superseded"]), chunker.chunks_per_second())
+        return parsed
+
+    @task
+    def embed(parsed: dict) -> dict | None:
+        """Embed the chunks of one batch and stage them for publish."""
+        import numpy as np
+
+        from src.db.utils.chunks import fetch_paper_chunk_texts
+        from src.services.embeddings.client import EmbeddingModel
+
+        arxiv_ids, superseded = parsed["arxiv_ids"], parsed["superseded"]
+        if not arxiv_ids:
+            return None
+
+        async def run():
+            rows = await fetch_paper_chunk_texts(arxiv_ids)
+            model = EmbeddingModel()
+            vectors = []
+            for start in range(0, len(rows), EMBED_BATCH_SIZE):
+                vectors.append(await model.embed_documents([text for _, text in rows[start:start + EMBED_BATCH_SIZE]]))
+            return rows, vectors
+
+        rows, vectors = asyncio.run(run())
+        if not rows:
+            return {"path": None, "arxiv_ids": arxiv_ids, "superseded": superseded}
+        run_dir = _run_dir()
+        os.makedirs(run_dir, exist_ok=True)
+        path = os.path.join(run_dir, f"embed-{get_current_context()['ti'].map_index}.npz")
+        np.savez(path, ids=np.asarray([chunk_id for chunk_id, _ in rows], dtype=np.int64),
+                 vectors=np.concatenate(vectors))
+        return {"path": path, "arxiv_ids": arxiv_ids, "superseded": superseded}
+
+    # none_failed: still runs (and lets the watermark advance) when there was nothing to process.
+    @task(trigger_rule="none_failed")
+    def publish(staged: list) -> int:
+        """Append staged embeddings to the indexes (single writer), drop superseded chunks, rebuild the filter bitmaps and mark the papers processed."""
+        import numpy as np
+
+        from src.db.utils.chunks import fetch_paper_chunk_texts
+        from src.db.utils.papers import mark_papers_processed
+        from src.services.lexical_index.bm25 import BM25Index
+        from src.services.retrieval.filters import rebuild_filters
+        from src.services.vector_index.index import MmapVectorIndex
+
+        staged = [item for item in staged if item]
+        if not staged:
+            return 0
+
+        bm25_index = BM25Index(BM25_INDEX_DIR)
+        vector_index = MmapVectorIndex.open(VECTOR_INDEX_DIR)
+
+        async def run() -> int:
+            nonlocal vector_index
+            for item in staged:
+                # Chunks replaced by a re-parse; deleting them again on a retry is a no-op.
+                superseded = np.asarray(item["superseded"], dtype=np.int64)
+                if len(superseded):
+                    if vector_index is not None:
+                        vector_index.delete(superseded)
+                    bm25_index.delete(superseded)
+                path = item["path"]
+                # A renamed file was published by an earlier try of this task.
+                if path is None or not os.path.exists(path):
+                    continue
+                data = np.load(path)
+                ids, vectors = data["ids"], data["vectors"]
+                texts = dict(await fetch_paper_chunk_texts(item["arxiv_ids"]))
+                if vector_index is None:
+                    vector_index = MmapVectorIndex(VECTOR_INDEX_DIR, dim=vectors.shape[1])
+                # Retries must not duplicate rows; BM25 only hides what it already indexed
+                vector_index.delete(ids)
+                bm25_index.delete(ids)
+                vector_index.add(ids, vectors)
+                bm25_index.add_documents(ids.tolist(), [texts.get(int(chunk_id), "") for chunk_id in ids])
+                os.replace(path, f"{path}.published")
+            # Search filters are by row position; the API only reads these bitmaps, it never builds them.
+            if vector_index is not None:
+                await rebuild_filters(FILTER_INDEX_DIR, vector_index)
+            return await mark_papers_processed(
+                arxiv_id for item in staged for arxiv_id in item["arxiv_ids"]
+            )
+
+        marked = asyncio.run(run())
+        logger.info("Published %d batches, %d papers marked processed", len(staged), marked)
+        return marked
+
+    @task(multiple_outputs=False, trigger_rule="none_failed")
+    def advance_watermarks(harvests: list) -> dict:
+        """Persist the newest harvested published_date per category."""
+        watermarks = Variable.get(WATERMARK_VARIABLE, default={}, deserialize_json=True)
+        for harvested in harvests:
+            watermarks[harvested["category"]] = harvested["watermark"]
+        Variable.set(WATERMARK_VARIABLE, watermarks, serialize_json=True)
+        return watermarks
+
+    harvests = harvest.expand(category=CATEGORIES)
+    batches = plan_batches(harvests)
+    downloaded = download.expand(batch=batches)
+    parsed = parse.expand(batch=downloaded)
+    staged = embed.expand(parsed=parsed)
+    published = publish(staged)
+    published >> advance_watermarks(harvests)
+
+
+arxiv_incremental_ingestion()
@@ -9,8 +9,6 @@ import asyncio
 
 sys.path.insert(0, "/opt/airflow")
 
-from src.db.utils.chat_history import insert_into_first_table
-
 
 def hello_world():
     """Simple hello world function."""
@@ -37,6 +35,9 @@ def check_services():
 
 def log_in_table():
     """Log a record into postgres table"""
+    # Imported here so parsing the DAG file does not load SQLAlchemy.
+    from src.db.utils.chat_history import insert_into_first_table
+
     asyncio.run(insert_into_first_table(name="Dag Ran Successfully"))
 
 
@@ -0,0 +1,62 @@
+"""Build a BM25 index over a synthetic Zipfian corpus and report size, build time and query latency.
+
+Usage:
+    python -m benchmarks.bm25_benchmark --docs 100000 --queries 1000
+"""
+import argparse
+import json
+import tempfile
+import time
+
+import numpy as np
+
+from src.services.lexical_index.bm25 import BM25Index
+
+
+def synthetic_corpus(n_docs: int, vocab_size: int, doc_len: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"term{i}" for i in range(vocab_size)])
+    for _ in range(n_docs):
+        yield " ".join(vocabulary[np.minimum(rng.zipf(1.2, size=doc_len), vocab_size) - 1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--vocab", type=int, default=50_000)
+    parser.add_argument("--doc-len", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=10_000, help="documents per added segment")
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as path:
+        index = BM25Index(path)
+        texts = synthetic_corpus(args.docs, args.vocab, args.doc_len)
+        started = time.perf_counter()
+        for start in range(0, args.docs, args.batch):
+            batch = [next(texts) for _ in range(min(args.batch, args.docs - start))]
+            index.add_documents(range(start, start + len(batch)), batch)
+        build_s = time.perf_counter() - started
+
+        rng = np.random.default_rng(1)
+        latencies = []
+        for _ in range(args.queries):
+            terms = np.minimum(rng.zipf(1.5, size=rng.integers(1, 5)) + 10, args.vocab) - 1
+            query = " ".join(f"term{t}" for t in terms)
+            started = time.perf_counter()
+            index.search(query, k=args.k)
+            latencies.append(time.perf_counter() - started)
+
+        report = {
+            "docs": args.docs,
+            **index.stats(),
+            "build_s": round(build_s, 3),
+            "query_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+            "query_p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3),
+        }
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
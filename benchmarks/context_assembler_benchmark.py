@@ -0,0 +1,121 @@
+"""Latency and packing quality of the RAG context assembler over synthetic candidates.
+
+Each request offers ``--candidates`` chunks of dimension ``--dim``. They come
+in clusters of ``--cluster-size`` near-duplicates (the same passage indexed
+from several versions of a paper), and chunk lengths are drawn between
+``--min-words`` and ``--max-words``. The assembler reranks them with MMR and
+packs them into ``--budget`` tokens.
+
+``cold`` counts every chunk's tokens (new chunk ids per request), ``warm``
+repeats the same candidates so counts come from the cache, and ``mmr`` times
+``mmr_select`` alone. ``stuffed`` is the baseline: chunks in relevance order
+until the budget is full, which shows how much of it duplicates would take.
+
+Tokens are whitespace estimates unless ``--tokenizer`` names a tokenizer.json
+or Hugging Face repo (needs the ``tokenizers`` package).
+
+Usage:
+    python -m benchmarks.context_assembler_benchmark --candidates 1000 --dim 768 --budget 2000
+"""
+import argparse
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from src.services.rag_context.assembler import ContextAssembler, ContextCandidate, mmr_select
+
+WORDS = np.array("model attention layer training loss data token retrieval benchmark result method".split())
+
+
+def _summary(seconds: List[float]) -> Dict[str, float]:
+    return {"p50_us": round(float(np.percentile(seconds, 50)) * 1e6, 1),
+            "p99_us": round(float(np.percentile(seconds, 99)) * 1e6, 1)}
+
+
+def make_request(rng: np.random.Generator, args, first_id: int):
+    n_clusters = -(-args.candidates // args.cluster_size)
+    centers = rng.normal(size=(n_clusters, args.dim)).astype(np.float32)
+    vectors = np.repeat(centers, args.cluster_size, axis=0)[:args.candidates]
+    vectors += args.noise * rng.normal(size=vectors.shape).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    query = centers[:4].mean(axis=0) + 0.5 * rng.normal(size=args.dim).astype(np.float32)
+    query /= np.linalg.norm(query)
+    candidates = []
+    for i in range(args.candidates):
+        words = rng.choice(WORDS, size=int(rng.integers(args.min_words, args.max_words)))
+        candidates.append(ContextCandidate(first_id + i, f"2401.{i // args.cluster_size:05d}", "Results",
+                                           " ".join(words)))
+    return query, candidates, vectors
+
+
+def stuffed(query: np.ndarray, vectors: np.ndarray, costs: np.ndarray, budget: int, cluster_size: int) -> Dict:
+    """Relevance order until the budget is full: chunks taken and how many repeat a taken cluster."""
+    taken, clusters, used = 0, set(), 0
+    for i in np.argsort(-(vectors @ query)):
+        if used + costs[i] > budget:
+            continue
+        used += int(costs[i])
+        taken += 1
+        clusters.add(int(i) // cluster_size)
+    return {"chunks": taken, "duplicate_chunks": taken - len(clusters), "tokens": used}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=1000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--budget", type=int, default=2000)
+    parser.add_argument("--cluster-size", type=int, default=4)
+    parser.add_argument("--noise", type=float, default=0.01, help="spread of a cluster around its passage")
+    parser.add_argument("--min-words", type=int, default=40)
+    parser.add_argument("--max-words", type=int, default=300)
+    parser.add_argument("--lambda-mult", type=float, default=0.7)
+    parser.add_argument("--tokenizer", default=None)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    assembler = ContextAssembler(budget=args.budget, tokenizer=args.tokenizer, lambda_mult=args.lambda_mult)
+    requests = [make_request(rng, args, first_id=r * args.candidates) for r in range(args.requests)]
+
+    cold, warm, mmr = [], [], []
+    results = []
+    for query, candidates, vectors in requests:
+        started = time.perf_counter()
+        results.append(assembler.assemble(query, candidates, vectors))
+        cold.append(time.perf_counter() - started)
+    for query, candidates, vectors in requests:
+        started = time.perf_counter()
+        assembler.assemble(query, candidates, vectors)
+        warm.append(time.perf_counter() - started)
+    for query, candidates, vectors in requests:
+        costs = assembler.counter.count_keyed([c.chunk_id for c in candidates], lambda i: candidates[i].render())
+        started = time.perf_counter()
+        mmr_select(query, vectors, costs, args.budget, args.lambda_mult)
+        mmr.append(time.perf_counter() - started)
+
+    query, candidates, vectors = requests[0]
+    costs = assembler.counter.count_keyed([c.chunk_id for c in candidates], lambda i: candidates[i].render())
+    print(json.dumps({
+        "candidates": args.candidates,
+        "dim": args.dim,
+        "budget": args.budget,
+        "tokenizer": assembler.counter.counter.name,
+        "exact_tokens": assembler.counter.exact,
+        "cold": _summary(cold),
+        "warm": _summary(warm),
+        "mmr": _summary(mmr),
+        "chunks": round(float(np.mean([len(r.chunks) for r in results])), 1),
+        "duplicates_dropped": round(float(np.mean([r.duplicates for r in results])), 1),
+        "duplicate_chunks_kept": int(sum(len(r.chunks) - len({c.arxiv_id for c in r.chunks}) for r in results)),
+        "budget_used": round(float(np.mean([r.tokens for r in results])) / args.budget, 3),
+        "over_budget": int(sum(r.tokens > args.budget for r in results)),
+        "stuffed": stuffed(query, vectors, costs, args.budget, args.cluster_size),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Compare per-request model construction with the shared LLM registry against a local Ollama stub.
+
+The stub answers ``/api/chat`` instantly, so the measured latency is pure
+client-side overhead (client + chain construction, connection setup).
+
+Usage:
+    python -m benchmarks.llm_registry_benchmark --requests 500 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+STUB_REPLY = {
+    "model": "stub",
+    "created_at": "1970-01-01T00:00:00Z",
+    "message": {"role": "assistant", "content": "pong"},
+    "done": True,
+    "done_reason": "stop",
+}
+
+
+class OllamaStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    connections = set()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        OllamaStubHandler.connections.add(self.client_address)
+        body = (json.dumps(STUB_REPLY) + "\n").encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+async def run(make_model, requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await make_model().prompt_model("ping")
+            latencies.append(time.perf_counter() - started)
+
+    OllamaStubHandler.connections.clear()
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests_per_s": round(requests / elapsed, 1),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 3),
+        "tcp_connections": len(OllamaStubHandler.connections),
+    }
+
+
+async def main_async(args) -> dict:
+    # Imported after OLLAMA_HOST is set so the clients pick up the stub address.
+    from src.services.llm_registry.registry import LLMRegistry
+    from src.services.ollama.client import OllamaModel
+
+    report = {"requests": args.requests, "concurrency": args.concurrency}
+    report["per_request"] = await run(lambda: OllamaModel(model_name="stub"), args.requests, args.concurrency)
+    registry = LLMRegistry(max_connections=args.concurrency)
+    try:
+        report["registry"] = await run(lambda: registry.ollama("stub"), args.requests, args.concurrency)
+    finally:
+        await registry.aclose()
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OllamaStubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["OLLAMA_HOST"] = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        print(json.dumps(asyncio.run(main_async(args)), indent=2))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Interactive chat latency under a batch backlog, with and without the LLM scheduler.
+
+The upstream stands in for one local Ollama: it runs ``--upstream-parallel``
+generations at full speed and time-slices beyond that, so every call slows
+down as more are sent at once. ``--batch`` batch calls are submitted at the
+start, then ``--interactive`` chat calls arrive at ``--rate`` per second.
+
+``unscheduled`` sends everything straight to the upstream. ``scheduled`` runs
+the calls through LLMScheduler with ``--cap`` slots for the provider, batch
+calls in the batch lane. ``hedged`` adds a slow tail (``--slow-share`` of the
+calls take ``--slow-factor`` times longer) to the interactive calls and
+compares p99 with and without hedging to a second model.
+
+Usage:
+    python -m benchmarks.llm_scheduler_benchmark --interactive 200 --batch 400 --cap 4
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from src.services.llm_registry.scheduler import BATCH, INTERACTIVE, LLMScheduler
+
+
+class FakeUpstream:
+    """Processor-sharing server: ``parallel`` calls at full speed, slower beyond that."""
+
+    def __init__(self, parallel: int, service_s: float):
+        self.parallel = parallel
+        self.service_s = service_s
+        self.running = 0
+        self.peak = 0
+
+    async def generate(self, factor: float = 1.0) -> str:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            remaining = self.service_s * factor
+            while remaining > 0:
+                step = min(remaining, 0.005)
+                await asyncio.sleep(step * max(1.0, self.running / self.parallel))
+                remaining -= step
+            return "answer"
+        finally:
+            self.running -= 1
+
+
+def _summary(latencies: List[float]) -> Dict[str, Optional[float]]:
+    if not latencies:
+        return {"count": 0}
+    return {"count": len(latencies),
+            "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 1),
+            "p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 1)}
+
+
+async def run_mix(args, scheduler: Optional[LLMScheduler]) -> dict:
+    upstream = FakeUpstream(args.upstream_parallel, args.service_s)
+    latencies = {INTERACTIVE: [], BATCH: []}
+    rejected = 0
+
+    async def request(lane: str) -> None:
+        nonlocal rejected
+        started = time.perf_counter()
+        try:
+            if scheduler is None:
+                await upstream.generate()
+            else:
+                await scheduler.run("ollama", "llama3.2", lambda provider, name: upstream.generate(), lane=lane)
+        except Exception:
+            rejected += 1
+            return
+        latencies[lane].append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    tasks = [asyncio.ensure_future(request(BATCH)) for _ in range(args.batch)]
+    for _ in range(args.interactive):
+        tasks.append(asyncio.ensure_future(request(INTERACTIVE)))
+        await asyncio.sleep(1.0 / args.rate)
+    await asyncio.gather(*tasks)
+    return {
+        "interactive": _summary(latencies[INTERACTIVE]),
+        "batch": _summary(latencies[BATCH]),
+        "rejected": rejected,
+        "upstream_peak_concurrency": upstream.peak,
+        "elapsed_s": round(time.perf_counter() - started, 2),
+    }
+
+
+async def run_hedged(args, hedge: bool) -> dict:
+    rng = random.Random(args.seed)
+    upstreams = {"a": FakeUpstream(args.cap, args.service_s), "b": FakeUpstream(args.cap, args.service_s)}
+    scheduler = LLMScheduler(provider_limits={"nvidia": args.cap * 2},
+                             hedges={"nvidia:a": "nvidia:b"} if hedge else {})
+
+    async def call(provider: str, name: str) -> str:
+        slow = name == "a" and rng.random() < args.slow_share
+        return await upstreams[name].generate(args.slow_factor if slow else 1.0)
+
+    latencies = []
+
+    async def request() -> None:
+        started = time.perf_counter()
+        await scheduler.run("nvidia", "a", call)
+        latencies.append(time.perf_counter() - started)
+
+    tasks = []
+    for _ in range(args.interactive):
+        tasks.append(asyncio.ensure_future(request()))
+        await asyncio.sleep(1.0 / args.rate)
+    await asyncio.gather(*tasks)
+    return {**_summary(latencies), "hedged": scheduler.stats["hedged"], "hedge_wins": scheduler.stats["hedge_wins"]}
+
+
+async def main_async(args) -> dict:
+    scheduler = LLMScheduler(provider_limits={"ollama": args.cap}, batch_share=args.batch_share)
+    return {
+        "interactive": args.interactive,
+        "batch": args.batch,
+        "cap": args.cap,
+        "unscheduled": await run_mix(args, None),
+        "scheduled": await run_mix(args, scheduler),
+        "tail_without_hedging": await run_hedged(args, hedge=False),
+        "tail_with_hedging": await run_hedged(args, hedge=True),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--interactive", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=400)
+    parser.add_argument("--rate", type=float, default=50.0, help="interactive arrivals per second")
+    parser.add_argument("--cap", type=int, default=4, help="provider slots for the scheduler")
+    parser.add_argument("--batch-share", type=float, default=0.5)
+    parser.add_argument("--upstream-parallel", type=int, default=4)
+    parser.add_argument("--service-s", type=float, default=0.02, help="duration of one generation at full speed")
+    parser.add_argument("--slow-share", type=float, default=0.1)
+    parser.add_argument("--slow-factor", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main_async(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Compare paper listing latency with parsed content inline (before) and split out (after).
+
+Builds two synthetic tables in a scratch schema of the database at
+DATABASE_URL:
+
+- ``papers_wide`` has the old arxiv_papers layout, with raw_text, sections
+  and references in the row.
+- ``papers_narrow`` holds metadata only, with compressed content in
+  ``paper_contents``.
+
+It then times the same category-filtered listing query, the way the ORM
+issues it (every mapped column), against both tables. The scratch schema is
+dropped at the end.
+
+Usage:
+    DATABASE_URL=postgresql+asyncpg://... python -m benchmarks.paper_list_benchmark --papers 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+SCHEMA = "bench_paper_list"
+METADATA = "id, arxiv_id, title, authors, abstract, categories, published_date, pdf_url"
+CATEGORIES = ["cs.CL", "cs.LG", "cs.AI", "cs.CV", "stat.ML", "math.OC", "physics.comp-ph", "q-bio.NC"]
+
+# Random hex text does not compress, like real extracted text after TOAST's pglz.
+SYNTHETIC_ROWS = """
+SELECT i AS id,
+       'bench.' || lpad(i::text, 6, '0') AS arxiv_id,
+       'Paper ' || i AS title,
+       '["A. Author", "B. Author"]'::json AS authors,
+       repeat('abstract ', 150) AS abstract,
+       json_build_array((ARRAY{categories})[1 + i % {n_categories}]) AS categories,
+       timestamp '2020-01-01' + (i % 2000) * interval '1 day' AS published_date,
+       'https://arxiv.org/pdf/' || i AS pdf_url,
+       (SELECT string_agg(md5(random()::text || g || i), '') FROM generate_series(1, {text_blocks}) g) AS raw_text
+FROM generate_series(1, {papers}) i
+"""
+
+
+async def setup(conn, papers: int, text_kb: int) -> None:
+    rows = SYNTHETIC_ROWS.format(
+        categories="[" + ",".join(f"'{c}'" for c in CATEGORIES) + "]",
+        n_categories=len(CATEGORIES),
+        text_blocks=max(1, text_kb * 1024 // 32),
+        papers=papers,
+    )
+    await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+    await conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    await conn.execute(text(f"CREATE UNLOGGED TABLE {SCHEMA}.source AS {rows}"))
+    await conn.execute(text(
+        f"CREATE TABLE {SCHEMA}.papers_wide AS SELECT {METADATA}, raw_text, "
+        f"json_build_array(raw_text) AS sections, '[]'::json AS \"references\" FROM {SCHEMA}.source"
+    ))
+    await conn.execute(text(f"CREATE TABLE {SCHEMA}.papers_narrow AS SELECT {METADATA} FROM {SCHEMA}.source"))
+    # Compression happens client-side in the app; here the bytes only need to be out of line.
+    await conn.execute(text(
+        f"CREATE TABLE {SCHEMA}.paper_contents AS SELECT arxiv_id, convert_to(raw_text, 'UTF8') AS raw_text "
+        f"FROM {SCHEMA}.source"
+    ))
+    await conn.execute(text(f"DROP TABLE {SCHEMA}.source"))
+    for table in ("papers_wide", "papers_narrow"):
+        await conn.execute(text(f"CREATE INDEX ON {SCHEMA}.{table} (published_date DESC, arxiv_id DESC)"))
+        await conn.execute(text(f"ANALYZE {SCHEMA}.{table}"))
+
+
+async def time_query(conn, sql: str, repeats: int) -> dict:
+    latencies = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        rows = (await conn.execute(text(sql))).all()
+        latencies.append(time.perf_counter() - started)
+    return {
+        "rows": len(rows),
+        "p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 2),
+    }
+
+
+async def main_async(args) -> dict:
+    engine = create_async_engine(os.environ["DATABASE_URL"])
+    try:
+        async with engine.begin() as conn:
+            started = time.perf_counter()
+            await setup(conn, args.papers, args.text_kb)
+            setup_s = time.perf_counter() - started
+
+        listing = ("SELECT {columns} FROM {schema}.{table} WHERE categories::jsonb @> '[\"cs.CL\"]' "
+                   "ORDER BY published_date DESC, arxiv_id DESC LIMIT {limit}")
+        report = {"papers": args.papers, "text_kb": args.text_kb, "limit": args.limit,
+                  "setup_s": round(setup_s, 1)}
+        async with engine.connect() as conn:
+            for name, table, columns in (
+                ("before", "papers_wide", f'{METADATA}, raw_text, sections, "references"'),
+                ("after", "papers_narrow", METADATA),
+            ):
+                sql = listing.format(columns=columns, schema=SCHEMA, table=table, limit=args.limit)
+                await time_query(conn, sql, 1)  # warm the cache
+                report[name] = await time_query(conn, sql, args.repeats)
+            size = (await conn.execute(text(
+                f"SELECT pg_total_relation_size('{SCHEMA}.papers_wide'), "
+                f"pg_total_relation_size('{SCHEMA}.papers_narrow')"
+            ))).one()
+            report["before"]["table_mb"] = round(size[0] / 2**20, 1)
+            report["after"]["table_mb"] = round(size[1] / 2**20, 1)
+        report["speedup_p50"] = round(report["before"]["p50_ms"] / max(report["after"]["p50_ms"], 1e-6), 1)
+        return report
+    finally:
+        if not args.keep:
+            async with engine.begin() as conn:
+                await conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--papers", type=int, default=100_000)
+    parser.add_argument("--text-kb", type=int, default=40, help="raw text size per paper")
+    parser.add_argument("--limit", type=int, default=1000, help="papers per listing query")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch schema")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main_async(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Replay a skewed question workload through the LLM response cache.
+
+Questions are drawn from ``--questions`` distinct intents with Zipf-like
+popularity. Each request asks its intent verbatim, with different case or
+punctuation (exact tier after normalization), or reworded with filler words
+(semantic tier only). A local hashing embedder stands in for the embedding
+model, so no Ollama is needed, and completions are not run: each miss is
+credited ``--llm-latency-s``.
+
+Reports the hit ratio per tier, the LLM time saved, wrong semantic hits (a
+cached answer to a different intent), and the cache's own lookup cost.
+
+Usage:
+    python -m benchmarks.response_cache_benchmark --requests 20000 --questions 500 --threshold 0.9
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from typing import List
+
+import numpy as np
+
+from src.services.response_cache.cache import ResponseCache
+
+TOPICS = ["main contribution", "training data", "evaluation metric", "baseline", "limitations",
+          "model architecture", "ablation results", "compute budget", "related work", "future work"]
+FILLERS = ["please", "can you tell me", "briefly", "in short", "exactly", "i wonder"]
+TOKEN = re.compile(r"\w+")
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-words embedder (hashed unigrams and bigrams), a local stand-in for EmbeddingModel."""
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _vector(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        tokens = TOKEN.findall(text.lower())
+        for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dim] += 1.0 if digest[4] & 1 else -1.0
+        return vector
+
+    async def embed_queries(self, queries: List[str]) -> np.ndarray:
+        return np.stack([self._vector(query) for query in queries])
+
+
+def _intent(i: int) -> str:
+    return f"What is the {TOPICS[i % len(TOPICS)]} of paper 2410.{i // len(TOPICS):05d}"
+
+
+def _variant(rng: random.Random, question: str) -> str:
+    kind = rng.random()
+    if kind < 0.5:
+        return question + "?"
+    if kind < 0.75:
+        return f"  {question.upper() if rng.random() < 0.5 else question.lower()} ?!"
+    words = question.split()
+    words.insert(rng.randrange(len(words) + 1), rng.choice(FILLERS))
+    return " ".join(words) + "?"
+
+
+async def main_async(args) -> dict:
+    cache = ResponseCache(max_entries=args.max_entries, ttl_s=args.ttl, similarity_threshold=args.threshold,
+                          embedder=HashingEmbedder(args.dim))
+    rng = random.Random(args.seed)
+    weights = [1.0 / (rank + 1) ** args.zipf for rank in range(args.questions)]
+    intents = rng.choices(range(args.questions), weights=weights, k=args.requests)
+    wrong_hits = 0
+    hit_us, miss_us = [], []
+    for i in intents:
+        query = _variant(rng, _intent(i))
+        started = time.perf_counter()
+        lookup = await cache.lookup("ollama:bench", query)
+        if lookup.hit:
+            hit_us.append((time.perf_counter() - started) * 1e6)
+            wrong_hits += lookup.response != f"answer to intent {i}"
+        else:
+            cache.put(lookup, f"answer to intent {i}", latency_s=args.llm_latency_s)
+            miss_us.append((time.perf_counter() - started) * 1e6)
+
+    snapshot = cache.snapshot()
+    without_cache_s = args.requests * args.llm_latency_s
+    return {
+        "requests": args.requests,
+        "questions": args.questions,
+        "threshold": args.threshold,
+        **{key: round(value, 4) if isinstance(value, float) else value for key, value in snapshot.items()},
+        "wrong_semantic_hits": wrong_hits,
+        "llm_time_saved_share": round(snapshot["saved_s"] / without_cache_s, 4),
+        "hit_lookup_us_p50": round(float(np.percentile(hit_us, 50)), 1) if hit_us else None,
+        "miss_lookup_us_p50": round(float(np.percentile(miss_us, 50)), 1) if miss_us else None,
+        "miss_lookup_us_p99": round(float(np.percentile(miss_us, 99)), 1) if miss_us else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--questions", type=int, default=500, help="distinct intents")
+    parser.add_argument("--zipf", type=float, default=1.1, help="popularity skew of the intents")
+    parser.add_argument("--threshold", type=float, default=0.9, help="semantic tier similarity; 0 disables it")
+    parser.add_argument("--max-entries", type=int, default=10_000)
+    parser.add_argument("--ttl", type=float, default=3600.0)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--llm-latency-s", type=float, default=2.0, help="credited per avoided completion")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main_async(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
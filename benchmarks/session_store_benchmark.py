@@ -0,0 +1,66 @@
+"""Drive the chat session store with many distinct session ids and report memory over time.
+
+Each simulated request touches a session, reads its history and appends one
+turn, like RunnableWithMessageHistory does. A fake loader stands in for
+Postgres. Memory should level off once the store reaches its caps.
+
+Usage:
+    python -m benchmarks.session_store_benchmark --sessions 100000 --max-sessions 10000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+import tracemalloc
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.services.chat_memory.store import SessionStore
+
+
+async def fake_loader(session_id: str, limit: int):
+    return [(f"earlier question from {session_id}", "earlier answer " * 20)] * min(limit, 2)
+
+
+async def main_async(args) -> dict:
+    store = SessionStore(max_sessions=args.max_sessions, max_bytes=args.max_mb * 1024 * 1024,
+                         ttl_s=args.ttl, loader=fake_loader)
+    rng = random.Random(0)
+    samples = []
+    tracemalloc.start()
+    started = time.perf_counter()
+    for i in range(args.sessions * args.turns):
+        # Mostly new sessions, with some returning ones that were likely evicted.
+        session_id = f"s{i % args.sessions}" if rng.random() > args.revisit else f"s{rng.randrange(args.sessions)}"
+        history = store.get(session_id)
+        await history.aget_messages()
+        await history.aadd_messages([HumanMessage(content="question " * 10), AIMessage(content="answer " * 60)])
+        if (i + 1) % args.sample_every == 0:
+            current, _ = tracemalloc.get_traced_memory()
+            samples.append({"requests": i + 1, "traced_mb": round(current / 2**20, 2), **store.snapshot()})
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "requests_per_s": round(args.sessions * args.turns / elapsed, 1),
+        "peak_traced_mb": round(peak / 2**20, 2),
+        "samples": samples,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--turns", type=int, default=1, help="passes over the session ids")
+    parser.add_argument("--revisit", type=float, default=0.1, help="share of requests to a random earlier session")
+    parser.add_argument("--max-sessions", type=int, default=10_000)
+    parser.add_argument("--max-mb", type=int, default=64)
+    parser.add_argument("--ttl", type=float, default=1800.0)
+    parser.add_argument("--sample-every", type=int, default=10_000)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main_async(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
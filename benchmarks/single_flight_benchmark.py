@@ -0,0 +1,87 @@
+"""Bursts of concurrent chat requests with and without single-flight coalescing.
+
+Each burst starts ``--clients`` requests at once, their queries drawn from
+``--questions`` intents with Zipf-like popularity, the way a popular question
+arrives from many clients. The upstream stands in for one local Ollama: it
+serves ``--upstream-slots`` generations at a time, each taking
+``--llm-latency-s``, so duplicate generations queue behind each other.
+
+Reports upstream calls, calls avoided, and request latency for both runs.
+
+Usage:
+    python -m benchmarks.single_flight_benchmark --bursts 20 --clients 32 --questions 50
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List
+
+import numpy as np
+
+from src.services.coalescing.flight import SingleFlight
+
+
+async def run(args, enabled: bool) -> dict:
+    flight = SingleFlight("llm", enabled=enabled)
+    slots = asyncio.Semaphore(args.upstream_slots)
+    rng = random.Random(args.seed)
+    weights = [1.0 / (rank + 1) ** args.zipf for rank in range(args.questions)]
+    upstream_calls = 0
+    latencies: List[float] = []
+
+    async def generate(query: str) -> str:
+        nonlocal upstream_calls
+        async with slots:
+            upstream_calls += 1
+            await asyncio.sleep(args.llm_latency_s)
+            return f"answer to {query}"
+
+    async def request(query: str) -> None:
+        started = time.perf_counter()
+        response, _ = await flight.do(("ollama:bench", query, ""), lambda: generate(query))
+        assert response == f"answer to {query}"
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    for _ in range(args.bursts):
+        queries = rng.choices([f"question {i}" for i in range(args.questions)], weights=weights, k=args.clients)
+        await asyncio.gather(*(request(query) for query in queries))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "upstream_calls": upstream_calls,
+        "avoided_calls": flight.stats["followers"],
+        "max_waiters": flight.stats["max_waiters"],
+        "elapsed_s": round(elapsed, 2),
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 1),
+        "latency_p99_ms": round(float(np.percentile(latencies, 99)) * 1000, 1),
+    }
+
+
+async def main_async(args) -> dict:
+    return {
+        "requests": args.bursts * args.clients,
+        "questions": args.questions,
+        "upstream_slots": args.upstream_slots,
+        "without_single_flight": await run(args, enabled=False),
+        "with_single_flight": await run(args, enabled=True),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=32, help="concurrent requests per burst")
+    parser.add_argument("--questions", type=int, default=50, help="distinct intents")
+    parser.add_argument("--zipf", type=float, default=1.1, help="popularity skew of the intents")
+    parser.add_argument("--upstream-slots", type=int, default=2, help="generations the upstream runs at once")
+    parser.add_argument("--llm-latency-s", type=float, default=0.05)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main_async(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
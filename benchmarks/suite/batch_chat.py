@@ -0,0 +1,84 @@
+"""/chat_batch throughput against the fake LLM server at several concurrency levels.
+
+Each level runs a new job of ``per_slot * level`` queries against every
+model, so every level takes about ``per_slot * len(MODELS)`` rounds of
+generations and the items/s should grow with the level. The scheduler's
+provider caps are raised out of the way, so the level is the only limit.
+After each job, the same job_id is posted again to time a resume that finds
+every item completed.
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Dict, List, Sequence
+
+import httpx
+
+from benchmarks.suite.chat import AppServer
+from benchmarks.suite.fake_llm import FakeLLMConfig, FakeLLMProcess
+
+MODELS = ("llama3.2", "deepseek-ai/deepseek-v3.1")
+
+
+async def _job(client: httpx.AsyncClient, queries: List[str], concurrency: int, job_id: str = None) -> Dict:
+    body = {"queries": queries, "models": list(MODELS), "concurrency": concurrency, "job_id": job_id}
+    started = time.perf_counter()
+    lines = []
+    async with client.stream("POST", "/chat_batch", json=body) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line:
+                lines.append(json.loads(line))
+    return {"elapsed": time.perf_counter() - started, "start": lines[0], "done": lines[-1]}
+
+
+async def _load(base_url: str, levels: Sequence[int], per_slot: int, ideal_s: float) -> List[Dict]:
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+        for _ in range(600):
+            try:
+                if (await client.get("/api/v1/health")).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+        # Build the models and open connections before timing.
+        await _job(client, ["warm up"], 1)
+
+        report = []
+        for level in levels:
+            queries = [f"evaluation question {level}-{i}: what does the paper claim?" for i in range(per_slot * level)]
+            job = await _job(client, queries, level)
+            # Results reach chat_history through the write-behind queue; let it flush.
+            await asyncio.sleep(1.0)
+            resumed = await _job(client, queries, level, job_id=job["start"]["job_id"])
+            items = job["done"]["completed"]
+            report.append({
+                "concurrency": level,
+                "items": job["start"]["items"],
+                "failed": job["done"]["failed"],
+                "items_per_s": round(items / job["elapsed"], 2),
+                # Every item takes at least one fake generation; `level` run at once.
+                "scaling_efficiency": round(items / job["elapsed"] / (level / ideal_s), 3),
+                "resume_skipped": resumed["start"]["skipped"],
+                "resume_ms": round(resumed["elapsed"] * 1000, 2),
+            })
+    return report
+
+
+def run(database_url: str, llm: FakeLLMConfig, levels: Sequence[int], per_slot: int = 4,
+        workers: int = 1) -> Dict[str, object]:
+    with FakeLLMProcess(llm) as fake:
+        env = {
+            "DATABASE_URL": database_url,
+            "OLLAMA_HOST": fake.url,
+            "NVIDIA_BASE_URL": f"{fake.url}/v1",
+            "NVIDIA_NIM_API_KEY": os.getenv("NVIDIA_NIM_API_KEY", "bench"),
+            "LLM_PROVIDER_CONCURRENCY": "ollama=1024,nvidia=1024",
+            "LLM_BATCH_SHARE": "1",
+        }
+        with AppServer(env, workers=workers) as app:
+            ideal_s = (llm.ttft_ms + (llm.output_tokens / llm.tokens_per_s * 1000 if llm.tokens_per_s else 0)) / 1000
+            results = asyncio.run(_load(app.url, levels, per_slot, ideal_s))
+    return {"models": list(MODELS), "per_slot": per_slot, "ideal_item_ms": round(ideal_s * 1000, 2),
+            "levels": results}
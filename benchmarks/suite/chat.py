@@ -0,0 +1,152 @@
+"""Load-test the chat endpoints of the running API against the fake LLM server.
+
+Starts uvicorn on ``src.main:app`` in a child process, wired to the fake
+server for Ollama and NIM and to the benchmark Postgres, then sends requests
+at each concurrency level. Streaming endpoints also report time to first
+token as seen by the client.
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Sequence
+
+import httpx
+
+from benchmarks.suite.fake_llm import FakeLLMConfig, FakeLLMProcess, free_port, wait_for_port
+from benchmarks.suite.report import latency_summary
+
+ENDPOINTS = {
+    "chat_ollama": ("/chat_ollama", False),
+    "chat_nvidia": ("/chat_nvidia", False),
+    "chat_ollama_stream": ("/chat_ollama/stream", True),
+    "chat_nvidia_stream": ("/chat_nvidia/stream", True),
+}
+QUERY = "Summarise the main contribution of retrieval-augmented generation in two sentences."
+
+
+class AppServer:
+    """uvicorn serving the API in a child process."""
+
+    def __init__(self, env: Dict[str, str], workers: int = 1):
+        self.env = env
+        self.workers = workers
+        self.port = free_port()
+        self.process = None
+        self._index_dir = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "AppServer":
+        self._index_dir = tempfile.TemporaryDirectory(prefix="bench-indexes-")
+        env = {
+            **os.environ,
+            "VECTOR_INDEX_DIR": os.path.join(self._index_dir.name, "vector"),
+            "BM25_INDEX_DIR": os.path.join(self._index_dir.name, "bm25"),
+            "FILTER_INDEX_DIR": os.path.join(self._index_dir.name, "filters"),
+            "LLM_WARMUP_MODELS": "",
+            **self.env,
+        }
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "src.main:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--workers", str(self.workers), "--log-level", "warning", "--no-access-log"],
+            env=env,
+        )
+        wait_for_port(self.port, timeout_s=120, process=self.process)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=30)
+        if self._index_dir is not None:
+            self._index_dir.cleanup()
+
+
+async def _one(client: httpx.AsyncClient, path: str, stream: bool, session_id: str) -> Dict[str, float]:
+    params = {"session_id": session_id} if "nvidia" in path else None
+    started = time.perf_counter()
+    if not stream:
+        response = await client.post(path, json={"query": QUERY}, params=params)
+        return {"latency": time.perf_counter() - started, "ok": response.status_code == 200}
+    ttft = None
+    ok = True
+    async with client.stream("POST", path, json={"query": QUERY}, params=params) as response:
+        ok = response.status_code == 200
+        async for line in response.aiter_lines():
+            if line == "event: token" and ttft is None:
+                ttft = time.perf_counter() - started
+            elif line == "event: error":
+                ok = False
+    return {"latency": time.perf_counter() - started, "ttft": ttft, "ok": ok}
+
+
+async def _level(base_url: str, path: str, stream: bool, concurrency: int, requests: int) -> Dict[str, object]:
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limits) as client:
+
+        async def task(i: int):
+            async with semaphore:
+                try:
+                    # A session per request slot: history stays short, as in a real multi-user load.
+                    return await _one(client, path, stream, f"bench-{concurrency}-{i % concurrency}")
+                except httpx.HTTPError:
+                    return {"latency": None, "ok": False}
+
+        started = time.perf_counter()
+        results: List[Dict] = await asyncio.gather(*(task(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    ok = [r for r in results if r["ok"]]
+    report = {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": requests - len(ok),
+        "throughput_rps": round(len(ok) / elapsed, 2),
+        "latency": latency_summary(r["latency"] for r in ok),
+    }
+    if stream:
+        report["ttft"] = latency_summary(r["ttft"] for r in ok if r.get("ttft") is not None)
+    return report
+
+
+async def _load(base_url: str, endpoints: Sequence[str], levels: Sequence[int], requests_per_level: int):
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        # The API is up once the lifespan has finished; the port can open a little earlier.
+        for _ in range(600):
+            try:
+                if (await client.get("/api/v1/health")).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.1)
+    report = {}
+    for name in endpoints:
+        path, stream = ENDPOINTS[name]
+        # One untimed request to build the model and open connections.
+        await _level(base_url, path, stream, 1, 1)
+        report[name] = [
+            await _level(base_url, path, stream, level, max(requests_per_level, level))
+            for level in levels
+        ]
+    return report
+
+
+def run(database_url: str, llm: FakeLLMConfig, endpoints: Sequence[str], levels: Sequence[int],
+        requests_per_level: int, workers: int = 1) -> Dict[str, object]:
+    with FakeLLMProcess(llm) as fake:
+        env = {
+            "DATABASE_URL": database_url,
+            "OLLAMA_HOST": fake.url,
+            "NVIDIA_BASE_URL": f"{fake.url}/v1",
+            "NVIDIA_NIM_API_KEY": os.getenv("NVIDIA_NIM_API_KEY", "bench"),
+        }
+        with AppServer(env, workers=workers) as app:
+            results = asyncio.run(_load(app.url, endpoints, levels, requests_per_level))
+    ideal_ms = llm.ttft_ms + (llm.output_tokens / llm.tokens_per_s * 1000 if llm.tokens_per_s else 0)
+    return {"workers": workers, "ideal_latency_ms": round(ideal_ms, 2), "endpoints": results}
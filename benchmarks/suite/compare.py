@@ -0,0 +1,84 @@
+"""Diff two benchmark result files and flag regressions.
+
+Every numeric leaf present in both files is compared. Direction is taken from
+the key name: latencies and durations (``*_ms``, ``*_s``) are better lower,
+rates (``*_per_s``, ``throughput_*``) are better higher. Other numbers,
+such as counts and config, are ignored. The exit status is 1 if any metric
+regressed by more than ``--threshold``, so this can gate CI.
+
+Usage:
+    python -m benchmarks.suite.compare bench-results/base.json bench-results/head.json --threshold 0.1
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+# Lists of per-level results are keyed by the field that identifies the level.
+LEVEL_KEYS = ("concurrency", "workers")
+
+
+def _flatten(value, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _flatten(item, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            label = str(i)
+            if isinstance(item, dict):
+                label = next((f"{key}={item[key]}" for key in LEVEL_KEYS if key in item), label)
+            yield from _flatten(item, f"{prefix}[{label}]")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, float(value)
+
+
+def direction(path: str) -> Optional[int]:
+    """+1 if higher is better, -1 if lower is better, None if the number is not a performance metric."""
+    leaf = path.rsplit(".", 1)[-1]
+    if leaf.endswith("_per_s") or leaf.startswith("throughput_"):
+        return 1
+    if leaf in ("errors", "failures", "dropped"):
+        return -1
+    if leaf.endswith("_ms") or (leaf.endswith("_s") and leaf != "elapsed_s"):
+        return -1
+    return None
+
+
+def compare(base: Dict, head: Dict, threshold: float):
+    base_values = dict(_flatten(base.get("scenarios", {})))
+    head_values = dict(_flatten(head.get("scenarios", {})))
+    rows = []
+    for path, old in base_values.items():
+        new = head_values.get(path)
+        sign = direction(path)
+        if new is None or sign is None:
+            continue
+        change = (new - old) / abs(old) if old else (0.0 if new == old else float("inf"))
+        regressed = -sign * change > threshold
+        improved = sign * change > threshold
+        rows.append((path, old, new, change, "REGRESSION" if regressed else "improved" if improved else ""))
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base", type=Path)
+    parser.add_argument("head", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change treated as significant")
+    parser.add_argument("--all", action="store_true", help="also list metrics within the threshold")
+    args = parser.parse_args()
+
+    base, head = json.loads(args.base.read_text()), json.loads(args.head.read_text())
+    rows = compare(base, head, args.threshold)
+    print(f"base {base['meta'].get('git_commit')}  head {head['meta'].get('git_commit')}")
+    for path, old, new, change, verdict in rows:
+        if verdict or args.all:
+            print(f"{verdict:>10}  {change:+8.1%}  {old:>12.4g} -> {new:<12.4g} {path}")
+    regressions = sum(verdict == "REGRESSION" for *_, verdict in rows)
+    print(f"{len(rows)} metrics compared, {regressions} regressions")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
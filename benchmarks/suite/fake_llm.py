@@ -0,0 +1,238 @@
+"""Local stand-in for Ollama and an OpenAI/NIM-compatible endpoint.
+
+One aiohttp server answers both APIs with synthetic tokens at a configurable
+rate. The app and the LLM clients can then be load-tested without a GPU or
+an API key:
+
+- Ollama: ``POST /api/chat`` (NDJSON stream or single JSON), ``POST /api/embed``,
+  ``GET /api/tags``
+- OpenAI/NIM: ``POST /v1/chat/completions`` (SSE stream or single JSON),
+  ``GET /v1/models``
+
+Point the app at it with ``OLLAMA_HOST=http://127.0.0.1:<port>`` and
+``NVIDIA_BASE_URL=http://127.0.0.1:<port>/v1``.
+
+Usage:
+    python -m benchmarks.suite.fake_llm --port 11500 --tokens-per-s 50 --ttft-ms 200
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+import numpy as np
+from aiohttp import web
+
+WORDS = ("the model attends to retrieved context and answers with cited evidence from arxiv papers "
+         "on transformers retrieval evaluation benchmarks and scaling").split()
+
+
+@dataclass
+class FakeLLMConfig:
+    tokens_per_s: float = 50.0
+    ttft_ms: float = 200.0
+    output_tokens: int = 128
+    embed_dim: int = 768
+    embed_latency_ms: float = 5.0
+
+
+def _tokens(n: int) -> List[str]:
+    return [WORDS[i % len(WORDS)] + " " for i in range(n)]
+
+
+def _prompt_tokens(messages: List[Dict]) -> int:
+    return sum(len(str(message.get("content", "")).split()) for message in messages)
+
+
+def fake_embedding(text: str, dim: int) -> List[float]:
+    """Deterministic unit vector per text, so repeated queries hit the same neighbours."""
+    seed = int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+    vector = np.random.default_rng(seed).standard_normal(dim).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+class FakeLLMServer:
+    def __init__(self, config: FakeLLMConfig):
+        self.config = config
+        self.requests = 0
+        self.app = web.Application()
+        self.app.add_routes([
+            web.post("/api/chat", self.ollama_chat),
+            web.post("/api/embed", self.ollama_embed),
+            web.get("/api/tags", self.ollama_tags),
+            web.post("/v1/chat/completions", self.openai_chat),
+            web.get("/v1/models", self.openai_models),
+            web.get("/stats", self.stats),
+        ])
+
+    def _max_tokens(self, requested: Optional[int]) -> int:
+        return min(self.config.output_tokens, requested) if requested else self.config.output_tokens
+
+    async def _generate(self, n: int):
+        """Yield n tokens: the first after ttft_ms, then one every 1/tokens_per_s."""
+        interval = 1.0 / self.config.tokens_per_s if self.config.tokens_per_s > 0 else 0.0
+        start = time.perf_counter() + self.config.ttft_ms / 1000
+        for i, token in enumerate(_tokens(n)):
+            # Sleep until this token's scheduled time so rates hold under load.
+            delay = start + i * interval - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield token
+
+    async def ollama_chat(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        body = await request.json()
+        model = body.get("model", "fake")
+        n = self._max_tokens((body.get("options") or {}).get("num_predict"))
+        prompt_tokens = _prompt_tokens(body.get("messages", []))
+        done = {
+            "model": model, "created_at": "1970-01-01T00:00:00Z",
+            "message": {"role": "assistant", "content": ""},
+            "done": True, "done_reason": "stop",
+            "prompt_eval_count": prompt_tokens, "eval_count": n,
+        }
+        if not body.get("stream", True):
+            content = "".join([token async for token in self._generate(n)])
+            done["message"]["content"] = content
+            return web.json_response(done)
+
+        response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+        await response.prepare(request)
+        async for token in self._generate(n):
+            chunk = {"model": model, "created_at": "1970-01-01T00:00:00Z",
+                     "message": {"role": "assistant", "content": token}, "done": False}
+            await response.write((json.dumps(chunk) + "\n").encode())
+        await response.write((json.dumps(done) + "\n").encode())
+        await response.write_eof()
+        return response
+
+    async def ollama_embed(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        body = await request.json()
+        texts = body.get("input", [])
+        texts = [texts] if isinstance(texts, str) else texts
+        await asyncio.sleep(self.config.embed_latency_ms / 1000)
+        return web.json_response({
+            "model": body.get("model", "fake"),
+            "embeddings": [fake_embedding(text, self.config.embed_dim) for text in texts],
+        })
+
+    async def ollama_tags(self, request: web.Request) -> web.Response:
+        return web.json_response({"models": []})
+
+    async def openai_chat(self, request: web.Request) -> web.StreamResponse:
+        self.requests += 1
+        body = await request.json()
+        model = body.get("model", "fake")
+        n = self._max_tokens(body.get("max_tokens"))
+        usage = {"prompt_tokens": _prompt_tokens(body.get("messages", [])), "completion_tokens": n}
+        usage["total_tokens"] = usage["prompt_tokens"] + n
+        if not body.get("stream"):
+            content = "".join([token async for token in self._generate(n)])
+            return web.json_response({
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": 0, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                             "finish_reason": "stop"}],
+                "usage": usage,
+            })
+
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+
+        def frame(delta: Dict, finish_reason: Optional[str] = None, **extra) -> bytes:
+            chunk = {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": 0, "model": model,
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}], **extra}
+            return f"data: {json.dumps(chunk)}\n\n".encode()
+
+        async for token in self._generate(n):
+            await response.write(frame({"role": "assistant", "content": token}))
+        await response.write(frame({}, "stop", usage=usage))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    async def openai_models(self, request: web.Request) -> web.Response:
+        return web.json_response({"object": "list", "data": []})
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response({"requests": self.requests, "config": asdict(self.config)})
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port: int, timeout_s: float = 30.0, process: Optional[subprocess.Popen] = None) -> None:
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Process exited with code {process.returncode} before listening on {port}")
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Nothing listening on port {port} after {timeout_s}s")
+
+
+class FakeLLMProcess:
+    """Runs the fake server in a child process, so it does not compete with the client's event loop.
+
+    Usage:
+        with FakeLLMProcess(FakeLLMConfig(tokens_per_s=100)) as server:
+            os.environ["OLLAMA_HOST"] = server.url
+    """
+
+    def __init__(self, config: FakeLLMConfig, port: Optional[int] = None):
+        self.config = config
+        self.port = port or free_port()
+        self.process: Optional[subprocess.Popen] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "FakeLLMProcess":
+        args = [sys.executable, "-m", "benchmarks.suite.fake_llm", "--port", str(self.port)]
+        for name, value in asdict(self.config).items():
+            args += [f"--{name.replace('_', '-')}", str(value)]
+        self.process = subprocess.Popen(args, env=os.environ.copy())
+        wait_for_port(self.port, process=self.process)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self.process is not None:
+            self.process.terminate()
+            self.process.wait(timeout=10)
+            self.process = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--tokens-per-s", type=float, default=FakeLLMConfig.tokens_per_s,
+                        help="per-stream generation rate; 0 for no delay")
+    parser.add_argument("--ttft-ms", type=float, default=FakeLLMConfig.ttft_ms)
+    parser.add_argument("--output-tokens", type=int, default=FakeLLMConfig.output_tokens)
+    parser.add_argument("--embed-dim", type=int, default=FakeLLMConfig.embed_dim)
+    parser.add_argument("--embed-latency-ms", type=float, default=FakeLLMConfig.embed_latency_ms)
+    args = parser.parse_args()
+    config = FakeLLMConfig(
+        tokens_per_s=args.tokens_per_s, ttft_ms=args.ttft_ms, output_tokens=args.output_tokens,
+        embed_dim=args.embed_dim, embed_latency_ms=args.embed_latency_ms,
+    )
+    web.run_app(FakeLLMServer(config).app, host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""chat_history insertion: one transaction per row versus the batched write-behind writer.
+
+``direct`` calls ``insert_into_chat_history`` from N concurrent producers,
+the way the endpoints used to. ``writer`` submits the same rows to
+``ChatHistoryWriter`` and also times the drain, so its rows/s covers the rows
+actually committed, not only the enqueueing.
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Sequence
+
+from benchmarks.suite.postgres import truncate
+from benchmarks.suite.report import latency_summary
+
+
+def _row(i: int, response_chars: int) -> Dict[str, object]:
+    return {
+        "user_query": f"benchmark question {i}: how does retrieval change answer quality?",
+        "model_response": ("benchmark answer " * (response_chars // 17 + 1))[:response_chars],
+        "model_used": "bench-model",
+        "session_id": f"bench-session-{i % 1000}",
+        "user_query_timestamp": datetime.utcnow(),
+        "model_response_timestamp": datetime.utcnow(),
+    }
+
+
+async def _producers(fn, rows: int, concurrency: int, response_chars: int):
+    latencies = []
+    counter = iter(range(rows))
+
+    async def producer():
+        for i in counter:
+            started = time.perf_counter()
+            await fn(**_row(i, response_chars))
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(producer() for _ in range(concurrency)))
+    return latencies
+
+
+async def _direct(rows: int, concurrency: int, response_chars: int) -> Dict[str, object]:
+    from src.db.database import get_engine
+    from src.db.utils.chat_history import insert_into_chat_history
+
+    try:
+        started = time.perf_counter()
+        latencies = await _producers(insert_into_chat_history, rows, concurrency, response_chars)
+        elapsed = time.perf_counter() - started
+    finally:
+        await get_engine().dispose()
+    return {"concurrency": concurrency, "rows_per_s": round(rows / elapsed, 1),
+            "insert": latency_summary(latencies)}
+
+
+async def _writer(rows: int, concurrency: int, response_chars: int, batch_size: int) -> Dict[str, object]:
+    from src.db.database import get_engine
+    from src.db.utils.history_writer import ChatHistoryWriter
+
+    writer = ChatHistoryWriter(batch_size=batch_size)
+    writer.start()
+    try:
+        started = time.perf_counter()
+        latencies = await _producers(writer.submit, rows, concurrency, response_chars)
+        enqueued = time.perf_counter() - started
+        await writer.stop()
+        elapsed = time.perf_counter() - started
+    finally:
+        await get_engine().dispose()
+    snapshot = writer.snapshot()
+    return {
+        "concurrency": concurrency,
+        "batch_size": batch_size,
+        "rows_per_s": round(snapshot["written"] / elapsed, 1),
+        "enqueue_s": round(enqueued, 3),
+        "drain_s": round(elapsed - enqueued, 3),
+        "submit": latency_summary(latencies),
+        "written": snapshot["written"],
+        "dropped": snapshot["dropped"],
+        "avg_batch_size": round(snapshot["avg_batch_size"], 1),
+        "avg_flush_ms": round(snapshot["avg_flush_ms"], 2),
+    }
+
+
+def run(rows: int, levels: Sequence[int], response_chars: int = 2000, batch_size: int = 500) -> Dict[str, object]:
+    report = {"rows": rows, "response_chars": response_chars, "direct": [], "writer": []}
+    for level in levels:
+        asyncio.run(truncate("chat_history"))
+        report["direct"].append(asyncio.run(_direct(rows, level, response_chars)))
+        asyncio.run(truncate("chat_history"))
+        report["writer"].append(asyncio.run(_writer(rows, level, response_chars, batch_size)))
+    asyncio.run(truncate("chat_history"))
+    return report
@@ -0,0 +1,133 @@
+"""PDF parsing throughput on a synthetic corpus.
+
+Measures ``DoclingParser.parse_pdf`` (one converter, worker threads) at each
+concurrency level, and ``PdfParseEngine`` (a process pool) with the given
+number of workers. ``long_pdf`` parses a single long paper with 1, 2, 4, ...
+engine workers: its page windows are converted in parallel, so wall time
+should drop with the worker count. Converter warm-up is reported separately
+and not counted in throughput.
+"""
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from benchmarks.suite.pdf_corpus import build_pdf, generate_corpus
+from benchmarks.suite.report import latency_summary
+
+
+async def _parse_level(parser, manifest: List[dict], concurrency: int) -> Dict[str, object]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], 0
+
+    async def one(entry: dict) -> None:
+        nonlocal failures
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await parser.parse_pdf(Path(entry["path"]))
+            except Exception:
+                failures += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(entry) for entry in manifest))
+    elapsed = time.perf_counter() - started
+    pages = sum(entry["pages"] for entry in manifest)
+    return {
+        "concurrency": concurrency,
+        "failures": failures,
+        "docs_per_s": round(len(latencies) / elapsed, 3),
+        "pages_per_s": round(pages / elapsed, 2),
+        "per_doc": latency_summary(latencies),
+    }
+
+
+async def _engine(manifest: List[dict], workers: int, parser_kwargs: dict) -> Dict[str, object]:
+    from src.services.pdf_parser.engine import PdfParseEngine
+
+    engine = PdfParseEngine(max_workers=workers, **parser_kwargs)
+    await engine.start()
+    try:
+        # Workers load their models on their first job; keep that out of the timing.
+        await asyncio.gather(*(engine.parse(Path(manifest[0]["path"])) for _ in range(workers)))
+        started = time.perf_counter()
+        jobs = await asyncio.gather(*(engine.submit(Path(entry["path"])) for entry in manifest))
+        results = await asyncio.gather(*(job.future for job in jobs), return_exceptions=True)
+        elapsed = time.perf_counter() - started
+    finally:
+        await engine.stop()
+    failures = sum(isinstance(result, BaseException) for result in results)
+    return {
+        "workers": workers,
+        "failures": failures,
+        "docs_per_s": round((len(manifest) - failures) / elapsed, 3),
+        "pages_per_s": round(sum(entry["pages"] for entry in manifest) / elapsed, 2),
+        "per_doc": latency_summary(job.parse_s for job in jobs if job.parse_s is not None),
+        "queue_wait": latency_summary(job.wait_s for job in jobs if job.wait_s is not None),
+    }
+
+
+async def _long_pdf(path: Path, pages: int, workers: int, parser_kwargs: dict) -> Dict[str, object]:
+    from src.services.pdf_parser.engine import PdfParseEngine
+
+    engine = PdfParseEngine(max_workers=workers, **parser_kwargs)
+    await engine.start()
+    try:
+        await engine.parse(path)  # loads the models of (at least) every worker that gets a window
+        started = time.perf_counter()
+        first_section_s = None
+        async for _ in engine.iter_sections(path):
+            if first_section_s is None:
+                first_section_s = time.perf_counter() - started
+        elapsed = time.perf_counter() - started
+    finally:
+        await engine.stop()
+    return {"workers": workers, "parse_s": round(elapsed, 2), "first_section_s": round(first_section_s or 0.0, 2),
+            "pages_per_s": round(pages / elapsed, 2)}
+
+
+def _worker_levels(max_workers: int) -> List[int]:
+    levels = [1]
+    while levels[-1] * 2 <= max_workers:
+        levels.append(levels[-1] * 2)
+    if levels[-1] != max_workers:
+        levels.append(max_workers)
+    return levels
+
+
+def run(docs: int, pages: Tuple[int, int], levels: Sequence[int], engine_workers: int,
+        max_pages: int = 500, window_pages: int = 10, long_pages: int = 100, seed: int = 0) -> Dict[str, object]:
+    from src.services.pdf_parser.doc_parser_utils import DoclingParser
+
+    parser_kwargs = {"max_pages": max_pages, "window_pages": window_pages}
+    with tempfile.TemporaryDirectory(prefix="bench-corpus-") as corpus:
+        manifest = generate_corpus(Path(corpus), docs, pages=pages, seed=seed)
+        parser = DoclingParser(**parser_kwargs)
+        started = time.perf_counter()
+        parser._warm_up_model()
+        warm_up_s = time.perf_counter() - started
+
+        async def main():
+            return [await _parse_level(parser, manifest, level) for level in levels]
+
+        report = {
+            "docs": docs,
+            "pages": sum(entry["pages"] for entry in manifest),
+            "warm_up_s": round(warm_up_s, 2),
+            "parse_pdf": asyncio.run(main()),
+        }
+        if engine_workers:
+            report["engine"] = asyncio.run(_engine(manifest, engine_workers, parser_kwargs))
+            if long_pages:
+                long_path = Path(corpus) / "long.pdf"
+                long_path.write_bytes(build_pdf(long_pages, 450, seed=seed))
+                report["long_pdf"] = {
+                    "pages": long_pages,
+                    "window_pages": window_pages,
+                    "scaling": [asyncio.run(_long_pdf(long_path, long_pages, workers, parser_kwargs))
+                                for workers in _worker_levels(engine_workers)],
+                }
+    return report
@@ -0,0 +1,162 @@
+"""Generate a corpus of synthetic, paper-shaped PDFs.
+
+Each PDF has a title, numbered section headings and justified-looking body
+paragraphs on A4 pages, written directly as PDF objects (no extra
+dependency). The text layer is real, so Docling parses it like a born-digital
+arXiv paper. Page count and words per page vary per document within the
+given ranges, with a fixed seed so a corpus is reproducible.
+
+Usage:
+    python -m benchmarks.suite.pdf_corpus --out /tmp/corpus --docs 50 --pages 4-12
+"""
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import List, Tuple
+
+VOCABULARY = (
+    "attention transformer retrieval augmented generation language model benchmark dataset evaluation "
+    "token embedding vector index latency throughput query document passage ranking dense sparse hybrid "
+    "training inference gradient loss optimizer parameter layer head context window memory cache batch "
+    "accuracy precision recall baseline ablation experiment result analysis method approach proposed "
+    "we show that our results demonstrate significant improvement over prior work in this setting"
+).split()
+SECTION_TITLES = ("Introduction", "Related Work", "Method", "Experimental Setup", "Results", "Analysis",
+                  "Ablations", "Limitations", "Conclusion")
+
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+MARGIN = 72
+BODY_SIZE, HEADING_SIZE, TITLE_SIZE = 10, 13, 17
+LEADING = 13
+CHARS_PER_LINE = 95
+
+
+def _escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _wrap(words: List[str]) -> List[str]:
+    lines, current = [], ""
+    for word in words:
+        if current and len(current) + 1 + len(word) > CHARS_PER_LINE:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    return lines
+
+
+def _page_blocks(rng: random.Random, page: int, n_pages: int, words_per_page: int) -> List[Tuple[str, int]]:
+    """(line, font size) pairs for one page."""
+    blocks: List[Tuple[str, int]] = []
+    if page == 0:
+        blocks.append((f"A Synthetic Study of {rng.choice(VOCABULARY).title()} "
+                       f"{rng.choice(VOCABULARY).title()} Systems", TITLE_SIZE))
+        blocks.append(("Anonymous Authors", BODY_SIZE))
+        blocks.append(("", BODY_SIZE))
+    written = 0
+    section = page * len(SECTION_TITLES) // max(n_pages, 1)
+    while written < words_per_page:
+        if written == 0 or rng.random() < 0.15:
+            blocks.append((f"{section + 1} {SECTION_TITLES[section % len(SECTION_TITLES)]}", HEADING_SIZE))
+            section += 1
+        n = min(rng.randint(60, 140), words_per_page - written)
+        paragraph = [rng.choice(VOCABULARY) for _ in range(n)]
+        paragraph[0] = paragraph[0].capitalize()
+        blocks.extend((line, BODY_SIZE) for line in _wrap(paragraph))
+        blocks[-1] = (blocks[-1][0] + ".", BODY_SIZE)
+        blocks.append(("", BODY_SIZE))
+        written += n
+    return blocks
+
+
+def _content_stream(blocks: List[Tuple[str, int]]) -> bytes:
+    ops = ["BT"]
+    y = PAGE_HEIGHT - MARGIN
+    for line, size in blocks:
+        if y < MARGIN:
+            break
+        font = "/F2" if size > BODY_SIZE else "/F1"
+        ops.append(f"{font} {size} Tf 1 0 0 1 {MARGIN} {y} Tm ({_escape(line)}) Tj")
+        y -= LEADING if size == BODY_SIZE else size + 8
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def build_pdf(n_pages: int, words_per_page: int, seed: int) -> bytes:
+    """Bytes of one synthetic PDF."""
+    rng = random.Random(seed)
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # filled in once the page tree number is known
+    pages = add(b"")
+    regular = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Times-Roman /Encoding /WinAnsiEncoding >>")
+    bold = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Times-Bold /Encoding /WinAnsiEncoding >>")
+    kids = []
+    for page in range(n_pages):
+        stream = _content_stream(_page_blocks(rng, page, n_pages, words_per_page))
+        content = add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        kids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R "
+            b"/Resources << /Font << /F1 %d 0 R /F2 %d 0 R >> >> >>"
+            % (pages, PAGE_WIDTH, PAGE_HEIGHT, content, regular, bold)
+        ))
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages
+    objects[pages - 1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    return bytes(out)
+
+
+def parse_range(value: str) -> Tuple[int, int]:
+    low, _, high = value.partition("-")
+    return int(low), int(high or low)
+
+
+def generate_corpus(out_dir: Path, docs: int, pages: Tuple[int, int] = (4, 12),
+                    words_per_page: Tuple[int, int] = (350, 550), seed: int = 0) -> List[dict]:
+    """Write ``docs`` PDFs to ``out_dir`` and return a manifest entry (path, pages, bytes) per file."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    manifest = []
+    for i in range(docs):
+        n_pages = rng.randint(*pages)
+        data = build_pdf(n_pages, rng.randint(*words_per_page), seed=seed * 1_000_003 + i)
+        path = out_dir / f"synthetic-{i:05d}.pdf"
+        path.write_bytes(data)
+        manifest.append({"path": str(path), "pages": n_pages, "bytes": len(data)})
+    return manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", type=Path, required=True)
+    parser.add_argument("--docs", type=int, default=50)
+    parser.add_argument("--pages", type=parse_range, default=(4, 12), help="page count range, e.g. 4-12")
+    parser.add_argument("--words-per-page", type=parse_range, default=(350, 550))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    manifest = generate_corpus(args.out, args.docs, args.pages, args.words_per_page, args.seed)
+    print(json.dumps({"docs": len(manifest), "pages": sum(m["pages"] for m in manifest),
+                      "bytes": sum(m["bytes"] for m in manifest)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+
+def latency_summary(latencies_s: Iterable[float]) -> Dict[str, Optional[float]]:
+    """count, mean and p50/p95/p99 in milliseconds."""
+    values = np.asarray(list(latencies_s), dtype=np.float64) * 1000
+    if not len(values):
+        return {"count": 0, "mean_ms": None, "p50_ms": None, "p95_ms": None, "p99_ms": None}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": int(len(values)),
+        "mean_ms": round(float(values.mean()), 2),
+        "p50_ms": round(float(p50), 2),
+        "p95_ms": round(float(p95), 2),
+        "p99_ms": round(float(p99), 2),
+    }
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        return subprocess.run(["git", *args], check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata() -> Dict[str, object]:
+    """Where and on what the numbers were produced, so result files from different commits can be compared."""
+    return {
+        "git_commit": _git("rev-parse", "HEAD"),
+        "git_dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
@@ -0,0 +1,180 @@
+"""Search latency over a synthetic chunk corpus.
+
+Seeds arxiv_papers and paper_chunks in the benchmark Postgres, builds the
+vector, BM25 and filter indexes in a temporary directory, and times
+``SearchService.search``. Query embeddings come from the fake LLM server, so
+embedding cost is a fixed, configurable latency. Variants cover dense-only,
+hybrid, filtered, batched and approximate (IVF) search, plus hybrid
+throughput under concurrency.
+"""
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Sequence
+
+import numpy as np
+
+from benchmarks.suite.fake_llm import FakeLLMConfig, FakeLLMProcess
+from benchmarks.suite.pdf_corpus import VOCABULARY
+from benchmarks.suite.postgres import truncate
+from benchmarks.suite.report import latency_summary
+
+CATEGORIES = ["cs.CL", "cs.LG", "cs.AI", "cs.CV", "cs.IR", "stat.ML", "math.OC", "q-bio.NC"]
+SEED_BATCH = 5000
+
+
+def _chunk_text(rng: random.Random, words: int) -> str:
+    # Zipf-like: early vocabulary words are much more frequent.
+    return " ".join(VOCABULARY[min(int(rng.paretovariate(1.2)) - 1, len(VOCABULARY) - 1)] for _ in range(words))
+
+
+async def _seed(papers: int, chunks_per_paper: int, chunk_words: int, seed: int):
+    from sqlalchemy import insert
+
+    from src.db.database import AsyncSessionLocal, get_engine
+    from src.db.models import Chunk, Paper
+
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    texts = []
+    try:
+        async with AsyncSessionLocal() as session:
+            paper_rows = [{
+                "arxiv_id": f"bench.{i:06d}",
+                "title": f"Synthetic paper {i}",
+                "authors": ["A. Author"],
+                "abstract": _chunk_text(rng, 80),
+                "categories": rng.sample(CATEGORIES, rng.randint(1, 2)),
+                "published_date": start + timedelta(days=rng.randrange(2000)),
+                "pdf_url": f"https://arxiv.org/pdf/bench.{i:06d}",
+            } for i in range(papers)]
+            for offset in range(0, len(paper_rows), SEED_BATCH):
+                await session.execute(insert(Paper), paper_rows[offset:offset + SEED_BATCH])
+
+            chunk_rows = []
+            for i in range(papers):
+                for j in range(chunks_per_paper):
+                    text = _chunk_text(rng, chunk_words)
+                    texts.append(text)
+                    chunk_rows.append({
+                        "id": len(texts), "arxiv_id": f"bench.{i:06d}", "chunk_index": j, "section_index": 0,
+                        "section_title": "Content", "start_char": 0, "end_char": len(text),
+                        "token_count": chunk_words, "text": text,
+                    })
+                if len(chunk_rows) >= SEED_BATCH:
+                    await session.execute(insert(Chunk), chunk_rows)
+                    chunk_rows = []
+            if chunk_rows:
+                await session.execute(insert(Chunk), chunk_rows)
+            await session.commit()
+    finally:
+        await get_engine().dispose()
+    return texts
+
+
+async def _measure(service, request, repeats: int) -> Dict[str, object]:
+    await service.search(request)  # warm caches and mappings
+    latencies = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await service.search(request)
+        latencies.append(time.perf_counter() - started)
+    return latency_summary(latencies)
+
+
+async def _concurrent(service, make_request, concurrency: int, requests: int) -> Dict[str, object]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            await service.search(make_request(i))
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {"concurrency": concurrency, "throughput_qps": round(requests / elapsed, 2),
+            "latency": latency_summary(latencies)}
+
+
+async def _bench(index_dir: Path, dim: int, repeats: int, levels: Sequence[int]) -> Dict[str, object]:
+    from src.db.database import get_engine
+    from src.schemas.search.models import SearchRequest
+    from src.services.embeddings.client import EmbeddingModel
+    from src.services.lexical_index.bm25 import BM25Index
+    from src.services.retrieval.filters import rebuild_filters
+    from src.services.retrieval.search import SearchService
+    from src.services.vector_index.index import MmapVectorIndex
+
+    vector_index = MmapVectorIndex(index_dir / "vector")
+    try:
+        started = time.perf_counter()
+        filter_index = await rebuild_filters(index_dir / "filters", vector_index)
+        filters_s = time.perf_counter() - started
+        service = SearchService(vector_index=vector_index, bm25_index=BM25Index(index_dir / "bm25"),
+                                filter_index=filter_index, embedder=EmbeddingModel(),
+                                filter_path=index_dir / "filters")
+
+        rng = random.Random(1)
+        queries = [" ".join(rng.sample(VOCABULARY, 4)) for _ in range(64)]
+        report = {"filter_build_s": round(filters_s, 2), "variants": {}}
+        variants = {
+            "dense": SearchRequest(queries=queries[:1], hybrid=False),
+            "hybrid": SearchRequest(queries=queries[:1]),
+            "hybrid_filtered": SearchRequest(queries=queries[:1], categories=["cs.CL"],
+                                             published_from=datetime(2022, 1, 1).date()),
+            "hybrid_batch16": SearchRequest(queries=queries[:16]),
+        }
+        for name, request in variants.items():
+            report["variants"][name] = await _measure(service, request, repeats)
+
+        started = time.perf_counter()
+        await asyncio.to_thread(vector_index.train_ivf)
+        report["ivf_train_s"] = round(time.perf_counter() - started, 2)
+        report["variants"]["dense_approximate"] = await _measure(
+            service, SearchRequest(queries=queries[:1], hybrid=False, approximate=True), repeats)
+
+        report["hybrid_concurrency"] = [
+            await _concurrent(service, lambda i: SearchRequest(queries=[queries[i % len(queries)]]),
+                              level, max(repeats, level * 4))
+            for level in levels
+        ]
+        return report
+    finally:
+        await get_engine().dispose()
+
+
+def run(papers: int, chunks_per_paper: int, levels: Sequence[int], dim: int = 768, chunk_words: int = 200,
+        repeats: int = 50, llm: FakeLLMConfig = None, seed: int = 0) -> Dict[str, object]:
+    from src.services.lexical_index.bm25 import BM25Index
+    from src.services.vector_index.index import MmapVectorIndex
+
+    llm = llm or FakeLLMConfig()
+    llm.embed_dim = dim
+    asyncio.run(truncate("paper_chunks", "arxiv_papers"))
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench-retrieval-") as tmp, FakeLLMProcess(llm) as fake:
+            index_dir = Path(tmp)
+            started = time.perf_counter()
+            texts = asyncio.run(_seed(papers, chunks_per_paper, chunk_words, seed))
+            seed_s = time.perf_counter() - started
+
+            started = time.perf_counter()
+            ids = np.arange(1, len(texts) + 1, dtype=np.int64)
+            vectors = np.random.default_rng(seed).standard_normal((len(texts), dim), dtype=np.float32)
+            MmapVectorIndex(index_dir / "vector", dim=dim).add(ids, vectors)
+            BM25Index(index_dir / "bm25").add_documents(ids.tolist(), texts)
+            index_s = time.perf_counter() - started
+
+            os.environ["OLLAMA_HOST"] = fake.url
+            report = asyncio.run(_bench(index_dir, dim, repeats, levels))
+    finally:
+        asyncio.run(truncate("paper_chunks", "arxiv_papers"))
+    return {"papers": papers, "chunks": papers * chunks_per_paper, "dim": dim,
+            "seed_s": round(seed_s, 2), "index_build_s": round(index_s, 2), **report}
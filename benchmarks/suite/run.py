@@ -0,0 +1,149 @@
+"""Run the benchmark suite and write one JSON result file.
+
+Scenarios:
+- ``chat``: /chat_ollama, /chat_nvidia and their streaming variants under
+  concurrency, against the fake LLM server
+- ``batch_chat``: /chat_batch items/s per concurrency level, against the
+  fake LLM server
+- ``parse``: DoclingParser.parse_pdf and PdfParseEngine throughput on a
+  synthetic PDF corpus
+- ``history``: chat_history inserts, per-row transactions versus the
+  batched writer
+- ``retrieval``: SearchService latency and throughput over a synthetic corpus
+- ``startup``: cold-start import time of the API and the DAG files
+
+``chat``, ``batch_chat``, ``history`` and ``retrieval`` need Postgres (see
+benchmarks/suite/postgres.py); ``parse`` needs docling. A scenario that fails
+is recorded with its error and the others still run. Compare two result
+files with ``python -m benchmarks.suite.compare``.
+
+Usage:
+    python -m benchmarks.suite.run --scenarios chat,history --out bench-results/head.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+import traceback
+from contextlib import ExitStack
+from pathlib import Path
+
+from benchmarks.suite.fake_llm import FakeLLMConfig
+from benchmarks.suite.pdf_corpus import parse_range
+from benchmarks.suite.postgres import LocalPostgres, prepare_schema
+from benchmarks.suite.report import run_metadata
+
+SCENARIOS = ("chat", "batch_chat", "parse", "history", "retrieval", "startup")
+NEEDS_DATABASE = {"chat", "batch_chat", "history", "retrieval"}
+
+
+def _levels(value: str):
+    return [int(level) for level in value.split(",") if level]
+
+
+def _run_scenario(name: str, args, llm: FakeLLMConfig, database_url: str) -> dict:
+    if name == "chat":
+        from benchmarks.suite import chat
+        return chat.run(database_url, llm, args.chat_endpoints.split(","), args.concurrency,
+                        args.chat_requests, workers=args.workers)
+    if name == "batch_chat":
+        from benchmarks.suite import batch_chat
+        return batch_chat.run(database_url, llm, args.batch_concurrency, per_slot=args.batch_per_slot,
+                              workers=args.workers)
+    if name == "parse":
+        from benchmarks.suite import parse
+        return parse.run(args.parse_docs, args.parse_pages, args.parse_concurrency, args.engine_workers,
+                         window_pages=args.window_pages, long_pages=args.long_pdf_pages, seed=args.seed)
+    if name == "history":
+        from benchmarks.suite import history
+        return history.run(args.history_rows, args.concurrency, batch_size=args.history_batch_size)
+    if name == "retrieval":
+        from benchmarks.suite import retrieval
+        return retrieval.run(args.papers, args.chunks_per_paper, args.concurrency, dim=args.dim,
+                             repeats=args.search_repeats, llm=llm, seed=args.seed)
+    if name == "startup":
+        from benchmarks.suite import startup
+        return startup.run(runs=args.startup_runs)
+    raise ValueError(f"Unknown scenario {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--out", type=Path, default=None,
+                        help="result file; defaults to bench-results/<commit>.json")
+    parser.add_argument("--concurrency", type=_levels, default=[1, 8, 32], help="levels, e.g. 1,8,32")
+    parser.add_argument("--seed", type=int, default=0)
+    llm_group = parser.add_argument_group("fake LLM")
+    llm_group.add_argument("--tokens-per-s", type=float, default=FakeLLMConfig.tokens_per_s)
+    llm_group.add_argument("--ttft-ms", type=float, default=FakeLLMConfig.ttft_ms)
+    llm_group.add_argument("--output-tokens", type=int, default=FakeLLMConfig.output_tokens)
+    llm_group.add_argument("--embed-latency-ms", type=float, default=FakeLLMConfig.embed_latency_ms)
+    chat_group = parser.add_argument_group("chat")
+    chat_group.add_argument("--chat-endpoints", default="chat_ollama,chat_nvidia,chat_ollama_stream,chat_nvidia_stream")
+    chat_group.add_argument("--chat-requests", type=int, default=200, help="requests per concurrency level")
+    chat_group.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    batch_group = parser.add_argument_group("batch_chat")
+    batch_group.add_argument("--batch-concurrency", type=_levels, default=[1, 4, 16, 64])
+    batch_group.add_argument("--batch-per-slot", type=int, default=4, help="queries per concurrency slot")
+    parse_group = parser.add_argument_group("parse")
+    parse_group.add_argument("--parse-docs", type=int, default=20)
+    parse_group.add_argument("--parse-pages", type=parse_range, default=(4, 12))
+    parse_group.add_argument("--parse-concurrency", type=_levels, default=[1, 4])
+    parse_group.add_argument("--engine-workers", type=int, default=min(4, os.cpu_count() or 1),
+                             help="PdfParseEngine processes; 0 to skip")
+    parse_group.add_argument("--window-pages", type=int, default=10, help="pages per parallel parse window")
+    parse_group.add_argument("--long-pdf-pages", type=int, default=100,
+                             help="pages of the single-paper scaling run; 0 to skip")
+    history_group = parser.add_argument_group("history")
+    history_group.add_argument("--history-rows", type=int, default=20_000)
+    history_group.add_argument("--history-batch-size", type=int, default=500)
+    retrieval_group = parser.add_argument_group("retrieval")
+    retrieval_group.add_argument("--papers", type=int, default=5_000)
+    retrieval_group.add_argument("--chunks-per-paper", type=int, default=20)
+    retrieval_group.add_argument("--dim", type=int, default=768)
+    retrieval_group.add_argument("--search-repeats", type=int, default=50)
+    startup_group = parser.add_argument_group("startup")
+    startup_group.add_argument("--startup-runs", type=int, default=5, help="fresh interpreters per target")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    scenarios = [name for name in args.scenarios.split(",") if name]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    llm = FakeLLMConfig(tokens_per_s=args.tokens_per_s, ttft_ms=args.ttft_ms, output_tokens=args.output_tokens,
+                        embed_latency_ms=args.embed_latency_ms)
+    report = {"meta": run_metadata(), "config": {k: v for k, v in vars(args).items() if k != "out"},
+              "scenarios": {}}
+
+    with ExitStack() as stack:
+        database_url = None
+        if NEEDS_DATABASE & set(scenarios):
+            postgres = stack.enter_context(LocalPostgres())
+            database_url = postgres.url
+            report["meta"]["postgres"] = postgres.kind
+            # The engine reads DATABASE_URL on first use, in this process and in uvicorn's.
+            os.environ["DATABASE_URL"] = database_url
+            asyncio.run(prepare_schema())
+        for name in scenarios:
+            started = time.perf_counter()
+            try:
+                result = _run_scenario(name, args, llm, database_url)
+            except Exception as e:
+                logging.exception("Scenario %s failed", name)
+                result = {"error": f"{type(e).__name__}: {e}", "traceback": traceback.format_exc()}
+            result["elapsed_s"] = round(time.perf_counter() - started, 2)
+            report["scenarios"][name] = result
+
+    out = args.out or Path("bench-results") / f"{(report['meta']['git_commit'] or 'unknown')[:12]}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2, default=str))
+    print(json.dumps(report["scenarios"], indent=2, default=str))
+    print(f"Results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Cold-start import time of the API and the Airflow DAG files.
+
+Each target is imported in a fresh interpreter with ``-X importtime``, the
+way uvicorn imports ``src.main`` and the Airflow scheduler parses a DAG file.
+The report keeps the interpreter's wall time (minus an empty interpreter's),
+the summed import time (modules an empty interpreter already loads are left
+out), and where it goes: the slowest imports at the first two nesting levels
+and the self time per top-level package. DATABASE_URL is removed from the
+environment, so a module that connects or reads config at import fails here.
+
+As a standalone check, ``--budget-ms`` fails (exit status 1) when a target's
+median wall time is over budget:
+
+Usage:
+    python -m benchmarks.suite.startup --budget-ms api=1500,ingestion_dag=800
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Sequence, Set
+
+ROOT = Path(__file__).resolve().parents[2]
+TARGETS: Dict[str, str] = {
+    "api": "import src.main",
+    "ingestion_dag": "import runpy; runpy.run_path('airflow/dags/arxiv_ingestion_dag.py')",
+    "example_dag": "import runpy; runpy.run_path('airflow/dags/exampledag.py')",
+}
+TOP = 15
+
+
+def _interpreter(statement: str, env: Dict[str, str]) -> subprocess.CompletedProcess:
+    return subprocess.run([sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT, env=env,
+                          capture_output=True, text=True)
+
+
+def parse_importtime(stderr: str):
+    """(depth, module, self_us, cumulative_us) for each line of ``-X importtime`` output."""
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        module = name.lstrip(" ")
+        # One leading space, then two per nesting level.
+        yield (len(name) - len(module) - 1) // 2, module, int(self_us), int(cumulative_us)
+
+
+def profile(statement: str, runs: int, env: Dict[str, str], baseline_ms: float,
+            startup_modules: Set[str]) -> Dict[str, object]:
+    walls = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = _interpreter(statement, env)
+        walls.append((time.perf_counter() - started) * 1000 - baseline_ms)
+        if result.returncode != 0:
+            return {"error": (result.stderr.strip().splitlines() or ["exit status %d" % result.returncode])[-1]}
+
+    # Breakdown of the last run; by then the bytecode caches are warm, as in a deployed image.
+    rows = [row for row in parse_importtime(result.stderr) if row[1] not in startup_modules]
+    top_level = [row for row in rows if row[0] == 0]
+    slowest = sorted((row for row in rows if row[0] <= 1), key=lambda row: row[3], reverse=True)
+    packages = defaultdict(int)
+    for _, module, self_us, _ in rows:
+        packages[module.split(".", 1)[0]] += self_us
+    return {
+        "wall_ms": round(statistics.median(walls), 1),
+        "wall_min_ms": round(min(walls), 1),
+        "import_ms": round(sum(row[3] for row in top_level) / 1000, 1),
+        "modules": len(rows),
+        "slowest_imports": {module: round(cumulative / 1000, 1) for _, module, _, cumulative in slowest[:TOP]},
+        "package_self": {name: round(us / 1000, 1)
+                         for name, us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:TOP]},
+    }
+
+
+def run(targets: Sequence[str] = tuple(TARGETS), runs: int = 5) -> Dict[str, object]:
+    env = {key: value for key, value in os.environ.items() if key != "DATABASE_URL"}
+    # Startup cost of the interpreter itself, subtracted from every wall time.
+    baseline = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = _interpreter("pass", env)
+        baseline.append((time.perf_counter() - started) * 1000)
+    baseline_ms = statistics.median(baseline)
+    startup_modules = {module for _, module, _, _ in parse_importtime(result.stderr)}
+    report = {"runs": runs, "interpreter_ms": round(baseline_ms, 1), "targets": {}}
+    for name in targets:
+        report["targets"][name] = profile(TARGETS[name], runs, env, baseline_ms, startup_modules)
+    return report
+
+
+def _budgets(value: str) -> Dict[str, float]:
+    budgets = {}
+    for item in value.split(","):
+        name, _, budget = item.partition("=")
+        if not budget:
+            name, budget = "api", name
+        if name not in TARGETS:
+            raise argparse.ArgumentTypeError(f"unknown target {name}")
+        budgets[name] = float(budget)
+    return budgets
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", default=",".join(TARGETS))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=_budgets, default={},
+                        help="median wall-time budgets, e.g. api=1500,ingestion_dag=800 (a bare number is the api's)")
+    args = parser.parse_args()
+
+    targets = [name for name in args.targets.split(",") if name]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+    report = run(sorted(set(targets) | set(args.budget_ms), key=list(TARGETS).index), args.runs)
+    print(json.dumps(report, indent=2))
+
+    failures = []
+    for name, budget in args.budget_ms.items():
+        result = report["targets"][name]
+        if "error" in result:
+            failures.append(f"{name}: import failed: {result['error']}")
+        elif result["wall_ms"] > budget:
+            failures.append(f"{name}: {result['wall_ms']} ms > budget {budget:g} ms")
+    for failure in failures:
+        print(f"OVER BUDGET {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,29 +1,68 @@
 import os
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import time
+from functools import lru_cache
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from src.db.models import Base
+from src.services.metrics.instruments import DB_COMMIT_SECONDS
+
+
+def database_url() -> str:
+    # Expect DATABASE_URL from Docker/Compose envs.
+    # Example: postgresql+asyncpg://user:pass@db:5432/arxivmind_db
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise RuntimeError("DATABASE_URL is not set. Make sure it's provided via Docker Compose/.env")
+    return url
+
+
+@lru_cache(maxsize=None)
+def get_engine() -> AsyncEngine:
+    """The process-wide engine, created on first use rather than at import.
+
+    Importing the db modules (e.g. while Airflow parses a DAG file) therefore
+    neither needs DATABASE_URL nor loads the asyncpg driver.
+    """
+    return create_async_engine(
+        database_url(),
+        echo=False,
+        future=True,
+        pool_pre_ping=True,  # healthier long-running connections
+    )
+
+
+class TimedAsyncSession(AsyncSession):
+    """AsyncSession that records how long each commit takes."""
+
+    async def commit(self) -> None:
+        started = time.perf_counter()
+        try:
+            await super().commit()
+        finally:
+            DB_COMMIT_SECONDS.observe(time.perf_counter() - started)
+
+
+@lru_cache(maxsize=None)
+def get_sessionmaker() -> sessionmaker:
+    return sessionmaker(
+        bind=get_engine(),
+        class_=TimedAsyncSession,
+        expire_on_commit=False,
+        autoflush=False
+    )
+
+
+class _LazySessionFactory:
+    """Callable stand-in for the sessionmaker that builds the engine on the first session."""
+
+    def __call__(self, **kwargs) -> AsyncSession:
+        return get_sessionmaker()(**kwargs)
+
+
+AsyncSessionLocal = _LazySessionFactory()
 
-# Expect DATABASE_URL from Docker/Compose envs.
-# Example: postgresql+asyncpg://user:pass@db:5432/arxivmind_db
-DATABASE_URL = os.getenv("DATABASE_URL")
-if not DATABASE_URL:
-    raise RuntimeError("DATABASE_URL is not set. Make sure it's provided via Docker Compose/.env")
-
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=False,
-    future=True,
-    pool_pre_ping=True,  # healthier long-running connections
-)
-
-AsyncSessionLocal= sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autoflush=False
-)
 
 async def init_db() -> None:
     """Run DDL once on startup."""
-    async with engine.begin() as conn:
+    async with get_engine().begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -0,0 +1,151 @@
+"""Partition chat_history by month and key it by session
+
+chat_history becomes a table range-partitioned on user_query_timestamp, one
+partition per month plus a DEFAULT catch-all. It gains a composite
+(session_id, user_query_timestamp, id) index for reading a conversation back
+in order. The B-tree indexes on the free-text user_query/model_response
+columns are dropped: they made every insert expensive and long responses
+could exceed the B-tree row size limit.
+
+Existing rows are copied into the new table. On a fresh database, where
+init_db already created the partitioned table, only the partitions are
+created.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 00:00:00
+
+"""
+from datetime import date, datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3
+
+
+def _relkind(name: str):
+    return op.get_bind().execute(
+        sa.text(
+            "SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE c.relname = :name AND n.nspname = current_schema()"
+        ),
+        {"name": name},
+    ).scalar()
+
+
+def _add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_partitions(first: date, last: date) -> None:
+    month = date(first.year, first.month, 1)
+    while month <= last:
+        following = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE IF NOT EXISTS chat_history_y{month.year:04d}m{month.month:02d} "
+            f"PARTITION OF chat_history FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+        )
+        month = following
+    op.execute("CREATE TABLE IF NOT EXISTS chat_history_default PARTITION OF chat_history DEFAULT")
+
+
+def upgrade() -> None:
+    today = datetime.utcnow().date()
+    kind = _relkind("chat_history")
+    if kind == "p":
+        _create_partitions(today, _add_months(today, MONTHS_AHEAD))
+        return
+
+    legacy = kind is not None
+    if legacy:
+        # Free the names the new table needs (table, primary key, id sequence).
+        op.execute("ALTER TABLE chat_history RENAME TO chat_history_legacy")
+        op.execute("ALTER INDEX IF EXISTS chat_history_pkey RENAME TO chat_history_legacy_pkey")
+        op.execute("ALTER SEQUENCE IF EXISTS chat_history_id_seq RENAME TO chat_history_legacy_id_seq")
+        op.execute("ALTER TABLE chat_history_legacy ADD COLUMN IF NOT EXISTS session_id VARCHAR")
+
+    op.execute(
+        """
+        CREATE TABLE chat_history (
+            id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+            user_query_timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            session_id VARCHAR,
+            user_query TEXT,
+            model_response TEXT,
+            model_used VARCHAR,
+            model_response_timestamp TIMESTAMP WITHOUT TIME ZONE,
+            PRIMARY KEY (id, user_query_timestamp)
+        ) PARTITION BY RANGE (user_query_timestamp)
+        """
+    )
+    op.create_index(
+        "ix_chat_history_session_id_ts", "chat_history", ["session_id", "user_query_timestamp", "id"]
+    )
+
+    first = today
+    if legacy:
+        oldest = op.get_bind().execute(sa.text(
+            "SELECT min(COALESCE(user_query_timestamp, model_response_timestamp)) FROM chat_history_legacy"
+        )).scalar()
+        if oldest is not None:
+            first = min(first, oldest.date())
+    _create_partitions(first, _add_months(today, MONTHS_AHEAD))
+
+    if legacy:
+        op.execute(
+            """
+            INSERT INTO chat_history (id, user_query_timestamp, session_id, user_query, model_response,
+                                      model_used, model_response_timestamp)
+            SELECT id, COALESCE(user_query_timestamp, model_response_timestamp, now() AT TIME ZONE 'utc'),
+                   session_id, user_query, model_response, model_used, model_response_timestamp
+            FROM chat_history_legacy
+            """
+        )
+        op.execute(
+            "SELECT setval(pg_get_serial_sequence('chat_history', 'id'), "
+            "(SELECT COALESCE(max(id), 0) + 1 FROM chat_history), false)"
+        )
+        op.execute("DROP TABLE chat_history_legacy")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE chat_history RENAME TO chat_history_partitioned")
+    op.execute("ALTER INDEX IF EXISTS chat_history_pkey RENAME TO chat_history_partitioned_pkey")
+    op.execute("ALTER INDEX IF EXISTS ix_chat_history_session_id_ts RENAME TO ix_chat_history_partitioned_session_id_ts")
+    op.execute("ALTER SEQUENCE IF EXISTS chat_history_id_seq RENAME TO chat_history_partitioned_id_seq")
+    op.create_table(
+        "chat_history",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("user_query", sa.String()),
+        sa.Column("model_response", sa.String()),
+        sa.Column("model_used", sa.String()),
+        sa.Column("session_id", sa.String(), nullable=True),
+        sa.Column("user_query_timestamp", sa.DateTime()),
+        sa.Column("model_response_timestamp", sa.DateTime()),
+    )
+    for column in ("id", "user_query", "model_response", "model_used", "session_id"):
+        op.create_index(f"ix_chat_history_{column}", "chat_history", [column])
+    op.execute(
+        """
+        INSERT INTO chat_history (id, user_query, model_response, model_used, session_id,
+                                  user_query_timestamp, model_response_timestamp)
+        SELECT id, user_query, model_response, model_used, session_id,
+               user_query_timestamp, model_response_timestamp
+        FROM chat_history_partitioned
+        """
+    )
+    op.execute(
+        "SELECT setval(pg_get_serial_sequence('chat_history', 'id'), "
+        "(SELECT COALESCE(max(id), 0) + 1 FROM chat_history), false)"
+    )
+    op.execute("DROP TABLE chat_history_partitioned CASCADE")
@@ -0,0 +1,127 @@
+"""Move parsed paper content out of arxiv_papers
+
+raw_text, sections and references move from arxiv_papers into
+paper_contents. There they are stored zlib-compressed in bytea columns with
+STORAGE EXTERNAL, so queries that list or filter papers only read metadata
+pages, and the full text can be streamed in slices. Existing content is
+compressed and copied over in batches.
+
+On a fresh database, arxiv_papers does not exist yet and init_db creates
+both tables, so this migration does nothing there.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 00:00:00
+
+"""
+import json
+import zlib
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+CONTENT_COLUMNS = ("raw_text", "sections", "references")
+
+
+def _exists(table: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def _columns(table: str) -> set:
+    return {column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def _compress(value) -> Union[bytes, None]:
+    if value is None:
+        return None
+    raw = value if isinstance(value, str) else json.dumps(value)
+    return zlib.compress(raw.encode("utf-8"), 6)
+
+
+def upgrade() -> None:
+    if not _exists("arxiv_papers") or not set(CONTENT_COLUMNS) <= _columns("arxiv_papers"):
+        return
+
+    if not _exists("paper_contents"):
+        op.create_table(
+            "paper_contents",
+            sa.Column("arxiv_id", sa.String(), sa.ForeignKey("arxiv_papers.arxiv_id", ondelete="CASCADE"),
+                      primary_key=True),
+            sa.Column("raw_text", sa.LargeBinary(), nullable=True),
+            sa.Column("sections", sa.LargeBinary(), nullable=True),
+            sa.Column("references", sa.LargeBinary(), nullable=True),
+            sa.Column("raw_text_chars", sa.Integer(), nullable=True),
+            sa.Column("compressed_bytes", sa.Integer(), nullable=True),
+            sa.Column("updated_at", sa.DateTime(), nullable=True),
+        )
+        op.execute(
+            'ALTER TABLE paper_contents ALTER COLUMN raw_text SET STORAGE EXTERNAL, '
+            'ALTER COLUMN sections SET STORAGE EXTERNAL, ALTER COLUMN "references" SET STORAGE EXTERNAL'
+        )
+
+    bind = op.get_bind()
+    contents = sa.table(
+        "paper_contents",
+        *(sa.column(name) for name in ("arxiv_id", *CONTENT_COLUMNS, "raw_text_chars", "compressed_bytes", "updated_at")),
+    )
+    last_id = ""
+    while True:
+        rows = bind.execute(sa.text(
+            'SELECT arxiv_id, raw_text, sections, "references", updated_at FROM arxiv_papers '
+            "WHERE arxiv_id > :last_id AND (raw_text IS NOT NULL OR sections IS NOT NULL "
+            'OR "references" IS NOT NULL) ORDER BY arxiv_id LIMIT :limit'
+        ), {"last_id": last_id, "limit": BATCH_SIZE}).all()
+        if not rows:
+            break
+        values = []
+        for row in rows:
+            compressed = {name: _compress(getattr(row, name)) for name in CONTENT_COLUMNS}
+            values.append({
+                "arxiv_id": row.arxiv_id,
+                **compressed,
+                "raw_text_chars": len(row.raw_text) if row.raw_text is not None else None,
+                "compressed_bytes": sum(len(value) for value in compressed.values() if value is not None),
+                "updated_at": row.updated_at,
+            })
+        bind.execute(contents.insert(), values)
+        last_id = rows[-1].arxiv_id
+
+    for column in CONTENT_COLUMNS:
+        op.drop_column("arxiv_papers", column)
+
+
+def downgrade() -> None:
+    op.add_column("arxiv_papers", sa.Column("raw_text", sa.Text(), nullable=True))
+    op.add_column("arxiv_papers", sa.Column("sections", sa.JSON(), nullable=True))
+    op.add_column("arxiv_papers", sa.Column("references", sa.JSON(), nullable=True))
+
+    bind = op.get_bind()
+    last_id = ""
+    while True:
+        rows = bind.execute(sa.text(
+            'SELECT arxiv_id, raw_text, sections, "references" FROM paper_contents '
+            "WHERE arxiv_id > :last_id ORDER BY arxiv_id LIMIT :limit"
+        ), {"last_id": last_id, "limit": BATCH_SIZE}).all()
+        if not rows:
+            break
+        for row in rows:
+            decompressed = {
+                name: zlib.decompress(getattr(row, name)).decode("utf-8") if getattr(row, name) is not None else None
+                for name in CONTENT_COLUMNS
+            }
+            bind.execute(sa.text(
+                'UPDATE arxiv_papers SET raw_text = :raw_text, sections = CAST(:sections AS json), '
+                '"references" = CAST(:references AS json) WHERE arxiv_id = :arxiv_id'
+            ), {"arxiv_id": row.arxiv_id, **decompressed})
+        last_id = rows[-1].arxiv_id
+
+    op.drop_table("paper_contents")
@@ -0,0 +1,52 @@
+"""Store extracted figures and tables with the parsed paper content
+
+Adds two zlib-compressed JSON columns to paper_contents, stored EXTERNAL like
+the others. figures holds captions and blob-store hashes, never image bytes.
+tables holds the tables column by column. Existing rows keep NULL until their
+paper is parsed again.
+
+On a fresh database, init_db creates paper_contents with both columns, so
+this migration does nothing there.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+NEW_COLUMNS = ("figures", "tables")
+
+
+def _columns(table: str) -> set:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return set()
+    return {column["name"] for column in inspector.get_columns(table)}
+
+
+def upgrade() -> None:
+    existing = _columns("paper_contents")
+    if not existing:
+        return
+    for column in NEW_COLUMNS:
+        if column not in existing:
+            op.add_column("paper_contents", sa.Column(column, sa.LargeBinary(), nullable=True))
+            op.execute(f"ALTER TABLE paper_contents ALTER COLUMN {column} SET STORAGE EXTERNAL")
+
+
+def downgrade() -> None:
+    existing = _columns("paper_contents")
+    for column in NEW_COLUMNS:
+        if column in existing:
+            op.drop_column("paper_contents", column)
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import declarative_base
-from sqlalchemy import Integer, JSON, Boolean, Column, DateTime, String, Text
+from sqlalchemy import BigInteger, DDL, Identity, Index, Integer, JSON, Boolean, Column, DateTime, ForeignKey, LargeBinary, String, Text, UniqueConstraint, event
 import uuid
 from datetime import datetime, timezone
 from sqlalchemy.dialects.postgresql import UUID
@@ -16,11 +16,20 @@ class FirstTable(Base):
 
 class ChatHistory(Base):
     __tablename__ = "chat_history"
-    id = Column(Integer, primary_key=True, index=True)
-    user_query = Column(String, index=True)
-    model_response = Column(String, index=True)
-    model_used = Column(String, index=True)
-    user_query_timestamp = Column(DateTime)
+    # Range-partitioned by month on user_query_timestamp (partitions are managed by the
+    # alembic migration and ensure_chat_history_partitions), so the partition key is part
+    # of the primary key. The free-text columns are deliberately not indexed; reads go
+    # through (session_id, user_query_timestamp, id).
+    __table_args__ = (
+        Index("ix_chat_history_session_id_ts", "session_id", "user_query_timestamp", "id"),
+        {"postgresql_partition_by": "RANGE (user_query_timestamp)"},
+    )
+    id = Column(BigInteger, Identity(), primary_key=True)
+    user_query_timestamp = Column(DateTime, primary_key=True, default=datetime.utcnow)
+    session_id = Column(String, nullable=True)
+    user_query = Column(Text)
+    model_response = Column(Text)
+    model_used = Column(String)
     model_response_timestamp = Column(DateTime)
 
 
@@ -37,10 +46,8 @@ class Paper(Base):
     published_date = Column(DateTime, nullable=False)
     pdf_url = Column(String, nullable=False)
 
-    # Parsed PDF content (added for comprehensive storage)
-    raw_text = Column(Text, nullable=True)
-    sections = Column(JSON, nullable=True)
-    references = Column(JSON, nullable=True)
+    # Parsed PDF content lives in paper_contents (PaperContent), so listing and
+    # filtering papers never touches it.
 
     # PDF processing metadata
     parser_used = Column(String, nullable=True)
@@ -53,4 +60,50 @@ class Paper(Base):
     updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
 
-__all__ = ["Base", "FirstTable", "ChatHistory"]
+class PaperContent(Base):
+    """Parsed PDF content of a paper, kept out of arxiv_papers.
+
+    Each column holds zlib-compressed data (UTF-8 text or JSON). Columns are
+    stored EXTERNAL (out of line, no second TOAST compression) so that
+    ``substring`` can read the text in slices without detoasting it whole.
+    """
+    __tablename__ = "paper_contents"
+
+    arxiv_id = Column(String, ForeignKey("arxiv_papers.arxiv_id", ondelete="CASCADE"), primary_key=True)
+    raw_text = Column(LargeBinary, nullable=True)
+    sections = Column(LargeBinary, nullable=True)
+    references = Column(LargeBinary, nullable=True)
+    figures = Column(LargeBinary, nullable=True)
+    tables = Column(LargeBinary, nullable=True)
+    raw_text_chars = Column(Integer, nullable=True)
+    compressed_bytes = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+
+event.listen(
+    PaperContent.__table__,
+    "after_create",
+    DDL(
+        "ALTER TABLE paper_contents ALTER COLUMN raw_text SET STORAGE EXTERNAL, "
+        "ALTER COLUMN sections SET STORAGE EXTERNAL, ALTER COLUMN \"references\" SET STORAGE EXTERNAL, "
+        "ALTER COLUMN figures SET STORAGE EXTERNAL, ALTER COLUMN tables SET STORAGE EXTERNAL"
+    ).execute_if(dialect="postgresql"),
+)
+
+
+class Chunk(Base):
+    __tablename__ = "paper_chunks"
+    __table_args__ = (UniqueConstraint("arxiv_id", "chunk_index", name="uq_paper_chunks_arxiv_id_chunk_index"),)
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    arxiv_id = Column(String, ForeignKey("arxiv_papers.arxiv_id", ondelete="CASCADE"), nullable=False)
+    chunk_index = Column(Integer, nullable=False)
+    section_index = Column(Integer, nullable=False)
+    section_title = Column(String, nullable=False)
+    start_char = Column(Integer, nullable=False)
+    end_char = Column(Integer, nullable=False)
+    token_count = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+
+
+__all__ = ["Base", "FirstTable", "ChatHistory", "Paper", "PaperContent", "Chunk"]
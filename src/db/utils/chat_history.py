@@ -1,9 +1,10 @@
-from typing import Optional
-from sqlalchemy import select
+import base64
+from typing import List, Optional, Set, Tuple
+from sqlalchemy import select, text, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.db.database import AsyncSessionLocal
+from src.db.database import AsyncSessionLocal, get_engine
 from src.db.models import FirstTable, ChatHistory
-from datetime import datetime
+from datetime import date, datetime
 
 async def insert_into_first_table(name: str = "Temp", session: Optional[AsyncSession] = None) -> int:
     """
@@ -34,6 +35,7 @@ async def insert_into_chat_history(
     user_query_timestamp: Optional[datetime] = None,
     model_response_timestamp: Optional[datetime] = None,
     session: Optional[AsyncSession] = None,
+    session_id: Optional[str] = None,
 ) -> int:
 
 
@@ -42,7 +44,8 @@ async def insert_into_chat_history(
             user_query=user_query,
             model_response=model_response,
             model_used=model_used,
-            user_query_timestamp=user_query_timestamp,
+            session_id=session_id,
+            user_query_timestamp=user_query_timestamp or datetime.utcnow(),
             model_response_timestamp=model_response_timestamp,
         )
         session.add(entry)
@@ -54,9 +57,127 @@ async def insert_into_chat_history(
             user_query=user_query,
             model_response=model_response,
             model_used=model_used,
-            user_query_timestamp=user_query_timestamp,
+            session_id=session_id,
+            user_query_timestamp=user_query_timestamp or datetime.utcnow(),
             model_response_timestamp=model_response_timestamp,
         )
         local_session.add(entry)
         await local_session.commit()
         return entry.id
+
+
+async def fetch_session_turns(
+    session_id: str,
+    limit: int = 20,
+    session: Optional[AsyncSession] = None,
+) -> List[Tuple[str, str]]:
+    """
+    Return the last `limit` (user_query, model_response) turns of a conversation, oldest first.
+    If a session is provided, reuse it. Otherwise create a short-lived one.
+    """
+    stmt = (
+        select(ChatHistory.user_query, ChatHistory.model_response)
+        .where(ChatHistory.session_id == session_id)
+        .order_by(ChatHistory.user_query_timestamp.desc(), ChatHistory.id.desc())
+        .limit(limit)
+    )
+    if session is not None:
+        rows = (await session.execute(stmt)).all()
+    else:
+        async with AsyncSessionLocal() as local_session:
+            rows = (await local_session.execute(stmt)).all()
+    return [(row.user_query, row.model_response) for row in reversed(rows)]
+
+
+async def fetch_session_turn_keys(
+    session_id: str,
+    session: Optional[AsyncSession] = None,
+) -> Set[Tuple[str, str]]:
+    """
+    Return the distinct (user_query, model_used) pairs stored for a session, e.g. the completed items of a batch job.
+    If a session is provided, reuse it. Otherwise create a short-lived one.
+    """
+    stmt = select(ChatHistory.user_query, ChatHistory.model_used).where(ChatHistory.session_id == session_id)
+    if session is not None:
+        rows = (await session.execute(stmt)).all()
+    else:
+        async with AsyncSessionLocal() as local_session:
+            rows = (await local_session.execute(stmt)).all()
+    return {(row.user_query, row.model_used) for row in rows}
+
+
+def encode_history_cursor(row: ChatHistory) -> str:
+    """Opaque keyset cursor pointing just after `row`."""
+    raw = f"{row.user_query_timestamp.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_history_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        timestamp, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid history cursor: {cursor!r}") from e
+
+
+async def fetch_session_history_page(
+    session_id: str,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    session: Optional[AsyncSession] = None,
+) -> Tuple[List[ChatHistory], Optional[str]]:
+    """
+    Return one page of a conversation in chronological order plus the cursor of the next page.
+    Keyset pagination on (user_query_timestamp, id): each page is a single range scan of
+    ix_chat_history_session_id_ts, however deep into the conversation it starts.
+    If a session is provided, reuse it. Otherwise create a short-lived one.
+    """
+    stmt = select(ChatHistory).where(ChatHistory.session_id == session_id)
+    if cursor is not None:
+        stmt = stmt.where(
+            tuple_(ChatHistory.user_query_timestamp, ChatHistory.id) > tuple_(*decode_history_cursor(cursor))
+        )
+    stmt = stmt.order_by(ChatHistory.user_query_timestamp, ChatHistory.id).limit(limit + 1)
+
+    if session is not None:
+        rows = list((await session.execute(stmt)).scalars())
+    else:
+        async with AsyncSessionLocal() as local_session:
+            rows = list((await local_session.execute(stmt)).scalars())
+
+    next_cursor = encode_history_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def _add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+async def ensure_chat_history_partitions(months_ahead: int = 3) -> List[str]:
+    """
+    Create the monthly chat_history partitions from the current month through `months_ahead`
+    months ahead, so rows never fall into the DEFAULT partition. Safe to call on every startup.
+    Does nothing (and returns []) if chat_history is not partitioned yet, i.e. the
+    alembic migration has not been applied to a pre-existing table.
+    """
+    async with get_engine().begin() as conn:
+        kind = (await conn.execute(text(
+            "SELECT c.relkind FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE c.relname = 'chat_history' AND n.nspname = current_schema()"
+        ))).scalar()
+        if kind != "p":
+            return []
+
+        today = datetime.utcnow().date()
+        names = []
+        for n in range(months_ahead + 1):
+            month = _add_months(today, n)
+            name = f"chat_history_y{month.year:04d}m{month.month:02d}"
+            await conn.execute(text(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF chat_history "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+            ))
+            names.append(name)
+        await conn.execute(text("CREATE TABLE IF NOT EXISTS chat_history_default PARTITION OF chat_history DEFAULT"))
+        return names
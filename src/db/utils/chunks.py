@@ -0,0 +1,124 @@
+from itertools import islice
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.database import AsyncSessionLocal
+from src.db.models import Chunk, Paper
+from src.schemas.chunking.models import PaperChunk
+
+
+async def _write_chunks(session: AsyncSession, arxiv_id: str, chunks: Iterable[PaperChunk],
+                        batch_size: int) -> Tuple[int, List[int]]:
+    result = await session.execute(delete(Chunk).where(Chunk.arxiv_id == arxiv_id).returning(Chunk.id))
+    superseded = list(result.scalars().all())
+    written = 0
+    iterator = iter(chunks)
+    # Pull the stream one batch at a time so only batch_size chunks are alive at once.
+    while batch := list(islice(iterator, batch_size)):
+        await session.execute(pg_insert(Chunk).values([chunk.model_dump() for chunk in batch]))
+        written += len(batch)
+    await session.commit()
+    return written, superseded
+
+
+async def replace_paper_chunks(
+    arxiv_id: str,
+    chunks: Iterable[PaperChunk],
+    batch_size: int = 1000,
+    session: Optional[AsyncSession] = None,
+) -> Tuple[int, List[int]]:
+    """
+    Replace all chunks of a paper with a (possibly streaming) iterable of chunks.
+    Old chunks are deleted and new ones inserted as multi-row batches in one transaction.
+    If a session is provided, reuse it. Otherwise create a short-lived one.
+
+    Args:
+        arxiv_id: Paper whose chunks are replaced
+        chunks: Chunks to write, e.g. SectionChunker.iter_chunks(...)
+        batch_size: Number of chunks per INSERT statement
+        session: Optional session to reuse
+
+    Returns:
+        (number of chunks written, ids of the deleted chunks), so the search
+        indexes can drop the chunks that were replaced
+    """
+    if session is not None:
+        return await _write_chunks(session, arxiv_id, chunks, batch_size)
+
+    async with AsyncSessionLocal() as local_session:
+        return await _write_chunks(local_session, arxiv_id, chunks, batch_size)
+
+
+async def fetch_chunks_with_papers(chunk_ids: Iterable[int], session: Optional[AsyncSession] = None) -> dict:
+    """
+    Load chunks and their papers' metadata for a set of chunk ids in one query.
+    Only metadata columns of arxiv_papers are selected.
+
+    Returns:
+        Mapping of chunk id to (Chunk row, paper metadata row)
+    """
+    chunk_ids = list(set(chunk_ids))
+    if not chunk_ids:
+        return {}
+    stmt = (
+        select(Chunk, Paper.title, Paper.categories, Paper.published_date, Paper.pdf_url)
+        .join(Paper, Paper.arxiv_id == Chunk.arxiv_id)
+        .where(Chunk.id.in_(chunk_ids))
+    )
+
+    async def run(db: AsyncSession) -> dict:
+        rows = (await db.execute(stmt)).all()
+        return {row.Chunk.id: row for row in rows}
+
+    if session is not None:
+        return await run(session)
+
+    async with AsyncSessionLocal() as local_session:
+        return await run(local_session)
+
+
+async def fetch_paper_chunk_texts(arxiv_ids: Iterable[str], session: Optional[AsyncSession] = None) -> List[Tuple[int, str]]:
+    """
+    Return (chunk id, text) for every chunk of the given papers, ordered by chunk id.
+    Used to feed new chunks to the vector and BM25 indexes.
+    """
+    arxiv_ids = list(set(arxiv_ids))
+    if not arxiv_ids:
+        return []
+    stmt = select(Chunk.id, Chunk.text).where(Chunk.arxiv_id.in_(arxiv_ids)).order_by(Chunk.id)
+
+    if session is not None:
+        rows = (await session.execute(stmt)).all()
+    else:
+        async with AsyncSessionLocal() as local_session:
+            rows = (await local_session.execute(stmt)).all()
+    return [(row.id, row.text) for row in rows]
+
+
+async def iter_chunk_filter_attributes(batch_size: int = 10000, session: Optional[AsyncSession] = None):
+    """
+    Stream (chunk id, paper categories, paper published_date) for every chunk.
+    Used to build the search filter bitmaps.
+    """
+    stmt = (
+        select(Chunk.id, Paper.categories, Paper.published_date)
+        .join(Paper, Paper.arxiv_id == Chunk.arxiv_id)
+        .execution_options(yield_per=batch_size)
+    )
+
+    async def run(db: AsyncSession):
+        result = await db.stream(stmt)
+        async for row in result:
+            yield row.id, row.categories, row.published_date
+
+    if session is not None:
+        async for row in run(session):
+            yield row
+        return
+
+    async with AsyncSessionLocal() as local_session:
+        async for row in run(local_session):
+            yield row
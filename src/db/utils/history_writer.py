@@ -0,0 +1,189 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+
+from src.db.database import AsyncSessionLocal
+from src.db.models import ChatHistory
+from src.services.metrics.instruments import CHAT_HISTORY_FLUSH_ROWS, CHAT_HISTORY_FLUSH_SECONDS, QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+# A queued row and, for ``submit(wait=True)``, the future resolved once it is written
+_Entry = Tuple[Dict[str, Any], Optional[asyncio.Future]]
+
+
+class ChatHistoryWriteError(Exception):
+    """A row submitted with ``wait=True`` was dropped after the flush retries."""
+
+
+class ChatHistoryWriter:
+    """Write-behind queue that persists chat_history rows in batches.
+
+    Requests enqueue a row and return immediately; a background task collects
+    rows until ``batch_size`` is reached or ``flush_interval_s`` has passed
+    since the first row of the batch, then writes them with one multi-row
+    INSERT. The queue is bounded, so when the database falls behind ``submit``
+    waits for room (backpressure) instead of buffering without limit.
+    ``stop`` drains everything still queued before returning. Callers that
+    must know a row is stored (e.g. resumable batch jobs) submit it with
+    ``wait=True``; it is still written as part of a batch.
+    """
+
+    def __init__(self, batch_size: int = 500, flush_interval_s: float = 0.2, max_queue: int = 10_000,
+                 max_retries: int = 3, retry_backoff_s: float = 0.5, session_factory=AsyncSessionLocal):
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.max_retries = max_retries
+        self.retry_backoff_s = retry_backoff_s
+        self.session_factory = session_factory
+        self._queue: "asyncio.Queue[_Entry]" = asyncio.Queue(maxsize=max_queue)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.stats: Dict[str, float] = {
+            "submitted": 0, "written": 0, "dropped": 0, "batches": 0, "errors": 0,
+            "backpressure_waits": 0, "last_batch_size": 0,
+            "last_flush_ms": 0.0, "max_flush_ms": 0.0, "total_flush_ms": 0.0,
+        }
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run(), name="chat-history-writer")
+            QUEUE_DEPTH.labels("chat_history").set_function(self._queue.qsize)
+
+    async def submit(
+        self,
+        user_query: str,
+        model_response: str,
+        model_used: str,
+        user_query_timestamp: Optional[datetime] = None,
+        model_response_timestamp: Optional[datetime] = None,
+        session_id: Optional[str] = None,
+        wait: bool = False,
+    ) -> None:
+        """Queue one chat_history row; waits if the queue is full and, with ``wait``, until it is written.
+
+        Raises:
+            ChatHistoryWriteError: With ``wait``, the row's batch was dropped
+        """
+        if self._stopping:
+            raise RuntimeError("ChatHistoryWriter is stopping; no new rows are accepted")
+        if wait and self._task is None:
+            raise RuntimeError("ChatHistoryWriter is not started; a waiting submit would never return")
+        row = {
+            "user_query": user_query,
+            "model_response": model_response,
+            "model_used": model_used,
+            "session_id": session_id,
+            # Partition key of chat_history, so it must always be set
+            "user_query_timestamp": user_query_timestamp or datetime.utcnow(),
+            "model_response_timestamp": model_response_timestamp,
+        }
+        written = asyncio.get_running_loop().create_future() if wait else None
+        if self._queue.full():
+            self.stats["backpressure_waits"] += 1
+        await self._queue.put((row, written))
+        self.stats["submitted"] += 1
+        if written is not None:
+            # Shielded: a caller that goes away does not take the row out of its batch
+            await asyncio.shield(written)
+
+    async def stop(self) -> None:
+        """Stop accepting rows, flush everything queued and wait for the writer task."""
+        self._stopping = True
+        if self._task is None:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _next_batch(self) -> List[_Entry]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval_s
+        while len(batch) < self.batch_size:
+            # Take whatever is already queued without waiting.
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.batch_size or remaining <= 0 or self._stopping:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._flush([row for row, _ in batch])
+            except ChatHistoryWriteError as e:
+                self._settle(batch, e)
+            except BaseException as e:
+                self._settle(batch, ChatHistoryWriteError(f"chat_history writer stopped: {e!r}"))
+                raise
+            else:
+                self._settle(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    @staticmethod
+    def _settle(batch: List[_Entry], error: Optional[ChatHistoryWriteError] = None) -> None:
+        """Tell the ``wait=True`` submitters of a batch whether it was written."""
+        for _, written in batch:
+            if written is None or written.done():
+                continue
+            if error is None:
+                written.set_result(None)
+            else:
+                written.set_exception(error)
+
+    async def _flush(self, batch: List[Dict[str, Any]]) -> None:
+        for attempt in range(self.max_retries + 1):
+            started = time.perf_counter()
+            try:
+                async with self.session_factory() as session:
+                    await session.execute(insert(ChatHistory).values(batch))
+                    await session.commit()
+            except Exception as e:
+                self.stats["errors"] += 1
+                if attempt == self.max_retries:
+                    self.stats["dropped"] += len(batch)
+                    CHAT_HISTORY_FLUSH_ROWS.labels("dropped").inc(len(batch))
+                    logger.error("Dropping %d chat_history rows after %d attempts: %s",
+                                 len(batch), attempt + 1, e)
+                    raise ChatHistoryWriteError(f"{len(batch)} rows dropped after {attempt + 1} attempts: {e}") from e
+                logger.warning("chat_history flush failed (attempt %d): %s", attempt + 1, e)
+                await asyncio.sleep(self.retry_backoff_s * 2 ** attempt)
+                continue
+            elapsed = time.perf_counter() - started
+            elapsed_ms = elapsed * 1000
+            CHAT_HISTORY_FLUSH_SECONDS.observe(elapsed)
+            CHAT_HISTORY_FLUSH_ROWS.labels("written").inc(len(batch))
+            self.stats["batches"] += 1
+            self.stats["written"] += len(batch)
+            self.stats["last_batch_size"] = len(batch)
+            self.stats["last_flush_ms"] = elapsed_ms
+            self.stats["total_flush_ms"] += elapsed_ms
+            self.stats["max_flush_ms"] = max(self.stats["max_flush_ms"], elapsed_ms)
+            return
+
+    def snapshot(self) -> Dict[str, float]:
+        batches = self.stats["batches"]
+        return {
+            **self.stats,
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "avg_batch_size": self.stats["written"] / batches if batches else 0.0,
+            "avg_flush_ms": self.stats["total_flush_ms"] / batches if batches else 0.0,
+        }
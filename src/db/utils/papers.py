@@ -0,0 +1,357 @@
+import base64
+import codecs
+import json
+import uuid
+import zlib
+from datetime import datetime, timezone
+from itertools import islice
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Tuple, Union
+
+from sqlalchemy import cast, func, literal_column, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.database import AsyncSessionLocal
+from src.db.models import Paper, PaperContent
+from src.schemas.database.paper_schema import PaperMetadata, PaperUpsertResult
+from src.schemas.pdf_parser.models import PaperFigure, PaperSection, PaperTable, PdfContent
+
+# Columns refreshed from arXiv on every harvest. Parsed-content and processing
+# columns are owned by the PDF pipeline and left untouched on conflict.
+METADATA_COLUMNS = ["title", "authors", "abstract", "categories", "published_date", "pdf_url"]
+JSON_COLUMNS = {"authors", "categories"}
+
+
+def _batched(rows: Iterable[PaperMetadata], batch_size: int) -> Iterator[List[PaperMetadata]]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def _build_upsert(batch: List[PaperMetadata]):
+    """One multi-row INSERT ... ON CONFLICT (arxiv_id) DO UPDATE for a batch.
+
+    The update only fires when a metadata column actually changed, so unchanged
+    rows are neither rewritten nor returned. ``xmax = 0`` distinguishes freshly
+    inserted rows from updated ones in the RETURNING clause.
+    """
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    # Postgres rejects ON CONFLICT touching the same row twice; last one wins.
+    deduped = {paper.arxiv_id: paper for paper in batch}
+    values = [
+        {
+            "id": uuid.uuid4(),
+            **paper.model_dump(),
+            "pdf_processed": False,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for paper in deduped.values()
+    ]
+
+    stmt = pg_insert(Paper).values(values)
+    table = Paper.__table__
+
+    def distinct(column: str):
+        if column in JSON_COLUMNS:
+            # json has no equality operator; compare as jsonb
+            return cast(table.c[column], JSONB).is_distinct_from(cast(stmt.excluded[column], JSONB))
+        return table.c[column].is_distinct_from(stmt.excluded[column])
+
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.arxiv_id],
+        set_={**{column: stmt.excluded[column] for column in METADATA_COLUMNS}, "updated_at": now},
+        where=or_(*(distinct(column) for column in METADATA_COLUMNS)),
+    ).returning(table.c.arxiv_id, literal_column("(xmax = 0)").label("inserted"))
+    return stmt, len(values)
+
+
+async def _upsert_batches(session: AsyncSession, papers: Iterable[PaperMetadata], batch_size: int) -> List[PaperUpsertResult]:
+    results = []
+    for batch_index, batch in enumerate(_batched(papers, batch_size)):
+        stmt, row_count = _build_upsert(batch)
+        returned = (await session.execute(stmt)).all()
+        await session.commit()
+        inserted = sum(1 for row in returned if row.inserted)
+        results.append(PaperUpsertResult(
+            batch_index=batch_index,
+            inserted=inserted,
+            updated=len(returned) - inserted,
+            unchanged=row_count - len(returned),
+        ))
+    return results
+
+
+async def upsert_papers(
+    papers: Iterable[Union[PaperMetadata, dict]],
+    batch_size: int = 500,
+    session: Optional[AsyncSession] = None,
+) -> List[PaperUpsertResult]:
+    """
+    Idempotently upsert arXiv papers keyed on arxiv_id.
+    Each batch is a single multi-row statement and a single commit.
+    If a session is provided, reuse it. Otherwise create a short-lived one.
+
+    Args:
+        papers: PaperMetadata objects (or dicts with the same fields)
+        batch_size: Number of papers per INSERT statement
+        session: Optional session to reuse
+
+    Returns:
+        One PaperUpsertResult per batch with inserted/updated/unchanged counts
+    """
+    rows = (paper if isinstance(paper, PaperMetadata) else PaperMetadata(**paper) for paper in papers)
+
+    if session is not None:
+        return await _upsert_batches(session, rows, batch_size)
+
+    async with AsyncSessionLocal() as local_session:
+        return await _upsert_batches(local_session, rows, batch_size)
+
+
+def _compress(raw: str) -> bytes:
+    return zlib.compress(raw.encode("utf-8"), 6)
+
+
+def _decompress(data: Optional[bytes]) -> Optional[str]:
+    return zlib.decompress(data).decode("utf-8") if data is not None else None
+
+
+async def _save_content(session: AsyncSession, arxiv_id: str, content: PdfContent, mark_processed: bool) -> int:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    values = {
+        "raw_text": _compress(content.raw_text),
+        "sections": _compress(json.dumps([section.model_dump() for section in content.sections])),
+        "references": _compress(json.dumps(content.references)),
+        "figures": _compress(json.dumps([figure.model_dump() for figure in content.figures])),
+        "tables": _compress(json.dumps([table.model_dump() for table in content.tables])),
+    }
+    compressed_bytes = sum(len(value) for value in values.values())
+    values.update(raw_text_chars=len(content.raw_text), compressed_bytes=compressed_bytes, updated_at=now)
+    stmt = pg_insert(PaperContent).values(arxiv_id=arxiv_id, **values)
+    await session.execute(stmt.on_conflict_do_update(index_elements=[PaperContent.arxiv_id], set_=values))
+    await session.execute(
+        update(Paper)
+        .where(Paper.arxiv_id == arxiv_id)
+        .values(
+            parser_used=content.parser_used,
+            parser_metadata=content.metadata,
+            **({"pdf_processed": True, "pdf_processing_date": now} if mark_processed else {}),
+            updated_at=now,
+        )
+    )
+    await session.commit()
+    return compressed_bytes
+
+
+async def save_paper_content(arxiv_id: str, content: PdfContent, session: Optional[AsyncSession] = None,
+                             mark_processed: bool = True) -> int:
+    """
+    Store the parsed content of a paper (compressed, in paper_contents) and mark it processed.
+    If a session is provided, reuse it. Otherwise create a short-lived one.
+
+    Args:
+        arxiv_id: Paper the content belongs to (must exist in arxiv_papers)
+        content: Parser output
+        session: Optional session to reuse
+        mark_processed: Set pdf_processed now; pass False when a later step (e.g. indexing)
+            has to succeed first and will call mark_papers_processed
+
+    Returns:
+        Compressed size in bytes
+    """
+    if session is not None:
+        return await _save_content(session, arxiv_id, content, mark_processed)
+
+    async with AsyncSessionLocal() as local_session:
+        return await _save_content(local_session, arxiv_id, content, mark_processed)
+
+
+async def fetch_processed_arxiv_ids(arxiv_ids: Iterable[str], session: Optional[AsyncSession] = None) -> set:
+    """
+    Return the subset of `arxiv_ids` whose PDF has already been processed.
+    If a session is provided, reuse it. Otherwise create a short-lived one.
+    """
+    arxiv_ids = list(set(arxiv_ids))
+    if not arxiv_ids:
+        return set()
+    stmt = select(Paper.arxiv_id).where(Paper.arxiv_id.in_(arxiv_ids), Paper.pdf_processed.is_(True))
+    if session is not None:
+        return set((await session.execute(stmt)).scalars())
+    async with AsyncSessionLocal() as local_session:
+        return set((await local_session.execute(stmt)).scalars())
+
+
+async def fetch_unprocessed_papers(
+    categories: List[str],
+    published_since: datetime,
+    limit: int = 1000,
+    session: Optional[AsyncSession] = None,
+) -> List[Paper]:
+    """
+    Papers in any of `categories`, published since `published_since`, whose PDF is not processed yet
+    (e.g. a download or parse failed in an earlier ingestion run). Oldest first, at most `limit`.
+    If a session is provided, reuse it. Otherwise create a short-lived one.
+    """
+    stmt = (
+        select(Paper)
+        .where(
+            Paper.pdf_processed.is_(False),
+            Paper.published_date >= published_since,
+            or_(*(cast(Paper.categories, JSONB).contains([category]) for category in categories)),
+        )
+        .order_by(Paper.published_date)
+        .limit(limit)
+    )
+    if session is not None:
+        return list((await session.execute(stmt)).scalars())
+    async with AsyncSessionLocal() as local_session:
+        return list((await local_session.execute(stmt)).scalars())
+
+
+async def mark_papers_processed(arxiv_ids: Iterable[str], session: Optional[AsyncSession] = None) -> int:
+    """
+    Set pdf_processed for the given papers in one statement and return the number of rows updated.
+    If a session is provided, reuse it. Otherwise create a short-lived one.
+    """
+    arxiv_ids = list(set(arxiv_ids))
+    if not arxiv_ids:
+        return 0
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    stmt = (
+        update(Paper)
+        .where(Paper.arxiv_id.in_(arxiv_ids))
+        .values(pdf_processed=True, pdf_processing_date=now, updated_at=now)
+    )
+
+    async def run(db: AsyncSession) -> int:
+        result = await db.execute(stmt)
+        await db.commit()
+        return result.rowcount
+
+    if session is not None:
+        return await run(session)
+    async with AsyncSessionLocal() as local_session:
+        return await run(local_session)
+
+
+def encode_paper_cursor(paper: Paper) -> str:
+    """Opaque keyset cursor pointing just after `paper` in (published_date, arxiv_id) descending order."""
+    raw = f"{paper.published_date.isoformat()}|{paper.arxiv_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_paper_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        published, arxiv_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(published), arxiv_id
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid paper cursor: {cursor!r}") from e
+
+
+async def list_papers(
+    category: Optional[str] = None,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    session: Optional[AsyncSession] = None,
+) -> Tuple[List[Paper], Optional[str]]:
+    """
+    List papers newest first, optionally restricted to one arXiv category.
+    Only arxiv_papers is read, which no longer holds any parsed content.
+    If a session is provided, reuse it. Otherwise create a short-lived one.
+
+    Returns:
+        The page of Paper rows and the cursor of the next page (None on the last page)
+    """
+    stmt = select(Paper)
+    if category is not None:
+        stmt = stmt.where(cast(Paper.categories, JSONB).contains([category]))
+    if cursor is not None:
+        stmt = stmt.where(tuple_(Paper.published_date, Paper.arxiv_id) < tuple_(*decode_paper_cursor(cursor)))
+    stmt = stmt.order_by(Paper.published_date.desc(), Paper.arxiv_id.desc()).limit(limit + 1)
+
+    if session is not None:
+        rows = list((await session.execute(stmt)).scalars())
+    else:
+        async with AsyncSessionLocal() as local_session:
+            rows = list((await local_session.execute(stmt)).scalars())
+
+    next_cursor = encode_paper_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+async def fetch_paper_sections(arxiv_id: str, session: Optional[AsyncSession] = None) -> Optional[List[PaperSection]]:
+    """
+    Load and decompress the parsed sections of one paper, or None if it has no content.
+    If a session is provided, reuse it. Otherwise create a short-lived one.
+    """
+    stmt = select(PaperContent.sections).where(PaperContent.arxiv_id == arxiv_id)
+    if session is not None:
+        data = (await session.execute(stmt)).scalar_one_or_none()
+    else:
+        async with AsyncSessionLocal() as local_session:
+            data = (await local_session.execute(stmt)).scalar_one_or_none()
+    sections = _decompress(data)
+    return [PaperSection(**section) for section in json.loads(sections)] if sections is not None else None
+
+
+async def fetch_paper_figures_and_tables(
+    arxiv_id: str, session: Optional[AsyncSession] = None
+) -> Optional[Tuple[List[PaperFigure], List[PaperTable]]]:
+    """
+    Load the extracted figures and tables of one paper, or None if it has no content.
+    Figure images are not included: read them from the blob store by ``image_sha256``.
+    If a session is provided, reuse it. Otherwise create a short-lived one.
+    """
+    stmt = select(PaperContent.figures, PaperContent.tables).where(PaperContent.arxiv_id == arxiv_id)
+    if session is not None:
+        row = (await session.execute(stmt)).one_or_none()
+    else:
+        async with AsyncSessionLocal() as local_session:
+            row = (await local_session.execute(stmt)).one_or_none()
+    if row is None:
+        return None
+    figures, tables = _decompress(row.figures), _decompress(row.tables)
+    return (
+        [PaperFigure(**figure) for figure in json.loads(figures)] if figures is not None else [],
+        [PaperTable(**table) for table in json.loads(tables)] if tables is not None else [],
+    )
+
+
+async def paper_text_size(arxiv_id: str) -> Optional[int]:
+    """Compressed size of a paper's raw text, or None if the paper has no stored text."""
+    async with AsyncSessionLocal() as session:
+        stmt = select(func.octet_length(PaperContent.raw_text)).where(PaperContent.arxiv_id == arxiv_id)
+        return (await session.execute(stmt)).scalar_one_or_none()
+
+
+async def iter_paper_text(arxiv_id: str, slice_bytes: int = 256 * 1024) -> AsyncIterator[str]:
+    """
+    Stream a paper's raw text without loading it whole.
+    The compressed column is read in `slice_bytes` slices with substring (cheap because the
+    column is stored EXTERNAL) and inflated incrementally, so memory stays bounded by one slice.
+
+    Yields:
+        Consecutive pieces of the decompressed text
+    """
+    inflater = zlib.decompressobj()
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    async with AsyncSessionLocal() as session:
+        offset = 1  # substring is 1-based
+        while True:
+            stmt = (
+                select(func.substring(PaperContent.raw_text, offset, slice_bytes))
+                .where(PaperContent.arxiv_id == arxiv_id)
+            )
+            data = (await session.execute(stmt)).scalar_one_or_none()
+            if not data:
+                break
+            offset += len(data)
+            text = decoder.decode(inflater.decompress(data))
+            if text:
+                yield text
+            if len(data) < slice_bytes:
+                break
+    tail = decoder.decode(inflater.flush(), final=True)
+    if tail:
+        yield tail
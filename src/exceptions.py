@@ -7,4 +7,16 @@ class PDFParsingException(ParsingException):
 
 
 class PDFValidationError(PDFParsingException):
-    """Exception raised when PDF file validation fails."""
\ No newline at end of file
+    """Exception raised when PDF file validation fails."""
+
+
+class DownloadException(Exception):
+    """Base exception for arXiv download-related errors."""
+
+
+class PDFDownloadException(DownloadException):
+    """Exception raised when a PDF cannot be downloaded after all retries."""
+
+
+class IndexException(Exception):
+    """Base exception for retrieval index errors."""
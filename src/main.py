@@ -1,22 +1,109 @@
+import asyncio
+import json
 import os
+import time
+import uuid
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Query, Depends
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 
 from src.db.database import init_db, AsyncSessionLocal
-from src.schemas.database.chat_schema import ChatModel, ResponseModel
-from src.services.ollama.client import OllamaModel
-from src.services.nvidia_nim.client import NvidiaNimModel
-from src.db.utils.chat_history import insert_into_chat_history
+from src.schemas.database.chat_schema import BatchChatRequest, ChatModel, ChatTurn, ResponseModel, SessionHistoryPage
+from src.db.utils.chat_history import (
+    ensure_chat_history_partitions,
+    fetch_session_history_page,
+    fetch_session_turn_keys,
+)
+from src.db.utils.papers import iter_paper_text, list_papers, paper_text_size
+from src.schemas.database.paper_schema import PaperListItem, PaperListPage
+from src.db.utils.history_writer import ChatHistoryWriter
+from src.schemas.search.models import ContextRequest, ContextResponse, SearchRequest, SearchResponse
+from src.services.batch_chat.runner import BatchItem, batch_session_id, plan_items, run_batch
+from src.services.coalescing.flight import SingleFlight
+from src.services.embeddings.client import EmbeddingModel
+from src.services.lexical_index.bm25 import BM25Index
+from src.services.llm_registry.registry import (
+    UnknownModelError,
+    make_llm_registry,
+    parse_model_specs,
+    resolve_model_id,
+)
+from src.services.llm_registry.scheduler import BATCH, AdmissionRejected, make_llm_scheduler
+from src.services.metrics.middleware import MetricsMiddleware, metrics_http_exception_handler
+from src.services.metrics.registry import REGISTRY
+from src.services.rag_context.assembler import context_assembler, load_context_tokenizers
+from src.services.response_cache.cache import context_hash, make_response_cache, normalize_query
+from src.services.retrieval.filters import FilterIndex
+from src.services.retrieval.search import SearchService
+from src.services.streaming import stream_sse
+from src.services.vector_index.index import MmapVectorIndex
+
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR", "data/vector_index")
+BM25_INDEX_DIR = os.getenv("BM25_INDEX_DIR", "data/bm25_index")
+FILTER_INDEX_DIR = os.getenv("FILTER_INDEX_DIR", "data/filter_index")
+# Comma-separated provider:model list built (and pinged) before serving, e.g. "ollama:llama3.2"
+LLM_WARMUP_MODELS = os.getenv("LLM_WARMUP_MODELS", "")
+LLM_WARMUP_PING = os.getenv("LLM_WARMUP_PING", "true").lower() == "true"
+CHAT_HISTORY_BATCH_SIZE = int(os.getenv("CHAT_HISTORY_BATCH_SIZE", "500"))
+CHAT_HISTORY_FLUSH_INTERVAL_S = float(os.getenv("CHAT_HISTORY_FLUSH_INTERVAL_S", "0.2"))
+CHAT_HISTORY_MAX_QUEUE = int(os.getenv("CHAT_HISTORY_MAX_QUEUE", "10000"))
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+BATCH_CHAT_CONCURRENCY = int(os.getenv("BATCH_CHAT_CONCURRENCY", "8"))
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Run migrations/DDL once
     await init_db()
+    # Keep upcoming monthly chat_history partitions in place
+    await ensure_chat_history_partitions()
+    # Concurrent identical LLM, search and embedding calls share one upstream call
+    app.state.single_flight = {
+        group: SingleFlight(group, enabled=SINGLE_FLIGHT_ENABLED) for group in ("llm", "search", "embedding")
+    }
+    # Memory-map the vector index (no copy into RAM): uvicorn workers share the OS page cache
+    app.state.vector_index = MmapVectorIndex.open(VECTOR_INDEX_DIR)
+    app.state.search_service = SearchService(
+        vector_index=app.state.vector_index,
+        bm25_index=BM25Index(BM25_INDEX_DIR),
+        filter_index=FilterIndex.open(FILTER_INDEX_DIR),
+        embedder=EmbeddingModel(single_flight=app.state.single_flight["embedding"]),
+        single_flight=app.state.single_flight["search"],
+        filter_path=FILTER_INDEX_DIR,
+    )
+    # Filter bitmaps are built by the ingestion DAG's publish; an index without them is caught up in the background
+    filters_rebuild = None
+    if app.state.search_service.filters_outdated():
+        filters_rebuild = asyncio.create_task(app.state.search_service.rebuild_filters())
+    # One chain per (provider, model, temperature), sharing pooled keep-alive connections
+    app.state.llm_registry = make_llm_registry()
+    await app.state.llm_registry.warm_up(parse_model_specs(LLM_WARMUP_MODELS), ping=LLM_WARMUP_PING)
+    # Concurrency caps per provider/model, interactive-before-batch queueing, hedging to fallback models
+    app.state.llm_scheduler = make_llm_scheduler()
+    # Near-identical questions are answered from cache (exact, then embedding similarity)
+    app.state.response_cache = make_response_cache(embedder=app.state.search_service.embedder)
+    # Tokenizers of CONTEXT_TOKENIZERS are loaded now (possibly from the Hub), not on the first RAG request
+    await asyncio.to_thread(load_context_tokenizers)
+    # Chat history is persisted write-behind, in batches, off the request path
+    app.state.history_writer = ChatHistoryWriter(
+        batch_size=CHAT_HISTORY_BATCH_SIZE,
+        flush_interval_s=CHAT_HISTORY_FLUSH_INTERVAL_S,
+        max_queue=CHAT_HISTORY_MAX_QUEUE,
+    )
+    app.state.history_writer.start()
     yield
+    # Drain queued history rows before shutting down
+    await app.state.history_writer.stop()
+    await app.state.llm_registry.aclose()
+    if filters_rebuild is not None:
+        filters_rebuild.cancel()
 
 app = FastAPI(lifespan=lifespan)
+# Per-route latency histograms, and 5xx counts by the exception behind them
+app.add_middleware(MetricsMiddleware)
+app.add_exception_handler(StarletteHTTPException, metrics_http_exception_handler)
 
 async def get_session() -> AsyncSession:
     async with AsyncSessionLocal() as session:
@@ -33,12 +120,128 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """In-process metrics in the Prometheus text format (per worker process)."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@app.get("/api/v1/history_writer/stats")
+def history_writer_stats():
+    """Queue depth, batch sizes and flush latency of the chat_history write-behind queue."""
+    return app.state.history_writer.snapshot()
+
+
+@app.get("/api/v1/llm_cache/stats")
+def llm_cache_stats():
+    """Entries, hits per tier, hit ratio and LLM seconds saved by the response cache."""
+    return app.state.response_cache.snapshot()
+
+
+@app.delete("/api/v1/llm_cache")
+def invalidate_llm_cache(model: str | None = Query(None, description="provider:model, e.g. ollama:llama3.2; all if omitted")):
+    """Drop cached responses, e.g. after a model was updated."""
+    return {"invalidated": app.state.response_cache.invalidate(model)}
+
+
+@app.get("/api/v1/llm_scheduler/stats")
+def llm_scheduler_stats():
+    """Running and queued LLM calls per lane, admission rejections and hedging deadlines."""
+    return app.state.llm_scheduler.snapshot()
+
+
+@app.get("/api/v1/single_flight/stats")
+def single_flight_stats():
+    """Per group (llm, search, embedding): calls in flight, leaders, and followers, i.e. upstream calls avoided."""
+    return {group: flight.snapshot() for group, flight in app.state.single_flight.items()}
+
+
+@app.post("/api/v1/search", response_model=SearchResponse)
+async def search(request: SearchRequest):
+    """
+    Hybrid chunk search for one or more queries.
+    - All queries are embedded and scored against the vector index as one batch
+    - Category/date filters are applied inside the index scan via precomputed bitmaps
+    """
+    try:
+        return await app.state.search_service.search(request)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def prompt_model(provider: str, model_name: str, query: str, session_id: str | None = None, context: str = ""):
+    """Prompt a registry model; the scheduler calls it again with the fallback model when hedging."""
+    model = app.state.llm_registry.get(provider, model_name)
+    if provider == "nvidia":
+        # session_id=None asks without reading or recording conversation history
+        return model.prompt_model(query, session_id=session_id, context=context)
+    return model.prompt_model(query)
+
+
+async def retrieve_context(query: str, model_name: str) -> str:
+    """Paper excerpts for a prompt, reranked with MMR and packed into the model's context token budget."""
+    assembled, _ = await app.state.search_service.assemble_context(
+        SearchRequest(queries=[query], k=app.state.search_service.candidates), context_assembler(model_name)
+    )
+    return assembled.text
+
+
+@app.post("/api/v1/context", response_model=ContextResponse)
+async def assemble_context(request: ContextRequest):
+    """
+    The retrieved context a model would be prompted with for a query.
+    - Retrieves `candidates` chunks with hybrid search
+    - Reranks them with MMR on their stored embeddings and drops near-duplicates
+    - Packs them into the model's token budget (CONTEXT_TOKEN_BUDGETS), counted
+      with its tokenizer (CONTEXT_TOKENIZERS) or estimated from whitespace
+    """
+    try:
+        selected_model = request.model_name or os.getenv(
+            "NVIDIA_NIM_DEFAULT_MODEL", "moonshotai/kimi-k2-instruct-0905"
+        )
+        # Assemblers are cached per model name, so only configured models get one
+        app.state.llm_registry.check(*resolve_model_id(selected_model))
+        assembler = context_assembler(selected_model)
+        assembled, hits = await app.state.search_service.assemble_context(
+            request.search_request(), assembler, budget=request.budget
+        )
+        chosen = {chunk.chunk_id for chunk in assembled.chunks}
+        by_id = {hit.chunk_id: hit for hit in hits if hit.chunk_id in chosen}
+        return ContextResponse(
+            context=assembled.text,
+            chunks=[by_id[chunk.chunk_id] for chunk in assembled.chunks],
+            tokens=assembled.tokens,
+            budget=assembled.budget,
+            exact_tokens=assembler.counter.exact,
+            candidates=len(hits),
+            duplicates_dropped=assembled.duplicates,
+            timings_ms=assembled.timings_ms,
+        )
+    except UnknownModelError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/chat_ollama", response_model=ResponseModel)
 async def chat_with_ollama(chat: ChatModel):
     try:
-        model = OllamaModel()
-        response = await model.prompt_model(chat.query)
+        model = app.state.llm_registry.ollama()
+        key = f"ollama:{model.model_name}"
+
+        async def complete():
+            response, (provider, name) = await app.state.llm_scheduler.run(
+                "ollama", model.model_name, lambda provider, name: prompt_model(provider, name, chat.query)
+            )
+            return response, f"{provider}:{name}"
+
+        (response, _, _), _ = await app.state.single_flight["llm"].do(
+            (key, normalize_query(chat.query), ""),
+            lambda: app.state.response_cache.get_or_complete(key, chat.query, complete),
+        )
         return ResponseModel(response=response)
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -48,33 +251,243 @@ async def chat_with_nvidia(
     chat: ChatModel,
     model_name: str | None = Query(None, description="Model, e.g., deepseek-ai/deepseek-v3"),
     session_id: str | None = Query(None, description="Optional session id to retain history"),
-    db: AsyncSession = Depends(get_session),
+    rag: bool = Query(False, description="Answer from retrieved paper excerpts"),
 ):
     """
     NVIDIA NIM chat endpoint.
     - Respects `model_name` or falls back to NVIDIA_NIM_DEFAULT_MODEL
     - Partitions history by model to avoid cross-model persona bleed
-    - Persists the response to Postgres (first_table)
+    - With `rag`, adds paper excerpts to the system prompt, packed into the model's context token budget
+    - Without a `session_id`, the query is answered on its own, without conversation history
+    - Answers from the response cache when the same (or a very similar) query
+      was asked with the same model, excerpts and conversation history
+    - Without a `session_id`, concurrent identical queries share one completion
+    - Answers 429 when the model's scheduler queue is full or the wait times out
+    - Queues the exchange for batched persistence to chat_history
     """
     try:
         selected_model = model_name or os.getenv(
             "NVIDIA_NIM_DEFAULT_MODEL", "moonshotai/kimi-k2-instruct-0905"
         )
+        # chat_history rows of stateless queries are grouped under the model's default session
         sid = session_id or f"default::{selected_model}"
 
-        model = NvidiaNimModel(model_name=selected_model)
+        model = app.state.llm_registry.nvidia(selected_model)
         user_query_timestamp = datetime.utcnow()
-        response = await model.prompt_model(chat.query, session_id=sid)
+        key = f"nvidia:{selected_model}"
+        retrieved = await retrieve_context(chat.query, selected_model) if rag else ""
+        # The answer depends on the excerpts and, within a session, on the conversation so far
+        context = retrieved if session_id is None else await model.history_context(session_id) + retrieved
+
+        async def ask():
+            response, (provider, name) = await app.state.llm_scheduler.run(
+                "nvidia", selected_model,
+                lambda provider, name: prompt_model(provider, name, chat.query, session_id, retrieved),
+                # A session's history and excerpts packed for this model's budget do not suit its fallback
+                hedge=session_id is None and not retrieved,
+            )
+            return response, f"{provider}:{name}"
+
+        def complete():
+            return app.state.response_cache.get_or_complete(key, chat.query, ask, context=context)
+
+        if session_id is None:
+            # Stateless: nothing is read or recorded, so identical queries can share one completion
+            (response, _, answered_by), _ = await app.state.single_flight["llm"].do(
+                (key, normalize_query(chat.query), context_hash(context)), complete
+            )
+        else:
+            # A caller's own conversation is never merged with anyone else's call
+            response, cached, answered_by = await complete()
+            if cached:
+                # prompt_model did not run for this request, so the history wrapper did not record the turn
+                await model.record_turn(chat.query, response, session_id=session_id)
         model_response_timestamp = datetime.utcnow()
 
-        # Persist response text (adjust to your real schema later)
-        await insert_into_chat_history(user_query=chat.query, 
-                                       model_response=response, 
-                                       model_used=selected_model,
-                                       user_query_timestamp=user_query_timestamp,
-                                       model_response_timestamp=model_response_timestamp,
-                                       session=db)
+        # Write-behind: returns once queued, the row is inserted with the next batch
+        # Attributed to the model that answered, which is the fallback's when a hedge won
+        await app.state.history_writer.submit(user_query=chat.query,
+                                              model_response=response,
+                                              model_used=answered_by.partition(":")[2],
+                                              user_query_timestamp=user_query_timestamp,
+                                              model_response_timestamp=model_response_timestamp,
+                                              session_id=sid)
 
         return ResponseModel(response=response)
+    except UnknownModelError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except AdmissionRejected as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/chat_batch")
+async def chat_batch(request: BatchChatRequest):
+    """
+    Batch chat endpoint for evaluation runs (NDJSON).
+    - Asks every query to every model, `concurrency` items at a time, in the scheduler's batch lane
+    - Streams a `start` line, one `result` line per item as it completes, and a final `done` line
+    - Models must be in AVAILABLE_MODELS (or another configured model list), else 422
+    - Items are asked without conversation history and stored in chat_history (session
+      `batch::<job_id>`) through the batched writer; a result line is only sent once its row is written
+    - Posting again with the `job_id` from the `start` line resumes the job: completed items are skipped
+    """
+    try:
+        models = [resolve_model_id(model_id) for model_id in request.models]
+        for provider, model_name in models:
+            app.state.llm_registry.check(provider, model_name)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    job_id = request.job_id or uuid.uuid4().hex
+    sid = batch_session_id(job_id)
+    completed = await fetch_session_turn_keys(sid) if request.job_id else set()
+    items, skipped = plan_items(request.queries, models, completed)
+    concurrency = request.concurrency or BATCH_CHAT_CONCURRENCY
+
+    async def call(item: BatchItem) -> str:
+        user_query_timestamp = datetime.utcnow()
+        # Evaluation runs want each model's own answer, never a fallback's
+        response, _ = await app.state.llm_scheduler.run(
+            item.provider, item.model_name, lambda provider, name: prompt_model(provider, name, item.query),
+            lane=BATCH, hedge=False,
+        )
+        # Written (with the next batch) before the result is reported, so a resumed job skips
+        # every item it reported; an item whose row was dropped is reported as failed
+        await app.state.history_writer.submit(user_query=item.query,
+                                              model_response=response,
+                                              model_used=item.model_name,
+                                              user_query_timestamp=user_query_timestamp,
+                                              model_response_timestamp=datetime.utcnow(),
+                                              session_id=sid,
+                                              wait=True)
+        return response
+
+    async def lines():
+        started = time.perf_counter()
+        yield json.dumps({"event": "start", "job_id": job_id, "items": len(items) + skipped,
+                          "skipped": skipped, "concurrency": concurrency}) + "\n"
+        counts = {"ok": 0, "error": 0}
+        async for result in run_batch(items, call, concurrency):
+            counts[result["status"]] += 1
+            yield json.dumps(result) + "\n"
+        yield json.dumps({"event": "done", "job_id": job_id, "completed": counts["ok"], "failed": counts["error"],
+                          "skipped": skipped, "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)}) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson", headers={"X-Job-Id": job_id})
+
+
+@app.get("/api/v1/papers", response_model=PaperListPage)
+async def papers(
+    category: str | None = Query(None, description="arXiv category, e.g. cs.CL"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    db: AsyncSession = Depends(get_session),
+):
+    """
+    Paper metadata, newest first.
+    - Reads arxiv_papers only; parsed content is served by /api/v1/papers/{arxiv_id}/text
+    """
+    try:
+        rows, next_cursor = await list_papers(category=category, limit=limit, cursor=cursor, session=db)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return PaperListPage(papers=[PaperListItem.model_validate(row) for row in rows], next_cursor=next_cursor)
+
+
+@app.get("/api/v1/papers/{arxiv_id:path}/text")
+async def paper_text(arxiv_id: str):
+    """
+    Full extracted text of a paper, streamed as it is decompressed.
+    """
+    if not await paper_text_size(arxiv_id):
+        raise HTTPException(status_code=404, detail=f"No parsed text for {arxiv_id}")
+    return StreamingResponse(iter_paper_text(arxiv_id), media_type="text/plain; charset=utf-8")
+
+
+@app.get("/api/v1/sessions/{session_id}/history", response_model=SessionHistoryPage)
+async def session_history(
+    session_id: str,
+    limit: int = Query(50, ge=1, le=500, description="Turns per page"),
+    cursor: str | None = Query(None, description="next_cursor from the previous page"),
+    db: AsyncSession = Depends(get_session),
+):
+    """
+    Conversation history of one session, oldest first.
+    - Keyset-paginated on (user_query_timestamp, id); pass `next_cursor` back as `cursor`
+    """
+    try:
+        rows, next_cursor = await fetch_session_history_page(session_id, limit=limit, cursor=cursor, session=db)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return SessionHistoryPage(
+        session_id=session_id,
+        turns=[ChatTurn.model_validate(row) for row in rows],
+        next_cursor=next_cursor,
+    )
+
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+@app.post("/chat_ollama/stream")
+async def chat_with_ollama_stream(chat: ChatModel):
+    """
+    Streaming Ollama chat endpoint (Server-Sent Events).
+    - `token` events carry incremental text, a final `done` event carries ttft_ms/total_ms
+    - Holds a scheduler slot while streaming; a rejected call ends with an `error` event
+    """
+    started_at = time.perf_counter()
+    model = app.state.llm_registry.ollama()
+    return StreamingResponse(
+        stream_sse(app.state.llm_scheduler.stream("ollama", model.model_name, lambda: model.stream_model(chat.query)),
+                   started_at),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@app.post("/chat_nvidia/stream")
+async def chat_with_nvidia_stream(
+    chat: ChatModel,
+    model_name: str | None = Query(None, description="Model, e.g., deepseek-ai/deepseek-v3"),
+    session_id: str | None = Query(None, description="Optional session id to retain history"),
+    rag: bool = Query(False, description="Answer from retrieved paper excerpts"),
+):
+    """
+    Streaming NVIDIA NIM chat endpoint (Server-Sent Events).
+    - Same model/session/`rag` handling as /chat_nvidia
+    - Queues the full response for chat_history once the stream completes
+    """
+    started_at = time.perf_counter()
+    selected_model = model_name or os.getenv(
+        "NVIDIA_NIM_DEFAULT_MODEL", "moonshotai/kimi-k2-instruct-0905"
+    )
+    sid = session_id or f"default::{selected_model}"
+    try:
+        model = app.state.llm_registry.nvidia(selected_model)
+    except UnknownModelError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    user_query_timestamp = datetime.utcnow()
+    retrieved = await retrieve_context(chat.query, selected_model) if rag else ""
+
+    async def persist(response: str, timings: dict) -> None:
+        # Runs after the last token
+        await app.state.history_writer.submit(user_query=chat.query,
+                                              model_response=response,
+                                              model_used=selected_model,
+                                              user_query_timestamp=user_query_timestamp,
+                                              model_response_timestamp=datetime.utcnow(),
+                                              session_id=sid)
+
+    return StreamingResponse(
+        stream_sse(
+            app.state.llm_scheduler.stream(
+                "nvidia", selected_model,
+                lambda: model.stream_model(chat.query, session_id=session_id, context=retrieved),
+            ),
+            started_at, on_complete=persist,
+        ),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
@@ -0,0 +1,15 @@
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+
+class DownloadResult(BaseModel):
+    """Outcome of downloading a single arXiv PDF."""
+
+    paper_id: str = Field(..., description="Versioned arXiv short id, e.g. 2401.01234v2")
+    status: str = Field(..., description="downloaded, cached or failed")
+    path: Optional[str] = Field(None, description="Content-addressed location of the PDF on disk")
+    sha256: Optional[str] = Field(None, description="SHA-256 of the PDF bytes")
+    size_bytes: int = Field(default=0, description="Size of the PDF in bytes")
+    attempts: int = Field(default=0, description="Number of HTTP attempts made")
+    error: Optional[str] = Field(None, description="Last error message if the download failed")
@@ -0,0 +1,14 @@
+from pydantic import BaseModel, Field
+
+
+class PaperChunk(BaseModel):
+    """A token-bounded slice of one paper section, used as the retrieval unit."""
+
+    arxiv_id: str = Field(..., description="Paper the chunk belongs to")
+    chunk_index: int = Field(..., description="Position of the chunk within the paper")
+    section_index: int = Field(..., description="Position of the source section within the paper")
+    section_title: str = Field(..., description="Title of the source section")
+    start_char: int = Field(..., description="Start offset of the chunk within the section content")
+    end_char: int = Field(..., description="End offset (exclusive) of the chunk within the section content")
+    token_count: int = Field(..., description="Number of tokens in the chunk")
+    text: str = Field(..., description="Chunk text")
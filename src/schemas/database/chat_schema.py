@@ -1,7 +1,33 @@
-from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
 
 class ChatModel(BaseModel):
     query: str
 
 class ResponseModel(BaseModel):
-    response: str
\ No newline at end of file
+    response: str
+
+class ChatTurn(BaseModel):
+    model_config = ConfigDict(from_attributes=True, protected_namespaces=())
+
+    id: int
+    user_query: Optional[str] = None
+    model_response: Optional[str] = None
+    model_used: Optional[str] = None
+    user_query_timestamp: datetime
+    model_response_timestamp: Optional[datetime] = None
+
+class SessionHistoryPage(BaseModel):
+    session_id: str
+    turns: List[ChatTurn]
+    next_cursor: Optional[str] = None
+
+class BatchChatRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=10_000, description="Questions, each asked to every model")
+    models: List[str] = Field(..., min_length=1, max_length=16,
+                              description="Model ids (e.g. llama3.2, deepseek-ai/deepseek-v3.1) or provider:model")
+    job_id: Optional[str] = Field(None, pattern=r"^[A-Za-z0-9_.-]{1,64}$",
+                                  description="Resume this job: items it already completed are skipped")
+    concurrency: Optional[int] = Field(None, ge=1, le=64, description="Items in flight at once")
@@ -0,0 +1,58 @@
+import re
+from datetime import datetime, timezone
+from typing import List, Optional
+
+import arxiv
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class PaperMetadata(BaseModel):
+    """arXiv metadata for one row of arxiv_papers."""
+
+    arxiv_id: str = Field(..., description="Versionless arXiv id, e.g. 2401.01234")
+    title: str
+    authors: List[str]
+    abstract: str
+    categories: List[str]
+    published_date: datetime
+    pdf_url: str
+
+    @classmethod
+    def from_arxiv_result(cls, result: arxiv.Result) -> "PaperMetadata":
+        published = result.published
+        if published.tzinfo is not None:
+            # arxiv_papers stores naive UTC timestamps
+            published = published.astimezone(timezone.utc).replace(tzinfo=None)
+        return cls(
+            arxiv_id=re.sub(r"v\d+$", "", result.get_short_id()),
+            title=result.title,
+            authors=[author.name for author in result.authors],
+            abstract=result.summary,
+            categories=list(result.categories),
+            published_date=published,
+            pdf_url=result.pdf_url,
+        )
+
+
+class PaperListItem(PaperMetadata):
+    """One paper in a listing: metadata only, never parsed content."""
+
+    model_config = ConfigDict(from_attributes=True)
+
+    pdf_processed: bool = False
+
+
+class PaperListPage(BaseModel):
+    """A keyset-paginated page of papers."""
+
+    papers: List[PaperListItem]
+    next_cursor: Optional[str] = None
+
+
+class PaperUpsertResult(BaseModel):
+    """Row counts for one batch of an arxiv_papers upsert."""
+
+    batch_index: int
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
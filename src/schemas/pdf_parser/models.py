@@ -11,17 +11,35 @@ class PaperSection(BaseModel):
     level: int = Field(default=1, description="Section hierarchy level")
 
 class PaperFigure(BaseModel):
-    """Represents a figure in the paper."""
+    """Represents a figure in the paper.
+
+    The image itself is not held here: it is stored once in the blob store and
+    referenced by the SHA-256 of its bytes.
+    """
 
     caption: str = Field(..., description="Figure caption")
-    image_data: Optional[bytes] = Field(None, description="Binary data of the figure image")
+    image_sha256: Optional[str] = Field(None, description="Blob store key of the PNG image, if it was extracted")
+    media_type: str = Field(default="image/png", description="Media type of the stored image")
+    width: Optional[int] = Field(None, description="Image width in pixels")
+    height: Optional[int] = Field(None, description="Image height in pixels")
+    page: Optional[int] = Field(None, description="Page the figure appears on (1-based)")
 
 
 class PaperTable(BaseModel):
-    """Represents a table in the paper."""
+    """Represents a table in the paper, stored column by column."""
 
     caption: str = Field(..., description="Table caption")
-    data: List[List[Any]] = Field(..., description="2D list representing table data")
+    header: List[str] = Field(default_factory=list, description="Column names; empty if the table has no header row")
+    columns: List[List[str]] = Field(default_factory=list, description="Cell texts of each column, top to bottom")
+    page: Optional[int] = Field(None, description="Page the table appears on (1-based)")
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.columns[0]) if self.columns else 0
+
+    def rows(self) -> List[List[str]]:
+        """Body cells in row-major order."""
+        return [list(row) for row in zip(*self.columns)]
 
 
 class PdfContent(BaseModel):
@@ -34,3 +52,18 @@ class PdfContent(BaseModel):
     references: List[str] = Field(default_factory=list, description="References")
     parser_used: str = Field(..., description="Parser used for extraction: DOCLING")
     metadata: Dict[str, Any] = Field(default_factory=dict, description="Parser metadata")
+
+
+class PdfPageWindow(BaseModel):
+    """Content of a contiguous page range of a PDF, converted on its own."""
+
+    start_page: int = Field(..., description="First page of the window (1-based)")
+    end_page: int = Field(..., description="Last page of the window (inclusive)")
+    leading_text: str = Field(default="", description="Text before the window's first heading; it continues "
+                                                      "the last section of the previous window")
+    sections: List[PaperSection] = Field(default_factory=list,
+                                         description="Sections started in this window; the last one may "
+                                                     "continue in the next window")
+    figures: List[PaperFigure] = Field(default_factory=list, description="Figures on the window's pages")
+    tables: List[PaperTable] = Field(default_factory=list, description="Tables on the window's pages")
+    raw_text: str = Field(default="", description="Extracted text of the window's pages")
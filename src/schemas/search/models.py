@@ -0,0 +1,71 @@
+from datetime import date, datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class SearchRequest(BaseModel):
+    """One or more queries sharing the same filters."""
+
+    queries: List[str] = Field(..., min_length=1, max_length=64, description="Query texts, searched as one batch")
+    k: int = Field(default=10, ge=1, le=100, description="Chunks returned per query")
+    categories: Optional[List[str]] = Field(None, description="Only papers in any of these arXiv categories")
+    published_from: Optional[date] = Field(None, description="Only papers published on or after this date")
+    published_to: Optional[date] = Field(None, description="Only papers published on or before this date")
+    hybrid: bool = Field(default=True, description="Fuse BM25 with dense results")
+    approximate: bool = Field(default=False, description="Use the IVF index instead of an exact scan")
+
+
+class ChunkHit(BaseModel):
+    chunk_id: int
+    arxiv_id: str
+    section_title: str
+    text: str
+    score: float
+
+
+class PaperHit(BaseModel):
+    arxiv_id: str
+    title: str
+    categories: List[str]
+    published_date: datetime
+    pdf_url: str
+
+
+class SearchResult(BaseModel):
+    query: str
+    chunks: List[ChunkHit]
+    papers: List[PaperHit] = Field(..., description="Distinct papers of the chunks, in rank order")
+
+
+class SearchResponse(BaseModel):
+    results: List[SearchResult]
+
+
+class ContextRequest(BaseModel):
+    """Retrieve chunks for a query and pack them into a model's prompt context."""
+
+    query: str = Field(..., min_length=1, description="Query text")
+    model_name: Optional[str] = Field(None, description="Model whose token budget and tokenizer apply")
+    candidates: int = Field(default=50, ge=1, le=100, description="Chunks retrieved before MMR reranking")
+    budget: Optional[int] = Field(None, ge=1, description="Overrides the model's context token budget")
+    categories: Optional[List[str]] = Field(None, description="Only papers in any of these arXiv categories")
+    published_from: Optional[date] = Field(None, description="Only papers published on or after this date")
+    published_to: Optional[date] = Field(None, description="Only papers published on or before this date")
+    hybrid: bool = Field(default=True, description="Fuse BM25 with dense results")
+
+    def search_request(self) -> SearchRequest:
+        return SearchRequest(queries=[self.query], k=self.candidates, categories=self.categories,
+                             published_from=self.published_from, published_to=self.published_to,
+                             hybrid=self.hybrid)
+
+
+class ContextResponse(BaseModel):
+    context: str = Field(..., description="Chosen chunks in prompt order, as sent to the model")
+    chunks: List[ChunkHit]
+    tokens: int
+    budget: int
+    exact_tokens: bool = Field(..., description="False when counted without the model's tokenizer")
+    candidates: int
+    duplicates_dropped: int
+    timings_ms: dict
@@ -1,7 +1,11 @@
 import arxiv
-from typing import Dict, List, Optional
+import random
+import time
+from typing import Dict, Iterable, List, Optional
 from datetime import datetime, timedelta
 
+from .downloader import ArxivPdfDownloader
+
 class ArxivClient:
     def __init__(self):
         self.client = arxiv.Client()
@@ -41,16 +45,22 @@ class ArxivClient:
         return self.client.results(search)
     
 
-    def download_pdf_with_retry(self, paper: arxiv.Result, dirpath: str, max_retries: int = 3):
+    def download_pdf_with_retry(self, paper: arxiv.Result, dirpath: str, max_retries: int = 3,
+                                backoff_base: float = 1.0, backoff_max: float = 30.0):
 
-        try:
-            file_name = paper.get_short_id().split("/")[-1] + ".pdf"
-            paper.download_pdf(dirpath=dirpath, filename=file_name)
-            return f"Downloaded: {dirpath}/{file_name}"
-        except Exception as e:
-            if max_retries > 0:
-                return ArxivClient.download_pdf_with_retry(paper, dirpath, max_retries - 1)
-            else:
-                return "Download failed after multiple attempts."
-    
+        file_name = paper.get_short_id().split("/")[-1] + ".pdf"
+        for attempt in range(max_retries + 1):
+            try:
+                paper.download_pdf(dirpath=dirpath, filename=file_name)
+                return f"Downloaded: {dirpath}/{file_name}"
+            except Exception:
+                if attempt == max_retries:
+                    break
+                # Exponential backoff with full jitter
+                time.sleep(random.uniform(0, min(backoff_max, backoff_base * (2 ** attempt))))
+        return "Download failed after multiple attempts."
 
+    async def download_pdfs(self, papers: Iterable[arxiv.Result], dirpath: str, **downloader_kwargs):
+        """Download many PDFs concurrently; see ArxivPdfDownloader for the options."""
+        downloader = ArxivPdfDownloader(dirpath, **downloader_kwargs)
+        return await downloader.download_papers(papers)
@@ -0,0 +1,337 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import arxiv
+import httpx
+
+from src.exceptions import PDFDownloadException
+from src.schemas.arxiv_downloader.models import DownloadResult
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: throttling and transient server errors.
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class HostRateLimiter:
+    """Spaces out request starts per host.
+
+    arXiv asks automated clients to wait a few seconds between requests, so every
+    request to a host reserves the next free slot and sleeps until it arrives.
+    Requests to different hosts never wait on each other.
+    """
+
+    def __init__(self, min_interval: float = 3.0):
+        self.min_interval = min_interval
+        self._next_slot: Dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, url: str) -> None:
+        if self.min_interval <= 0:
+            return
+        host = urlsplit(url).netloc
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.min_interval
+        delay = slot - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def defer(self, url: str, seconds: float) -> None:
+        """Push the host's next slot out, e.g. after a 429 with Retry-After."""
+        host = urlsplit(url).netloc
+        self._next_slot[host] = max(self._next_slot.get(host, 0.0), time.monotonic() + seconds)
+
+
+class DownloadManifest:
+    """Append-only JSON-lines record of finished downloads.
+
+    Each completed paper is appended and flushed immediately, so an interrupted
+    harvest picks up from the last finished paper on the next run. When an id
+    appears more than once the last line wins.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, dict] = {}
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A torn last line from a crash; everything before it is intact.
+                    logger.warning("Skipping corrupt manifest line in %s", self.path)
+                    continue
+                self.entries[entry["paper_id"]] = entry
+
+    def get(self, paper_id: str) -> Optional[dict]:
+        return self.entries.get(paper_id)
+
+    def record(self, result: DownloadResult) -> None:
+        entry = result.model_dump(exclude_none=True)
+        self.entries[result.paper_id] = entry
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class ArxivPdfDownloader:
+    """Concurrent, rate-limited and resumable downloader for arXiv PDFs.
+
+    PDFs are stored content-addressed as ``<dirpath>/<sha[:2]>/<sha>.pdf`` and
+    indexed by versioned arXiv id in ``<dirpath>/manifest.jsonl``. arXiv versions
+    are immutable, so a versioned id that is already in the manifest with its
+    blob on disk is never fetched again.
+    """
+
+    def __init__(
+        self,
+        dirpath: Union[str, Path],
+        max_concurrency: int = 4,
+        min_request_interval: float = 3.0,
+        max_retries: int = 3,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        timeout: float = 60.0,
+        client: Optional[httpx.AsyncClient] = None,
+    ):
+        self.dirpath = Path(dirpath)
+        self.dirpath.mkdir(parents=True, exist_ok=True)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.rate_limiter = HostRateLimiter(min_request_interval)
+        self.manifest = DownloadManifest(self.dirpath / "manifest.jsonl")
+        self._client = client
+        self.stats = {"downloaded": 0, "cached": 0, "failed": 0, "bytes": 0, "elapsed_s": 0.0}
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.dirpath / sha256[:2] / f"{sha256}.pdf"
+
+    def _backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with full jitter."""
+        cap = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    @staticmethod
+    def _retry_after(response: httpx.Response) -> Optional[float]:
+        value = response.headers.get("Retry-After")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _cached_result(self, paper_id: str) -> Optional[DownloadResult]:
+        entry = self.manifest.get(paper_id)
+        if not entry or entry.get("status") == "failed" or not entry.get("sha256"):
+            return None
+        path = self.blob_path(entry["sha256"])
+        if not path.is_file() or path.stat().st_size != entry.get("size_bytes"):
+            return None
+        return DownloadResult(
+            paper_id=paper_id,
+            status="cached",
+            path=str(path),
+            sha256=entry["sha256"],
+            size_bytes=entry["size_bytes"],
+        )
+
+    async def _fetch_once(self, client: httpx.AsyncClient, pdf_url: str) -> Tuple[str, int]:
+        """Stream one response to a temp file while hashing it; return (sha256, size)."""
+        tmp_path = self.dirpath / f".{os.getpid()}.{id(asyncio.current_task())}.part"
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with client.stream("GET", pdf_url) as response:
+                response.raise_for_status()
+                with open(tmp_path, "wb") as f:
+                    async for chunk in response.aiter_bytes(1 << 16):
+                        digest.update(chunk)
+                        f.write(chunk)
+                        size += len(chunk)
+            sha256 = digest.hexdigest()
+            final_path = self.blob_path(sha256)
+            if final_path.exists():
+                # Same bytes already stored under another id; keep a single copy.
+                tmp_path.unlink()
+            else:
+                final_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, final_path)
+            return sha256, size
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    async def download(self, client: httpx.AsyncClient, paper_id: str, pdf_url: str) -> DownloadResult:
+        """Download one PDF with retries, skipping it if the manifest already has it.
+
+        Args:
+            client: Shared HTTP client
+            paper_id: Versioned arXiv short id
+            pdf_url: URL of the PDF
+
+        Returns:
+            DownloadResult describing the outcome
+        """
+        cached = self._cached_result(paper_id)
+        if cached:
+            self.stats["cached"] += 1
+            return cached
+
+        last_error = None
+        attempts = 0
+        for attempt in range(self.max_retries + 1):
+            attempts += 1
+            await self.rate_limiter.acquire(pdf_url)
+            try:
+                sha256, size = await self._fetch_once(client, pdf_url)
+                result = DownloadResult(
+                    paper_id=paper_id,
+                    status="downloaded",
+                    path=str(self.blob_path(sha256)),
+                    sha256=sha256,
+                    size_bytes=size,
+                    attempts=attempts,
+                )
+                self.manifest.record(result)
+                self.stats["downloaded"] += 1
+                self.stats["bytes"] += size
+                return result
+            except httpx.HTTPStatusError as e:
+                last_error = f"HTTP {e.response.status_code}"
+                if e.response.status_code not in RETRYABLE_STATUS_CODES:
+                    break
+                retry_after = self._retry_after(e.response)
+                if retry_after is not None:
+                    self.rate_limiter.defer(pdf_url, retry_after)
+            except httpx.TransportError as e:
+                last_error = f"{type(e).__name__}: {e}"
+            except Exception as e:
+                # Not a network problem (e.g. an OSError writing the PDF or the manifest):
+                # retrying will not help, and it must not abort the other downloads.
+                last_error = f"{type(e).__name__}: {e}"
+                logger.warning("Download of %s failed: %s", paper_id, last_error)
+                break
+
+            if attempt < self.max_retries:
+                delay = self._backoff_delay(attempt)
+                logger.info("Retrying %s in %.2fs after %s", paper_id, delay, last_error)
+                await asyncio.sleep(delay)
+
+        result = DownloadResult(paper_id=paper_id, status="failed", attempts=attempts, error=last_error)
+        try:
+            self.manifest.record(result)
+        except OSError as e:
+            # Failures are only recorded for inspection; the paper is retried next run either way.
+            logger.warning("Could not record failed download of %s: %s", paper_id, e)
+        self.stats["failed"] += 1
+        return result
+
+    async def iter_downloads(self, items: Iterable[Tuple[str, str]]) -> AsyncIterator[Tuple[int, DownloadResult]]:
+        """Download ``(paper_id, pdf_url)`` pairs with bounded concurrency, yielding results as they finish.
+
+        ``items`` is read lazily: a new pair is only taken once one of the
+        ``max_concurrency`` downloads in flight has finished, and each result is
+        handed out as soon as it is ready. Memory stays flat no matter how many
+        papers are passed in.
+
+        Args:
+            items: Iterable of (versioned arXiv id, PDF URL) pairs, e.g. a generator
+
+        Yields:
+            (position of the pair in ``items``, its DownloadResult), in completion order
+        """
+        pairs = enumerate(items)
+        in_flight: Dict[asyncio.Task, int] = {}
+        started = time.perf_counter()
+        client = self._client or httpx.AsyncClient(
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.max_concurrency),
+        )
+        try:
+            while True:
+                while len(in_flight) < max(1, self.max_concurrency):
+                    pair = next(pairs, None)
+                    if pair is None:
+                        break
+                    index, (paper_id, pdf_url) = pair
+                    in_flight[asyncio.ensure_future(self.download(client, paper_id, pdf_url))] = index
+                if not in_flight:
+                    return
+                finished, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in finished:
+                    yield in_flight.pop(task), task.result()
+        finally:
+            # Reached early when the caller stops iterating or a download raised.
+            for task in in_flight:
+                task.cancel()
+            await asyncio.gather(*in_flight, return_exceptions=True)
+            if self._client is None:
+                await client.aclose()
+            self.stats["elapsed_s"] += time.perf_counter() - started
+
+    async def download_many(self, items: Iterable[Tuple[str, str]]) -> List[DownloadResult]:
+        """Download many ``(paper_id, pdf_url)`` pairs and collect the results in input order.
+
+        Downloads run as in ``iter_downloads``, but the returned list holds one
+        result per pair, so it grows with the input. Stream large inputs
+        through ``iter_downloads`` instead.
+
+        Args:
+            items: Iterable of (versioned arXiv id, PDF URL) pairs
+
+        Returns:
+            List of DownloadResult in input order
+        """
+        results: List[Optional[DownloadResult]] = []
+        async for index, result in self.iter_downloads(items):
+            results.extend([None] * (index + 1 - len(results)))
+            results[index] = result
+        return results
+
+    async def download_papers(self, papers: Iterable[arxiv.Result]) -> List[DownloadResult]:
+        """Download the PDFs of ``arxiv.Result`` objects returned by ``ArxivClient``."""
+        return await self.download_many(
+            (paper.get_short_id().split("/")[-1], paper.pdf_url) for paper in papers
+        )
+
+    def throughput(self) -> Dict[str, float]:
+        """Papers and megabytes per second over all iter_downloads/download_many calls so far."""
+        elapsed = self.stats["elapsed_s"] or float("nan")
+        return {
+            "papers_per_s": self.stats["downloaded"] / elapsed,
+            "mb_per_s": self.stats["bytes"] / (1024 * 1024) / elapsed,
+        }
+
+    def raise_for_failures(self, results: List[DownloadResult]) -> None:
+        failed = [r.paper_id for r in results if r.status == "failed"]
+        if failed:
+            raise PDFDownloadException(f"{len(failed)} PDF(s) failed to download: {', '.join(failed[:10])}")
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def batch_session_id(job_id: str) -> str:
+    """chat_history session_id under which the results of a batch job are stored."""
+    return f"batch::{job_id}"
+
+
+class BatchItem:
+    """One (query, model) pair of a batch job."""
+
+    __slots__ = ("index", "query_index", "query", "provider", "model_name")
+
+    def __init__(self, index: int, query_index: int, query: str, provider: str, model_name: str):
+        self.index = index
+        self.query_index = query_index
+        self.query = query
+        self.provider = provider
+        self.model_name = model_name
+
+
+def plan_items(queries: List[str], models: List[Tuple[str, str]],
+               completed: Iterable[Tuple[str, str]] = ()) -> Tuple[List[BatchItem], int]:
+    """Every query against every model, minus the (query, model_name) pairs already completed.
+
+    Items are numbered over the full query x model grid, so an item keeps its
+    index when a job is resumed.
+
+    Returns:
+        (items to run, number of items skipped as completed)
+    """
+    completed = set(completed)
+    items, skipped = [], 0
+    for query_index, query in enumerate(queries):
+        for model_index, (provider, model_name) in enumerate(models):
+            if (query, model_name) in completed:
+                skipped += 1
+                continue
+            items.append(BatchItem(query_index * len(models) + model_index, query_index, query, provider, model_name))
+    return items, skipped
+
+
+async def run_batch(items: List[BatchItem], call: Callable[[BatchItem], Awaitable[str]],
+                    concurrency: int) -> AsyncIterator[Dict[str, Any]]:
+    """Run ``call`` for every item with at most ``concurrency`` in flight and yield results as they complete.
+
+    A failed item yields an ``error`` result and does not stop the others.
+    Closing the generator (e.g. the client disconnected) cancels the calls
+    still running.
+
+    Yields:
+        {"event": "result", "index", "query_index", "model", "status": "ok" | "error",
+         "response" or "error", "latency_ms"}
+    """
+    pending = iter(items)
+    results: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+
+    async def worker() -> None:
+        for item in pending:
+            started = time.perf_counter()
+            result = {"event": "result", "index": item.index, "query_index": item.query_index,
+                      "model": f"{item.provider}:{item.model_name}"}
+            try:
+                result.update(status="ok", response=await call(item))
+            except Exception as e:
+                logger.warning("Batch item %d (%s) failed: %s", item.index, result["model"], e)
+                result.update(status="error", error=f"{type(e).__name__}: {e}")
+            result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            await results.put(result)
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, min(concurrency, len(items))))]
+    try:
+        for _ in range(len(items)):
+            yield await results.get()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
@@ -0,0 +1,72 @@
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Union
+
+
+class BlobStore:
+    """Content-addressed, write-once store of binary blobs on disk.
+
+    A blob is addressed by the SHA-256 of its bytes and stored at
+    ``<root>/<aa>/<bb>/<sha256>``, so identical figures (a logo on every
+    page, the same plot in two papers) are written once. Writes go to a
+    temporary file in the same directory and are renamed into place, which
+    is atomic: concurrent writers of the same blob, e.g. parse workers in
+    different processes, never expose a partial file, and the last rename
+    wins with identical bytes.
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.stats: Dict[str, int] = {"puts": 0, "deduplicated": 0, "bytes_written": 0}
+
+    def path(self, digest: str) -> Path:
+        if len(digest) != 64 or not all(c in "0123456789abcdef" for c in digest):
+            raise ValueError(f"Invalid blob digest {digest!r}")
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def exists(self, digest: str) -> bool:
+        return self.path(digest).is_file()
+
+    def put(self, data: bytes) -> str:
+        """Store ``data`` unless an identical blob exists, and return its SHA-256."""
+        digest = hashlib.sha256(data).hexdigest()
+        self.stats["puts"] += 1
+        path = self.path(digest)
+        if path.is_file():
+            self.stats["deduplicated"] += 1
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        self.stats["bytes_written"] += len(data)
+        return digest
+
+    def open(self, digest: str) -> BinaryIO:
+        """Open a blob for reading; raises FileNotFoundError if it is not stored."""
+        return open(self.path(digest), "rb")
+
+    def iter_chunks(self, digest: str, chunk_size: int = 1 << 16) -> Iterator[bytes]:
+        """Read a blob in chunks, e.g. to stream it in an HTTP response."""
+        with self.open(digest) as f:
+            for block in iter(lambda: f.read(chunk_size), b""):
+                yield block
+
+    def get(self, digest: str) -> bytes:
+        with self.open(digest) as f:
+            return f.read()
+
+    def size_bytes(self) -> int:
+        """Total size of the stored blobs."""
+        return sum(entry.stat().st_size for entry in self.root.glob("*/*/*") if not entry.name.startswith(".tmp-"))
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from src.services.metrics.instruments import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+_SESSION_HIT = CACHE_REQUESTS.labels("chat_session", "hit")
+_SESSION_MISS = CACHE_REQUESTS.labels("chat_session", "miss")
+
+# Loads the last N persisted (user_query, model_response) turns of a session.
+TurnLoader = Callable[[str, int], Awaitable[List[Tuple[str, str]]]]
+
+
+async def load_persisted_turns(session_id: str, limit: int) -> List[Tuple[str, str]]:
+    # Imported lazily so the store can be used (and benchmarked) without a database.
+    from src.db.utils.chat_history import fetch_session_turns
+
+    return await fetch_session_turns(session_id, limit=limit)
+
+
+def _message_size(message: BaseMessage) -> int:
+    content = message.content if isinstance(message.content, str) else str(message.content)
+    return sys.getsizeof(content) + 200  # rough per-message object overhead
+
+
+class SessionHistory(BaseChatMessageHistory):
+    """Chat history of one session, owned by a SessionStore.
+
+    Messages are loaded from Postgres on first async access, so a session
+    that was evicted (or lives on another worker) picks up where it left off.
+    Only the last ``max_messages`` messages are kept in memory.
+    """
+
+    def __init__(self, store: "SessionStore", session_id: str):
+        self.store = store
+        self.session_id = session_id
+        self._messages: List[BaseMessage] = []
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+        self.nbytes = 0
+        self.last_access = time.monotonic()
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        return list(self._messages)
+
+    async def aget_messages(self) -> List[BaseMessage]:
+        await self._ensure_loaded()
+        return list(self._messages)
+
+    async def _ensure_loaded(self) -> None:
+        if self._loaded:
+            return
+        async with self._load_lock:
+            if self._loaded:
+                return
+            persisted = await self.store.rehydrate(self.session_id)
+            # Messages added while loading are newer than anything persisted.
+            self._set_messages(persisted + self._messages)
+            self._loaded = True
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        self._set_messages(self._messages + list(messages))
+
+    async def aadd_messages(self, messages: Sequence[BaseMessage]) -> None:
+        await self._ensure_loaded()
+        self.add_messages(messages)
+
+    def clear(self) -> None:
+        self._set_messages([])
+
+    def _set_messages(self, messages: List[BaseMessage]) -> None:
+        messages = messages[-self.store.max_messages:]
+        nbytes = sum(_message_size(message) for message in messages)
+        self.store._resize(self, nbytes - self.nbytes)
+        self._messages = messages
+        self.nbytes = nbytes
+
+
+class SessionStore:
+    """Bounded in-memory cache of per-session chat histories.
+
+    Sessions are kept in LRU order and evicted when there are more than
+    ``max_sessions`` of them, when their approximate size exceeds ``max_bytes``,
+    or when they have been idle for longer than ``ttl_s``. Postgres stays the
+    source of truth: an evicted or unknown session is rehydrated from its
+    persisted turns on its next use.
+    """
+
+    def __init__(self, max_sessions: int = 10_000, max_bytes: int = 64 * 1024 * 1024,
+                 ttl_s: float = 1800.0, max_messages: int = 40,
+                 loader: Optional[TurnLoader] = load_persisted_turns):
+        self.max_sessions = max_sessions
+        self.max_bytes = max_bytes
+        self.ttl_s = ttl_s
+        self.max_messages = max_messages
+        self.loader = loader
+        self._sessions: "OrderedDict[str, SessionHistory]" = OrderedDict()
+        self.nbytes = 0
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0,
+                                      "rehydrations": 0, "rehydration_errors": 0}
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, session_id: str) -> SessionHistory:
+        """Return the history for ``session_id``; usable as RunnableWithMessageHistory's factory."""
+        now = time.monotonic()
+        self._expire(now)
+        history = self._sessions.get(session_id)
+        if history is not None:
+            self.stats["hits"] += 1
+            _SESSION_HIT.inc()
+            self._sessions.move_to_end(session_id)
+        else:
+            self.stats["misses"] += 1
+            _SESSION_MISS.inc()
+            history = SessionHistory(self, session_id)
+            self._sessions[session_id] = history
+            self._evict()
+        history.last_access = now
+        return history
+
+    async def rehydrate(self, session_id: str) -> List[BaseMessage]:
+        """Load persisted messages for a session; errors degrade to an empty history."""
+        if self.loader is None:
+            return []
+        try:
+            turns = await self.loader(session_id, self.max_messages // 2)
+        except Exception as e:
+            self.stats["rehydration_errors"] += 1
+            logger.warning("Could not rehydrate chat session %s: %s", session_id, e)
+            return []
+        self.stats["rehydrations"] += 1
+        messages: List[BaseMessage] = []
+        for user_query, model_response in turns:
+            messages.append(HumanMessage(content=user_query or ""))
+            messages.append(AIMessage(content=model_response or ""))
+        return messages
+
+    def _resize(self, history: SessionHistory, delta: int) -> None:
+        if self._sessions.get(history.session_id) is not history:
+            return  # already evicted; its size is no longer counted
+        self.nbytes += delta
+        if delta > 0:
+            self._evict()
+
+    def _drop(self, session_id: str) -> None:
+        history = self._sessions.pop(session_id)
+        self.nbytes -= history.nbytes
+
+    def _expire(self, now: float) -> None:
+        # LRU order is access order, so idle sessions are all at the front.
+        while self._sessions:
+            session_id, history = next(iter(self._sessions.items()))
+            if now - history.last_access <= self.ttl_s:
+                break
+            self._drop(session_id)
+            self.stats["expirations"] += 1
+
+    def _evict(self) -> None:
+        # The most recently used session is never evicted, even if it alone exceeds max_bytes.
+        while len(self._sessions) > 1 and (len(self._sessions) > self.max_sessions
+                                           or self.nbytes > self.max_bytes):
+            session_id = next(iter(self._sessions))
+            self._drop(session_id)
+            self.stats["evictions"] += 1
+
+    def snapshot(self) -> Dict[str, int]:
+        return {"sessions": len(self._sessions), "bytes": self.nbytes, **self.stats}
+
+
+def make_session_store() -> SessionStore:
+    return SessionStore(
+        max_sessions=int(os.getenv("CHAT_SESSION_MAX_SESSIONS", "10000")),
+        max_bytes=int(float(os.getenv("CHAT_SESSION_MAX_MB", "64")) * 1024 * 1024),
+        ttl_s=float(os.getenv("CHAT_SESSION_TTL_S", "1800")),
+        max_messages=int(os.getenv("CHAT_SESSION_MAX_MESSAGES", "40")),
+    )
@@ -0,0 +1,86 @@
+import re
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, Iterator, Tuple
+
+from src.schemas.chunking.models import PaperChunk
+from src.schemas.pdf_parser.models import PaperSection
+
+# Whitespace-delimited tokens. Cheap, language-agnostic and close enough to
+# model tokens for sizing retrieval chunks.
+TOKEN_PATTERN = re.compile(r"\S+")
+
+
+class SectionChunker:
+    """Streams overlapping, token-bounded chunks out of paper sections.
+
+    Sections are consumed one at a time and tokens are scanned lazily with
+    ``re.finditer``; only the (start, end) offsets of the current window are
+    kept, so memory is bounded by ``max_tokens`` regardless of paper size.
+    Chunks never cross a section boundary and keep their section title and
+    character offsets.
+    """
+
+    def __init__(self, max_tokens: int = 256, overlap_tokens: int = 32):
+        if max_tokens <= 0:
+            raise ValueError("max_tokens must be positive")
+        if not 0 <= overlap_tokens < max_tokens:
+            raise ValueError("overlap_tokens must be in [0, max_tokens)")
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.stats: Dict[str, float] = {"sections": 0, "chunks": 0, "tokens": 0, "elapsed_s": 0.0}
+
+    def iter_chunks(self, arxiv_id: str, sections: Iterable[PaperSection]) -> Iterator[PaperChunk]:
+        """Yield chunks for every section of a paper, in order.
+
+        Args:
+            arxiv_id: Paper the sections belong to
+            sections: PaperSection objects, e.g. ``PdfContent.sections`` or a generator
+
+        Yields:
+            PaperChunk objects with increasing ``chunk_index``
+        """
+        chunk_index = 0
+        for section_index, section in enumerate(sections):
+            started = time.perf_counter()
+            for start, end, token_count in self._windows(section.content):
+                chunk = PaperChunk(
+                    arxiv_id=arxiv_id,
+                    chunk_index=chunk_index,
+                    section_index=section_index,
+                    section_title=section.title,
+                    start_char=start,
+                    end_char=end,
+                    token_count=token_count,
+                    text=section.content[start:end],
+                )
+                chunk_index += 1
+                self.stats["chunks"] += 1
+                self.stats["tokens"] += token_count
+                # Exclude time spent by the consumer between yields.
+                self.stats["elapsed_s"] += time.perf_counter() - started
+                yield chunk
+                started = time.perf_counter()
+            self.stats["sections"] += 1
+            self.stats["elapsed_s"] += time.perf_counter() - started
+
+    def _windows(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        """Yield (start_char, end_char, token_count) windows over ``text``."""
+        window: Deque[Tuple[int, int]] = deque()
+        emitted_through = -1  # index in the token stream of the last token already emitted
+        token_position = -1
+        for match in TOKEN_PATTERN.finditer(text):
+            token_position += 1
+            window.append(match.span())
+            if len(window) == self.max_tokens:
+                yield window[0][0], window[-1][1], len(window)
+                emitted_through = token_position
+                for _ in range(self.max_tokens - self.overlap_tokens):
+                    window.popleft()
+        # Emit the tail unless it is made only of overlap already emitted.
+        if window and token_position > emitted_through:
+            yield window[0][0], window[-1][1], len(window)
+
+    def chunks_per_second(self) -> float:
+        elapsed = self.stats["elapsed_s"]
+        return self.stats["chunks"] / elapsed if elapsed else 0.0
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple, TypeVar
+
+from src.services.metrics.instruments import SINGLE_FLIGHT_CALLS
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 1
+
+
+class SingleFlight:
+    """Coalesces concurrent identical calls into one upstream call.
+
+    The first caller of a key (the leader) starts ``fn()`` in its own task;
+    callers arriving with the same key while it is in flight (followers) wait
+    for that task and get the same result or exception. Once it finishes the
+    key is released, so nothing is cached: the next call goes upstream again.
+
+    The upstream task is shielded from its waiters, so a client that
+    disconnects does not cancel the call the other waiters are sharing.
+    Results are shared objects and must not be mutated by the callers.
+    """
+
+    def __init__(self, group: str, enabled: bool = True):
+        """
+        Args:
+            group: Metrics label for what is coalesced, e.g. "llm", "search", "embedding"
+            enabled: False runs every call upstream (for comparisons)
+        """
+        self.group = group
+        self.enabled = enabled
+        self._in_flight: Dict[Hashable, _Flight] = {}
+        self._leader = SINGLE_FLIGHT_CALLS.labels(group, "leader")
+        self._follower = SINGLE_FLIGHT_CALLS.labels(group, "follower")
+        self.stats: Dict[str, int] = {"leaders": 0, "followers": 0, "errors": 0, "max_waiters": 0}
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        """Run ``fn()``, or join the identical call already in flight for ``key``.
+
+        Returns:
+            (result, shared) where shared is True if this caller was a follower
+        """
+        if not self.enabled:
+            return await fn(), False
+        flight = self._in_flight.get(key)
+        shared = flight is not None
+        if shared:
+            flight.waiters += 1
+            self.stats["max_waiters"] = max(self.stats["max_waiters"], flight.waiters)
+            self.stats["followers"] += 1
+            self._follower.inc()
+        else:
+            flight = self._in_flight[key] = _Flight(asyncio.ensure_future(fn()))
+            flight.task.add_done_callback(lambda task: self._release(key, flight))
+            self.stats["leaders"] += 1
+            self._leader.inc()
+        return await asyncio.shield(flight.task), shared
+
+    def snapshot(self) -> Dict[str, Any]:
+        calls = self.stats["leaders"] + self.stats["followers"]
+        return {"in_flight": len(self._in_flight),
+                "avoided_share": self.stats["followers"] / calls if calls else 0.0, **self.stats}
+
+    def _release(self, key: Hashable, flight: _Flight) -> None:
+        if self._in_flight.get(key) is flight:
+            del self._in_flight[key]
+        # Reading the exception here also keeps asyncio from logging it as never
+        # retrieved when every waiter went away before the call failed.
+        if not flight.task.cancelled() and flight.task.exception() is not None:
+            self.stats["errors"] += 1
+            logger.debug("Single-flight %s call failed: %s", self.group, flight.task.exception())
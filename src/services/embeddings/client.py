@@ -0,0 +1,43 @@
+from typing import List, Optional
+
+import numpy as np
+
+from dotenv import load_dotenv
+import os
+
+from src.services.coalescing.flight import SingleFlight
+
+load_dotenv()  # Load environment variables from .env file
+
+
+class EmbeddingModel:
+    def __init__(self, model_name: str | None = None, single_flight: Optional[SingleFlight] = None):
+        self.model_name = model_name or os.getenv("OLLAMA_EMBED_MODEL", "nomic-embed-text")
+        # Concurrent identical query batches share one embedding call
+        self.single_flight = single_flight
+        self._embeddings = None
+
+    @property
+    def embeddings(self):
+        # langchain_ollama is imported on first use, not when the API starts.
+        if self._embeddings is None:
+            from langchain_ollama import OllamaEmbeddings
+
+            self._embeddings = OllamaEmbeddings(model=self.model_name)
+        return self._embeddings
+
+    async def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed a batch of queries in one call and return a (n, dim) float32 array."""
+        if self.single_flight is not None:
+            vectors, _ = await self.single_flight.do(tuple(queries), lambda: self._embed_queries(queries))
+            return vectors
+        return await self._embed_queries(queries)
+
+    async def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        vectors = await self.embeddings.aembed_documents(queries)
+        return np.asarray(vectors, dtype=np.float32)
+
+    async def embed_documents(self, texts: List[str]) -> np.ndarray:
+        """Embed chunk texts for indexing and return a (n, dim) float32 array."""
+        vectors = await self.embeddings.aembed_documents(texts)
+        return np.asarray(vectors, dtype=np.float32)
@@ -0,0 +1,378 @@
+import json
+import logging
+import os
+import re
+import shutil
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from src.exceptions import IndexException
+from .postings import varint_decode, varint_encode
+
+logger = logging.getLogger(__name__)
+
+# Identifiers keep their inner punctuation so "gpt-4o", "llama3.2", "resnet-50"
+# and "\alpha" survive as single terms; their parts are indexed as well.
+TOKEN_PATTERN = re.compile(r"\\?\w+(?:[.\-+/]\w+)*")
+PART_PATTERN = re.compile(r"\w+")
+
+MANIFEST_FILE = "segments.json"
+DELETED_FILE = "deleted.npy"
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms for BM25, including the parts of compound identifiers."""
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group()
+        tokens.append(token)
+        parts = PART_PATTERN.findall(token)
+        if len(parts) > 1 or (parts and parts[0] != token):
+            tokens.extend(parts)
+    return tokens
+
+
+class Segment:
+    """An immutable slice of the inverted index, stored as flat arrays.
+
+    ``postings[offsets[t]:offsets[t + 1]]`` holds term t's postings as varints:
+    (doc-position delta, term frequency) pairs sorted by doc position. Arrays
+    are memory-mapped; only the vocabulary is held as a Python dict.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        # Segments are numbered in creation order (seg-000042 -> 42)
+        self.seq = int(path.name.rpartition("-")[2])
+        with open(path / "terms.json", "r", encoding="utf-8") as f:
+            terms = json.load(f)
+        self.term_index: Dict[str, int] = {term: i for i, term in enumerate(terms)}
+        self.offsets = np.load(path / "offsets.npy", mmap_mode="r")
+        self.df = np.load(path / "df.npy", mmap_mode="r")
+        self.postings = np.load(path / "postings.npy", mmap_mode="r")
+        self.doc_ids = np.load(path / "doc_ids.npy", mmap_mode="r")
+        self.doc_lens = np.load(path / "doc_lens.npy", mmap_mode="r")
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.doc_ids)
+
+    @property
+    def total_len(self) -> int:
+        return int(self.doc_lens.sum())
+
+    def term_df(self, term: str) -> int:
+        index = self.term_index.get(term)
+        return 0 if index is None else int(self.df[index])
+
+    def postings_for(self, term: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        index = self.term_index.get(term)
+        if index is None:
+            return None
+        values = varint_decode(self.postings[self.offsets[index]:self.offsets[index + 1]])
+        return np.cumsum(values[0::2]).astype(np.int64), values[1::2].astype(np.float32)
+
+    def triples(self) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """All (term index, doc position, tf) triples, for merging."""
+        terms = [None] * len(self.term_index)
+        for term, index in self.term_index.items():
+            terms[index] = term
+        values = varint_decode(self.postings)
+        deltas, tfs = values[0::2].astype(np.int64), values[1::2].astype(np.int64)
+        df = np.asarray(self.df, dtype=np.int64)
+        term_idx = np.repeat(np.arange(len(df)), df)
+        # Undo the per-term delta encoding: cumulative sum restarted at each term.
+        running = np.concatenate([[0], np.cumsum(deltas)])
+        term_starts = np.concatenate([[0], np.cumsum(df)[:-1]])
+        return terms, term_idx, running[1:] - np.repeat(running[term_starts], df), tfs
+
+    def size_bytes(self) -> int:
+        return sum(f.stat().st_size for f in self.path.iterdir())
+
+
+def write_segment(path: Path, terms: List[str], term_idx: np.ndarray, doc_pos: np.ndarray,
+                  tfs: np.ndarray, doc_ids: np.ndarray, doc_lens: np.ndarray) -> None:
+    """Encode (term, doc, tf) triples into a segment directory.
+
+    ``terms`` need not be sorted; triples are sorted by (term, doc) here and the
+    whole postings stream is varint-encoded in one vectorised pass.
+    """
+    order = np.lexsort((doc_pos, term_idx))
+    term_idx, doc_pos, tfs = term_idx[order], doc_pos[order], tfs[order]
+    df = np.bincount(term_idx, minlength=len(terms)).astype(np.int64)
+
+    deltas = np.diff(doc_pos, prepend=0)
+    term_starts = np.concatenate([[0], np.cumsum(df)[:-1]]).astype(np.int64)
+    nonempty = df > 0
+    deltas[term_starts[nonempty]] = doc_pos[term_starts[nonempty]]
+
+    interleaved = np.empty(2 * len(doc_pos), dtype=np.uint64)
+    interleaved[0::2] = deltas
+    interleaved[1::2] = tfs
+    encoded = varint_encode(interleaved)
+
+    # Byte offset of each term: count value terminators (bytes < 0x80) to find boundaries.
+    value_ends = np.flatnonzero(encoded < 0x80) + 1
+    # pair_ends[n] is the byte where the first n pairs end, so a term ends at pair_ends[cumsum(df)].
+    pair_ends = np.concatenate([[0], value_ends[1::2]]).astype(np.int64)
+    offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+    offsets[1:] = pair_ends[np.cumsum(df)]
+
+    tmp = path.with_name(path.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    with open(tmp / "terms.json", "w", encoding="utf-8") as f:
+        json.dump(terms, f)
+    np.save(tmp / "offsets.npy", offsets)
+    np.save(tmp / "df.npy", df.astype(np.int32))
+    np.save(tmp / "postings.npy", encoded)
+    np.save(tmp / "doc_ids.npy", np.asarray(doc_ids, dtype=np.int64))
+    np.save(tmp / "doc_lens.npy", np.asarray(doc_lens, dtype=np.int32))
+    os.replace(tmp, path)
+
+
+class BM25Index:
+    """Segmented BM25 inverted index over chunk text.
+
+    New documents become a new immutable segment; once there are more than
+    ``max_segments`` the smallest ones are merged, dropping deleted documents.
+    A deletion only hides documents already indexed when it was made, so an id
+    that is deleted and then added again (a re-published chunk) is searchable.
+    Scoring decodes the query terms' postings and accumulates BM25 weights with
+    NumPy, then picks the top-k with ``argpartition``.
+    """
+
+    def __init__(self, path: Union[str, Path], k1: float = 1.5, b: float = 0.75,
+                 max_segments: int = 8, merge_factor: int = 4):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.k1 = k1
+        self.b = b
+        self.max_segments = max_segments
+        self.merge_factor = merge_factor
+        self.manifest_path = self.path / MANIFEST_FILE
+        self._manifest_stamp = None
+        self.segments: List[Segment] = []
+        # Deleted ids, and for each the segment number from which it is no longer deleted
+        self.deleted = np.empty(0, dtype=np.int64)
+        self.deleted_before = np.empty(0, dtype=np.int64)
+        self._segment_deleted: Dict[str, np.ndarray] = {}
+        if not self.manifest_path.exists():
+            self.manifest = {"segments": [], "next_segment": 0}
+            self._write_manifest()
+        self.refresh()
+
+    # ---- manifest -----------------------------------------------------------------
+    def _write_manifest(self) -> None:
+        tmp = self.manifest_path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.manifest_path)
+
+    def refresh(self) -> None:
+        """Reload segments if another process added, merged or deleted."""
+        stat = self.manifest_path.stat()
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        if stamp == self._manifest_stamp:
+            return
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        loaded = {segment.path.name: segment for segment in self.segments}
+        self.segments = [loaded.get(name) or Segment(self.path / name) for name in self.manifest["segments"]]
+        deleted_path = self.path / DELETED_FILE
+        deleted = np.load(deleted_path) if deleted_path.exists() else np.empty((0, 2), dtype=np.int64)
+        if deleted.ndim == 1:
+            # Written before deletions were numbered: they apply to every existing
+            # segment. Saved right away so later segments are not covered as well.
+            deleted = np.stack([deleted, np.full(len(deleted), self.manifest["next_segment"])], axis=1)
+            self._save_deleted(deleted[:, 0], deleted[:, 1])
+        self.deleted, self.deleted_before = deleted[:, 0], deleted[:, 1]
+        self._segment_deleted = {segment.path.name: self.deleted[self.deleted_before > segment.seq]
+                                 for segment in self.segments}
+        self._manifest_stamp = stamp
+
+    def _save_deleted(self, ids: np.ndarray, before: np.ndarray) -> None:
+        tmp = self.path / f"{DELETED_FILE}.tmp.npy"
+        np.save(tmp, np.stack([ids, before], axis=1).astype(np.int64))
+        os.replace(tmp, self.path / DELETED_FILE)
+
+    def _new_segment_path(self) -> Path:
+        name = f"seg-{self.manifest['next_segment']:06d}"
+        self.manifest["next_segment"] += 1
+        return self.path / name
+
+    # ---- writes ---------------------------------------------------------------------
+    def add_documents(self, ids: Sequence[int], texts: Iterable[str]) -> None:
+        """Index documents as a new segment, then merge if there are too many segments.
+
+        Args:
+            ids: External document (chunk) ids
+            texts: Document texts, same length as ids
+        """
+        self.refresh()
+        vocabulary: Dict[str, int] = {}
+        term_idx, doc_pos, tfs, doc_lens = [], [], [], []
+        for position, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lens.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                term_idx.append(vocabulary.setdefault(term, len(vocabulary)))
+                doc_pos.append(position)
+                tfs.append(tf)
+        if len(doc_lens) != len(ids):
+            raise IndexException("ids and texts must have the same length.")
+        if not doc_lens:
+            return
+
+        path = self._new_segment_path()
+        write_segment(path, list(vocabulary), np.asarray(term_idx, dtype=np.int64),
+                      np.asarray(doc_pos, dtype=np.int64), np.asarray(tfs, dtype=np.int64),
+                      np.asarray(ids, dtype=np.int64), np.asarray(doc_lens, dtype=np.int32))
+        self.manifest["segments"].append(path.name)
+        self._write_manifest()
+        self.refresh()
+        self.maybe_merge()
+
+    def delete(self, ids: Sequence[int]) -> None:
+        """Mark documents as deleted; they are skipped at query time and dropped on merge.
+
+        Only documents indexed so far are deleted: ids added again afterwards
+        are searchable.
+        """
+        self.refresh()
+        ids = np.unique(np.asarray(ids, dtype=np.int64))
+        before = np.full(len(ids), self.manifest["next_segment"], dtype=np.int64)
+        # A repeated deletion moves the id's boundary forward
+        kept = ~np.isin(self.deleted, ids)
+        self._save_deleted(np.concatenate([self.deleted[kept], ids]),
+                           np.concatenate([self.deleted_before[kept], before]))
+        self._write_manifest()
+        self.refresh()
+
+    def maybe_merge(self) -> None:
+        """Tiered merge policy: merge the smallest segments until at most max_segments remain."""
+        while len(self.segments) > self.max_segments:
+            smallest = sorted(self.segments, key=lambda segment: segment.n_docs)[:self.merge_factor]
+            self.merge([segment.path.name for segment in smallest])
+
+    def merge(self, names: List[str]) -> None:
+        """Merge the named segments into one new segment, dropping deleted documents."""
+        self.refresh()
+        by_name = {segment.path.name: segment for segment in self.segments}
+        vocabulary: Dict[str, int] = {}
+        parts_term, parts_doc, parts_tf, parts_ids, parts_lens = [], [], [], [], []
+        doc_offset = 0
+        for name in names:
+            segment = by_name[name]
+            terms, term_idx, doc_pos, tfs = segment.triples()
+            doc_ids = np.asarray(segment.doc_ids)
+            alive = ~np.isin(doc_ids, self._segment_deleted[name])
+            # Renumber surviving docs densely after the docs of earlier segments.
+            new_pos = np.cumsum(alive) - 1 + doc_offset
+            keep = alive[doc_pos]
+            mapping = np.array([vocabulary.setdefault(term, len(vocabulary)) for term in terms], dtype=np.int64)
+            parts_term.append(mapping[term_idx[keep]] if len(mapping) else term_idx[keep])
+            parts_doc.append(new_pos[doc_pos[keep]])
+            parts_tf.append(tfs[keep])
+            parts_ids.append(doc_ids[alive])
+            parts_lens.append(np.asarray(segment.doc_lens)[alive])
+            doc_offset += int(alive.sum())
+
+        merged = set(names)
+        position = min(self.manifest["segments"].index(name) for name in names)
+        remaining = [name for name in self.manifest["segments"] if name not in merged]
+        if doc_offset:
+            term_idx = np.concatenate(parts_term)
+            # Terms that only occurred in deleted documents leave the vocabulary.
+            used = np.bincount(term_idx, minlength=len(vocabulary)) > 0
+            renumber = np.cumsum(used) - 1
+            terms = [term for term, keep in zip(vocabulary, used) if keep]
+            path = self._new_segment_path()
+            write_segment(path, terms, renumber[term_idx], np.concatenate(parts_doc),
+                          np.concatenate(parts_tf), np.concatenate(parts_ids), np.concatenate(parts_lens))
+            remaining.insert(position, path.name)
+            logger.info("Merged %d BM25 segments into %s (%d docs)", len(names), path.name, doc_offset)
+        else:
+            logger.info("Dropped %d BM25 segments whose documents were all deleted", len(names))
+        self.manifest["segments"] = remaining
+        self._write_manifest()
+        # Deletions that no remaining segment predates have nothing left to hide.
+        # Readers still holding them are unaffected, so this needs no manifest bump.
+        oldest = min((int(name.rpartition("-")[2]) for name in remaining), default=self.manifest["next_segment"])
+        live = self.deleted_before > oldest
+        if not live.all():
+            self._save_deleted(self.deleted[live], self.deleted_before[live])
+        self.refresh()
+        for name in names:
+            shutil.rmtree(self.path / name, ignore_errors=True)
+
+    # ---- search ---------------------------------------------------------------------
+    def search(self, query: str, k: int = 10,
+               allowed_ids: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """BM25 top-k for one query.
+
+        Args:
+            query: Query text
+            k: Number of results
+            allowed_ids: Optional sorted array of ids to restrict the search to
+
+        Returns:
+            (ids, scores) sorted by descending score; may hold fewer than k entries
+        """
+        self.refresh()
+        terms = list(dict.fromkeys(tokenize(query)))
+        n_docs = sum(segment.n_docs for segment in self.segments)
+        if not terms or n_docs == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        avgdl = sum(segment.total_len for segment in self.segments) / n_docs
+        df = np.array([sum(segment.term_df(term) for segment in self.segments) for term in terms], dtype=np.float64)
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+        found_ids, found_scores = [], []
+        for segment in self.segments:
+            positions, weights = [], []
+            for term, term_idf in zip(terms, idf):
+                postings = segment.postings_for(term)
+                if postings is None:
+                    continue
+                doc_pos, tf = postings
+                norm = self.k1 * (1 - self.b + self.b * segment.doc_lens[doc_pos] / avgdl)
+                positions.append(doc_pos)
+                weights.append(term_idf * tf * (self.k1 + 1) / (tf + norm))
+            if not positions:
+                continue
+            unique_pos, inverse = np.unique(np.concatenate(positions), return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(weights)).astype(np.float32)
+            ids = np.asarray(segment.doc_ids[unique_pos])
+            deleted = self._segment_deleted[segment.path.name]
+            mask = ~np.isin(ids, deleted) if len(deleted) else None
+            if allowed_ids is not None:
+                allowed = np.isin(ids, allowed_ids, assume_unique=True)
+                mask = allowed if mask is None else mask & allowed
+            if mask is not None:
+                ids, scores = ids[mask], scores[mask]
+            if len(scores) > k:
+                top = np.argpartition(-scores, k - 1)[:k]
+                ids, scores = ids[top], scores[top]
+            found_ids.append(ids)
+            found_scores.append(scores)
+
+        if not found_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        ids, scores = np.concatenate(found_ids), np.concatenate(found_scores)
+        order = np.argsort(-scores, kind="stable")[:k]
+        return ids[order], scores[order]
+
+    def stats(self) -> Dict[str, int]:
+        self.refresh()
+        return {
+            "segments": len(self.segments),
+            "docs": sum(segment.n_docs for segment in self.segments),
+            "deleted": len(self.deleted),
+            "size_bytes": sum(segment.size_bytes() for segment in self.segments),
+        }
@@ -0,0 +1,42 @@
+import numpy as np
+
+# LEB128-style varints: 7 payload bits per byte, high bit set on every byte but the last.
+
+
+def varint_encode(values: np.ndarray) -> np.ndarray:
+    """Encode non-negative integers as a uint8 varint stream (vectorised)."""
+    values = np.asarray(values, dtype=np.uint64)
+    if len(values) == 0:
+        return np.empty(0, dtype=np.uint8)
+    bit_length = np.zeros(len(values), dtype=np.int64)
+    remaining = values.copy()
+    while remaining.any():
+        nonzero = remaining > 0
+        bit_length[nonzero] += 1
+        remaining >>= np.uint64(1)
+    n_bytes = np.maximum(1, (bit_length + 6) // 7)
+    ends = np.cumsum(n_bytes)
+    starts = ends - n_bytes
+    out = np.empty(int(ends[-1]), dtype=np.uint8)
+    for byte_index in range(int(n_bytes.max())):
+        has = n_bytes > byte_index
+        payload = (values[has] >> np.uint64(7 * byte_index)) & np.uint64(0x7F)
+        more = (n_bytes[has] > byte_index + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[has] + byte_index] = (payload | more).astype(np.uint8)
+    return out
+
+
+def varint_decode(buffer: np.ndarray) -> np.ndarray:
+    """Decode a uint8 varint stream back into uint64 values (vectorised)."""
+    buffer = np.asarray(buffer, dtype=np.uint8)
+    if len(buffer) == 0:
+        return np.empty(0, dtype=np.uint64)
+    ends = np.flatnonzero(buffer < 0x80)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    lengths = ends - starts + 1
+    position = np.arange(len(buffer)) - np.repeat(starts, lengths)
+    payload = (buffer & 0x7F).astype(np.uint64) << (7 * position).astype(np.uint64)
+    return np.add.reduceat(payload, starts)
+
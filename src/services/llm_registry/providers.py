@@ -0,0 +1,77 @@
+import importlib
+import logging
+import os
+import time
+from functools import lru_cache
+from importlib import metadata
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+# Built-in providers: name -> "module:attribute" of the model class. The
+# module (and the SDK it wraps) is imported the first time the provider is used.
+BUILTIN_PROVIDERS: Dict[str, str] = {
+    "ollama": "src.services.ollama.client:OllamaModel",
+    "nvidia": "src.services.nvidia_nim.client:NvidiaNimModel",
+}
+# Installed packages can add providers through this entry-point group, e.g.
+#   [project.entry-points."arxivmind.llm_providers"]
+#   openai = "my_pkg.openai_model:OpenAIModel"
+ENTRY_POINT_GROUP = "arxivmind.llm_providers"
+
+
+def load_object(target: str) -> Any:
+    """Import ``module:attribute`` and return the attribute."""
+    module_name, _, attribute = target.partition(":")
+    if not module_name or not attribute:
+        raise ValueError(f"Invalid import target {target!r}, expected module:attribute")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+def _env_providers() -> Dict[str, str]:
+    """Extra providers from LLM_PROVIDER_PLUGINS, e.g. ``openai=my_pkg.openai_model:OpenAIModel``."""
+    providers = {}
+    for item in os.getenv("LLM_PROVIDER_PLUGINS", "").split(","):
+        name, _, target = item.strip().partition("=")
+        if name and target:
+            providers[name.strip()] = target.strip()
+    return providers
+
+
+@lru_cache(maxsize=None)
+def _plugin_providers() -> Dict[str, str]:
+    # Scanning installed distributions is not free either, so it only happens
+    # when a name is not a built-in provider.
+    providers = {entry_point.name: entry_point.value for entry_point in metadata.entry_points(group=ENTRY_POINT_GROUP)}
+    providers.update(_env_providers())
+    return providers
+
+
+def provider_target(name: str) -> str:
+    target = BUILTIN_PROVIDERS.get(name) or _plugin_providers().get(name)
+    if target is None:
+        raise ValueError(f"Unknown LLM provider: {name}")
+    return target
+
+
+def is_known_provider(name: str) -> bool:
+    try:
+        provider_target(name)
+    except ValueError:
+        return False
+    return True
+
+
+@lru_cache(maxsize=None)
+def load_provider(name: str) -> type:
+    """Model class of a provider, importing its module (and SDK) on the first call.
+
+    A provider's model class is built as ``cls(model_name=..., temperature=...)``
+    and must offer async ``prompt_model``, ``stream_model`` and ``warm_up``,
+    like OllamaModel and NvidiaNimModel.
+    """
+    target = provider_target(name)
+    started = time.perf_counter()
+    model_class = load_object(target)
+    logger.info("Loaded LLM provider %s (%s) in %.0f ms", name, target, (time.perf_counter() - started) * 1000)
+    return model_class
@@ -0,0 +1,241 @@
+import asyncio
+import logging
+import os
+from typing import TYPE_CHECKING, Any, Dict, FrozenSet, Iterable, List, Optional, Tuple, Union
+
+from src.services.llm_registry.providers import is_known_provider, load_provider
+
+if TYPE_CHECKING:
+    import aiohttp
+    import httpx
+
+    from src.services.nvidia_nim.client import NvidiaNimModel
+    from src.services.ollama.client import OllamaModel
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TEMPERATURE = 0.7
+# Same default as the Streamlit model picker
+DEFAULT_AVAILABLE_MODELS = "llama3.2,moonshotai/kimi-k2-instruct-0905,deepseek-ai/deepseek-v3.1"
+
+LLMModel = Union["OllamaModel", "NvidiaNimModel", Any]
+
+
+def parse_model_specs(value: Optional[str]) -> List[Tuple[str, str]]:
+    """Parse a comma-separated ``provider:model`` list, e.g. ``ollama:llama3.2,nvidia:deepseek-ai/deepseek-v3``."""
+    specs = []
+    for item in (value or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        provider, _, model_name = item.partition(":")
+        if not is_known_provider(provider) or not model_name:
+            raise ValueError(f"Invalid model spec {item!r}, expected provider:model")
+        specs.append((provider, model_name))
+    return specs
+
+
+def resolve_model_id(model_id: str) -> Tuple[str, str]:
+    """(provider, model) of a ``provider:model`` spec or a bare model id.
+
+    Bare ids follow the AVAILABLE_MODELS convention: NIM models are
+    ``org/model`` (``deepseek-ai/deepseek-v3.1``), anything else is an Ollama
+    model (``llama3.2``). This only parses the id; ``LLMRegistry.check``
+    decides whether the model may be used.
+    """
+    model_id = model_id.strip()
+    provider, _, model_name = model_id.partition(":")
+    if model_name and is_known_provider(provider):
+        return provider, model_name
+    if not model_id:
+        raise ValueError("Empty model id")
+    return ("nvidia" if "/" in model_id else "ollama"), model_id
+
+
+class UnknownModelError(ValueError):
+    """Raised for a model that is not in the registry's allowlist."""
+
+
+def parse_verify_ssl(value: Optional[str]) -> Union[bool, str]:
+    """``true``/``false``, or the path of a CA bundle to verify against."""
+    value = (value or "true").strip()
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    return value
+
+
+class LLMRegistry:
+    """Process-wide cache of ready-to-use chat models.
+
+    One model (client + prompt + chain) is built per (provider, model,
+    temperature) and reused by every request. All models of a provider share
+    one keep-alive connection pool: an httpx transport for Ollama and an
+    aiohttp connector for NVIDIA NIM. Provider SDKs and pools are only loaded
+    when a provider is first used, so unused providers cost nothing at
+    startup. Create it in the FastAPI lifespan and call ``aclose`` on shutdown.
+
+    Model names usually come from clients, so only models in ``allowed`` are
+    built; anything else raises ``UnknownModelError`` instead of adding a
+    model (and its metric series, scheduler state and token cache) per name.
+    """
+
+    def __init__(self, max_connections: int = 100, keepalive_expiry: float = 60.0,
+                 allowed: Optional[Iterable[Tuple[str, str]]] = None,
+                 nvidia_verify_ssl: Union[bool, str] = True, nvidia_timeout_s: float = 60.0):
+        """
+        Args:
+            max_connections: Pooled connections per provider
+            keepalive_expiry: Seconds an idle pooled connection is kept
+            allowed: (provider, model_name) pairs that may be built; None allows any
+            nvidia_verify_ssl: SSL verification of NIM requests: a bool or a CA bundle path
+            nvidia_timeout_s: Connect and read timeout of NIM requests
+        """
+        self._models: Dict[Tuple[str, str, float], LLMModel] = {}
+        self._ollama_transport: Optional["httpx.AsyncHTTPTransport"] = None
+        self._nvidia_connector: Optional["aiohttp.TCPConnector"] = None
+        self._max_connections = max_connections
+        self._keepalive_expiry = keepalive_expiry
+        self.allowed: Optional[FrozenSet[Tuple[str, str]]] = None if allowed is None else frozenset(allowed)
+        self._nvidia_verify_ssl = nvidia_verify_ssl
+        self._nvidia_timeout_s = nvidia_timeout_s
+        self.stats = {"hits": 0, "misses": 0, "rejected": 0}
+
+    def is_allowed(self, provider: str, model_name: str) -> bool:
+        return self.allowed is None or (provider, model_name) in self.allowed
+
+    def check(self, provider: str, model_name: str) -> None:
+        """Raise ``UnknownModelError`` unless the model may be used."""
+        if not self.is_allowed(provider, model_name):
+            self.stats["rejected"] += 1
+            raise UnknownModelError(f"Unknown model {provider}:{model_name}; "
+                                    f"available: {', '.join(sorted(f'{p}:{m}' for p, m in self.allowed))}")
+
+    def _transport(self) -> "httpx.AsyncHTTPTransport":
+        if self._ollama_transport is None:
+            import httpx
+
+            self._ollama_transport = httpx.AsyncHTTPTransport(
+                limits=httpx.Limits(
+                    max_connections=self._max_connections,
+                    max_keepalive_connections=self._max_connections,
+                    keepalive_expiry=self._keepalive_expiry,
+                )
+            )
+        return self._ollama_transport
+
+    def _connector(self) -> "aiohttp.TCPConnector":
+        # aiohttp connectors must be created inside a running event loop.
+        if self._nvidia_connector is None:
+            import aiohttp
+
+            from src.services.nvidia_nim.client import aiohttp_ssl
+
+            # SSL is a connector setting in aiohttp, so the shared pool carries it
+            self._nvidia_connector = aiohttp.TCPConnector(
+                limit=self._max_connections, keepalive_timeout=self._keepalive_expiry,
+                ssl=aiohttp_ssl(self._nvidia_verify_ssl),
+            )
+        return self._nvidia_connector
+
+    def _build(self, provider: str, model_name: str, temperature: float) -> LLMModel:
+        model_class = load_provider(provider)
+        if provider == "ollama":
+            return model_class(model_name=model_name, temperature=temperature,
+                               async_client_kwargs={"transport": self._transport()})
+        if provider == "nvidia":
+            return model_class(model_name=model_name, temperature=temperature, connector=self._connector(),
+                               verify_ssl=self._nvidia_verify_ssl, timeout=self._nvidia_timeout_s)
+        # Plugin providers manage their own connections.
+        return model_class(model_name=model_name, temperature=temperature)
+
+    def get(self, provider: str, model_name: str, temperature: float = DEFAULT_TEMPERATURE) -> LLMModel:
+        """Return the cached model for (provider, model_name, temperature), building it on first use.
+
+        Args:
+            provider: "ollama", "nvidia" or a plugin provider (see providers.py)
+            model_name: Provider model identifier
+            temperature: Sampling temperature
+
+        Returns:
+            An OllamaModel or NvidiaNimModel whose chain is ready to invoke
+
+        Raises:
+            UnknownModelError: The model is not in the allowlist
+        """
+        key = (provider, model_name, float(temperature))
+        model = self._models.get(key)
+        if model is not None:
+            self.stats["hits"] += 1
+            return model
+        self.check(provider, model_name)
+        self.stats["misses"] += 1
+        model = self._build(provider, model_name, temperature)
+        self._models[key] = model
+        return model
+
+    def ollama(self, model_name: str = "llama3.2", temperature: float = DEFAULT_TEMPERATURE) -> "OllamaModel":
+        return self.get("ollama", model_name, temperature)
+
+    def nvidia(self, model_name: str, temperature: float = DEFAULT_TEMPERATURE) -> "NvidiaNimModel":
+        return self.get("nvidia", model_name, temperature)
+
+    async def warm_up(self, specs: Iterable[Tuple[str, str]], ping: bool = True) -> None:
+        """Build the given models and optionally send each a one-token request.
+
+        Warm-up failures are logged rather than raised so that an unreachable
+        provider does not prevent the API from starting.
+
+        Args:
+            specs: (provider, model_name) pairs, at the default temperature
+            ping: Whether to generate a token so the model is loaded and a
+                pooled connection is already open before the first request
+        """
+        models = []
+        for provider, model_name in specs:
+            try:
+                models.append(self.get(provider, model_name))
+            except Exception as e:
+                logger.warning("Could not build %s model %s: %s", provider, model_name, e)
+        if not ping:
+            return
+        results = await asyncio.gather(*(model.warm_up() for model in models), return_exceptions=True)
+        for model, result in zip(models, results):
+            if isinstance(result, Exception):
+                logger.warning("Warm-up of %s failed: %s", model.model_name, result)
+            else:
+                logger.info("Warmed up %s", model.model_name)
+
+    async def aclose(self) -> None:
+        """Close the shared connection pools."""
+        if self._ollama_transport is not None:
+            await self._ollama_transport.aclose()
+        if self._nvidia_connector is not None:
+            await self._nvidia_connector.close()
+        self._models.clear()
+
+
+def configured_models() -> List[Tuple[str, str]]:
+    """Every model the deployment names: AVAILABLE_MODELS, the defaults, warm-up and hedge models.
+
+    AVAILABLE_MODELS takes bare ids or ``provider:model`` specs; ``*`` allows any model.
+    """
+    models = [resolve_model_id(model_id) for model_id in
+              os.getenv("AVAILABLE_MODELS", DEFAULT_AVAILABLE_MODELS).split(",") if model_id.strip()]
+    models.append(("nvidia", os.getenv("NVIDIA_NIM_DEFAULT_MODEL") or "moonshotai/kimi-k2-instruct-0905"))
+    models.append(("ollama", "llama3.2"))
+    models.extend(parse_model_specs(os.getenv("LLM_WARMUP_MODELS", "")))
+    for item in os.getenv("LLM_HEDGE_MODELS", "").split(","):
+        primary, _, fallback = item.partition("=")
+        models.extend(parse_model_specs(f"{primary},{fallback}"))
+    return models
+
+
+def make_llm_registry() -> LLMRegistry:
+    any_model = os.getenv("AVAILABLE_MODELS", "").strip() == "*"
+    return LLMRegistry(
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "100")),
+        keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY_S", "60")),
+        allowed=None if any_model else configured_models(),
+        nvidia_verify_ssl=parse_verify_ssl(os.getenv("NVIDIA_NIM_VERIFY_SSL")),
+        nvidia_timeout_s=float(os.getenv("NVIDIA_NIM_TIMEOUT_S", "60")),
+    )
@@ -0,0 +1,367 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from src.services.metrics.instruments import (
+    LLM_ADMISSION_REJECTIONS,
+    LLM_HEDGES,
+    LLM_IN_FLIGHT,
+    LLM_QUEUE_WAIT_SECONDS,
+    QUEUE_DEPTH,
+)
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Priority lanes, highest first: a freed slot goes to an interactive call
+# before any batch call waiting for the same provider and model.
+INTERACTIVE = "interactive"
+BATCH = "batch"
+LANES = (INTERACTIVE, BATCH)
+
+# (provider, model_name)
+ModelKey = Tuple[str, str]
+
+
+class AdmissionRejected(Exception):
+    """The scheduler refused an LLM call: its lane's queue is full or it waited too long."""
+
+    def __init__(self, provider: str, model_name: str, lane: str, reason: str):
+        super().__init__(f"{provider}:{model_name} is overloaded ({lane} lane: {reason.replace('_', ' ')})")
+        self.provider = provider
+        self.model_name = model_name
+        self.lane = lane
+        self.reason = reason
+
+
+def parse_limits(value: Optional[str]) -> Dict[str, float]:
+    """Parse a comma-separated ``name=number`` list, e.g. ``ollama=4,nvidia=32``.
+
+    Names may contain ``:`` (``ollama:llama3.2=2``); the number follows the last ``=``.
+    """
+    limits = {}
+    for item in (value or "").split(","):
+        name, _, number = item.strip().rpartition("=")
+        if name:
+            limits[name.strip()] = float(number)
+    return limits
+
+
+class _Waiter:
+    __slots__ = ("key", "lane", "future", "enqueued_at")
+
+    def __init__(self, key: ModelKey, lane: str, future: asyncio.Future, enqueued_at: float):
+        self.key = key
+        self.lane = lane
+        self.future = future
+        self.enqueued_at = enqueued_at
+
+
+class _LatencyWindow:
+    """The most recent call latencies of one model, for its hedging deadline."""
+
+    def __init__(self, size: int):
+        self.samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+
+    def quantile(self, q: float) -> float:
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LLMScheduler:
+    """Admission control for LLM calls: concurrency caps, priority lanes and hedging.
+
+    A call needs a slot of its provider (``provider_limits``) and of its model
+    (``model_limits``, keyed ``provider:model``); a provider or model without a
+    limit is not capped. Calls that find no free slot wait in their lane, and
+    every released slot goes to the oldest waiter of the highest lane that can
+    use it. Running generations cannot be interrupted, so batch calls are
+    further capped at ``batch_share`` of each provider's slots: the rest stay
+    free for interactive calls.
+
+    A lane with ``max_queue`` waiters rejects further calls, and a call that
+    waited ``queue_timeout_s`` for its lane is rejected too; both raise
+    AdmissionRejected instead of letting latency grow without bound.
+
+    ``hedges`` maps a model to a fallback (``nvidia:a -> nvidia:b``). Once the
+    model has ``hedge_min_samples`` recent latencies, a call still running
+    after their ``hedge_quantile`` is sent to the fallback as well; the first
+    answer wins and the other call is cancelled.
+    """
+
+    def __init__(self, provider_limits: Optional[Dict[str, int]] = None,
+                 model_limits: Optional[Dict[str, int]] = None, batch_share: float = 0.5,
+                 max_queue: Optional[Dict[str, int]] = None, queue_timeout_s: Optional[Dict[str, float]] = None,
+                 hedges: Optional[Dict[str, str]] = None, hedge_quantile: float = 0.95,
+                 hedge_min_samples: int = 20, latency_window: int = 200):
+        """
+        Args:
+            provider_limits: Concurrent calls per provider, e.g. {"ollama": 4}
+            model_limits: Concurrent calls per model, e.g. {"ollama:llama3.2": 2}
+            batch_share: Share of a capped provider's slots batch calls may hold
+            max_queue: Waiters per lane before calls are rejected; a missing lane is unbounded
+            queue_timeout_s: Longest wait per lane before a call is rejected; missing or 0 waits forever
+            hedges: "provider:model" -> "provider:model" of the fallback
+            hedge_quantile: Latency quantile after which a call is hedged
+            hedge_min_samples: Latencies a model needs before its calls are hedged
+            latency_window: Recent latencies kept per model
+        """
+        self.provider_limits = {name: int(limit) for name, limit in (provider_limits or {}).items()}
+        self.model_limits = {name: int(limit) for name, limit in (model_limits or {}).items()}
+        self.batch_share = batch_share
+        self.max_queue = max_queue or {}
+        self.queue_timeout_s = queue_timeout_s or {}
+        self.hedges: Dict[ModelKey, ModelKey] = {
+            _model_key(primary): _model_key(fallback) for primary, fallback in (hedges or {}).items()
+        }
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self._latency_window = latency_window
+        self._latencies: Dict[ModelKey, _LatencyWindow] = {}
+
+        self._running_providers: Dict[str, int] = {}
+        self._running_models: Dict[ModelKey, int] = {}
+        self._running_batch: Dict[str, int] = {}
+        # lane -> (provider, model) -> waiters in arrival order
+        self._waiting: Dict[str, Dict[ModelKey, Deque[_Waiter]]] = {lane: {} for lane in LANES}
+        self._queued: Dict[str, int] = {lane: 0 for lane in LANES}
+        for lane in LANES:
+            QUEUE_DEPTH.labels(f"llm_{lane}").set_function(lambda lane=lane: self._queued[lane])
+        self.stats: Dict[str, int] = {"admitted": 0, "waited": 0, "rejected_queue_full": 0,
+                                      "rejected_queue_timeout": 0, "hedged": 0, "hedge_wins": 0}
+
+    # -- admission -----------------------------------------------------------
+
+    def _limit(self, key: ModelKey, lane: str) -> Tuple[Optional[int], Optional[int], Optional[int]]:
+        provider_limit = self.provider_limits.get(key[0])
+        batch_limit = None
+        if lane == BATCH and provider_limit:
+            batch_limit = max(1, math.floor(provider_limit * self.batch_share))
+        return provider_limit, self.model_limits.get(f"{key[0]}:{key[1]}"), batch_limit
+
+    def _has_slot(self, key: ModelKey, lane: str) -> bool:
+        provider_limit, model_limit, batch_limit = self._limit(key, lane)
+        if provider_limit is not None and self._running_providers.get(key[0], 0) >= provider_limit:
+            return False
+        if model_limit is not None and self._running_models.get(key, 0) >= model_limit:
+            return False
+        if batch_limit is not None and self._running_batch.get(key[0], 0) >= batch_limit:
+            return False
+        return True
+
+    def _take(self, key: ModelKey, lane: str) -> None:
+        self._running_providers[key[0]] = self._running_providers.get(key[0], 0) + 1
+        self._running_models[key] = self._running_models.get(key, 0) + 1
+        if lane == BATCH:
+            self._running_batch[key[0]] = self._running_batch.get(key[0], 0) + 1
+        LLM_IN_FLIGHT.labels(key[0]).inc()
+        self.stats["admitted"] += 1
+
+    def _release(self, key: ModelKey, lane: str) -> None:
+        self._running_providers[key[0]] -= 1
+        self._running_models[key] -= 1
+        if lane == BATCH:
+            self._running_batch[key[0]] -= 1
+        LLM_IN_FLIGHT.labels(key[0]).dec()
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        """Hand free slots to waiters, highest lane first, oldest first within a (provider, model)."""
+        for lane in LANES:
+            waiting = self._waiting[lane]
+            for key in list(waiting):
+                queue = waiting[key]
+                while queue and self._has_slot(key, lane):
+                    waiter = queue.popleft()
+                    self._queued[lane] -= 1
+                    self._take(key, lane)
+                    waiter.future.set_result(None)
+                if not queue:
+                    del waiting[key]
+
+    def _reject(self, key: ModelKey, lane: str, reason: str) -> AdmissionRejected:
+        self.stats[f"rejected_{reason}"] += 1
+        LLM_ADMISSION_REJECTIONS.labels(key[0], lane, reason).inc()
+        return AdmissionRejected(key[0], key[1], lane, reason)
+
+    async def _acquire(self, key: ModelKey, lane: str) -> None:
+        if lane not in self._waiting:
+            raise ValueError(f"Unknown lane {lane!r}, expected one of {', '.join(LANES)}")
+        wait = LLM_QUEUE_WAIT_SECONDS.labels(key[0], lane)
+        # A waiter only exists while its slot is taken, so a free slot means nobody is ahead.
+        if self._has_slot(key, lane):
+            self._take(key, lane)
+            wait.observe(0.0)
+            return
+        max_queue = self.max_queue.get(lane)
+        if max_queue is not None and self._queued[lane] >= max_queue:
+            raise self._reject(key, lane, "queue_full")
+
+        waiter = _Waiter(key, lane, asyncio.get_running_loop().create_future(), time.perf_counter())
+        self._waiting[lane].setdefault(key, deque()).append(waiter)
+        self._queued[lane] += 1
+        self.stats["waited"] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout_s.get(lane) or None)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.future.done():
+                # Admitted just as the wait ended: hand the slot on.
+                self._release(key, lane)
+            else:
+                self._abandon(waiter)
+            if isinstance(e, asyncio.TimeoutError):
+                raise self._reject(key, lane, "queue_timeout") from None
+            raise
+        finally:
+            wait.observe(time.perf_counter() - waiter.enqueued_at)
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        queue = self._waiting[waiter.lane][waiter.key]
+        queue.remove(waiter)
+        self._queued[waiter.lane] -= 1
+        if not queue:
+            del self._waiting[waiter.lane][waiter.key]
+
+    @asynccontextmanager
+    async def slot(self, provider: str, model_name: str, lane: str = INTERACTIVE) -> AsyncIterator[None]:
+        """Hold a concurrency slot of (provider, model_name) for the body of the ``async with``.
+
+        Raises:
+            AdmissionRejected: The lane's queue is full or the wait timed out
+        """
+        key = (provider, model_name)
+        await self._acquire(key, lane)
+        try:
+            yield
+        finally:
+            self._release(key, lane)
+
+    # -- calls ---------------------------------------------------------------
+
+    async def _call(self, key: ModelKey, call: Callable[[str, str], Awaitable[T]], lane: str) -> T:
+        started = time.perf_counter()
+        async with self.slot(key[0], key[1], lane):
+            result = await call(*key)
+        # Latency as the caller sees it (queue wait included), the basis of the hedging deadline.
+        self._latencies.setdefault(key, _LatencyWindow(self._latency_window)).add(time.perf_counter() - started)
+        return result
+
+    def hedge_deadline(self, provider: str, model_name: str) -> Optional[float]:
+        """Seconds after which a call to the model is hedged, or None if it is not."""
+        key = (provider, model_name)
+        latencies = self._latencies.get(key)
+        if key not in self.hedges or latencies is None or len(latencies.samples) < self.hedge_min_samples:
+            return None
+        return latencies.quantile(self.hedge_quantile)
+
+    async def run(self, provider: str, model_name: str, call: Callable[[str, str], Awaitable[T]],
+                  lane: str = INTERACTIVE, hedge: bool = True) -> Tuple[T, ModelKey]:
+        """Run ``call(provider, model_name)`` in a slot, hedging it to the model's fallback if configured.
+
+        Args:
+            provider: Provider of the model
+            model_name: Model to call
+            call: Coroutine function making the call for a given (provider, model_name); it
+                is called a second time with the fallback model when the call is hedged
+            lane: INTERACTIVE or BATCH
+            hedge: False never hedges, e.g. when the prompt only suits this model
+                (its conversation history, context packed for its token budget)
+
+        Returns:
+            (result, (provider, model_name) of the model that produced it), which is
+            the fallback's when a hedge won
+
+        Raises:
+            AdmissionRejected: The call could not get a slot
+        """
+        key = (provider, model_name)
+        deadline = self.hedge_deadline(provider, model_name) if hedge else None
+        if deadline is None:
+            return await self._call(key, call, lane), key
+
+        primary = asyncio.ensure_future(self._call(key, call, lane))
+        tasks = {primary}
+        hedged = False
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=deadline)
+            if not done:
+                fallback = self.hedges[key]
+                logger.info("Hedging %s:%s to %s:%s after %.2fs", *key, *fallback, deadline)
+                self.stats["hedged"] += 1
+                hedged = True
+                tasks.add(asyncio.ensure_future(self._call(fallback, call, lane)))
+            while True:
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if hedged:
+                            self._record_hedge(key, task is primary)
+                        return task.result(), key if task is primary else self.hedges[key]
+                if not pending:
+                    # Every attempt failed: surface the primary's error.
+                    return primary.result(), key
+                tasks = pending
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _record_hedge(self, key: ModelKey, primary_won: bool) -> None:
+        winner = key if primary_won else self.hedges[key]
+        if not primary_won:
+            self.stats["hedge_wins"] += 1
+        LLM_HEDGES.labels(winner[0], winner[1], "primary" if primary_won else "hedge").inc()
+
+    async def stream(self, provider: str, model_name: str, tokens: Callable[[], AsyncIterator[str]],
+                     lane: str = INTERACTIVE) -> AsyncIterator[str]:
+        """Relay ``tokens()`` while holding a slot; streamed calls are never hedged."""
+        async with self.slot(provider, model_name, lane):
+            async for token in tokens():
+                yield token
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "running": {provider: count for provider, count in self._running_providers.items() if count},
+            "queued": dict(self._queued),
+            "hedge_deadlines_s": {f"{provider}:{model_name}": self.hedge_deadline(provider, model_name)
+                                  for provider, model_name in self.hedges},
+            **self.stats,
+        }
+
+
+def _model_key(spec: str) -> ModelKey:
+    provider, _, model_name = spec.strip().partition(":")
+    if not provider or not model_name:
+        raise ValueError(f"Invalid model spec {spec!r}, expected provider:model")
+    return provider, model_name
+
+
+def _parse_hedges(value: Optional[str]) -> Dict[str, str]:
+    """``nvidia:a=nvidia:b,ollama:llama3.2=nvidia:c`` -> {primary: fallback}."""
+    hedges = {}
+    for item in (value or "").split(","):
+        primary, _, fallback = item.strip().partition("=")
+        if primary and fallback:
+            hedges[primary.strip()] = fallback.strip()
+    return hedges
+
+
+def make_llm_scheduler() -> LLMScheduler:
+    return LLMScheduler(
+        provider_limits=parse_limits(os.getenv("LLM_PROVIDER_CONCURRENCY", "ollama=4,nvidia=32")),
+        model_limits=parse_limits(os.getenv("LLM_MODEL_CONCURRENCY", "")),
+        batch_share=float(os.getenv("LLM_BATCH_SHARE", "0.5")),
+        max_queue=parse_limits(os.getenv("LLM_QUEUE_MAX", "interactive=200,batch=10000")),
+        queue_timeout_s=parse_limits(os.getenv("LLM_QUEUE_TIMEOUT_S", "interactive=30,batch=0")),
+        hedges=_parse_hedges(os.getenv("LLM_HEDGE_MODELS", "")),
+        hedge_quantile=float(os.getenv("LLM_HEDGE_QUANTILE", "0.95")),
+        hedge_min_samples=int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20")),
+    )
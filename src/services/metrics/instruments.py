@@ -0,0 +1,118 @@
+"""Metrics recorded by the app, all registered in the process-wide REGISTRY.
+
+Names and labels are kept low-cardinality: routes are recorded by their
+template (``/api/v1/papers/{arxiv_id}/text``), never by the raw path.
+"""
+from src.services.metrics.registry import REGISTRY
+
+# Byte-sized and count-sized distributions
+PAGE_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 100, 200, 500)
+TOKEN_BUCKETS = (16, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency, until the last body chunk is sent",
+    ("method", "route", "status"),
+)
+HTTP_ERRORS = REGISTRY.counter(
+    "http_request_errors_total",
+    "Requests answered with a 5xx, by the exception that caused it",
+    ("route", "exception"),
+)
+
+LLM_REQUEST_SECONDS = REGISTRY.histogram(
+    "llm_request_duration_seconds",
+    "LLM call latency, from request to last token",
+    ("provider", "model"),
+)
+LLM_TIME_TO_FIRST_TOKEN_SECONDS = REGISTRY.histogram(
+    "llm_time_to_first_token_seconds",
+    "Latency until the first streamed token",
+    ("provider", "model"),
+)
+LLM_TOKENS = REGISTRY.counter(
+    "llm_tokens_total",
+    "Tokens sent to (input) and generated by (output) the LLM",
+    ("provider", "model", "direction"),
+)
+LLM_OUTPUT_TOKENS = REGISTRY.histogram(
+    "llm_output_tokens",
+    "Generated tokens per LLM call",
+    ("provider", "model"),
+    buckets=TOKEN_BUCKETS,
+)
+LLM_ERRORS = REGISTRY.counter(
+    "llm_errors_total",
+    "Failed LLM calls",
+    ("provider", "model", "exception"),
+)
+LLM_QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    "llm_queue_wait_seconds",
+    "Time an LLM call waited for a concurrency slot, by priority lane",
+    ("provider", "lane"),
+)
+LLM_ADMISSION_REJECTIONS = REGISTRY.counter(
+    "llm_admission_rejections_total",
+    "LLM calls refused by the scheduler (queue_full or queue_timeout)",
+    ("provider", "lane", "reason"),
+)
+LLM_IN_FLIGHT = REGISTRY.gauge(
+    "llm_in_flight",
+    "LLM calls holding a concurrency slot",
+    ("provider",),
+)
+LLM_HEDGES = REGISTRY.counter(
+    "llm_hedges_total",
+    "Hedged LLM calls by the model that answered (primary or hedge)",
+    ("provider", "model", "winner"),
+)
+
+DB_COMMIT_SECONDS = REGISTRY.histogram(
+    "db_commit_duration_seconds",
+    "Time spent in AsyncSession.commit",
+)
+CHAT_HISTORY_FLUSH_SECONDS = REGISTRY.histogram(
+    "chat_history_flush_duration_seconds",
+    "Time to insert and commit one batch of chat_history rows",
+)
+CHAT_HISTORY_FLUSH_ROWS = REGISTRY.counter(
+    "chat_history_rows_total",
+    "chat_history rows by outcome",
+    ("outcome",),
+)
+
+PDF_PARSE_SECONDS = REGISTRY.histogram(
+    "pdf_parse_duration_seconds",
+    "Time a parse worker spent on one PDF",
+    ("status",),
+)
+PDF_PARSE_WAIT_SECONDS = REGISTRY.histogram(
+    "pdf_parse_wait_seconds",
+    "Time a PDF waited in the parse queue before a worker picked it up",
+)
+PDF_PAGES = REGISTRY.histogram(
+    "pdf_parse_pages",
+    "Pages per parsed PDF",
+    buckets=PAGE_BUCKETS,
+)
+
+CACHE_REQUESTS = REGISTRY.counter(
+    "cache_requests_total",
+    "Cache lookups by result; hit ratio = hit / (hit + miss)",
+    ("cache", "result"),
+)
+LLM_CACHE_SAVED_SECONDS = REGISTRY.counter(
+    "llm_cache_saved_seconds_total",
+    "LLM time saved by response cache hits (latency of the cached completion), by tier",
+    ("tier",),
+)
+SINGLE_FLIGHT_CALLS = REGISTRY.counter(
+    "single_flight_calls_total",
+    "Coalesced calls by role; each follower is an upstream call avoided",
+    ("group", "role"),
+)
+QUEUE_DEPTH = REGISTRY.gauge(
+    "queue_depth",
+    "Items waiting in an in-process queue",
+    ("queue",),
+)
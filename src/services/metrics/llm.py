@@ -0,0 +1,98 @@
+import time
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from src.services.metrics.instruments import (
+    LLM_ERRORS,
+    LLM_OUTPUT_TOKENS,
+    LLM_REQUEST_SECONDS,
+    LLM_TIME_TO_FIRST_TOKEN_SECONDS,
+    LLM_TOKENS,
+)
+
+# Runs tagged with this (e.g. model warm-up pings) are not recorded.
+SKIP_METRICS_TAG = "skip_metrics"
+
+
+def _usage(response: LLMResult) -> Optional[Dict[str, int]]:
+    """input/output token counts reported by the provider, if any."""
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                return {"input": usage.get("input_tokens", 0), "output": usage.get("output_tokens", 0)}
+    token_usage = (response.llm_output or {}).get("token_usage") or {}
+    if token_usage:
+        return {"input": token_usage.get("prompt_tokens", 0), "output": token_usage.get("completion_tokens", 0)}
+    return None
+
+
+class _Run:
+    __slots__ = ("started", "chunks")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.chunks = 0
+
+
+class LLMMetricsHandler(BaseCallbackHandler):
+    """LangChain callback that records latency, time to first token and tokens of one chat model.
+
+    Attach it to the model (``callbacks=[LLMMetricsHandler(...)]``) so every
+    chain built on it is measured. ``run_inline`` keeps the callbacks on the
+    event loop instead of a thread-pool hop per event.
+    """
+
+    run_inline = True
+
+    def __init__(self, provider: str, model_name: str):
+        # One series per model: only models allowlisted by LLMRegistry get a handler,
+        # so client-supplied model names cannot grow the label set.
+        self.provider = provider
+        self.model_name = model_name
+        self._runs: Dict[UUID, _Run] = {}
+        self._latency = LLM_REQUEST_SECONDS.labels(provider, model_name)
+        self._ttft = LLM_TIME_TO_FIRST_TOKEN_SECONDS.labels(provider, model_name)
+        self._input_tokens = LLM_TOKENS.labels(provider, model_name, "input")
+        self._output_tokens = LLM_TOKENS.labels(provider, model_name, "output")
+        self._output_per_call = LLM_OUTPUT_TOKENS.labels(provider, model_name)
+
+    def _start(self, run_id: UUID, tags: Optional[List[str]]) -> None:
+        if not tags or SKIP_METRICS_TAG not in tags:
+            self._runs[run_id] = _Run()
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[list], *, run_id: UUID,
+                            tags: Optional[List[str]] = None, **kwargs: Any) -> None:
+        self._start(run_id, tags)
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID,
+                     tags: Optional[List[str]] = None, **kwargs: Any) -> None:
+        self._start(run_id, tags)
+
+    def on_llm_new_token(self, token: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.get(run_id)
+        if run is None:
+            return
+        if run.chunks == 0:
+            self._ttft.observe(time.perf_counter() - run.started)
+        run.chunks += 1
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        self._latency.observe(time.perf_counter() - run.started)
+        usage = _usage(response)
+        if usage is None:
+            # Provider sent no usage: fall back to streamed chunks (about one token each).
+            usage = {"input": 0, "output": run.chunks}
+        self._input_tokens.inc(usage["input"])
+        self._output_tokens.inc(usage["output"])
+        self._output_per_call.observe(usage["output"])
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        if self._runs.pop(run_id, None) is not None:
+            LLM_ERRORS.labels(self.provider, self.model_name, type(error).__name__).inc()
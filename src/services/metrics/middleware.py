@@ -0,0 +1,63 @@
+import time
+
+from fastapi import Request
+from fastapi.exception_handlers import http_exception_handler
+from starlette.exceptions import HTTPException as StarletteHTTPException
+
+from src.services.metrics.instruments import HTTP_ERRORS, HTTP_REQUEST_SECONDS
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(scope) -> str:
+    """Path template of the matched route, so /papers/2401.0001/text counts as /papers/{arxiv_id}/text."""
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per (method, route, status).
+
+    Written as plain ASGI rather than BaseHTTPMiddleware: it adds no task or
+    body copying per request, and for streaming responses the clock stops at
+    the last body chunk rather than when the headers go out.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            HTTP_ERRORS.labels(route_template(scope), type(e).__name__).inc()
+            raise
+        finally:
+            HTTP_REQUEST_SECONDS.labels(scope["method"], route_template(scope), status).observe(
+                time.perf_counter() - started
+            )
+
+
+async def metrics_http_exception_handler(request: Request, exc: StarletteHTTPException):
+    """Count 5xx HTTPExceptions by the exception the endpoint was handling when it raised them.
+
+    Endpoints wrap failures as ``HTTPException(500, str(e))`` inside an
+    ``except`` block, so the original error is still on ``__context__``.
+    """
+    if exc.status_code >= 500:
+        cause = exc.__cause__ or exc.__context__
+        HTTP_ERRORS.labels(route_template(request.scope), type(cause or exc).__name__).inc()
+    return await http_exception_handler(request, exc)
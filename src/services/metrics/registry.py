@@ -0,0 +1,238 @@
+import abc
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Seconds; covers a fast cache hit up to a long LLM generation.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _CounterChild:
+    __slots__ = ("_lock", "value")
+
+    def __init__(self, lock: threading.Lock):
+        self._lock = lock
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("_lock", "_value", "_function")
+
+    def __init__(self, lock: threading.Lock):
+        self._lock = lock
+        self._value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value -= amount
+
+    def set_function(self, function: Optional[Callable[[], float]]) -> None:
+        """Read the value from ``function`` at scrape time instead of storing it."""
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        if self._function is not None:
+            try:
+                return float(self._function())
+            except Exception:
+                return math.nan
+        return self._value
+
+
+class _HistogramChild:
+    __slots__ = ("_lock", "_bounds", "counts", "sum")
+
+    def __init__(self, lock: threading.Lock, bounds: Tuple[float, ...]):
+        self._lock = lock
+        self._bounds = bounds
+        # One slot per bucket plus the +Inf overflow; stored non-cumulative.
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self._bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class _Metric(abc.ABC):
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lookup: Dict[tuple, object] = {}
+        if not self.labelnames:
+            self._default = self._child(())
+
+    @abc.abstractmethod
+    def _new_child(self):
+        """A fresh child holding the value of one label combination."""
+
+    def _child(self, values: Tuple[str, ...]):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def labels(self, *values: str):
+        """Child for one combination of label values; keep the result to skip the lookup on hot paths."""
+        child = self._lookup.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            # Values are rendered as strings, so 200 and "200" must share a child.
+            child = self._lookup[values] = self._child(tuple(str(value) for value in values))
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape(self.documentation)}", f"# TYPE {self.name} {self.type}"]
+        for values, child in sorted(list(self._children.items())):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values: Tuple[str, ...], child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. requests or tokens."""
+
+    type = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild(self._lock)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. a queue depth."""
+
+    type = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild(self._lock)
+
+    def set(self, value: float) -> None:
+        self._default.set(value)
+
+    def set_function(self, function: Optional[Callable[[], float]]) -> None:
+        self._default.set_function(function)
+
+
+class Histogram(_Metric):
+    """Distribution over fixed buckets, e.g. latencies in seconds."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(float(bound) for bound in buckets if bound != math.inf))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self._lock, self.bounds)
+
+    def observe(self, value: float) -> None:
+        self._default.observe(value)
+
+    def _render_child(self, values: Tuple[str, ...], child: _HistogramChild) -> List[str]:
+        with self._lock:
+            counts, total = list(child.counts), child.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + (math.inf,), counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """In-process metrics, rendered in the Prometheus text exposition format.
+
+    Recording is a dict lookup (skipped when the labelled child is kept), a
+    bisect for histograms and an uncontended lock, so a single event costs
+    around a microsecond at most; ``benchmarks/metrics_overhead_benchmark.py``
+    measures it. Metrics are per process: with several uvicorn workers each
+    one serves its own /metrics.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format (version 0.0.4)."""
+        lines: List[str] = []
+        for name in sorted(self._metrics):
+            lines.extend(self._metrics[name].render())
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry served by /metrics.
+REGISTRY = MetricsRegistry()
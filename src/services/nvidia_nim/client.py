@@ -33,68 +33,170 @@ from langchain_nvidia_ai_endpoints import ChatNVIDIA
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder # Updated import
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.chat_history import BaseChatMessageHistory # New import
-from langchain_community.chat_message_histories import ChatMessageHistory # New import
+from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.runnables.history import RunnableWithMessageHistory # New import
 
 from dotenv import load_dotenv
+from typing import AsyncIterator, Optional, Union
+import aiohttp
+import logging
 import os
+import ssl
+
+from src.services.chat_memory.store import make_session_store
+from src.services.metrics.llm import SKIP_METRICS_TAG, LLMMetricsHandler
 
 load_dotenv()  # Load environment variables from .env file
 
+logger = logging.getLogger(__name__)
+
 # 1. Create a global store to hold session histories
-# This simple dictionary will map session IDs to their chat histories
-store = {}
+# Bounded (LRU + idle TTL + memory cap); evicted sessions are rehydrated from Postgres
+store = make_session_store()
 
 def get_session_history(session_id: str) -> BaseChatMessageHistory:
     """Factory function to get or create a chat history for a session."""
-    if session_id not in store:
-        store[session_id] = ChatMessageHistory()
-    return store[session_id]
+    return store.get(session_id)
+
+
+def context_instructions(context: str) -> str:
+    """System-prompt addition carrying retrieved paper excerpts; empty without any."""
+    if not context:
+        return ""
+    return ("\n\nUse the following excerpts from arXiv papers where they are relevant, "
+            "and cite the source of each one you use.\n\n" + context)
+
+
+def aiohttp_ssl(verify_ssl: Union[bool, str]) -> Union[bool, ssl.SSLContext]:
+    """aiohttp ``ssl`` setting for ChatNVIDIA's ``verify_ssl`` (a bool or a CA bundle path)."""
+    if isinstance(verify_ssl, str):
+        return ssl.create_default_context(cafile=verify_ssl)
+    return verify_ssl
 
 
 class NvidiaNimModel:
-    def __init__(self, model_name: str = "moonshotai/kimi-k2-instruct-0905", temperature: float = 0.7):
+    def __init__(self, model_name: str = "moonshotai/kimi-k2-instruct-0905", temperature: float = 0.7,
+                 connector: Optional[aiohttp.BaseConnector] = None, verify_ssl: Union[bool, str] = True,
+                 timeout: float = 60.0):
+        """
+        Args:
+            model_name: NIM model id
+            temperature: Sampling temperature
+            connector: Shared connection pool; it must be built with ``aiohttp_ssl(verify_ssl)``
+            verify_ssl: SSL verification: a bool or a CA bundle path
+            timeout: Connect and socket-read timeout in seconds
+        """
+        self.model_name = model_name
         self.llm = ChatNVIDIA(
             model=model_name,
             api_key=os.getenv("NVIDIA_NIM_API_KEY"),
             temperature=temperature, # Used the instance variable
             top_p=0.9,
-            max_tokens=4096
+            max_tokens=4096,
+            callbacks=[LLMMetricsHandler("nvidia", model_name)],
+            verify_ssl=verify_ssl,
+            timeout=timeout,
         )
+        if connector is not None:
+            self._share_connector(connector, timeout)
 
         # 2. Create a new prompt that includes a placeholder for history
         self.prompt = ChatPromptTemplate.from_messages([
-            ("system", "You are a helpful assistant. Answer the user's questions based on the conversation history."),
+            ("system", "You are a helpful assistant. Answer the user's questions based on the conversation history.{context}"),
             MessagesPlaceholder(variable_name="history"),  # This is where old messages will be injected
             ("human", "{query}"),                          # This is the new user input
-        ])
-        
+        ]).partial(context="")  # Retrieved chunks, when the caller assembled any (see context_instructions)
+
         parser = StrOutputParser()
 
         # 3. Define the core chain (without the history wrapper)
-        core_chain = self.prompt | self.llm | parser
+        self.chain = self.prompt | self.llm | parser
 
         # 4. Wrap the core chain with RunnableWithMessageHistory
         self.chain_with_history = RunnableWithMessageHistory(
-            core_chain,
+            self.chain,
             get_session_history,  # Function to retrieve/create history
             input_messages_key="query",      # The key for the new user input
             history_messages_key="history",  # The key for the MessagesPlaceholder
         )
 
-    async def prompt_model(self, query: str, session_id: str = "default_session") -> str:
+    def _share_connector(self, connector: aiohttp.BaseConnector, timeout: float) -> None:
+        # ChatNVIDIA opens (and closes) a fresh aiohttp session, on a fresh
+        # connector, per request, and has no option to pass a pool. Its async
+        # client's session factory is the one seam: sessions built on the shared,
+        # non-owned connector still close per request, but their TCP/TLS
+        # connections stay in the pool. SSL lives on the connector; the timeouts
+        # are the ones ChatNVIDIA itself sets (connect and inactivity, no total,
+        # so long streams are not cut off).
+        async_client = getattr(self.llm, "_async_client", None)
+        if not hasattr(async_client, "get_async_session_fn"):
+            logger.warning("This langchain-nvidia-ai-endpoints release has no async session factory; "
+                           "%s opens a connection per request", self.model_name)
+            return
+        client_timeout = aiohttp.ClientTimeout(connect=timeout, sock_connect=timeout, sock_read=timeout)
+        async_client.get_async_session_fn = lambda: aiohttp.ClientSession(
+            connector=connector, connector_owner=False, timeout=client_timeout
+        )
+
+    async def prompt_model(self, query: str, session_id: Optional[str] = "default_session",
+                           context: str = "") -> str:
         """
         Runs the model with conversation memory.
         
         Args:
             query: The user's new message.
-            session_id: A unique identifier for the conversation.
+            session_id: A unique identifier for the conversation; None runs the
+                query on its own, without reading or recording any history.
+            context: Retrieved paper excerpts for the system prompt. Only the
+                query and response are recorded in the history.
         """
+        if session_id is None:
+            return await self.chain.ainvoke({"query": query, "history": [], "context": context_instructions(context)})
         # 5. Invoke the chain, passing the session_id in the 'config'
         # The wrapper will automatically load history for this session_id,
         # run the chain, and save the new query/response to the history.
         response = await self.chain_with_history.ainvoke(
-            {"query": query},
+            {"query": query, "context": context_instructions(context)},
             config={"configurable": {"session_id": session_id}}
         )
         return response
+
+    async def stream_model(self, query: str, session_id: Optional[str] = "default_session",
+                           context: str = "") -> AsyncIterator[str]:
+        """
+        Streams the model's response with conversation memory.
+        The history wrapper records the query/response once the stream completes.
+
+        Args:
+            query: The user's new message.
+            session_id: A unique identifier for the conversation; None streams
+                an answer to the query on its own, outside any history.
+            context: Retrieved paper excerpts for the system prompt.
+        """
+        if session_id is None:
+            async for token in self.chain.astream(
+                {"query": query, "history": [], "context": context_instructions(context)}
+            ):
+                yield token
+            return
+        async for token in self.chain_with_history.astream(
+            {"query": query, "context": context_instructions(context)},
+            config={"configurable": {"session_id": session_id}}
+        ):
+            yield token
+
+    async def history_context(self, session_id: str) -> str:
+        """
+        The session's conversation so far, as text. Responses depend on it, so
+        it is part of their response-cache key.
+        """
+        messages = await get_session_history(session_id).aget_messages()
+        return "\n".join(f"{message.type}: {message.content}" for message in messages)
+
+    async def record_turn(self, query: str, response: str, session_id: str = "default_session") -> None:
+        """Add an exchange answered without calling the model (e.g. from the response cache) to the history."""
+        await get_session_history(session_id).aadd_messages([HumanMessage(content=query), AIMessage(content=response)])
+
+    async def warm_up(self) -> None:
+        """Open a pooled connection to the endpoint by generating a single token, outside any session history."""
+        await self.llm.ainvoke("ping", config={"tags": [SKIP_METRICS_TAG]}, max_tokens=1)
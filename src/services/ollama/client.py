@@ -1,21 +1,40 @@
+from typing import AsyncIterator, Optional
+
 from langchain_ollama import ChatOllama
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 
+from src.services.metrics.llm import SKIP_METRICS_TAG, LLMMetricsHandler
+
 
 class OllamaModel:
-    def __init__(self, model_name: str = "llama3.2", temperature: float = 0.7):
-        self.llm = ChatOllama(model=model_name, temperature=temperature)
+    def __init__(self, model_name: str = "llama3.2", temperature: float = 0.7,
+                 async_client_kwargs: Optional[dict] = None):
+        self.model_name = model_name
+        # async_client_kwargs is handed to the underlying httpx.AsyncClient,
+        # e.g. a shared transport so every model reuses one keep-alive pool.
+        self.llm = ChatOllama(model=model_name, temperature=temperature,
+                              async_client_kwargs=async_client_kwargs or {},
+                              callbacks=[LLMMetricsHandler("ollama", model_name)])
 
-    async def prompt_model(self, query: str) -> str:
-        """Asynchronously invoke the Ollama chain and return the response string."""
         prompt = PromptTemplate(
             input_variables=["query"],
             template="{query}"
         )
 
         parser = StrOutputParser()
-        chain = prompt | self.llm | parser
+        self.chain = prompt | self.llm | parser
 
-        response = await chain.ainvoke({"query": query})
+    async def prompt_model(self, query: str) -> str:
+        """Asynchronously invoke the Ollama chain and return the response string."""
+        response = await self.chain.ainvoke({"query": query})
         return response
+
+    async def stream_model(self, query: str) -> AsyncIterator[str]:
+        """Asynchronously stream the Ollama chain's response token by token."""
+        async for token in self.chain.astream({"query": query}):
+            yield token
+
+    async def warm_up(self) -> None:
+        """Load the model into Ollama's memory by generating a single token."""
+        await self.llm.ainvoke("ping", config={"tags": [SKIP_METRICS_TAG]}, options={"num_predict": 1})
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+from src.schemas.pdf_parser.models import PdfContent
+from src.services.metrics.instruments import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# Bump when the way PdfContent is built from a Docling document changes,
+# so entries produced by older extraction code are never served.
+PARSER_VERSION = "3"
+
+_CACHE_HIT = CACHE_REQUESTS.labels("parse", "hit")
+_CACHE_MISS = CACHE_REQUESTS.labels("parse", "miss")
+
+
+def _docling_version() -> str:
+    try:
+        return metadata.version("docling")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def file_sha256(path: Path, chunk_size: int = 1 << 20) -> str:
+    """SHA-256 of a file, read in chunks so large PDFs are never fully in memory."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """Persistent, size-bounded LRU cache of parsed PdfContent.
+
+    Entries are keyed by the PDF's SHA-256, the parser options that affect the
+    output and the parser version, and stored as zlib-compressed JSON in a
+    single SQLite file. When the total compressed size exceeds ``max_bytes`` the
+    least recently used entries are evicted.
+    """
+
+    def __init__(self, path: Union[str, Path], max_bytes: int = 2 * 1024 ** 3, compression_level: int = 6):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.compression_level = compression_level
+        self.stats = {"hits": 0, "misses": 0, "puts": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS parse_cache ("
+            " key TEXT PRIMARY KEY,"
+            " data BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_parse_cache_last_access ON parse_cache (last_access)")
+
+    @staticmethod
+    def make_key(pdf_sha256: str, options: Dict[str, Any]) -> str:
+        """Cache key for a PDF hash and the parser options that change its output."""
+        relevant = {
+            "max_pages": options.get("max_pages"),
+            "do_ocr": options.get("do_ocr"),
+            "do_table_structure": options.get("do_table_structure"),
+            # Figures reference image blobs by hash, which only resolve in the store they were written to.
+            "figure_store": str(Path(options["blob_dir"]).resolve()) if options.get("blob_dir") else None,
+            "parser_version": PARSER_VERSION,
+            "docling_version": _docling_version(),
+        }
+        suffix = hashlib.sha256(json.dumps(relevant, sort_keys=True).encode()).hexdigest()[:16]
+        return f"{pdf_sha256}:{suffix}"
+
+    def get(self, key: str) -> Optional[PdfContent]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM parse_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats["misses"] += 1
+                _CACHE_MISS.inc()
+                return None
+            self._conn.execute("UPDATE parse_cache SET last_access = ? WHERE key = ?", (time.time(), key))
+        try:
+            content = PdfContent.model_validate_json(zlib.decompress(row[0]))
+        except Exception:
+            # Corrupt or schema-incompatible entry: drop it and treat as a miss.
+            logger.warning("Dropping unreadable parse cache entry %s", key)
+            self.delete(key)
+            self.stats["misses"] += 1
+            _CACHE_MISS.inc()
+            return None
+        self.stats["hits"] += 1
+        _CACHE_HIT.inc()
+        return content
+
+    def put(self, key: str, content: PdfContent) -> None:
+        data = zlib.compress(content.model_dump_json().encode("utf-8"), self.compression_level)
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parse_cache (key, data, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, data, len(data), time.time()),
+            )
+            self.stats["puts"] += 1
+            self._evict()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM parse_cache WHERE key = ?", (key,))
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM parse_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        overflow = total - self.max_bytes
+        freed = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM parse_cache ORDER BY last_access"):
+            victims.append((key,))
+            freed += size
+            if freed >= overflow:
+                break
+        self._conn.executemany("DELETE FROM parse_cache WHERE key = ?", victims)
+        self.stats["evictions"] += len(victims)
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM parse_cache").fetchone()[0]
+
+    def hit_ratio(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def close(self) -> None:
+        self._conn.close()
@@ -1,20 +1,38 @@
+import asyncio
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 from src.exceptions import PDFParsingException, PDFValidationError
-from src.schemas.pdf_parser.models import PdfContent
+from src.schemas.pdf_parser.models import PaperSection, PdfContent
 
+from .cache import ParseCache, file_sha256
 from .doc_parser_utils import DoclingParser
+from .engine import PdfParseEngine
 
 
 
 class PDFParserService:
     """Service for parsing PDF documents using DoclingParser."""
 
-    def __init__(self, max_pages: Optional[int] = 30, max_size_mb: Optional[int] = 20, do_ocr: bool = False, do_table_structure: bool = True):
-        
-        self.parser = DoclingParser(max_pages=max_pages, max_size_mb=max_size_mb, do_ocr=do_ocr, do_table_structure=do_table_structure)
+    def __init__(self, max_pages: Optional[int] = 500, max_size_mb: Optional[int] = 20, do_ocr: bool = False,
+                 do_table_structure: bool = True, window_pages: int = 10, blob_dir: Optional[str] = None,
+                 engine: Optional[PdfParseEngine] = None, cache: Optional[ParseCache] = None):
+
+        self.parser_options = {"max_pages": max_pages, "max_size_mb": max_size_mb,
+                               "do_ocr": do_ocr, "do_table_structure": do_table_structure,
+                               "window_pages": window_pages, "blob_dir": blob_dir}
+        # With an engine, conversion happens in worker processes and no converter is built here.
+        self.engine = engine
+        self.cache = cache
+        self._parser: Optional[DoclingParser] = None
+
+    @property
+    def parser(self) -> DoclingParser:
+        """In-process DoclingParser, built on first use."""
+        if self._parser is None:
+            self._parser = DoclingParser(**self.parser_options)
+        return self._parser
 
 
     async def parse_pdf(self, pdf_path: Path) -> Optional[PdfContent]:
@@ -30,9 +48,21 @@ class PDFParserService:
         if not pdf_path.exists():
             raise PDFValidationError(f"PDF file not found: {pdf_path}")
 
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(await asyncio.to_thread(file_sha256, pdf_path), self.parser_options)
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                return cached
+
         try:
-            result = await self.docling_parser.parse_pdf(pdf_path)
+            if self.engine is not None:
+                result = await self.engine.parse(pdf_path)
+            else:
+                result = await self.parser.parse_pdf(pdf_path)
             if result:
+                if cache_key is not None:
+                    await asyncio.to_thread(self.cache.put, cache_key, result)
                 return result
             else:
                 raise PDFParsingException(f"Docling parsing returned no result for {pdf_path.name}")
@@ -42,4 +72,49 @@ class PDFParserService:
         except Exception as e:
             raise PDFParsingException(f"Docling parsing error for {pdf_path.name}: {e}")
 
+    async def iter_sections(self, pdf_path: Path) -> AsyncIterator[PaperSection]:
+        """
+        Parse a PDF and yield its sections in order, each as soon as its page window is done.
+
+        The complete PdfContent is cached once the last section has been yielded.
+
+        Args:
+            pdf_path: Path to PDF file
+
+        Yields:
+            PaperSection objects
+        """
+        if not pdf_path.exists():
+            raise PDFValidationError(f"PDF file not found: {pdf_path}")
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(await asyncio.to_thread(file_sha256, pdf_path), self.parser_options)
+            cached = await asyncio.to_thread(self.cache.get, cache_key)
+            if cached is not None:
+                for section in cached.sections:
+                    yield section
+                return
+
+        try:
+            if self.engine is not None:
+                job = await self.engine.submit(pdf_path, stream=True)
+                async for section in job.iter_sections():
+                    yield section
+                if cache_key is not None:
+                    await asyncio.to_thread(self.cache.put, cache_key, job.future.result())
+            else:
+                async for section in self.parser.iter_sections(pdf_path):
+                    yield section
+        except (PDFValidationError, PDFParsingException):
+            raise
+        except Exception as e:
+            raise PDFParsingException(f"Docling parsing error for {pdf_path.name}: {e}")
+
+    def cache_stats(self) -> dict:
+        """Parse cache hit/miss counts, or an empty dict when caching is disabled."""
+        if self.cache is None:
+            return {}
+        return {**self.cache.stats, "hit_ratio": self.cache.hit_ratio(), "size_bytes": self.cache.size_bytes()}
+
 
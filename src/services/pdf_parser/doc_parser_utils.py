@@ -1,43 +1,124 @@
+import asyncio
+import io
 import logging
 from pathlib import Path
-from typing import Optional
+from typing import AsyncIterator, List, Optional, Tuple
 
 import pypdfium2 as pdfium
 from docling.datamodel.base_models import InputFormat
 from docling.datamodel.pipeline_options import PdfPipelineOptions
 from docling.document_converter import DocumentConverter, PdfFormatOption
 from src.exceptions import PDFParsingException, PDFValidationError
-from src.schemas.pdf_parser.models import PaperSection, PdfContent
+from src.schemas.pdf_parser.models import PaperFigure, PaperSection, PaperTable, PdfContent, PdfPageWindow
+from src.services.blob_store.store import BlobStore
+
+from .windows import SectionAssembler, page_windows
+
+# Figure crops are rendered at 2x the PDF's 72 dpi.
+FIGURE_IMAGES_SCALE = 2.0
+
+
+def _page_no(item) -> Optional[int]:
+    prov = getattr(item, "prov", None)
+    return prov[0].page_no if prov else None
+
+
+def extract_table(table, doc) -> PaperTable:
+    """Convert a Docling TableItem into a column-major PaperTable.
+
+    Leading rows made of column-header cells become the header; stacked
+    header rows are joined with ".", like Docling's DataFrame export.
+    """
+    grid = table.data.grid
+    num_cols = table.data.num_cols
+    header_rows = 0
+    for row in grid:
+        if not any(cell.column_header for cell in row):
+            break
+        header_rows += 1
+    header = [".".join(cell_text for cell_text in (grid[i][j].text for i in range(header_rows)) if cell_text)
+              for j in range(num_cols)] if header_rows else []
+    body = grid[header_rows:]
+    return PaperTable(
+        caption=table.caption_text(doc),
+        header=header,
+        columns=[[row[j].text for row in body] for j in range(num_cols)],
+        page=_page_no(table),
+    )
+
+
+def extract_figure(picture, doc, store: Optional[BlobStore]) -> PaperFigure:
+    """Convert a Docling PictureItem into a PaperFigure, writing its image to ``store``.
+
+    Only the blob's hash stays in the model; the encoded PNG is dropped as
+    soon as it has been written.
+    """
+    figure = PaperFigure(caption=picture.caption_text(doc), page=_page_no(picture))
+    image = picture.get_image(doc) if store is not None else None
+    if image is None:
+        return figure
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    figure.image_sha256 = store.put(buffer.getvalue())
+    figure.width, figure.height = image.size
+    return figure
 
 
 class DoclingParser:
-    """Docling PDF Parser"""
+    """Docling PDF Parser.
 
-    def __init__(self, max_pages: int = 30, max_size_mb: int = 20,
-                 do_ocr: bool = False, do_table_structure: bool = True):
+    PDFs longer than ``window_pages`` are converted one page window at a time
+    and merged back with SectionAssembler, so memory is bounded by the window
+    and PdfParseEngine can spread the windows of one paper over its workers.
+    A PDF is opened 1 + (number of windows) times: once by ``plan`` to count
+    its pages, then once per window by Docling.
+    With ``blob_dir`` set, figure images are cropped and written to a
+    BlobStore there, and only their hashes are kept in the PdfContent.
+    """
+
+    def __init__(self, max_pages: int = 500, max_size_mb: int = 20,
+                 do_ocr: bool = False, do_table_structure: bool = True, window_pages: int = 10,
+                 blob_dir: Optional[str] = None):
+        if window_pages <= 0:
+            raise ValueError("window_pages must be positive")
         self.max_pages = max_pages
         self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.window_pages = window_pages
+        self.blob_store = BlobStore(blob_dir) if blob_dir else None
 
         pipeline_options = PdfPipelineOptions(
             do_table_structure=do_table_structure,
             do_ocr=do_ocr
         )
+        if self.blob_store is not None:
+            pipeline_options.generate_picture_images = True
+            pipeline_options.images_scale = FIGURE_IMAGES_SCALE
         self.converter = DocumentConverter(format_options={
             InputFormat.PDF: PdfFormatOption(pipeline_options=pipeline_options)
         })
         self.warmed_up = False
 
     def _warm_up_model(self) -> None:
+        """Build the PDF pipeline (layout and table models) once, ahead of the first parse."""
         if not self.warmed_up:
-            # place any heavy init here
+            self.converter.initialize_pipeline(InputFormat.PDF)
             self.warmed_up = True
 
-    def _validate_pdf(self, file_path: Path) -> None:
-        """Validate the PDF file before parsing.
-        
+    def _validate_pdf(self, file_path: Path) -> int:
+        """Validate the PDF file before parsing and count its pages.
+
+        The page count comes from a separate pdfium open, which takes
+        milliseconds next to a Docling conversion. Docling then loads the
+        document again for every page window: windows are converted in
+        different worker processes, so a handle cannot be shared between
+        them, and the windows have to be planned before any is converted.
+
         Args:
             file_path: Path to the PDF file
 
+        Returns:
+            Number of pages
+
         Raises:
             PDFValidationError: If the PDF is invalid
         """
@@ -76,63 +157,132 @@ class DoclingParser:
                 raise PDFValidationError(
                     f"PDF has {num_pages} pages, which exceeds the maximum allowed {self.max_pages} pages."
                 )
+            if num_pages == 0:
+                raise PDFValidationError("PDF has no pages.")
+            return num_pages
 
         except PDFValidationError:
             raise
         except Exception as e:
             raise PDFValidationError(f"PDF validation failed: {e}") from e
 
-    async def parse_pdf(self, file_path: Path) -> Optional[PdfContent]:
-        """Parse the PDF file and extract content using Docling.
-        
+    def plan(self, file_path: Path) -> Tuple[int, List[Tuple[int, int]]]:
+        """Validate the PDF and return its page count and the page windows to convert."""
+        num_pages = self._validate_pdf(file_path)
+        return num_pages, page_windows(num_pages, self.window_pages)
+
+    def parse_window_sync(self, file_path: Path, start_page: int, end_page: int) -> PdfPageWindow:
+        """Convert pages ``start_page``..``end_page`` (1-based, inclusive) and split them into sections.
+
         Args:
-            file_path: Path to the PDF file
+            file_path: Path to a PDF already checked by ``plan``
+            start_page: First page of the window
+            end_page: Last page of the window
 
         Returns:
-            PdfContent object with extracted content
+            PdfPageWindow whose text before the first heading is kept apart as ``leading_text``
         """
         try:
-            # 1) Validate
-            self._validate_pdf(file_path)
-
-            # 2) Warm up
             self._warm_up_model()
-
-            # 3) Convert with Docling
             result = self.converter.convert(
                 str(file_path),
                 max_num_pages=self.max_pages,
-                max_file_size=self.max_size_bytes
+                max_file_size=self.max_size_bytes,
+                page_range=(start_page, end_page),
             )
             doc = result.document
 
-            # 4) Build sections
-            sections = []
-            current = {"title": "Content", "content": ""}
+            # Collect parts and join once: linear in the text size.
+            leading_parts: List[str] = []
+            sections: List[PaperSection] = []
+            current_title, current_parts = None, leading_parts
+
+            def close() -> None:
+                if current_title is not None:
+                    sections.append(PaperSection(title=current_title, content="\n".join(current_parts).strip()))
 
             for element in getattr(doc, "texts", []):
                 if hasattr(element, "label") and element.label in ["title", "section_header"]:
-                    if current["content"].strip():
-                        sections.append(PaperSection(title=current["title"], content=current["content"].strip()))
-                    current = {"title": element.text.strip(), "content": ""}
+                    close()
+                    current_title, current_parts = element.text.strip(), []
                 else:
                     if hasattr(element, "text") and element.text:
-                        current["content"] += element.text + "\n"
-
-            if current["content"].strip():
-                sections.append(PaperSection(title=current["title"], content=current["content"].strip()))
+                        current_parts.append(element.text)
+            close()
 
-            return PdfContent(
+            return PdfPageWindow(
+                start_page=start_page,
+                end_page=end_page,
+                leading_text="\n".join(leading_parts).strip(),
                 sections=sections,
-                figures=[],
-                tables=[],
+                figures=[extract_figure(picture, doc, self.blob_store) for picture in getattr(doc, "pictures", [])],
+                tables=[extract_table(table, doc) for table in getattr(doc, "tables", [])],
                 raw_text=doc.export_to_text(),
-                references=[],
-                parser_used="DOCLING",
-                metadata={"source": "docling", "note": "Content extracted from PDF, metadata comes from arXiv API"},
             )
 
         except PDFValidationError:
             raise
         except Exception as e:
-            raise PDFParsingException(f"Error parsing PDF {file_path}: {e}") from e
\ No newline at end of file
+            raise PDFParsingException(f"Error parsing pages {start_page}-{end_page} of PDF {file_path}: {e}") from e
+
+    async def parse_pdf(self, file_path: Path) -> Optional[PdfContent]:
+        """Parse the PDF file in a worker thread so the event loop stays responsive.
+
+        Docling conversion is CPU-bound and blocking; for real throughput use
+        PdfParseEngine, which runs it in a pool of processes.
+
+        Args:
+            file_path: Path to the PDF file
+
+        Returns:
+            PdfContent object with extracted content
+        """
+        return await asyncio.to_thread(self.parse_pdf_sync, file_path)
+
+    async def iter_sections(self, file_path: Path) -> AsyncIterator[PaperSection]:
+        """Yield the sections of the PDF as each page window is converted, in document order.
+
+        Windows are converted one after another in a worker thread; use
+        PdfParseEngine.iter_sections to convert them in parallel.
+
+        Args:
+            file_path: Path to the PDF file
+
+        Yields:
+            PaperSection objects
+        """
+        try:
+            _, windows = await asyncio.to_thread(self.plan, file_path)
+        except PDFValidationError:
+            raise
+        except Exception as e:
+            raise PDFParsingException(f"Error parsing PDF {file_path}: {e}") from e
+        assembler = SectionAssembler()
+        for index, (start_page, end_page) in enumerate(windows):
+            window = await asyncio.to_thread(self.parse_window_sync, file_path, start_page, end_page)
+            for section in assembler.add(index, window):
+                yield section
+        for section in assembler.finish():
+            yield section
+
+    def parse_pdf_sync(self, file_path: Path) -> Optional[PdfContent]:
+        """Parse the PDF file and extract content using Docling.
+
+        Args:
+            file_path: Path to the PDF file
+
+        Returns:
+            PdfContent object with extracted content
+        """
+        try:
+            num_pages, windows = self.plan(file_path)
+            assembler = SectionAssembler()
+            for index, (start_page, end_page) in enumerate(windows):
+                assembler.add(index, self.parse_window_sync(file_path, start_page, end_page))
+            assembler.finish()
+            return assembler.content(num_pages)
+
+        except (PDFValidationError, PDFParsingException):
+            raise
+        except Exception as e:
+            raise PDFParsingException(f"Error parsing PDF {file_path}: {e}") from e
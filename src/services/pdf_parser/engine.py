@@ -0,0 +1,294 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from src.exceptions import PDFParsingException
+from src.schemas.pdf_parser.models import PaperSection, PdfContent, PdfPageWindow
+from src.services.metrics.instruments import PDF_PAGES, PDF_PARSE_SECONDS, PDF_PARSE_WAIT_SECONDS, QUEUE_DEPTH
+
+from .windows import SectionAssembler
+
+logger = logging.getLogger(__name__)
+
+# One DoclingParser per worker process, built and warmed by _init_worker.
+_worker_parser = None
+
+
+def _init_worker(parser_kwargs: Dict[str, Any]) -> None:
+    """Process-pool initializer: build the converter once and load its models."""
+    global _worker_parser
+    from .doc_parser_utils import DoclingParser
+
+    _worker_parser = DoclingParser(**parser_kwargs)
+    _worker_parser._warm_up_model()
+
+
+def _plan_in_worker(file_path: str) -> Tuple[int, List[Tuple[int, int]]]:
+    return _worker_parser.plan(Path(file_path))
+
+
+def _parse_window_in_worker(file_path: str, start_page: int, end_page: int) -> PdfPageWindow:
+    return _worker_parser.parse_window_sync(Path(file_path), start_page, end_page)
+
+
+class ParseJob:
+    """A single PDF parse request and its progress."""
+
+    def __init__(self, job_id: int, pdf_path: Path, future: asyncio.Future, stream: bool = False):
+        self.job_id = job_id
+        self.pdf_path = pdf_path
+        self.future = future
+        self.status = "new"
+        self.error: Optional[str] = None
+        self.pages: Optional[int] = None
+        self.windows: Optional[int] = None
+        # Final sections in document order, then None; only kept when the job is streamed.
+        self._sections: Optional[asyncio.Queue] = asyncio.Queue() if stream else None
+        self.queued_at = time.perf_counter()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    @property
+    def wait_s(self) -> Optional[float]:
+        return None if self.started_at is None else self.started_at - self.queued_at
+
+    @property
+    def parse_s(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "pdf_path": str(self.pdf_path),
+            "status": self.status,
+            "error": self.error,
+            "pages": self.pages,
+            "windows": self.windows,
+            "wait_s": self.wait_s,
+            "parse_s": self.parse_s,
+        }
+
+    def _publish(self, sections: List[PaperSection]) -> None:
+        if self._sections is not None:
+            for section in sections:
+                self._sections.put_nowait(section)
+
+    def _close_stream(self) -> None:
+        if self._sections is not None:
+            self._sections.put_nowait(None)
+
+    async def iter_sections(self) -> AsyncIterator[PaperSection]:
+        """Yield sections as their page windows complete; raises the job's error after the last one."""
+        if self._sections is None:
+            raise RuntimeError("Job was not submitted with stream=True")
+        while (section := await self._sections.get()) is not None:
+            yield section
+        await self.future
+
+
+class PdfParseEngine:
+    """Parses PDFs with Docling in a pool of worker processes.
+
+    Each worker builds and warms its own DocumentConverter once, so model loading
+    is paid per process rather than per PDF. A PDF is split into page windows
+    (``window_pages`` per window) that are converted in parallel, so a long
+    paper uses every worker rather than one. Jobs go through a bounded queue:
+    ``submit`` waits when the queue is full, which pushes back on producers
+    instead of letting pending work pile up in memory. The event loop only
+    awaits futures and is never blocked by a conversion.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        queue_size: Optional[int] = None,
+        on_progress: Optional[Callable[[ParseJob], None]] = None,
+        **parser_kwargs: Any,
+    ):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.queue_size = queue_size or self.max_workers * 4
+        self.on_progress = on_progress
+        self.parser_kwargs = parser_kwargs
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._dispatchers: list = []
+        self._next_job_id = 0
+        self.counts = {"queued": 0, "running": 0, "done": 0, "failed": 0, "cancelled": 0}
+
+    @property
+    def started(self) -> bool:
+        return self._executor is not None
+
+    def _make_executor(self) -> ProcessPoolExecutor:
+        # Docling/torch are not fork-safe once threads exist, so always spawn.
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.parser_kwargs,),
+        )
+
+    async def start(self) -> None:
+        """Spawn the worker processes and dispatcher tasks."""
+        if self.started:
+            return
+        self._executor = self._make_executor()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._dispatchers = [asyncio.create_task(self._dispatch()) for _ in range(self.max_workers)]
+        QUEUE_DEPTH.labels("pdf_parse").set_function(self._queue.qsize)
+        logger.info("PdfParseEngine started with %d workers", self.max_workers)
+
+    async def stop(self, drain: bool = True) -> None:
+        """Stop accepting work, optionally finish queued jobs, and shut the pool down."""
+        if not self.started:
+            return
+        if drain:
+            await self._queue.join()
+        for task in self._dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._dispatchers, return_exceptions=True)
+        while not self._queue.empty():
+            self._cancel(self._queue.get_nowait())
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = None
+        self._queue = None
+        self._dispatchers = []
+
+    def _report(self, job: ParseJob, status: str) -> None:
+        if job.status in self.counts:
+            self.counts[job.status] -= 1
+        job.status = status
+        self.counts[status] += 1
+        if self.on_progress:
+            try:
+                self.on_progress(job)
+            except Exception:
+                logger.exception("on_progress callback failed for job %d", job.job_id)
+
+    def _cancel(self, job: ParseJob) -> None:
+        """Settle a job that will not run (or finish): its future is cancelled and it leaves the counts."""
+        job.future.cancel()
+        job._close_stream()
+        self._report(job, "cancelled")
+
+    def _restart_executor(self) -> None:
+        """Replace a pool whose worker died (e.g. OOM-killed on a huge PDF)."""
+        broken = self._executor
+        self._executor = self._make_executor()
+        broken.shutdown(wait=False, cancel_futures=True)
+        logger.warning("PdfParseEngine worker pool was broken and has been restarted")
+
+    async def _dispatch(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            job: ParseJob = await self._queue.get()
+            try:
+                if job.future.cancelled():
+                    # The caller went away while the job was queued
+                    self._cancel(job)
+                    continue
+                job.started_at = time.perf_counter()
+                PDF_PARSE_WAIT_SECONDS.observe(job.wait_s)
+                self._report(job, "running")
+                executor = self._executor
+                try:
+                    result = await self._run(loop, executor, job)
+                except asyncio.CancelledError:
+                    # stop(drain=False) while the job was running
+                    self._cancel(job)
+                    raise
+                except BrokenProcessPool as e:
+                    if executor is self._executor:
+                        self._restart_executor()
+                    error = PDFParsingException(f"Error parsing PDF {job.pdf_path}: worker process died: {e}")
+                    self._finish(job, "failed", error=error)
+                except Exception as e:
+                    self._finish(job, "failed", error=e)
+                else:
+                    self._finish(job, "done", result=result)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, loop: asyncio.AbstractEventLoop, executor: ProcessPoolExecutor, job: ParseJob) -> PdfContent:
+        """Convert the windows of one PDF on the pool and merge them as they complete."""
+        path = str(job.pdf_path)
+        job.pages, windows = await loop.run_in_executor(executor, _plan_in_worker, path)
+        job.windows = len(windows)
+        # Windows are queued in page order, so the first ones tend to finish first.
+        pending = {
+            loop.run_in_executor(executor, _parse_window_in_worker, path, start_page, end_page): index
+            for index, (start_page, end_page) in enumerate(windows)
+        }
+        assembler = SectionAssembler()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    job._publish(assembler.add(pending.pop(future), future.result()))
+        finally:
+            for future in pending:
+                future.cancel()
+        job._publish(assembler.finish())
+        return assembler.content(job.pages)
+
+    def _finish(self, job: ParseJob, status: str, result: Optional[PdfContent] = None,
+                error: Optional[Exception] = None) -> None:
+        job.finished_at = time.perf_counter()
+        PDF_PARSE_SECONDS.labels(status).observe(job.parse_s)
+        if result is not None and result.metadata.get("pages"):
+            PDF_PAGES.observe(result.metadata["pages"])
+        if error is not None:
+            job.error = str(error)
+        if not job.future.done():
+            if error is not None:
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(result)
+        job._close_stream()
+        self._report(job, status)
+
+    async def submit(self, pdf_path: Path, stream: bool = False) -> ParseJob:
+        """Queue a PDF for parsing, waiting for room if the queue is full.
+
+        Args:
+            pdf_path: Path to PDF file
+            stream: Keep sections for ``ParseJob.iter_sections`` as windows complete
+
+        Returns:
+            ParseJob whose ``future`` resolves to the PdfContent
+        """
+        if not self.started:
+            await self.start()
+        self._next_job_id += 1
+        job = ParseJob(self._next_job_id, Path(pdf_path), asyncio.get_running_loop().create_future(), stream=stream)
+        self._report(job, "queued")
+        await self._queue.put(job)
+        return job
+
+    async def parse(self, pdf_path: Path) -> PdfContent:
+        """Parse one PDF and return its content."""
+        job = await self.submit(pdf_path)
+        return await job.future
+
+    async def iter_sections(self, pdf_path: Path) -> AsyncIterator[PaperSection]:
+        """Parse one PDF and yield its sections in order, as soon as each is final.
+
+        Chunking can start on the first sections while later windows are still
+        being converted. The complete PdfContent is ``job.future``'s result.
+        """
+        job = await self.submit(pdf_path, stream=True)
+        async for section in job.iter_sections():
+            yield section
+
+    def progress(self) -> Dict[str, int]:
+        """Current number of jobs per state, plus queue depth."""
+        return {**self.counts, "queue_depth": self._queue.qsize() if self._queue else 0}
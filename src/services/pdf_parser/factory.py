@@ -1,23 +1,80 @@
+import os
 from functools import lru_cache
+from typing import Optional
+
+from .cache import ParseCache
 from .doc_parser import PDFParserService
+from .engine import PdfParseEngine
+
+
+
+settings = {"pdf_parser_max_pages": int(os.getenv("PDF_PARSER_MAX_PAGES", "500")),
+            # Long PDFs are converted in windows of this many pages, in parallel
+            "pdf_parser_window_pages": int(os.getenv("PDF_PARSER_WINDOW_PAGES", "10")),
+            "pdf_parser_max_size_mb": 20,
+            "pdf_parser_do_ocr": False,
+            "pdf_parser_do_table_structure": True,
+            # 0 means one worker per CPU core
+            "pdf_parser_workers": int(os.getenv("PDF_PARSER_WORKERS", "0")),
+            "pdf_parser_queue_size": int(os.getenv("PDF_PARSER_QUEUE_SIZE", "0")),
+            # figure images are stored here by content hash; empty path skips image extraction
+            "pdf_blob_store_path": os.getenv("PDF_BLOB_STORE_PATH", "data/blobs"),
+            # empty path disables the parse cache
+            "pdf_parse_cache_path": os.getenv("PDF_PARSE_CACHE_PATH", "data/cache/parse_cache.sqlite3"),
+            "pdf_parse_cache_max_mb": int(os.getenv("PDF_PARSE_CACHE_MAX_MB", "2048"))}
+
+
+def _blob_dir(blob_dir: Optional[str]) -> Optional[str]:
+    return (settings["pdf_blob_store_path"] if blob_dir is None else blob_dir) or None
+
+
+@lru_cache(maxsize=1)
+def make_pdf_parse_engine(blob_dir: Optional[str] = None) -> PdfParseEngine:
+    """Factory function to create a cached, not yet started PdfParseEngine.
 
+    Args:
+        blob_dir: Figure image store; defaults to PDF_BLOB_STORE_PATH, "" skips images
+    """
+    return PdfParseEngine(
+        max_workers=settings["pdf_parser_workers"] or None,
+        queue_size=settings["pdf_parser_queue_size"] or None,
+        max_pages=settings["pdf_parser_max_pages"],
+        max_size_mb=settings["pdf_parser_max_size_mb"],
+        do_ocr=settings["pdf_parser_do_ocr"],
+        do_table_structure=settings["pdf_parser_do_table_structure"],
+        window_pages=settings["pdf_parser_window_pages"],
+        blob_dir=_blob_dir(blob_dir),
+    )
 
 
 @lru_cache(maxsize=1)
-def make_pdf_parser_service() -> PDFParserService:
-    """Factory function to create a cached instance of PDFParserService."""
-    settings = {"pdf_parser_max_pages": 30,
-                "pdf_parser_max_size_mb": 20,
-                "pdf_parser_do_ocr": False,
-                "pdf_parser_do_table_structure": True}
-    
+def make_parse_cache() -> ParseCache | None:
+    """Factory function to create a cached ParseCache, or None when disabled."""
+    if not settings["pdf_parse_cache_path"]:
+        return None
+    return ParseCache(settings["pdf_parse_cache_path"], max_bytes=settings["pdf_parse_cache_max_mb"] * 1024 * 1024)
+
+
+@lru_cache(maxsize=1)
+def make_pdf_parser_service(blob_dir: Optional[str] = None) -> PDFParserService:
+    """Factory function to create a cached instance of PDFParserService backed by the parse engine.
+
+    Args:
+        blob_dir: Figure image store; defaults to PDF_BLOB_STORE_PATH, "" skips images
+    """
     return PDFParserService(
         max_pages=settings["pdf_parser_max_pages"],
         max_size_mb=settings["pdf_parser_max_size_mb"],
         do_ocr=settings["pdf_parser_do_ocr"],
         do_table_structure=settings["pdf_parser_do_table_structure"],
+        window_pages=settings["pdf_parser_window_pages"],
+        blob_dir=_blob_dir(blob_dir),
+        engine=make_pdf_parse_engine(blob_dir),
+        cache=make_parse_cache(),
     )
 
 def reset_pdf_parser_service_cache():
-    """Function to clear the cached PDFParserService instance."""
-    make_pdf_parser_service.cache_clear()
\ No newline at end of file
+    """Function to clear the cached PDFParserService, PdfParseEngine and ParseCache instances."""
+    make_pdf_parser_service.cache_clear()
+    make_pdf_parse_engine.cache_clear()
+    make_parse_cache.cache_clear()
\ No newline at end of file
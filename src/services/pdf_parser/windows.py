@@ -0,0 +1,76 @@
+from typing import Dict, List, Optional, Tuple
+
+from src.exceptions import PDFParsingException
+from src.schemas.pdf_parser.models import PaperFigure, PaperSection, PaperTable, PdfContent, PdfPageWindow
+
+
+def page_windows(num_pages: int, window_pages: int) -> List[Tuple[int, int]]:
+    """Split ``num_pages`` into consecutive (start, end) page ranges, 1-based and inclusive."""
+    return [(start, min(start + window_pages - 1, num_pages)) for start in range(1, num_pages + 1, window_pages)]
+
+
+class SectionAssembler:
+    """Merges page windows, which may complete in any order, back into ordered sections.
+
+    A section can run across a window boundary: its heading is in one window
+    and the rest of its text is the next window's ``leading_text``. So the
+    last section seen so far stays open until the next window arrives, and
+    ``add`` returns only the sections that are final. Sections without
+    content are dropped, as in a whole-document parse.
+    """
+
+    def __init__(self):
+        self.sections: List[PaperSection] = []
+        self._pending: Dict[int, PdfPageWindow] = {}
+        self._next_index = 0
+        self._open: Optional[PaperSection] = None
+        self._raw_text: List[str] = []
+        self._figures: List[PaperFigure] = []
+        self._tables: List[PaperTable] = []
+
+    def add(self, index: int, window: PdfPageWindow) -> List[PaperSection]:
+        """Take the result of window ``index`` and return the sections it completes, in order."""
+        self._pending[index] = window
+        ready = []
+        while self._next_index in self._pending:
+            window = self._pending.pop(self._next_index)
+            self._next_index += 1
+            self._raw_text.append(window.raw_text)
+            self._figures.extend(window.figures)
+            self._tables.extend(window.tables)
+            if window.leading_text:
+                if self._open is None:
+                    self._open = PaperSection(title="Content", content=window.leading_text)
+                else:
+                    content = f"{self._open.content}\n{window.leading_text}".strip()
+                    self._open = self._open.model_copy(update={"content": content})
+            for section in window.sections:
+                ready.extend(self._close())
+                self._open = section
+        return ready
+
+    def finish(self) -> List[PaperSection]:
+        """Close the last section once every window has been added."""
+        if self._pending:
+            raise PDFParsingException(f"Missing page window {self._next_index}")
+        return self._close()
+
+    def _close(self) -> List[PaperSection]:
+        section, self._open = self._open, None
+        if section is None or not section.content:
+            return []
+        self.sections.append(section)
+        return [section]
+
+    def content(self, num_pages: int) -> PdfContent:
+        """The whole document, once ``finish`` has been called."""
+        return PdfContent(
+            sections=self.sections,
+            figures=self._figures,
+            tables=self._tables,
+            raw_text="\n\n".join(text for text in self._raw_text if text),
+            references=[],
+            parser_used="DOCLING",
+            metadata={"source": "docling", "note": "Content extracted from PDF, metadata comes from arXiv API",
+                      "pages": num_pages, "windows": self._next_index},
+        )
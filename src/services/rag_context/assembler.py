@@ -0,0 +1,233 @@
+import logging
+import os
+import time
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.services.llm_registry.scheduler import parse_limits
+from src.services.rag_context.tokens import CachedTokenCounter, make_token_counter
+
+logger = logging.getLogger(__name__)
+
+BLOCK_SEPARATOR = "\n\n"
+
+
+class ContextCandidate:
+    """A retrieved chunk offered to the assembler."""
+
+    __slots__ = ("chunk_id", "arxiv_id", "section_title", "text", "score")
+
+    def __init__(self, chunk_id: int, arxiv_id: str, section_title: str, text: str, score: float = 0.0):
+        self.chunk_id = chunk_id
+        self.arxiv_id = arxiv_id
+        self.section_title = section_title
+        self.text = text
+        self.score = score
+
+    def render(self) -> str:
+        """The chunk as it appears in the prompt; its source doubles as the citation."""
+        return f"Source: arXiv:{self.arxiv_id}, {self.section_title}\n{self.text}"
+
+
+class AssembledContext:
+    """Chunks chosen for a prompt, in prompt order, and what choosing them cost."""
+
+    __slots__ = ("text", "chunks", "tokens", "budget", "duplicates", "timings_ms")
+
+    def __init__(self, text: str, chunks: List[ContextCandidate], tokens: int, budget: int, duplicates: int = 0,
+                 timings_ms: Optional[Dict[str, float]] = None):
+        self.text = text
+        self.chunks = chunks
+        self.tokens = tokens
+        self.budget = budget
+        self.duplicates = duplicates
+        self.timings_ms = timings_ms or {}
+
+
+def mmr_select(query: np.ndarray, vectors: np.ndarray, costs: np.ndarray, budget: int,
+               lambda_mult: float = 0.7, duplicate_threshold: float = 0.95,
+               max_items: Optional[int] = None) -> Tuple[np.ndarray, int]:
+    """Greedy maximal marginal relevance under a token budget.
+
+    Each step picks the candidate maximizing
+    ``lambda_mult * sim(query, c) - (1 - lambda_mult) * max(sim(c, selected))``
+    among those that still fit the remaining budget. Only the similarities to
+    the chunk just picked are computed (one matrix-vector product), and the
+    running maximum is updated in place, so k steps over n candidates of
+    dimension d cost O(k * n * d) instead of the full n x n similarity matrix.
+    Candidates at least ``duplicate_threshold`` similar to a picked chunk are
+    dropped as near-duplicates.
+
+    Args:
+        query: Unit query vector, shape (d,)
+        vectors: Unit candidate vectors, shape (n, d)
+        costs: Tokens each candidate takes in the prompt, shape (n,)
+        budget: Tokens available
+        lambda_mult: 1 ranks by relevance only, 0 by diversity only
+        duplicate_threshold: Cosine similarity from which a candidate is a near-duplicate
+        max_items: Stop after this many picks
+
+    Returns:
+        (indices of the picked candidates in pick order, number of near-duplicates dropped)
+    """
+    n = len(vectors)
+    relevance = lambda_mult * (vectors @ query)
+    redundancy = np.zeros(n, dtype=np.float32)  # max similarity to a picked chunk; 0 until the first pick
+    available = costs <= budget
+    remaining = budget
+    picked: List[int] = []
+    duplicates = 0
+    limit = n if max_items is None else max_items
+    while len(picked) < limit:
+        scores = np.where(available, relevance - (1.0 - lambda_mult) * redundancy, -np.inf)
+        best = int(np.argmax(scores))
+        if not np.isfinite(scores[best]):
+            break
+        picked.append(best)
+        remaining -= int(costs[best])
+        similarity = vectors @ vectors[best]
+        np.maximum(redundancy, similarity, out=redundancy)
+        available[best] = False
+        near = available & (similarity >= duplicate_threshold)
+        duplicates += int(near.sum())
+        available &= ~near
+        available &= costs <= remaining
+    return np.asarray(picked, dtype=np.int64), duplicates
+
+
+class ContextAssembler:
+    """Packs the most relevant, non-redundant chunks into a model's token budget.
+
+    Candidates are reranked with token-budgeted MMR (``mmr_select``) on their
+    embeddings. Each chunk's prompt cost is counted once with the model's
+    tokenizer and cached by chunk id; the joined context is then counted again,
+    and trailing chunks are dropped until it fits, so the budget holds exactly
+    even where tokens merge across block boundaries. Without a tokenizer the
+    counts are whitespace estimates.
+    """
+
+    def __init__(self, budget: int = 2000, tokenizer: Optional[str] = None, lambda_mult: float = 0.7,
+                 duplicate_threshold: float = 0.95, max_chunks: Optional[int] = None):
+        """
+        Args:
+            budget: Context tokens per prompt
+            tokenizer: tokenizer.json path or Hugging Face repo id of the model's tokenizer
+            lambda_mult: MMR trade-off between relevance (1) and diversity (0)
+            duplicate_threshold: Cosine similarity from which chunks are near-duplicates
+            max_chunks: Upper bound on chunks per prompt
+        """
+        self.budget = budget
+        self.lambda_mult = lambda_mult
+        self.duplicate_threshold = duplicate_threshold
+        self.max_chunks = max_chunks
+        self.counter = CachedTokenCounter(make_token_counter(tokenizer))
+        self._separator_tokens: Optional[int] = None
+
+    @property
+    def separator_tokens(self) -> int:
+        if self._separator_tokens is None:
+            self._separator_tokens = int(self.counter.count([BLOCK_SEPARATOR])[0])
+        return self._separator_tokens
+
+    def assemble(self, query_vector: np.ndarray, candidates: Sequence[ContextCandidate],
+                 vectors: np.ndarray, budget: Optional[int] = None,
+                 found: Optional[np.ndarray] = None) -> AssembledContext:
+        """Choose and order the chunks of one prompt's context.
+
+        Args:
+            query_vector: Query embedding, shape (d,)
+            candidates: Retrieved chunks
+            vectors: Their unit embeddings, shape (len(candidates), d)
+            budget: Overrides the assembler's token budget
+            found: Rows of ``vectors`` that hold an embedding; the others are never
+                picked. Defaults to the non-zero rows.
+
+        Returns:
+            AssembledContext whose ``text`` fits the budget
+        """
+        budget = self.budget if budget is None else budget
+        started = time.perf_counter()
+        if not candidates:
+            return AssembledContext("", [], 0, budget)
+        # Only chunks whose count is not cached yet are rendered here.
+        costs = self.counter.count_keyed([candidate.chunk_id for candidate in candidates],
+                                         lambda i: candidates[i].render())
+        costs = costs + self.separator_tokens
+        counted = time.perf_counter()
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if found is None:
+            found = vectors.any(axis=1)
+        # Chunks without a vector cost more than any budget, so they are never picked.
+        costs = np.where(found, costs, budget + self.separator_tokens + 1)
+        picked, duplicates = mmr_select(query, vectors, costs, budget + self.separator_tokens,
+                                        self.lambda_mult, self.duplicate_threshold, self.max_chunks)
+        selected = time.perf_counter()
+
+        rendered = [candidates[i].render() for i in picked]
+        text = BLOCK_SEPARATOR.join(rendered)
+        tokens = int(self.counter.count([text])[0]) if rendered else 0
+        while tokens > budget:
+            rendered.pop()
+            text = BLOCK_SEPARATOR.join(rendered)
+            tokens = int(self.counter.count([text])[0]) if rendered else 0
+        picked = picked[:len(rendered)]
+        finished = time.perf_counter()
+        return AssembledContext(text, [candidates[i] for i in picked], tokens, budget, duplicates, {
+            "count": round((counted - started) * 1000, 3),
+            "mmr": round((selected - counted) * 1000, 3),
+            "total": round((finished - started) * 1000, 3),
+        })
+
+
+def _parse_names(value: Optional[str]) -> Dict[str, str]:
+    """``llama3.2=meta-llama/Llama-3.2-1B,deepseek-ai/deepseek-v3.1=/models/ds.json`` -> {model: tokenizer}."""
+    names = {}
+    for item in (value or "").split(","):
+        model_name, _, tokenizer = item.strip().partition("=")
+        if model_name and tokenizer:
+            names[model_name.strip()] = tokenizer.strip()
+    return names
+
+
+# Callers pass allowlisted model names (see LLMRegistry.check); the bound is a
+# backstop, since every assembler holds a token-count cache.
+@lru_cache(maxsize=64)
+def context_assembler(model_name: str) -> ContextAssembler:
+    """The process-wide assembler of a model, with its token budget and tokenizer.
+
+    CONTEXT_TOKEN_BUDGETS and CONTEXT_TOKENIZERS map model names to a budget
+    and a tokenizer; other models get CONTEXT_TOKEN_BUDGET and whitespace counts.
+    """
+    budgets = parse_limits(os.getenv("CONTEXT_TOKEN_BUDGETS", ""))
+    tokenizer = _parse_names(os.getenv("CONTEXT_TOKENIZERS", "")).get(model_name)
+    if tokenizer is None:
+        logger.info("No tokenizer configured for %s; context tokens are whitespace estimates", model_name)
+    return ContextAssembler(
+        budget=int(budgets.get(model_name, os.getenv("CONTEXT_TOKEN_BUDGET", "2000"))),
+        tokenizer=tokenizer,
+        lambda_mult=float(os.getenv("CONTEXT_MMR_LAMBDA", "0.7")),
+        duplicate_threshold=float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", "0.95")),
+    )
+
+
+def load_context_tokenizers() -> List[str]:
+    """Build the assemblers of the models in CONTEXT_TOKENIZERS and load their tokenizers.
+
+    Called at startup, so a missing ``tokenizers`` package or an unreadable
+    tokenizer fails the deployment instead of the first RAG request.
+
+    Returns:
+        Names of the models whose tokenizer was loaded
+    """
+    names = list(_parse_names(os.getenv("CONTEXT_TOKENIZERS", "")))
+    for model_name in names:
+        assembler = context_assembler(model_name)
+        # Counting the block separator loads the tokenizer
+        logger.info("Loaded tokenizer %s for %s (separator: %d tokens)",
+                    assembler.counter.counter.name, model_name, assembler.separator_tokens)
+    return names
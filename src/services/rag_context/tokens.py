@@ -0,0 +1,100 @@
+import os
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+
+class WhitespaceTokenCounter:
+    """Whitespace-delimited token counts: cheap, but only an estimate of model tokens.
+
+    Same tokens as the chunker's ``\\S+`` pattern; ``str.split()`` finds them several times faster.
+    """
+
+    name = "whitespace"
+    exact = False
+
+    def count(self, texts: Sequence[str]) -> np.ndarray:
+        return np.fromiter((len(text.split()) for text in texts), dtype=np.int64, count=len(texts))
+
+
+class HFTokenCounter:
+    """Exact token counts with a Hugging Face ``tokenizers`` tokenizer.
+
+    ``tokenizers`` is imported and the tokenizer loaded on first use.
+    ``encode_batch`` runs in Rust across threads, so a batch of chunks is
+    counted in one call.
+    """
+
+    exact = True
+
+    def __init__(self, name: str):
+        """
+        Args:
+            name: Path to a ``tokenizer.json`` or a Hugging Face Hub repo id,
+                e.g. "deepseek-ai/DeepSeek-V3.1"
+        """
+        self.name = name
+        self._tokenizer = None
+
+    @property
+    def tokenizer(self):
+        if self._tokenizer is None:
+            from tokenizers import Tokenizer
+
+            if os.path.exists(self.name):
+                self._tokenizer = Tokenizer.from_file(self.name)
+            else:
+                self._tokenizer = Tokenizer.from_pretrained(self.name)
+        return self._tokenizer
+
+    def count(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros(0, dtype=np.int64)
+        encodings = self.tokenizer.encode_batch(list(texts), add_special_tokens=False)
+        return np.fromiter((len(encoding.ids) for encoding in encodings), dtype=np.int64, count=len(texts))
+
+
+class CachedTokenCounter:
+    """Token counts of keyed texts (e.g. chunk id -> rendered chunk), computed once and kept in an LRU."""
+
+    def __init__(self, counter, max_entries: int = 100_000):
+        self.counter = counter
+        self.max_entries = max_entries
+        self._counts: "OrderedDict[Hashable, int]" = OrderedDict()
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+    @property
+    def exact(self) -> bool:
+        return self.counter.exact
+
+    def count(self, texts: Sequence[str]) -> np.ndarray:
+        return self.counter.count(texts)
+
+    def count_keyed(self, keys: Sequence[Hashable], text_of: Callable[[int], str]) -> np.ndarray:
+        """Counts of the texts behind ``keys``; ``text_of(i)`` is only called for keys not cached yet."""
+        counts = np.empty(len(keys), dtype=np.int64)
+        missing: List[int] = []
+        for i, key in enumerate(keys):
+            cached = self._counts.get(key)
+            if cached is None:
+                missing.append(i)
+            else:
+                self._counts.move_to_end(key)
+                counts[i] = cached
+        self.stats["hits"] += len(keys) - len(missing)
+        self.stats["misses"] += len(missing)
+        if missing:
+            counts[missing] = self.counter.count([text_of(i) for i in missing])
+            for i in missing:
+                self._counts[keys[i]] = int(counts[i])
+            while len(self._counts) > self.max_entries:
+                self._counts.popitem(last=False)
+        return counts
+
+
+def make_token_counter(tokenizer: Optional[str]):
+    """HFTokenCounter for a configured tokenizer, else the whitespace estimate."""
+    if not tokenizer:
+        return WhitespaceTokenCounter()
+    return HFTokenCounter(tokenizer)
@@ -0,0 +1,324 @@
+import hashlib
+import logging
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.services.metrics.instruments import CACHE_REQUESTS, LLM_CACHE_SAVED_SECONDS
+
+logger = logging.getLogger(__name__)
+
+_CACHE_HIT = CACHE_REQUESTS.labels("llm_response", "hit")
+_CACHE_MISS = CACHE_REQUESTS.labels("llm_response", "miss")
+
+_WHITESPACE = re.compile(r"\s+")
+# Tokens with a digit: arXiv ids, years, version numbers, quantities.
+_IDENTIFIER = re.compile(r"[\w.\-/]*\d[\w.\-/]*")
+# Trailing punctuation and surrounding quotes do not change what is being asked.
+_EDGE_PUNCTUATION = " \t\n?!.,;:\"'`"
+
+# (model, context hash, normalized query)
+CacheKey = Tuple[str, str, str]
+# (model, context hash, identifiers in the query)
+BucketKey = Tuple[str, str, str]
+
+
+def normalize_query(query: str) -> str:
+    """Case-, width- and whitespace-insensitive form of a query, used as the exact-match key."""
+    query = unicodedata.normalize("NFKC", query).casefold()
+    return _WHITESPACE.sub(" ", query).strip(_EDGE_PUNCTUATION)
+
+
+def query_identifiers(normalized_query: str) -> str:
+    """Sorted identifiers of a normalized query, e.g. "2410.01234 2023".
+
+    Embeddings barely tell "paper 2410.01234" from "paper 2410.01235", so a
+    semantic hit is only allowed between queries with the same identifiers.
+    """
+    return " ".join(sorted(set(match.rstrip(".-/") for match in _IDENTIFIER.findall(normalized_query))))
+
+
+def context_hash(context: str) -> str:
+    """Short hash of the context a response depends on (retrieved chunks, conversation history)."""
+    return hashlib.sha256(context.encode("utf-8")).hexdigest()[:32] if context else ""
+
+
+class CacheEntry:
+    """A cached response and what it cost to produce."""
+
+    __slots__ = ("key", "response", "created_at", "latency_s", "slot", "hits")
+
+    def __init__(self, key: CacheKey, response: str, created_at: float, latency_s: float):
+        self.key = key
+        self.response = response
+        self.created_at = created_at
+        self.latency_s = latency_s
+        self.slot: Optional[int] = None  # row in the bucket's embedding matrix
+        self.hits = 0
+
+
+class CacheLookup:
+    """Result of ``ResponseCache.lookup``; pass it back to ``put`` after a miss."""
+
+    __slots__ = ("key", "response", "tier", "score", "embedding")
+
+    def __init__(self, key: CacheKey, response: Optional[str] = None, tier: Optional[str] = None,
+                 score: Optional[float] = None, embedding: Optional[np.ndarray] = None):
+        self.key = key
+        self.response = response
+        self.tier = tier  # "exact", "semantic" or None on a miss
+        self.score = score
+        self.embedding = embedding
+
+    @property
+    def hit(self) -> bool:
+        return self.response is not None
+
+
+class _EmbeddingBucket:
+    """Unit-normalized query embeddings of one (model, context, identifiers) bucket, one row per entry.
+
+    Rows freed by eviction are reused, so adding and removing entries never
+    copies the matrix; it only grows (doubling) when every row is in use.
+    """
+
+    def __init__(self, dim: int, capacity: int = 64):
+        self.vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self.entries: List[Optional[CacheEntry]] = []
+        self.free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.entries) - len(self.free)
+
+    def add(self, entry: CacheEntry, vector: np.ndarray) -> None:
+        if self.free:
+            slot = self.free.pop()
+        else:
+            slot = len(self.entries)
+            if slot == len(self.vectors):
+                grown = np.zeros((len(self.vectors) * 2, self.vectors.shape[1]), dtype=np.float32)
+                grown[:slot] = self.vectors
+                self.vectors = grown
+            self.entries.append(None)
+        self.vectors[slot] = vector
+        self.entries[slot] = entry
+        entry.slot = slot
+
+    def remove(self, entry: CacheEntry) -> None:
+        self.entries[entry.slot] = None
+        self.vectors[entry.slot] = 0.0  # scores 0, below any useful threshold
+        self.free.append(entry.slot)
+        entry.slot = None
+
+    def best(self, vector: np.ndarray) -> Tuple[Optional[CacheEntry], float]:
+        used = len(self.entries)
+        if used == len(self.free):
+            return None, 0.0
+        scores = self.vectors[:used] @ vector
+        row = int(np.argmax(scores))
+        return self.entries[row], float(scores[row])
+
+
+class ResponseCache:
+    """In-memory cache of LLM responses with an exact and a semantic tier.
+
+    Responses are keyed by model, a hash of the context the answer depends on
+    (retrieved chunks, conversation history) and the normalized query. The
+    exact tier is a dict lookup on that key. On an exact miss, the semantic
+    tier embeds the query and returns the response of the most similar cached
+    query with the same model, context and identifiers (tokens with digits,
+    such as arXiv ids), if its cosine similarity is at least
+    ``similarity_threshold``. Responses are never shared across models or
+    contexts.
+
+    Entries expire ``ttl_s`` after they were stored and the least recently
+    used ones are evicted beyond ``max_entries``. ``invalidate`` drops every
+    entry of one model, e.g. after it was updated. ``max_entries=0`` disables
+    the cache; ``similarity_threshold=0`` or no embedder disables the
+    semantic tier.
+    """
+
+    def __init__(self, max_entries: int = 10_000, ttl_s: float = 3600.0, similarity_threshold: float = 0.95,
+                 embedder=None):
+        """
+        Args:
+            max_entries: Responses kept before LRU eviction; 0 disables the cache
+            ttl_s: Seconds a response may be served after it was stored
+            similarity_threshold: Minimum cosine similarity for a semantic hit
+            embedder: Object with ``async embed_queries(List[str]) -> np.ndarray``, e.g. EmbeddingModel
+        """
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.similarity_threshold = similarity_threshold
+        self.embedder = embedder
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._buckets: Dict[BucketKey, _EmbeddingBucket] = {}
+        self.stats: Dict[str, float] = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "puts": 0,
+                                        "evictions": 0, "expirations": 0, "invalidations": 0,
+                                        "embedding_errors": 0, "saved_s": 0.0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @property
+    def semantic(self) -> bool:
+        return self.embedder is not None and self.similarity_threshold > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def lookup(self, model: str, query: str, context: str = "") -> CacheLookup:
+        """Find a cached response for ``query``, trying the exact tier, then the semantic tier.
+
+        Args:
+            model: Model identity, e.g. "nvidia:deepseek-ai/deepseek-v3"
+            query: The user's query
+            context: Everything else the response depends on; "" if nothing
+
+        Returns:
+            CacheLookup whose ``response`` is None on a miss
+        """
+        lookup = CacheLookup((model, context_hash(context), normalize_query(query)))
+        if not self.enabled:
+            return lookup
+        now = time.monotonic()
+
+        entry = self._entries.get(lookup.key)
+        if entry is not None and self._expired(entry, now):
+            self._drop(entry)
+            self.stats["expirations"] += 1
+            entry = None
+        if entry is not None:
+            return self._hit(lookup, entry, "exact", 1.0)
+
+        if self.semantic:
+            try:
+                lookup.embedding = await self._embed(lookup.key[2])
+            except Exception as e:
+                # The cache must never fail a request; fall back to exact matching only.
+                self.stats["embedding_errors"] += 1
+                logger.warning("Response cache could not embed a query: %s", e)
+            bucket = self._buckets.get(self._bucket_key(lookup.key))
+            if lookup.embedding is not None and bucket is not None:
+                entry, score = bucket.best(lookup.embedding)
+                if entry is not None and self._expired(entry, now):
+                    self._drop(entry)
+                    self.stats["expirations"] += 1
+                elif entry is not None and score >= self.similarity_threshold:
+                    return self._hit(lookup, entry, "semantic", score)
+
+        self.stats["misses"] += 1
+        _CACHE_MISS.inc()
+        return lookup
+
+    def put(self, lookup: CacheLookup, response: str, latency_s: float = 0.0, model: Optional[str] = None) -> None:
+        """Store the response produced after a miss.
+
+        Args:
+            lookup: The miss returned by ``lookup`` (its query embedding is reused)
+            response: The completion to cache
+            latency_s: How long the completion took; credited as saved on every hit
+            model: The model that actually answered, if not the one looked up
+                (e.g. a hedge's fallback); the response is stored under it
+        """
+        if not self.enabled or lookup.hit or not response:
+            return
+        key = lookup.key if model is None else (model, *lookup.key[1:])
+        existing = self._entries.get(key)
+        if existing is not None:
+            self._drop(existing)
+        entry = CacheEntry(key, response, time.monotonic(), latency_s)
+        self._entries[key] = entry
+        if lookup.embedding is not None:
+            bucket_key = self._bucket_key(key)
+            bucket = self._buckets.get(bucket_key)
+            if bucket is None:
+                bucket = self._buckets[bucket_key] = _EmbeddingBucket(len(lookup.embedding))
+            bucket.add(entry, lookup.embedding)
+        self.stats["puts"] += 1
+        while len(self._entries) > self.max_entries:
+            self._drop(next(iter(self._entries.values())))
+            self.stats["evictions"] += 1
+
+    async def get_or_complete(self, model: str, query: str, complete: Callable[[], Awaitable[Tuple[str, str]]],
+                              context: str = "") -> Tuple[str, Optional[str], str]:
+        """Return a cached response, or call ``complete()`` and cache what it returns.
+
+        Args:
+            model: Model identity to look the query up for
+            query: The user's query
+            complete: Coroutine function returning the response and the identity of the
+                model that produced it, which differs from ``model`` when a hedge won;
+                the response is cached under the model that produced it
+            context: Everything else the response depends on; "" if nothing
+
+        Returns:
+            (response, tier, answering model) where tier is "exact", "semantic" or
+            None when ``complete`` ran
+        """
+        lookup = await self.lookup(model, query, context)
+        if lookup.hit:
+            return lookup.response, lookup.tier, model
+        started = time.perf_counter()
+        response, answered_by = await complete()
+        self.put(lookup, response, time.perf_counter() - started, model=answered_by)
+        return response, None, answered_by
+
+    def invalidate(self, model: Optional[str] = None) -> int:
+        """Drop every entry of ``model`` (all entries if None) and return how many were dropped."""
+        entries = [entry for entry in self._entries.values() if model is None or entry.key[0] == model]
+        for entry in entries:
+            self._drop(entry)
+        self.stats["invalidations"] += len(entries)
+        return len(entries)
+
+    def snapshot(self) -> Dict[str, float]:
+        hits = self.stats["exact_hits"] + self.stats["semantic_hits"]
+        lookups = hits + self.stats["misses"]
+        return {"entries": len(self._entries), "hit_ratio": hits / lookups if lookups else 0.0, **self.stats}
+
+    @staticmethod
+    def _bucket_key(key: CacheKey) -> BucketKey:
+        return key[0], key[1], query_identifiers(key[2])
+
+    async def _embed(self, normalized_query: str) -> np.ndarray:
+        vector = np.asarray((await self.embedder.embed_queries([normalized_query]))[0], dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expired(self, entry: CacheEntry, now: float) -> bool:
+        return now - entry.created_at > self.ttl_s
+
+    def _hit(self, lookup: CacheLookup, entry: CacheEntry, tier: str, score: float) -> CacheLookup:
+        self._entries.move_to_end(entry.key)
+        entry.hits += 1
+        lookup.response, lookup.tier, lookup.score = entry.response, tier, score
+        self.stats[f"{tier}_hits"] += 1
+        self.stats["saved_s"] += entry.latency_s
+        _CACHE_HIT.inc()
+        LLM_CACHE_SAVED_SECONDS.labels(tier).inc(entry.latency_s)
+        return lookup
+
+    def _drop(self, entry: CacheEntry) -> None:
+        del self._entries[entry.key]
+        if entry.slot is not None:
+            bucket_key = self._bucket_key(entry.key)
+            bucket = self._buckets[bucket_key]
+            bucket.remove(entry)
+            if not len(bucket):
+                del self._buckets[bucket_key]
+
+
+def make_response_cache(embedder=None) -> ResponseCache:
+    return ResponseCache(
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "10000")),
+        ttl_s=float(os.getenv("LLM_CACHE_TTL_S", "3600")),
+        similarity_threshold=float(os.getenv("LLM_CACHE_SIMILARITY_THRESHOLD", "0.95")),
+        embedder=embedder,
+    )
@@ -0,0 +1,275 @@
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import shutil
+import uuid
+from collections import OrderedDict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+from src.db.utils.chunks import iter_chunk_filter_attributes
+from src.services.metrics.instruments import CACHE_REQUESTS
+from src.services.vector_index.index import MmapVectorIndex
+
+logger = logging.getLogger(__name__)
+
+EPOCH = date(1970, 1, 1)
+META_FILE = "filters.json"
+BITMAPS_FILE = "bitmaps.npy"
+DAYS_FILE = "row_days.npy"
+LOCK_FILE = "build.lock"
+
+_MASK_CACHE_HIT = CACHE_REQUESTS.labels("filter_mask", "hit")
+_MASK_CACHE_MISS = CACHE_REQUESTS.labels("filter_mask", "miss")
+
+
+def month_key(value: Union[date, datetime]) -> str:
+    return f"{value.year:04d}-{value.month:02d}"
+
+
+def _stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def _days(value: Union[date, datetime]) -> int:
+    if isinstance(value, datetime):
+        value = value.date()
+    return (value - EPOCH).days
+
+
+class FilterIndex:
+    """Precomputed per-category and per-month row bitmaps over the vector index.
+
+    Bit i of a bitmap is set when vector-index row i belongs to a paper in that
+    category (or published in that month). Bitmaps are packed 8 rows per byte
+    and memory-mapped. A filter becomes a boolean row mask by OR-ing the
+    requested categories and months and AND-ing the two; months that are only
+    partly inside the date range are refined with a per-row day array. The
+    mask is handed to the vector scan, so filtering happens inside the top-k
+    search rather than before or after it.
+
+    Each build writes its arrays to a new directory and then swaps
+    ``filters.json`` to point at it, so processes that still have the previous
+    arrays mapped never see them change. Builds run where the vector index is
+    written (see ``rebuild_filters``), never inside a search request.
+    """
+
+    def __init__(self, path: Union[str, Path], mask_cache_size: int = 256):
+        self.path = Path(path)
+        # Taken before reading, so a swap during the read shows up as a change.
+        self._stamp = _stamp(self.path / META_FILE)
+        with open(self.path / META_FILE, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        # Indexes built before versioned directories keep their arrays next to filters.json.
+        files_path = self.path / self.meta.get("files_dir", "")
+        self.keys: Dict[str, int] = {key: i for i, key in enumerate(self.meta["keys"])}
+        self.bitmaps = np.load(files_path / BITMAPS_FILE, mmap_mode="r")
+        self.row_days = np.load(files_path / DAYS_FILE, mmap_mode="r")
+        self._mask_cache: "OrderedDict[Tuple, np.ndarray]" = OrderedDict()
+        self._mask_cache_size = mask_cache_size
+
+    @property
+    def count(self) -> int:
+        return self.meta["count"]
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> Optional["FilterIndex"]:
+        if not (Path(path) / META_FILE).exists():
+            return None
+        return cls(path)
+
+    def changed(self) -> bool:
+        """True when a newer build has replaced ``filters.json`` since this one was opened."""
+        return _stamp(self.path / META_FILE) != self._stamp
+
+    def matches(self, snapshot: dict) -> bool:
+        """True when the bitmaps describe exactly the rows of a vector index snapshot."""
+        return (self.meta["count"] == snapshot["meta"]["count"]
+                and self.meta["data_dir"] == snapshot["meta"]["data_dir"])
+
+    def covers(self, snapshot: dict) -> bool:
+        """True when every bitmap row is still the same row of the snapshot.
+
+        Appends keep row positions, so bitmaps of the same data directory stay
+        valid for their rows; only rows appended after the build are unknown.
+        A compaction moves rows, so the bitmaps of an older data directory do not.
+        """
+        return (self.meta["count"] <= snapshot["meta"]["count"]
+                and self.meta["data_dir"] == snapshot["meta"]["data_dir"])
+
+    def is_stale(self, vector_index: MmapVectorIndex) -> bool:
+        """True when the bitmaps no longer describe the vector index's current rows."""
+        return not self.matches(vector_index.snapshot())
+
+    @staticmethod
+    def build_lock(path: Union[str, Path]):
+        """Block until this process is the only one building the filter index at ``path``.
+
+        Returns:
+            Open lock file; closing it releases the lock
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        lock = open(path / LOCK_FILE, "a")
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return lock
+
+    @staticmethod
+    def build(path: Union[str, Path], vector_index: MmapVectorIndex,
+              attributes: Iterable[Tuple[int, List[str], datetime]]) -> "FilterIndex":
+        """Build bitmaps aligned with the vector index rows.
+
+        Args:
+            path: Directory to write the filter index to
+            vector_index: Index whose rows the bitmaps describe
+            attributes: (chunk id, paper categories, paper published_date) per chunk
+
+        Returns:
+            The freshly written FilterIndex
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        # One snapshot, so the ids and the data_dir recorded with them belong together.
+        snapshot = vector_index.snapshot()
+        ids = np.asarray(snapshot["ids"])
+        data_dir = snapshot["meta"]["data_dir"]
+        order = np.argsort(ids, kind="stable")
+        sorted_ids = ids[order]
+
+        n_rows = len(ids)
+        row_days = np.full(n_rows, np.iinfo(np.int32).min, dtype=np.int32)
+        rows_by_key: Dict[str, List[int]] = {}
+        for chunk_id, categories, published in attributes:
+            position = np.searchsorted(sorted_ids, chunk_id)
+            if position >= n_rows or sorted_ids[position] != chunk_id:
+                continue
+            row = int(order[position])
+            row_days[row] = _days(published)
+            for key in [f"cat:{category}" for category in categories] + [f"month:{month_key(published)}"]:
+                rows_by_key.setdefault(key, []).append(row)
+
+        keys = sorted(rows_by_key)
+        bitmaps = np.zeros((len(keys), (n_rows + 7) // 8), dtype=np.uint8)
+        for i, key in enumerate(keys):
+            bits = np.zeros(n_rows, dtype=bool)
+            bits[rows_by_key[key]] = True
+            bitmaps[i] = np.packbits(bits)
+
+        files_dir = f"filters-{uuid.uuid4().hex[:12]}"
+        (path / files_dir).mkdir()
+        np.save(path / files_dir / BITMAPS_FILE, bitmaps)
+        np.save(path / files_dir / DAYS_FILE, row_days)
+        tmp = path / f"{META_FILE}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"keys": keys, "count": n_rows, "data_dir": data_dir, "files_dir": files_dir}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path / META_FILE)
+        # Earlier builds stay readable where they are mapped: unlinking does not unmap.
+        for old in path.iterdir():
+            if old.is_dir() and old.name.startswith("filters-") and old.name != files_dir:
+                shutil.rmtree(old, ignore_errors=True)
+        for name in (BITMAPS_FILE, DAYS_FILE):
+            (path / name).unlink(missing_ok=True)
+        return FilterIndex(path)
+
+    def _union(self, keys: List[str]) -> np.ndarray:
+        """OR of the packed bitmaps for the given keys (unknown keys match nothing)."""
+        packed = np.zeros(self.bitmaps.shape[1], dtype=np.uint8)
+        for key in keys:
+            index = self.keys.get(key)
+            if index is not None:
+                packed |= self.bitmaps[index]
+        return packed
+
+    def mask(self, categories: Optional[List[str]] = None, date_from: Optional[date] = None,
+             date_to: Optional[date] = None, rows: Optional[int] = None) -> Optional[np.ndarray]:
+        """Boolean row mask for a filter, or None when the filter is empty.
+
+        Args:
+            categories: Match papers in any of these arXiv categories
+            date_from: Inclusive lower bound on published date
+            date_to: Inclusive upper bound on published date
+            rows: Length of the mask; rows past the bitmaps (appended since the
+                build) match nothing. Defaults to the rows the bitmaps describe.
+
+        Returns:
+            bool array with one entry per vector-index row
+        """
+        if not categories and date_from is None and date_to is None:
+            return None
+        mask = self._mask(categories, date_from, date_to)
+        if rows is not None and rows > len(mask):
+            mask = np.concatenate([mask, np.zeros(rows - len(mask), dtype=bool)])
+        return mask
+
+    def _mask(self, categories: Optional[List[str]], date_from: Optional[date],
+              date_to: Optional[date]) -> np.ndarray:
+        cache_key = (tuple(sorted(categories or [])), date_from, date_to)
+        cached = self._mask_cache.get(cache_key)
+        if cached is not None:
+            self._mask_cache.move_to_end(cache_key)
+            _MASK_CACHE_HIT.inc()
+            return cached
+        _MASK_CACHE_MISS.inc()
+
+        packed = np.full(self.bitmaps.shape[1], 0xFF, dtype=np.uint8)
+        if categories:
+            packed &= self._union([f"cat:{category}" for category in categories])
+        partial_months = False
+        if date_from is not None or date_to is not None:
+            months = [key[len("month:"):] for key in self.keys if key.startswith("month:")]
+            low = month_key(date_from) if date_from else ""
+            high = month_key(date_to) if date_to else "9999-99"
+            packed &= self._union([f"month:{month}" for month in months if low <= month <= high])
+            partial_months = True
+
+        mask = np.unpackbits(packed, count=self.count).astype(bool)
+        if partial_months:
+            # Month bitmaps over-select at the edges; trim by exact day where needed.
+            rows = np.flatnonzero(mask)
+            days = self.row_days[rows]
+            keep = np.ones(len(rows), dtype=bool)
+            if date_from is not None:
+                keep &= days >= _days(date_from)
+            if date_to is not None:
+                keep &= days <= _days(date_to)
+            mask[rows[~keep]] = False
+
+        self._mask_cache[cache_key] = mask
+        if len(self._mask_cache) > self._mask_cache_size:
+            self._mask_cache.popitem(last=False)
+        return mask
+
+
+async def rebuild_filters(path: Union[str, Path], vector_index: MmapVectorIndex) -> FilterIndex:
+    """Bring the bitmaps at ``path`` in line with the vector index's current rows.
+
+    Reads the attributes of every chunk from Postgres, so it runs after the
+    index is written (the ingestion DAG's publish task) or in the background,
+    not per request. A file lock makes concurrent callers wait for one build
+    and then reuse it.
+
+    Returns:
+        FilterIndex matching the rows the vector index had when it was built
+    """
+    lock = await asyncio.to_thread(FilterIndex.build_lock, path)
+    try:
+        built = FilterIndex.open(path)
+        if built is not None and built.matches(vector_index.snapshot()):
+            return built
+        attributes = [row async for row in iter_chunk_filter_attributes()]
+        built = await asyncio.to_thread(FilterIndex.build, path, vector_index, attributes)
+        logger.info("Rebuilt search filter bitmaps for %d rows", built.count)
+        return built
+    finally:
+        lock.close()
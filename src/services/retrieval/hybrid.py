@@ -0,0 +1,69 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.services.lexical_index.bm25 import BM25Index
+from src.services.vector_index.index import MmapVectorIndex
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = 60,
+                           weights: Optional[Sequence[float]] = None) -> List[Tuple[int, float]]:
+    """Fuse ranked id lists with RRF: score(d) = sum_i w_i / (k + rank_i(d)).
+
+    RRF only looks at ranks, so BM25 and cosine scores never need to be put on
+    the same scale.
+
+    Args:
+        rankings: Each a list of ids, best first
+        k: Rank damping constant (60 in the original paper)
+        weights: Optional per-ranking weight
+
+    Returns:
+        (id, fused score) pairs, best first
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[int, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, doc_id in enumerate(ranking, start=1):
+            if doc_id < 0:
+                continue
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+class HybridRanker:
+    """Runs dense and BM25 retrieval for a query and fuses the two rankings."""
+
+    def __init__(self, vector_index: Optional[MmapVectorIndex], bm25_index: Optional[BM25Index],
+                 rrf_k: int = 60, dense_weight: float = 1.0, lexical_weight: float = 1.0,
+                 candidates: int = 100):
+        self.vector_index = vector_index
+        self.bm25_index = bm25_index
+        self.rrf_k = rrf_k
+        self.dense_weight = dense_weight
+        self.lexical_weight = lexical_weight
+        self.candidates = candidates
+
+    def search(self, query: str, query_vector: Optional[np.ndarray], k: int = 10,
+               approximate: bool = False) -> List[Tuple[int, float]]:
+        """Top-k chunk ids for a query by reciprocal rank fusion.
+
+        Args:
+            query: Query text, for BM25
+            query_vector: Query embedding, for the dense index (skipped if None)
+            k: Number of fused results
+            approximate: Use the dense index's IVF mode
+
+        Returns:
+            (chunk id, fused score) pairs, best first
+        """
+        rankings, weights = [], []
+        if self.vector_index is not None and query_vector is not None:
+            ids, _ = self.vector_index.search(query_vector, k=self.candidates, approximate=approximate)
+            rankings.append(ids[0].tolist())
+            weights.append(self.dense_weight)
+        if self.bm25_index is not None:
+            ids, _ = self.bm25_index.search(query, k=self.candidates)
+            rankings.append(ids.tolist())
+            weights.append(self.lexical_weight)
+        return reciprocal_rank_fusion(rankings, k=self.rrf_k, weights=weights)[:k]
@@ -0,0 +1,180 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from src.db.utils.chunks import fetch_chunks_with_papers
+from src.exceptions import IndexException
+from src.schemas.search.models import ChunkHit, PaperHit, SearchRequest, SearchResponse, SearchResult
+from src.services.coalescing.flight import SingleFlight
+from src.services.embeddings.client import EmbeddingModel
+from src.services.lexical_index.bm25 import BM25Index
+from src.services.rag_context.assembler import AssembledContext, ContextAssembler, ContextCandidate
+from src.services.retrieval.filters import FilterIndex, rebuild_filters
+from src.services.retrieval.hybrid import reciprocal_rank_fusion
+from src.services.vector_index.index import MmapVectorIndex
+
+logger = logging.getLogger(__name__)
+
+
+class SearchService:
+    """Batched, filterable hybrid search over the chunk indexes.
+
+    All queries of a request are embedded in one call and scored against the
+    vector index in one batched scan. Category/date filters are turned into a
+    row mask from the precomputed FilterIndex bitmaps and applied inside the
+    scan; BM25 receives the same filter as a sorted id array. Mask, scan and
+    BM25 id array all come from one vector index snapshot. With a
+    ``single_flight``, concurrent identical requests share one search.
+    """
+
+    def __init__(self, vector_index: Optional[MmapVectorIndex], bm25_index: Optional[BM25Index],
+                 filter_index: Optional[FilterIndex], embedder: Optional[EmbeddingModel],
+                 candidates: int = 100, rrf_k: int = 60, single_flight: Optional[SingleFlight] = None,
+                 filter_path: Optional[Union[str, Path]] = None):
+        self.vector_index = vector_index
+        self.bm25_index = bm25_index
+        self.filter_index = filter_index
+        self.embedder = embedder
+        self.candidates = candidates
+        self.rrf_k = rrf_k
+        self.single_flight = single_flight
+        # Where publish writes the filter bitmaps; newer builds are picked up from there
+        self.filter_path = filter_path
+
+    def refresh_filters(self) -> None:
+        """Pick up filter bitmaps rebuilt since they were opened (publish rebuilds them).
+
+        Only reopens ``filters.json``; bitmaps are never built here.
+        """
+        if self.filter_path is not None and (self.filter_index is None or self.filter_index.changed()):
+            self.filter_index = FilterIndex.open(self.filter_path)
+
+    def filters_outdated(self) -> bool:
+        """True when no filter bitmaps cover the vector index's current data directory."""
+        if self.vector_index is None or self.filter_path is None:
+            return False
+        self.refresh_filters()
+        return self.filter_index is None or not self.filter_index.covers(self.vector_index.snapshot())
+
+    async def rebuild_filters(self) -> None:
+        """Build the bitmaps when publish has not, e.g. for an index published before they existed.
+
+        Reads every chunk from Postgres, so it is started as a background task, never awaited by a request.
+        """
+        try:
+            self.filter_index = await rebuild_filters(self.filter_path, self.vector_index)
+        except Exception:
+            logger.exception("Rebuilding the search filter bitmaps at %s failed", self.filter_path)
+
+    def _row_mask(self, request: SearchRequest, snapshot: dict) -> Optional[np.ndarray]:
+        if not (request.categories or request.published_from or request.published_to):
+            return None
+        # Bitmaps are by row position: they must be of the snapshot's data directory.
+        self.refresh_filters()
+        count = snapshot["meta"]["count"]
+        if self.filter_index is None:
+            # No bitmaps yet: nothing is known to match.
+            return np.zeros(count, dtype=bool)
+        if not self.filter_index.covers(snapshot):
+            raise IndexException("Search filters do not match the vector index rows; retry once they are rebuilt.")
+        # Rows appended since the last build match nothing until publish rebuilds the bitmaps.
+        return self.filter_index.mask(request.categories, request.published_from, request.published_to, rows=count)
+
+    async def search(self, request: SearchRequest) -> SearchResponse:
+        if self.single_flight is not None:
+            response, _ = await self.single_flight.do(request.model_dump_json(), lambda: self._search(request))
+            return response
+        return await self._search(request)
+
+    async def _search(self, request: SearchRequest, query_vectors: Optional[np.ndarray] = None) -> SearchResponse:
+        queries = request.queries
+        rankings: List[List[List[int]]] = [[] for _ in queries]
+        scores_by_id: List[dict] = [{} for _ in queries]
+
+        # Appends and compactions landing while the queries are embedded must not shift the mask's rows.
+        snapshot = self.vector_index.snapshot() if self.vector_index is not None else None
+        mask = self._row_mask(request, snapshot) if snapshot is not None else None
+        if snapshot is not None and self.embedder is not None and snapshot["meta"]["count"]:
+            if query_vectors is None:
+                query_vectors = await self.embedder.embed_queries(queries)
+            ids, scores = await asyncio.to_thread(
+                self.vector_index.search, query_vectors, self.candidates if request.hybrid else request.k,
+                mask, request.approximate, snapshot=snapshot,
+            )
+            for i in range(len(queries)):
+                rankings[i].append([int(x) for x in ids[i] if x >= 0])
+                scores_by_id[i].update({int(x): float(s) for x, s in zip(ids[i], scores[i]) if x >= 0})
+
+        if request.hybrid and self.bm25_index is not None:
+            allowed_ids = None
+            if mask is not None:
+                allowed_ids = np.sort(np.asarray(snapshot["ids"])[mask])
+            elif request.categories or request.published_from or request.published_to:
+                # Filters are resolved through the vector-index bitmaps; without them nothing matches.
+                allowed_ids = np.empty(0, dtype=np.int64)
+            for i, query in enumerate(queries):
+                ids, scores = await asyncio.to_thread(self.bm25_index.search, query, self.candidates, allowed_ids)
+                rankings[i].append(ids.tolist())
+                for x, s in zip(ids.tolist(), scores.tolist()):
+                    scores_by_id[i].setdefault(x, s)
+
+        fused = []
+        for ranking in rankings:
+            if len(ranking) > 1:
+                fused.append(reciprocal_rank_fusion(ranking, k=self.rrf_k)[:request.k])
+            else:
+                fused.append([(doc_id, None) for doc_id in (ranking[0] if ranking else [])][:request.k])
+
+        rows = await fetch_chunks_with_papers(chunk_id for hits in fused for chunk_id, _ in hits)
+        results = []
+        for i, (query, hits) in enumerate(zip(queries, fused)):
+            chunk_hits, papers = [], {}
+            for chunk_id, fused_score in hits:
+                row = rows.get(chunk_id)
+                if row is None:
+                    continue
+                chunk = row.Chunk
+                chunk_hits.append(ChunkHit(
+                    chunk_id=chunk_id,
+                    arxiv_id=chunk.arxiv_id,
+                    section_title=chunk.section_title,
+                    text=chunk.text,
+                    score=fused_score if fused_score is not None else scores_by_id[i].get(chunk_id, 0.0),
+                ))
+                papers.setdefault(chunk.arxiv_id, PaperHit(
+                    arxiv_id=chunk.arxiv_id,
+                    title=row.title,
+                    categories=row.categories,
+                    published_date=row.published_date,
+                    pdf_url=row.pdf_url,
+                ))
+            results.append(SearchResult(query=query, chunks=chunk_hits, papers=list(papers.values())))
+        return SearchResponse(results=results)
+
+    async def assemble_context(self, request: SearchRequest, assembler: ContextAssembler,
+                               budget: Optional[int] = None) -> Tuple[AssembledContext, List[ChunkHit]]:
+        """Retrieve ``request.k`` candidates for the first query and pack them into a prompt context.
+
+        The query is embedded once, for both the search and the MMR rerank, and
+        the candidates' vectors are read back from the vector index instead of
+        being embedded again.
+
+        Returns:
+            (the assembled context, the hits it was chosen from)
+        """
+        request = request.model_copy(update={"queries": request.queries[:1]})
+        query_vectors = None
+        if self.vector_index is not None and self.embedder is not None and self.vector_index.count:
+            query_vectors = await self.embedder.embed_queries(request.queries)
+        hits = (await self._search(request, query_vectors)).results[0].chunks
+        if query_vectors is None or not hits:
+            return AssembledContext("", [], 0, assembler.budget if budget is None else budget), hits
+        ids = np.fromiter((hit.chunk_id for hit in hits), dtype=np.int64, count=len(hits))
+        vectors, found = self.vector_index.vectors_for(ids)
+        candidates = [ContextCandidate(hit.chunk_id, hit.arxiv_id, hit.section_title, hit.text, hit.score)
+                      for hit in hits]
+        assembled = await asyncio.to_thread(assembler.assemble, query_vectors[0], candidates, vectors, budget, found)
+        return assembled, hits
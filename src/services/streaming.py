@@ -0,0 +1,60 @@
+import json
+import logging
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def stream_sse(
+    tokens: AsyncIterator[str],
+    started_at: float,
+    on_complete: Optional[Callable[[str, Dict[str, float]], Awaitable[None]]] = None,
+) -> AsyncIterator[str]:
+    """Relay model tokens as SSE ``token`` events, then a final ``done`` event.
+
+    Time-to-first-token and total latency are measured from ``started_at``
+    (a ``time.perf_counter()`` taken when the request arrived) and sent in the
+    ``done`` event. ``on_complete`` receives the full response text and the
+    timings once the stream has finished, e.g. to persist chat history.
+
+    Args:
+        tokens: Async iterator of text deltas from the model
+        started_at: perf_counter timestamp of request arrival
+        on_complete: Optional coroutine called with (full text, timings)
+
+    Yields:
+        SSE frames
+    """
+    parts = []
+    ttft_ms = None
+    try:
+        async for token in tokens:
+            if not token:
+                continue
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - started_at) * 1000
+            parts.append(token)
+            yield sse_event("token", {"token": token})
+    except Exception as e:
+        logger.exception("Streaming generation failed")
+        yield sse_event("error", {"detail": str(e)})
+        return
+
+    timings = {
+        "ttft_ms": round(ttft_ms, 2) if ttft_ms is not None else None,
+        "total_ms": round((time.perf_counter() - started_at) * 1000, 2),
+        "tokens": len(parts),
+    }
+    logger.info("Stream finished: ttft=%sms total=%sms chunks=%d", timings["ttft_ms"], timings["total_ms"], len(parts))
+    if on_complete is not None:
+        try:
+            await on_complete("".join(parts), timings)
+        except Exception:
+            logger.exception("Post-stream hook failed")
+    yield sse_event("done", timings)
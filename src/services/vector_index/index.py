@@ -0,0 +1,428 @@
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+from src.exceptions import IndexException
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.bin"
+IDS_FILE = "ids.bin"
+TOMBSTONES_FILE = "tombstones.bin"
+ASSIGN_FILE = "ivf_assign.bin"
+CENTROIDS_FILE = "ivf_centroids.npy"
+ORDER_FILE = "ivf_order.npy"
+OFFSETS_FILE = "ivf_offsets.npy"
+META_FILE = "meta.json"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _merge_topk(best_scores: np.ndarray, best_rows: np.ndarray, scores: np.ndarray,
+                rows: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Merge a block's (queries x rows) scores into the running per-query top-k."""
+    all_scores = np.concatenate([best_scores, scores], axis=1)
+    all_rows = np.concatenate([best_rows, np.broadcast_to(rows, scores.shape)], axis=1)
+    if all_scores.shape[1] > k:
+        keep = np.argpartition(-all_scores, k - 1, axis=1)[:, :k]
+        all_scores = np.take_along_axis(all_scores, keep, axis=1)
+        all_rows = np.take_along_axis(all_rows, keep, axis=1)
+    return all_scores, all_rows
+
+
+class MmapVectorIndex:
+    """Dense vector index stored as flat, memory-mapped files.
+
+    Layout of the index directory:
+
+    - ``vectors.bin``: row-major float32/float16 unit vectors (cosine == dot product)
+    - ``ids.bin``: int64 external id (chunk id) per row
+    - ``tombstones.bin``: uint8 per row, 1 when the row was deleted
+    - ``ivf_*``: optional inverted-file structures for approximate search
+    - ``meta.json``: dimension, dtype, row count and the current data directory
+
+    The data files live in a ``data-NNNNNN`` directory named by ``meta.json``.
+    Files are opened read-only with ``np.memmap``, so every process that opens
+    the same index shares one copy of the data through the OS page cache.
+    A single writer appends rows and rewrites ``meta.json`` atomically; readers
+    notice the change on their next search and remap. Compaction writes a new
+    data directory and swaps ``meta.json`` to it, so readers never see a
+    half-written file.
+    """
+
+    # Below this fraction of allowed rows, a filtered search gathers the allowed
+    # rows rather than scanning the whole file with a mask.
+    selective_filter_ratio = 0.25
+
+    def __init__(self, path: Union[str, Path], dim: Optional[int] = None, dtype: str = "float32"):
+        self.path = Path(path)
+        self.meta_path = self.path / META_FILE
+        if self.meta_path.exists():
+            self._load_meta()
+        else:
+            if dim is None:
+                raise IndexException(f"No vector index at {self.path}; pass dim to create one.")
+            if dtype not in ("float32", "float16"):
+                raise IndexException(f"Unsupported dtype {dtype}; use float32 or float16.")
+            self.meta = {"dim": dim, "dtype": dtype, "count": 0, "data_dir": "data-000000",
+                         "ivf_lists": 0, "ivf_indexed_count": 0}
+            self.data_path.mkdir(parents=True, exist_ok=True)
+            for name in (VECTORS_FILE, IDS_FILE, TOMBSTONES_FILE):
+                (self.data_path / name).touch()
+            self._write_meta()
+        self._meta_stamp = None
+        self._mapped = None
+        self.refresh()
+
+    @classmethod
+    def open(cls, path: Union[str, Path]) -> Optional["MmapVectorIndex"]:
+        """Open an existing index, or return None if the directory has none."""
+        if not (Path(path) / META_FILE).exists():
+            return None
+        return cls(path)
+
+    # ---- metadata ---------------------------------------------------------------
+    @property
+    def dim(self) -> int:
+        return self.meta["dim"]
+
+    @property
+    def dtype(self) -> np.dtype:
+        return np.dtype(self.meta["dtype"])
+
+    @property
+    def count(self) -> int:
+        return self.meta["count"]
+
+    @property
+    def data_path(self) -> Path:
+        return self.path / self.meta["data_dir"]
+
+    def row_ids(self) -> np.ndarray:
+        """External id of every row, in row order (the current mapping, not a copy)."""
+        return self.snapshot()["ids"]
+
+    def snapshot(self) -> dict:
+        """The rows as of now: the mapped arrays plus the ``meta`` they were mapped with.
+
+        A snapshot never changes shape, and its mappings keep the files of a
+        compacted data directory readable, so a row mask computed from it and a
+        later ``search(..., snapshot=...)`` see the same rows, whatever was
+        appended or compacted in between. Tombstones are still shared.
+        """
+        self.refresh()
+        return self._mapped
+
+    def _load_meta(self) -> None:
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+    def _write_meta(self) -> None:
+        tmp_path = self.meta_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.meta_path)
+
+    # ---- mapping ----------------------------------------------------------------
+    def _memmap(self, name: str, dtype, shape, mode: str = "r"):
+        if shape[0] == 0:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self.data_path / name, dtype=dtype, mode=mode, shape=shape)
+
+    def refresh(self) -> None:
+        """Remap the files if another process appended, deleted or compacted."""
+        # meta.json is always replaced, never edited, so a new inode means new state.
+        stat = self.meta_path.stat()
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        if stamp == self._meta_stamp and self._mapped is not None:
+            return
+        self._load_meta()
+        count, dim = self.meta["count"], self.meta["dim"]
+        mapped = {
+            "meta": dict(self.meta),
+            "vectors": self._memmap(VECTORS_FILE, self.dtype, (count, dim)),
+            "ids": self._memmap(IDS_FILE, np.int64, (count,)),
+            "tombstones": self._memmap(TOMBSTONES_FILE, np.uint8, (count,)),
+        }
+        if self.meta["ivf_lists"]:
+            mapped["centroids"] = np.load(self.data_path / CENTROIDS_FILE)
+            mapped["order"] = np.load(self.data_path / ORDER_FILE, mmap_mode="r")
+            mapped["offsets"] = np.load(self.data_path / OFFSETS_FILE)
+            mapped["assign"] = self._memmap(ASSIGN_FILE, np.int32, (count,))
+        self._mapped = mapped
+        self._meta_stamp = stamp
+
+    # ---- writes -----------------------------------------------------------------
+    def add(self, ids: np.ndarray, vectors: np.ndarray) -> None:
+        """Append vectors with their external ids. Vectors are L2-normalised.
+
+        Args:
+            ids: int64 array of shape (n,)
+            vectors: float array of shape (n, dim)
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            raise IndexException(f"Expected vectors of shape (n, {self.dim}), got {vectors.shape}.")
+        if len(ids) != len(vectors):
+            raise IndexException("ids and vectors must have the same length.")
+        vectors = _normalize(vectors)
+
+        self._append(VECTORS_FILE, vectors.astype(self.dtype))
+        self._append(IDS_FILE, ids)
+        self._append(TOMBSTONES_FILE, np.zeros(len(ids), dtype=np.uint8))
+        if self.meta["ivf_lists"]:
+            self._append(ASSIGN_FILE, self._assign(vectors, self._mapped["centroids"]))
+        self.meta["count"] += len(ids)
+        self._write_meta()
+        self.refresh()
+
+    def _append(self, name: str, array: np.ndarray) -> None:
+        with open(self.data_path / name, "ab") as f:
+            f.write(np.ascontiguousarray(array).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+    def delete(self, ids: np.ndarray) -> int:
+        """Tombstone every row whose external id is in ``ids``; returns rows deleted."""
+        self.refresh()
+        if self.count == 0:
+            return 0
+        rows = np.flatnonzero(np.isin(self._mapped["ids"], np.asarray(ids, dtype=np.int64)))
+        if len(rows) == 0:
+            return 0
+        # Tombstones are flipped in place; readers share the mapping and see them at once.
+        tombstones = self._memmap(TOMBSTONES_FILE, np.uint8, (self.count,), mode="r+")
+        tombstones[rows] = 1
+        tombstones.flush()
+        del tombstones
+        return len(rows)
+
+    def deleted_fraction(self) -> float:
+        self.refresh()
+        return float(self._mapped["tombstones"].mean()) if self.count else 0.0
+
+    def compact(self, block_rows: int = 65536) -> None:
+        """Rewrite the index without tombstoned rows into a new data directory."""
+        self.refresh()
+        mapped = self._mapped
+        alive = np.flatnonzero(np.asarray(mapped["tombstones"]) == 0)
+        old_data_path = self.data_path
+        new_dir = f"data-{int(self.meta['data_dir'].split('-')[1]) + 1:06d}"
+        new_path = self.path / new_dir
+        # Left behind by a compaction that failed before swapping meta.json; nothing maps it.
+        shutil.rmtree(new_path, ignore_errors=True)
+        new_path.mkdir()
+
+        try:
+            for name, key in ((VECTORS_FILE, "vectors"), (IDS_FILE, "ids")):
+                with open(new_path / name, "wb") as f:
+                    for start in range(0, len(alive), block_rows):
+                        f.write(np.ascontiguousarray(mapped[key][alive[start:start + block_rows]]).tobytes())
+            np.zeros(len(alive), dtype=np.uint8).tofile(new_path / TOMBSTONES_FILE)
+            if self.meta["ivf_lists"]:
+                assign = np.asarray(mapped["assign"][alive])
+                assign.tofile(new_path / ASSIGN_FILE)
+                np.save(new_path / CENTROIDS_FILE, mapped["centroids"])
+                self._write_lists(new_path, assign)
+        except BaseException:
+            shutil.rmtree(new_path, ignore_errors=True)
+            raise
+
+        if self.meta["ivf_lists"]:
+            self.meta["ivf_indexed_count"] = len(alive)
+        self.meta["count"] = len(alive)
+        self.meta["data_dir"] = new_dir
+        self._write_meta()
+        self.refresh()
+        # Open mappings in other processes keep the unlinked files alive until they remap.
+        shutil.rmtree(old_data_path, ignore_errors=True)
+        logger.info("Compacted vector index at %s to %d rows", self.path, len(alive))
+
+    # ---- approximate (IVF) ------------------------------------------------------
+    def _assign(self, vectors: np.ndarray, centroids: np.ndarray, block_rows: int = 65536) -> np.ndarray:
+        assign = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), block_rows):
+            block = np.asarray(vectors[start:start + block_rows], dtype=np.float32)
+            assign[start:start + block_rows] = np.argmax(block @ centroids.T, axis=1)
+        return assign
+
+    def train_ivf(self, n_lists: Optional[int] = None, sample_size: int = 100_000,
+                  iterations: int = 10, seed: int = 0) -> None:
+        """Train IVF centroids with spherical k-means and bucket every row.
+
+        Args:
+            n_lists: Number of inverted lists; defaults to 4 * sqrt(rows)
+            sample_size: Rows sampled for training
+            iterations: k-means iterations
+            seed: RNG seed for the sample and initial centroids
+        """
+        self.refresh()
+        if self.count == 0:
+            raise IndexException("Cannot train IVF on an empty index.")
+        n_lists = n_lists or max(1, int(4 * np.sqrt(self.count)))
+        rng = np.random.default_rng(seed)
+        sample_rows = np.sort(rng.choice(self.count, size=min(sample_size, self.count), replace=False))
+        sample = np.asarray(self._mapped["vectors"][sample_rows], dtype=np.float32)
+        n_lists = min(n_lists, len(sample))
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = np.bincount(labels, minlength=n_lists) == 0
+            sums[empty] = centroids[empty]
+            centroids = _normalize(sums)
+
+        np.save(self.data_path / CENTROIDS_FILE, centroids.astype(np.float32))
+        assign = self._assign(self._mapped["vectors"], centroids)
+        assign.tofile(self.data_path / ASSIGN_FILE)
+        self._write_lists(self.data_path, assign)
+        self.meta["ivf_lists"] = n_lists
+        self.meta["ivf_indexed_count"] = self.count
+        self._write_meta()
+        self.refresh()
+
+    def _write_lists(self, data_path: Path, assign: np.ndarray) -> None:
+        """Group rows by list: ``order[offsets[l]:offsets[l + 1]]`` are the rows of list l.
+
+        Rows appended later are scanned through ``ivf_assign.bin`` until the
+        next compaction or training regroups them.
+        """
+        n_lists = len(np.load(data_path / CENTROIDS_FILE))
+        order = np.argsort(assign, kind="stable").astype(np.int64)
+        offsets = np.zeros(n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=n_lists), out=offsets[1:])
+        np.save(data_path / ORDER_FILE, order)
+        np.save(data_path / OFFSETS_FILE, offsets)
+
+    def _ivf_candidates(self, mapped: dict, queries: np.ndarray, n_probe: int) -> np.ndarray:
+        """Rows in the probed lists of the queries, plus rows added since the lists were built."""
+        probes = np.unique(np.argsort(-(queries @ mapped["centroids"].T), axis=1)[:, :n_probe])
+        order, offsets = mapped["order"], mapped["offsets"]
+        parts = [np.asarray(order[offsets[p]:offsets[p + 1]]) for p in probes]
+        indexed, count = mapped["meta"]["ivf_indexed_count"], mapped["meta"]["count"]
+        if count > indexed:
+            tail_assign = np.asarray(mapped["assign"][indexed:])
+            parts.append(indexed + np.flatnonzero(np.isin(tail_assign, probes)))
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int64)
+
+    def vectors_for(self, ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Stored unit vectors of the given external ids, e.g. the chunks a search returned.
+
+        Returns:
+            (vectors, found): float32 array of shape (len(ids), dim) with zero rows
+            for ids that are missing or deleted, and the bool mask of found ids
+        """
+        self.refresh()
+        ids = np.asarray(ids, dtype=np.int64)
+        vectors = np.zeros((len(ids), self.dim), dtype=np.float32)
+        if self.count == 0 or len(ids) == 0:
+            return vectors, np.zeros(len(ids), dtype=bool)
+        if "sorted_ids" not in self._mapped:
+            # Rows sorted by id, built on first use after each remap. Deletes flip
+            # tombstones in place without a remap, so they are checked per lookup.
+            order = np.argsort(self._mapped["ids"], kind="stable")
+            self._mapped["id_order"], self._mapped["sorted_ids"] = order, np.asarray(self._mapped["ids"][order])
+        order, sorted_ids = self._mapped["id_order"], self._mapped["sorted_ids"]
+        # Last row of each id: an id added again after a delete resolves to the new row.
+        positions = np.maximum(np.searchsorted(sorted_ids, ids, side="right") - 1, 0)
+        rows = order[positions]
+        found = (sorted_ids[positions] == ids) & (self._mapped["tombstones"][rows] == 0)
+        vectors[found] = self._mapped["vectors"][rows[found]]
+        return vectors, found
+
+    # ---- search -----------------------------------------------------------------
+    def search(self, queries: np.ndarray, k: int = 10, allowed: Optional[np.ndarray] = None,
+               approximate: bool = False, n_probe: int = 16, block_rows: int = 65536,
+               snapshot: Optional[dict] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k cosine search for a batch of queries.
+
+        Exact mode scans the whole file in blocks with one matrix product per
+        block. Approximate mode only scores rows in the ``n_probe`` nearest IVF
+        lists. Tombstoned rows, and rows where ``allowed`` is False, are masked
+        inside the scan, so filters never cost recall.
+
+        Args:
+            queries: float array of shape (m, dim) or (dim,)
+            k: Number of results per query
+            allowed: Optional bool array over the searched rows (one entry per row)
+            approximate: Use the IVF lists (requires train_ivf)
+            n_probe: Number of IVF lists to scan per query
+            block_rows: Rows scored per matrix product
+            snapshot: Search these rows (see ``snapshot``) instead of the current ones;
+                pass the snapshot ``allowed`` was computed from
+
+        Returns:
+            (ids, scores), each of shape (m, k); missing results have id -1 and score -inf
+        """
+        mapped = self.snapshot() if snapshot is None else snapshot
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if queries.shape[1] != self.dim:
+            raise IndexException(f"Expected queries of dimension {self.dim}, got {queries.shape[1]}.")
+        if allowed is not None and len(allowed) != mapped["meta"]["count"]:
+            raise IndexException(f"allowed has {len(allowed)} entries for {mapped['meta']['count']} rows; "
+                                 "search the snapshot it was computed from.")
+        queries = _normalize(queries)
+
+        if approximate and mapped["meta"]["ivf_lists"]:
+            # Each query scans only its own probed lists.
+            results = []
+            for query in queries:
+                candidates = self._ivf_candidates(mapped, query[None, :], n_probe)
+                if allowed is not None:
+                    candidates = candidates[allowed[candidates]]
+                results.append(self._scan(mapped, query[None, :], k, None, candidates, block_rows))
+            return np.vstack([r[0] for r in results]), np.vstack([r[1] for r in results])
+
+        if allowed is not None and allowed.mean() < self.selective_filter_ratio:
+            # Selective filter: gather just the allowed rows instead of scoring everything.
+            return self._scan(mapped, queries, k, None, np.flatnonzero(allowed), block_rows)
+        return self._scan(mapped, queries, k, allowed, None, block_rows)
+
+    def _scan(self, mapped: dict, queries: np.ndarray, k: int, allowed: Optional[np.ndarray],
+              candidates: Optional[np.ndarray], block_rows: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Score all rows of ``mapped`` (or only ``candidates``) block by block, keeping the top-k."""
+        m = len(queries)
+        best_scores = np.full((m, 0), -np.inf, dtype=np.float32)
+        best_rows = np.full((m, 0), -1, dtype=np.int64)
+
+        total = mapped["meta"]["count"] if candidates is None else len(candidates)
+        for start in range(0, total, block_rows):
+            if candidates is None:
+                rows = np.arange(start, min(start + block_rows, total))
+                block = mapped["vectors"][start:start + block_rows]
+                dead = mapped["tombstones"][start:start + block_rows] != 0
+            else:
+                rows = candidates[start:start + block_rows]
+                block = mapped["vectors"][rows]
+                dead = mapped["tombstones"][rows] != 0
+            if allowed is not None:
+                dead = dead | ~allowed[rows]
+            if dead.all():
+                continue
+            scores = queries @ np.asarray(block, dtype=np.float32).T
+            scores[:, dead] = -np.inf
+            best_scores, best_rows = _merge_topk(best_scores, best_rows, scores, rows, k)
+
+        # Sort the final top-k and pad to exactly k columns.
+        order = np.argsort(-best_scores, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)[:, :k]
+        best_rows = np.take_along_axis(best_rows, order, axis=1)[:, :k]
+        ids = np.where(np.isfinite(best_scores), mapped["ids"][np.maximum(best_rows, 0)], -1)
+        if ids.shape[1] < k:
+            pad = k - ids.shape[1]
+            ids = np.pad(ids, ((0, 0), (0, pad)), constant_values=-1)
+            best_scores = np.pad(best_scores, ((0, 0), (0, pad)), constant_values=-np.inf)
+        return ids, best_scores
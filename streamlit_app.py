@@ -1,5 +1,7 @@
+import json
 import os
-from typing import Dict, List
+import time
+from typing import Dict, Iterator, List, Tuple
 
 import requests
 import streamlit as st
@@ -91,6 +93,32 @@ def call_backend(backend_url: str, query: str, provider_label: str) -> str:
         return "Error: Backend returned non-JSON response."
 
 
+def stream_backend(backend_url: str, query: str, provider_label: str) -> Iterator[Tuple[str, dict]]:
+    """
+    Stream the reply from the backend's SSE endpoint.
+    Yields (event, data) pairs: ("token", {"token": ...}), then ("done", timings) or ("error", {...}).
+    """
+    endpoint = "/chat_ollama/stream" if provider_label == "Ollama (local)" else f"/chat_nvidia/stream?model_name={st.session_state.get('selected_model_id','')}"
+    url = f"{backend_url}{endpoint}"
+    try:
+        with requests.post(url, json={"query": query}, stream=True, timeout=(10, 300)) as r:
+            r.raise_for_status()
+            event = "message"
+            for line in r.iter_lines(decode_unicode=True):
+                if line.startswith("event:"):
+                    event = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    yield event, json.loads(line[len("data:"):].strip())
+    except requests.HTTPError as exc:
+        text = exc.response.text if exc.response is not None else ""
+        code = exc.response.status_code if exc.response is not None else "?"
+        yield "error", {"detail": f"HTTP {code} from {url}\n{text}"}
+    except requests.RequestException as exc:
+        yield "error", {"detail": f"Error contacting API at {url}: {exc}"}
+    except ValueError:
+        yield "error", {"detail": "Error: Backend returned a malformed event stream."}
+
+
 # ---- App ---------------------------------------------------------------------
 def main() -> None:
     st.set_page_config(page_title="ArxivMind Chat", page_icon="🧠")
@@ -122,11 +150,23 @@ def main() -> None:
     with st.chat_message("user"):
         st.markdown(prompt)
 
-    # Call selected backend
+    # Call selected backend, rendering tokens as they arrive
     with st.chat_message("assistant"):
         placeholder = st.empty()
         placeholder.markdown(f"_Querying **{provider_label}** backend..._")
-        assistant_reply = call_backend(backend_url, prompt, provider_label)
+        assistant_reply = ""
+        sent_at = time.perf_counter()
+        first_token_ms = None
+        for event, data in stream_backend(backend_url, prompt, provider_label):
+            if event == "token":
+                if first_token_ms is None:
+                    first_token_ms = (time.perf_counter() - sent_at) * 1000
+                assistant_reply += data.get("token", "")
+                placeholder.markdown(assistant_reply + "▌")
+            elif event == "error":
+                assistant_reply += ("\n\n" if assistant_reply else "") + data.get("detail", "")
+            elif event == "done" and first_token_ms is not None:
+                st.caption(f"Time to first token: {first_token_ms:.0f} ms · total: {(time.perf_counter() - sent_at) * 1000:.0f} ms")
         placeholder.markdown(assistant_reply or "_No response from backend._")
 
     # Record assistant reply
@@ -0,0 +1,81 @@
+import asyncio
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.services.arxiv_downloader.downloader import ArxivPdfDownloader
+
+PDFS = {"/pdf/2401.00001v1": b"%PDF-1.7 first paper", "/pdf/2401.00002v1": b"%PDF-1.7 second paper"}
+
+
+class StubArxiv(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = PDFS.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def arxiv_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubArxiv)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def downloader(tmp_path):
+    return ArxivPdfDownloader(tmp_path, max_concurrency=2, min_request_interval=0, max_retries=1, backoff_base=0)
+
+
+def test_a_paper_that_cannot_be_written_fails_alone(tmp_path, arxiv_url):
+    # A file where the first paper's shard directory belongs: storing it raises FileExistsError
+    blocked = hashlib.sha256(PDFS["/pdf/2401.00001v1"]).hexdigest()
+    (tmp_path / blocked[:2]).write_bytes(b"")
+
+    results = asyncio.run(downloader(tmp_path).download_many(
+        [(paper_id, f"{arxiv_url}/pdf/{paper_id}") for paper_id in ("2401.00001v1", "2401.00002v1", "2401.00003v1")]
+    ))
+
+    assert [result.status for result in results] == ["failed", "downloaded", "failed"]
+    assert results[0].error.startswith("FileExistsError") and results[0].attempts == 1
+    assert results[1].sha256 == hashlib.sha256(PDFS["/pdf/2401.00002v1"]).hexdigest()
+    assert results[2].error == "HTTP 404"
+    assert not list(tmp_path.glob(".*.part"))
+
+
+def test_downloaded_papers_are_not_fetched_again(tmp_path, arxiv_url):
+    items = [("2401.00002v1", f"{arxiv_url}/pdf/2401.00002v1")]
+    assert asyncio.run(downloader(tmp_path).download_many(items))[0].status == "downloaded"
+    # A new downloader reads the manifest written by the first one
+    assert asyncio.run(downloader(tmp_path).download_many(items))[0].status == "cached"
+
+
+def test_papers_are_read_lazily_and_streamed(tmp_path, arxiv_url):
+    pulled = []
+
+    def items():
+        for paper_id in ("2401.00001v1", "2401.00002v1", "2401.00003v1", "2401.00004v1"):
+            pulled.append(paper_id)
+            yield paper_id, f"{arxiv_url}/pdf/{paper_id}"
+
+    async def first():
+        async for index, result in downloader(tmp_path).iter_downloads(items()):
+            return index, result
+
+    index, result = asyncio.run(first())
+    assert result.paper_id == f"2401.0000{index + 1}v1"
+    # Two downloads in flight, the next pair is only read once one finishes
+    assert len(pulled) == 2
@@ -0,0 +1,38 @@
+from src.services.lexical_index.bm25 import BM25Index
+
+
+def ids(index, query):
+    return sorted(index.search(query, k=10)[0].tolist())
+
+
+def test_republished_documents_are_searchable(tmp_path):
+    index = BM25Index(tmp_path, max_segments=8)
+    index.add_documents([1, 2], ["sparse attention", "dense retrieval"])
+    index.delete([1, 2])
+    index.add_documents([1], ["sparse attention revisited"])
+    assert ids(index, "attention") == [1]
+    assert ids(index, "retrieval") == []
+    # Readers opening the index later see the same thing
+    assert ids(BM25Index(tmp_path), "attention") == [1]
+
+
+def test_merge_drops_deleted_documents_only(tmp_path):
+    index = BM25Index(tmp_path, max_segments=1, merge_factor=2)
+    index.add_documents([1, 2], ["sparse attention", "dense retrieval"])
+    index.delete([1])
+    index.add_documents([1, 3], ["attention sinks", "mixture of experts"])
+    assert index.stats()["segments"] == 1
+    assert ids(index, "attention") == [1]
+    assert ids(index, "retrieval experts") == [2, 3]
+    # No remaining segment predates the deletion
+    assert index.stats()["deleted"] == 0
+
+
+def test_segments_whose_documents_were_all_deleted_are_dropped(tmp_path):
+    index = BM25Index(tmp_path)
+    index.add_documents([1], ["sparse attention"])
+    index.add_documents([2], ["dense retrieval"])
+    index.delete([1, 2])
+    index.merge([segment.path.name for segment in index.segments])
+    assert index.stats() == {"segments": 0, "docs": 0, "deleted": 0, "size_bytes": 0}
+    assert ids(index, "attention retrieval") == []
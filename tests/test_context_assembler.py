@@ -0,0 +1,36 @@
+import pytest
+
+from src.services.rag_context.assembler import context_assembler, load_context_tokenizers
+
+
+@pytest.fixture(autouse=True)
+def fresh_assemblers():
+    context_assembler.cache_clear()
+    yield
+    context_assembler.cache_clear()
+
+
+def test_configured_tokenizers_are_loaded_at_startup(tmp_path, monkeypatch):
+    tokenizers = pytest.importorskip("tokenizers")
+    tokenizer = tokenizers.Tokenizer(tokenizers.models.WordLevel({"[UNK]": 0, "attention": 1}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    path = tmp_path / "tokenizer.json"
+    tokenizer.save(str(path))
+    monkeypatch.setenv("CONTEXT_TOKENIZERS", f"deepseek-ai/deepseek-v3.1={path}")
+
+    assert load_context_tokenizers() == ["deepseek-ai/deepseek-v3.1"]
+    counter = context_assembler("deepseek-ai/deepseek-v3.1").counter.counter
+    assert counter.exact and counter._tokenizer is not None
+
+
+def test_unloadable_tokenizer_fails_startup(tmp_path, monkeypatch):
+    monkeypatch.setenv("CONTEXT_TOKENIZERS", f"llama3.2={tmp_path / 'missing.json'}")
+    with pytest.raises(Exception):
+        load_context_tokenizers()
+
+
+def test_models_without_tokenizer_use_whitespace_counts(monkeypatch):
+    monkeypatch.delenv("CONTEXT_TOKENIZERS", raising=False)
+    assert load_context_tokenizers() == []
+    assert not context_assembler("llama3.2").counter.exact
+    assert context_assembler.cache_info().maxsize is not None
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from src.db.utils.history_writer import ChatHistoryWriteError, ChatHistoryWriter
+
+
+class FakeSession:
+    """Stand-in for AsyncSessionLocal(): records inserted batches, or fails every execute."""
+
+    def __init__(self, batches, fail=False):
+        self.batches = batches
+        self.fail = fail
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        if self.fail:
+            raise ConnectionError("database down")
+        self.batches.append(statement)
+
+    async def commit(self):
+        pass
+
+
+def writer(batches, fail=False):
+    return ChatHistoryWriter(batch_size=10, flush_interval_s=0.01, max_retries=1, retry_backoff_s=0,
+                             session_factory=lambda: FakeSession(batches, fail))
+
+
+def test_waiting_submit_returns_once_its_batch_is_written():
+    async def scenario():
+        batches = []
+        history = writer(batches)
+        history.start()
+        await asyncio.gather(*(history.submit(f"q{i}", "a", "m", session_id="batch::job", wait=True)
+                               for i in range(3)))
+        # All three were written, in one batch, before any submit returned
+        assert len(batches) == 1 and history.stats["written"] == 3
+        await history.stop()
+
+    asyncio.run(scenario())
+
+
+def test_waiting_submit_raises_when_its_batch_is_dropped():
+    async def scenario():
+        history = writer([], fail=True)
+        history.start()
+        with pytest.raises(ChatHistoryWriteError):
+            await history.submit("q", "a", "m", wait=True)
+        # The writer keeps running after a dropped batch
+        await history.submit("q", "a", "m")
+        await history.stop()
+        assert history.stats["dropped"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_waiting_submit_needs_a_started_writer():
+    async def scenario():
+        with pytest.raises(RuntimeError):
+            await writer([]).submit("q", "a", "m", wait=True)
+
+    asyncio.run(scenario())
@@ -0,0 +1,50 @@
+import asyncio
+
+import pytest
+
+from src.services.llm_registry.registry import LLMRegistry, UnknownModelError, make_llm_registry
+
+
+def test_models_outside_the_allowlist_are_not_built():
+    registry = LLMRegistry(allowed=[("ollama", "llama3.2")])
+    with pytest.raises(UnknownModelError):
+        registry.get("ollama", "anything-a-client-sends")
+    with pytest.raises(UnknownModelError):
+        registry.get("nvidia", "llama3.2")
+    assert registry.get("ollama", "llama3.2") is registry.ollama("llama3.2")
+    assert len(registry._models) == 1
+    assert registry.stats["rejected"] == 2
+
+
+def test_allowlist_covers_defaults_warm_up_and_hedge_models(monkeypatch):
+    monkeypatch.setenv("AVAILABLE_MODELS", "llama3.2,nvidia:deepseek-ai/deepseek-v3.1")
+    monkeypatch.setenv("NVIDIA_NIM_DEFAULT_MODEL", "moonshotai/kimi-k2-instruct-0905")
+    monkeypatch.setenv("LLM_WARMUP_MODELS", "ollama:qwen3")
+    monkeypatch.setenv("LLM_HEDGE_MODELS", "nvidia:deepseek-ai/deepseek-v3.1=nvidia:meta/llama-3.1-8b-instruct")
+    assert make_llm_registry().allowed == {
+        ("ollama", "llama3.2"),
+        ("ollama", "qwen3"),
+        ("nvidia", "deepseek-ai/deepseek-v3.1"),
+        ("nvidia", "moonshotai/kimi-k2-instruct-0905"),
+        ("nvidia", "meta/llama-3.1-8b-instruct"),
+    }
+    monkeypatch.setenv("AVAILABLE_MODELS", "*")
+    assert make_llm_registry().is_allowed("nvidia", "any/model")
+
+
+def test_nim_sessions_share_the_pool_and_keep_timeouts():
+    pytest.importorskip("langchain_nvidia_ai_endpoints")
+
+    async def session():
+        registry = LLMRegistry(nvidia_timeout_s=12.0)
+        model = registry.nvidia("deepseek-ai/deepseek-v3.1")
+        client_session = model.llm._async_client.get_async_session_fn()
+        try:
+            return client_session.connector is registry._connector(), client_session.timeout
+        finally:
+            await client_session.close()
+            await registry.aclose()
+
+    shared, timeout = asyncio.run(session())
+    assert shared
+    assert (timeout.connect, timeout.sock_connect, timeout.sock_read, timeout.total) == (12.0, 12.0, 12.0, None)
@@ -0,0 +1,63 @@
+import asyncio
+
+from src.services.llm_registry.scheduler import LLMScheduler
+
+
+def _hedging_scheduler():
+    return LLMScheduler(provider_limits={"nvidia": 8}, hedges={"nvidia:a": "nvidia:b"},
+                        hedge_quantile=0.5, hedge_min_samples=3)
+
+
+async def _warm_up(scheduler):
+    async def fast(provider, name):
+        await asyncio.sleep(0.005)
+        return name
+
+    for _ in range(3):
+        await scheduler.run("nvidia", "a", fast)
+
+
+def test_unhedged_call_reports_its_own_model():
+    async def scenario():
+        scheduler = LLMScheduler()
+
+        async def call(provider, name):
+            return f"{provider}:{name}"
+
+        return await scheduler.run("ollama", "llama3.2", call)
+
+    assert asyncio.run(scenario()) == ("ollama:llama3.2", ("ollama", "llama3.2"))
+
+
+def test_hedge_win_reports_the_fallback_model():
+    async def scenario():
+        scheduler = _hedging_scheduler()
+        await _warm_up(scheduler)
+
+        async def slow_primary(provider, name):
+            await asyncio.sleep(1.0 if name == "a" else 0.005)
+            return name
+
+        return scheduler, await scheduler.run("nvidia", "a", slow_primary)
+
+    scheduler, (result, answered_by) = asyncio.run(scenario())
+    assert (result, answered_by) == ("b", ("nvidia", "b"))
+    assert scheduler.stats["hedged"] == 1 and scheduler.stats["hedge_wins"] == 1
+
+
+def test_hedge_false_waits_for_the_primary():
+    async def scenario():
+        scheduler = _hedging_scheduler()
+        await _warm_up(scheduler)
+        names = []
+
+        async def slow_primary(provider, name):
+            names.append(name)
+            await asyncio.sleep(0.05 if name == "a" else 0.005)
+            return name
+
+        return scheduler, names, await scheduler.run("nvidia", "a", slow_primary, hedge=False)
+
+    scheduler, names, (result, answered_by) = asyncio.run(scenario())
+    assert (result, answered_by) == ("a", ("nvidia", "a"))
+    assert names == ["a"] and scheduler.stats["hedged"] == 0
@@ -0,0 +1,20 @@
+import pytest
+
+from src.services.metrics.registry import MetricsRegistry, _Metric
+
+
+def test_metric_kinds_must_define_their_children():
+    class Incomplete(_Metric):
+        type = "untyped"
+
+    with pytest.raises(TypeError):
+        Incomplete("incomplete", "no children")
+
+
+def test_label_values_share_children_and_render():
+    registry = MetricsRegistry()
+    counter = registry.counter("requests_total", "Requests", ("route", "status"))
+    counter.labels("/chat", 200).inc()
+    counter.labels("/chat", "200").inc(2)
+    assert counter.labels("/chat", 200) is counter.labels("/chat", "200")
+    assert 'requests_total{route="/chat",status="200"} 3' in registry.render()
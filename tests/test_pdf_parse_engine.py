@@ -0,0 +1,55 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.services.pdf_parser import engine as engine_module
+from src.services.pdf_parser.engine import PdfParseEngine
+
+
+@pytest.fixture
+def release(monkeypatch):
+    """Planning blocks until the event is set, then fails; workers are threads instead of Docling processes."""
+    event = threading.Event()
+
+    def plan(file_path):
+        event.wait(5)
+        raise ValueError(f"not a PDF: {file_path}")
+
+    monkeypatch.setattr(engine_module, "_plan_in_worker", plan)
+    monkeypatch.setattr(PdfParseEngine, "_make_executor", lambda self: ThreadPoolExecutor(self.max_workers))
+    yield event
+    event.set()
+
+
+def test_jobs_cancelled_while_queued_leave_the_queued_count(release):
+    async def scenario():
+        engine = PdfParseEngine(max_workers=1, queue_size=4)
+        running = await engine.submit("a.pdf")
+        queued = await engine.submit("b.pdf")
+        await asyncio.sleep(0.05)
+        queued.future.cancel()
+        release.set()
+        with pytest.raises(ValueError):
+            await running.future
+        await engine.stop()
+        return engine.counts, queued.status
+
+    counts, status = asyncio.run(scenario())
+    assert counts == {"queued": 0, "running": 0, "done": 0, "failed": 1, "cancelled": 1}
+    assert status == "cancelled"
+
+
+def test_stop_without_draining_cancels_running_and_queued_jobs(release):
+    async def scenario():
+        engine = PdfParseEngine(max_workers=1, queue_size=4)
+        jobs = [await engine.submit(f"{name}.pdf") for name in ("a", "b", "c")]
+        await asyncio.sleep(0.05)
+        threading.Timer(0.1, release.set).start()  # lets the pool shut down
+        await engine.stop(drain=False)
+        return engine.counts, jobs
+
+    counts, jobs = asyncio.run(scenario())
+    assert counts == {"queued": 0, "running": 0, "done": 0, "failed": 0, "cancelled": 3}
+    assert all(job.future.cancelled() for job in jobs)
@@ -0,0 +1,162 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.services.response_cache import cache as cache_module
+from src.services.response_cache.cache import ResponseCache
+
+
+class TableEmbedder:
+    """Local stand-in for EmbeddingModel: fixed vectors per normalized query, unit x-axis otherwise."""
+
+    def __init__(self, vectors):
+        self.vectors = {query: np.asarray(vector, dtype=np.float32) for query, vector in vectors.items()}
+        self.calls = 0
+
+    async def embed_queries(self, queries):
+        self.calls += 1
+        return np.stack([self.vectors.get(query, np.array([1.0, 0.0, 0.0], dtype=np.float32))
+                         for query in queries])
+
+
+SIMILAR = {
+    "what is the main contribution": [1.0, 0.0, 0.0],
+    "what is the main contribution of it": [0.99, 0.14, 0.0],
+    "what dataset was used": [0.0, 1.0, 0.0],
+}
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def ask(cache, model, query, response, calls, context=""):
+    """get_or_complete whose completion answers ``response`` from ``model``; returns (response, tier)."""
+    async def complete():
+        calls.append(response)
+        return response, model
+
+    answer, tier, answered_by = run(cache.get_or_complete(model, query, complete, context=context))
+    assert answered_by == model
+    return answer, tier
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_exact_hit_after_normalization():
+    cache = ResponseCache()
+    calls = []
+    assert ask(cache, "m", "What is X?", "a", calls) == ("a", None)
+    assert ask(cache, "m", "  what IS x ", "b", calls) == ("a", "exact")
+    assert calls == ["a"]
+    assert cache.stats["exact_hits"] == 1 and cache.stats["misses"] == 1
+
+
+def test_exact_key_includes_model_and_context():
+    cache = ResponseCache()
+    calls = []
+    ask(cache, "m1", "q", "a", calls, context="chunks A")
+    assert ask(cache, "m2", "q", "b", calls, context="chunks A")[1] is None
+    assert ask(cache, "m1", "q", "c", calls, context="chunks B")[1] is None
+    assert ask(cache, "m1", "q", "d", calls, context="chunks A") == ("a", "exact")
+    assert calls == ["a", "b", "c"]
+
+
+def test_semantic_hit_above_threshold_only():
+    cache = ResponseCache(similarity_threshold=0.95, embedder=TableEmbedder(SIMILAR))
+    calls = []
+    ask(cache, "m", "What is the main contribution?", "a", calls)
+    response, tier = ask(cache, "m", "What is the main contribution of it?", "b", calls)
+    assert (response, tier) == ("a", "semantic")
+    response, tier = ask(cache, "m", "What dataset was used?", "c", calls)
+    assert (response, tier) == ("c", None)
+    assert calls == ["a", "c"]
+
+
+def test_semantic_hit_requires_same_identifiers():
+    embedder = TableEmbedder({})  # every query embeds to the same vector
+    cache = ResponseCache(similarity_threshold=0.9, embedder=embedder)
+    calls = []
+    ask(cache, "m", "summarize 2410.01234", "a", calls)
+    assert ask(cache, "m", "summarize 2410.01235", "b", calls)[1] is None
+    assert ask(cache, "m", "please summarize 2410.01234", "c", calls)[1] == "semantic"
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(ttl_s=60, similarity_threshold=0.95, embedder=TableEmbedder(SIMILAR))
+    calls = []
+    ask(cache, "m", "What is the main contribution", "a", calls)
+    clock[0] += 59
+    assert run(cache.lookup("m", "what is the main contribution")).tier == "exact"
+    assert run(cache.lookup("m", "what is the main contribution of it")).tier == "semantic"
+    clock[0] += 2
+    assert not run(cache.lookup("m", "what is the main contribution of it")).hit
+    assert not run(cache.lookup("m", "what is the main contribution")).hit
+    assert len(cache) == 0 and cache.stats["expirations"] >= 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2, similarity_threshold=0.95, embedder=TableEmbedder(SIMILAR))
+    calls = []
+    ask(cache, "m", "q1", "a", calls)
+    ask(cache, "m", "q2", "b", calls)
+    assert run(cache.lookup("m", "q1")).hit  # q2 is now the least recently used
+    ask(cache, "m", "q3", "c", calls)
+    assert len(cache) == 2 and cache.stats["evictions"] == 1
+    assert run(cache.lookup("m", "q1")).hit
+    assert run(cache.lookup("m", "q3")).hit
+    # q2 is gone from the semantic tier as well, not only from the exact one
+    assert not any(entry is not None and entry.key[2] == "q2"
+                   for bucket in cache._buckets.values() for entry in bucket.entries)
+
+
+def test_invalidate_drops_one_model():
+    cache = ResponseCache(similarity_threshold=0.95, embedder=TableEmbedder(SIMILAR))
+    calls = []
+    for model in ("m1", "m2"):
+        ask(cache, model, "What is the main contribution", model, calls)
+        ask(cache, model, "What dataset was used", model, calls)
+    assert cache.invalidate("m1") == 2
+    assert not run(cache.lookup("m1", "what is the main contribution of it")).hit
+    assert run(cache.lookup("m2", "what is the main contribution of it")).tier == "semantic"
+    assert cache.invalidate() == 2
+    assert len(cache) == 0
+
+
+def test_embedding_errors_fall_back_to_exact_matching():
+    class FailingEmbedder:
+        async def embed_queries(self, queries):
+            raise RuntimeError("embedding service down")
+
+    cache = ResponseCache(similarity_threshold=0.95, embedder=FailingEmbedder())
+    calls = []
+    assert ask(cache, "m", "q", "a", calls) == ("a", None)
+    assert ask(cache, "m", "Q?", "b", calls) == ("a", "exact")
+    assert cache.stats["embedding_errors"] == 1
+
+
+def test_disabled_cache_always_completes():
+    cache = ResponseCache(max_entries=0)
+    calls = []
+    ask(cache, "m", "q", "a", calls)
+    ask(cache, "m", "q", "b", calls)
+    assert calls == ["a", "b"] and len(cache) == 0
+
+
+def test_response_is_cached_under_the_model_that_answered():
+    cache = ResponseCache(similarity_threshold=0.95, embedder=TableEmbedder(SIMILAR))
+
+    async def hedged():
+        return "from fallback", "nvidia:b"
+
+    response, tier, answered_by = run(cache.get_or_complete("nvidia:a", "What is the main contribution", hedged))
+    assert (response, tier, answered_by) == ("from fallback", None, "nvidia:b")
+    assert not run(cache.lookup("nvidia:a", "what is the main contribution")).hit
+    assert run(cache.lookup("nvidia:b", "what is the main contribution")).tier == "exact"
+    assert run(cache.lookup("nvidia:b", "what is the main contribution of it")).tier == "semantic"
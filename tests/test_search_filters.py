@@ -0,0 +1,83 @@
+import asyncio
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import src.services.retrieval.search as search_module
+from src.exceptions import IndexException
+from src.schemas.search.models import SearchRequest
+from src.services.retrieval.filters import FilterIndex
+from src.services.retrieval.search import SearchService
+from src.services.vector_index.index import MmapVectorIndex
+
+PUBLISHED = datetime(2024, 1, 15)
+CATEGORIES = {1: ["cs.CL"], 2: ["cs.LG"], 3: ["cs.CL"], 4: ["cs.LG"]}
+FILTERED = SearchRequest(queries=["attention"], categories=["cs.CL"], hybrid=False)
+
+
+class PublishingEmbedder:
+    """Embeds every query to the same vector, running ``during`` first as if a publish landed meanwhile."""
+
+    def __init__(self, during=None):
+        self.during = during
+
+    async def embed_queries(self, queries):
+        if self.during is not None:
+            self.during()
+            self.during = None
+        return np.ones((len(queries), 2), dtype=np.float32)
+
+
+@pytest.fixture(autouse=True)
+def chunks_without_postgres(monkeypatch):
+    async def fetch_chunks_with_papers(chunk_ids):
+        return {chunk_id: SimpleNamespace(
+            Chunk=SimpleNamespace(arxiv_id=f"2401.0000{chunk_id}", section_title="", text=""),
+            title="", categories=CATEGORIES.get(chunk_id, []), published_date=PUBLISHED, pdf_url="",
+        ) for chunk_id in chunk_ids}
+
+    monkeypatch.setattr(search_module, "fetch_chunks_with_papers", fetch_chunks_with_papers)
+
+
+@pytest.fixture
+def indexes(tmp_path):
+    writer = MmapVectorIndex(tmp_path / "vector", dim=2)
+    writer.add(np.array([1, 2, 3, 4]), np.random.default_rng(0).random((4, 2)) + 0.1)
+    FilterIndex.build(tmp_path / "filters", writer, [(i, CATEGORIES[i], PUBLISHED) for i in CATEGORIES])
+    return writer, MmapVectorIndex(tmp_path / "vector"), tmp_path / "filters"
+
+
+def chunk_ids(service, request=FILTERED):
+    return sorted(hit.chunk_id for hit in asyncio.run(service.search(request)).results[0].chunks)
+
+
+def service(reader, filters, embedder):
+    return SearchService(reader, None, FilterIndex.open(filters), embedder, filter_path=filters)
+
+
+def test_rows_appended_during_a_search_are_filtered_out(indexes):
+    writer, reader, filters = indexes
+    appended = PublishingEmbedder(lambda: writer.add(np.array([5, 6]), np.ones((2, 2))))
+    assert chunk_ids(service(reader, filters, appended)) == [1, 3]
+    # Until publish rebuilds the bitmaps, the new rows only match unfiltered searches.
+    search = service(reader, filters, PublishingEmbedder())
+    assert chunk_ids(search) == [1, 3]
+    assert chunk_ids(search, SearchRequest(queries=["attention"], hybrid=False)) == [1, 2, 3, 4, 5, 6]
+
+
+def test_a_compaction_during_a_search_keeps_the_mask_on_its_rows(indexes):
+    writer, reader, filters = indexes
+
+    def compact():
+        writer.delete([1])
+        writer.compact()
+
+    search = service(reader, filters, PublishingEmbedder(compact))
+    assert chunk_ids(search) == [3]
+    # The bitmaps describe the old data directory: refuse rather than rebuild inside the request.
+    with pytest.raises(IndexException):
+        chunk_ids(search)
+    FilterIndex.build(filters, writer, [(i, CATEGORIES[i], PUBLISHED) for i in CATEGORIES])
+    assert chunk_ids(search) == [3]
@@ -0,0 +1,82 @@
+import asyncio
+
+from src.services.coalescing.flight import SingleFlight
+
+def test_concurrent_identical_calls_share_one_upstream_call():
+    async def scenario():
+        flight = SingleFlight("test")
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        results = await asyncio.gather(*(flight.do("q", upstream) for _ in range(5)))
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert [result for result, _ in results] == ["answer"] * 5
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+    assert len(flight) == 0 and flight.stats["followers"] == 4
+
+def test_key_is_released_once_the_call_finishes():
+    async def scenario():
+        flight = SingleFlight("test")
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            return len(calls)
+
+        return [await flight.do("q", upstream) for _ in range(2)], calls
+
+    results, calls = asyncio.run(scenario())
+    assert results == [(1, False), (2, False)] and len(calls) == 2
+
+def test_errors_reach_every_waiter():
+    async def scenario():
+        flight = SingleFlight("test")
+
+        async def upstream():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream failed")
+
+        results = await asyncio.gather(*(flight.do("q", upstream) for _ in range(3)), return_exceptions=True)
+        return flight, results
+
+    flight, results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.stats["errors"] == 1
+
+def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    async def scenario():
+        flight = SingleFlight("test")
+
+        async def upstream():
+            await asyncio.sleep(0.02)
+            return "answer"
+
+        leader = asyncio.ensure_future(flight.do("q", upstream))
+        follower = asyncio.ensure_future(flight.do("q", upstream))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(scenario()) == ("answer", True)
+
+def test_disabled_runs_every_call():
+    async def scenario():
+        flight = SingleFlight("test", enabled=False)
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "answer"
+
+        await asyncio.gather(*(flight.do("q", upstream) for _ in range(3)))
+        return calls
+
+    assert len(asyncio.run(scenario())) == 3
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from src.services.vector_index.index import MmapVectorIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = MmapVectorIndex(tmp_path, dim=2)
+    index.add(np.array([1, 2, 3]), np.random.default_rng(0).random((3, 2)) + 0.1)
+    index.delete([2])
+    return index
+
+
+def test_compaction_replaces_a_directory_left_by_a_failed_one(index, tmp_path):
+    (tmp_path / "data-000001").mkdir()
+    (tmp_path / "data-000001" / "vectors.bin").write_bytes(b"partial")
+    index.compact()
+    assert index.meta["data_dir"] == "data-000001"
+    assert index.row_ids().tolist() == [1, 3]
+    assert sorted(path.name for path in tmp_path.glob("data-*")) == ["data-000001"]
+
+
+def test_failed_compaction_leaves_the_index_untouched(index, tmp_path, monkeypatch):
+    index.train_ivf(n_lists=1)
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(index, "_write_lists", fail)
+    with pytest.raises(OSError):
+        index.compact()
+    assert not (tmp_path / "data-000001").exists()
+    assert MmapVectorIndex(tmp_path).meta == index.meta
+    assert index.meta["data_dir"] == "data-000000" and index.count == 3
+
+    monkeypatch.undo()
+    index.compact()
+    assert index.row_ids().tolist() == [1, 3] and index.meta["ivf_indexed_count"] == 2